@@ -182,6 +182,7 @@ def _fix_duplicate_rides(conn, start_utc: datetime.datetime,
 
     # ─── Transactional delete ───
     placeholders = ",".join(["?" for _ in dup_ids])
+    DatabaseClient().mark_rides_dirty(cur, f"id IN ({placeholders})", tuple(dup_ids))
     cur.execute(
         f"DELETE FROM Rides.Rides WHERE id IN ({placeholders})",
         tuple(dup_ids)
@@ -245,6 +246,7 @@ def _fix_duplicate_expenses(conn, start_utc: datetime.datetime,
                 "before": before, "after": before}
 
     placeholders = ",".join(["?" for _ in dup_ids])
+    DatabaseClient().mark_rollup_range_dirty(start_utc.date().isoformat(), end_utc.date().isoformat(), cursor=cur)
     cur.execute(
         f"DELETE FROM Rides.ManualExpenses WHERE id IN ({placeholders})",
         tuple(dup_ids)
@@ -38,7 +38,7 @@ def uber_card_processor(myblob: func.InputStream):
         filename = os.path.basename(myblob.name)
         image_bytes = myblob.read()
         
-        result = service.process_image_bytes(image_bytes, filename)
+        result = service.process_image_bytes(image_bytes, filename, source="blob")
         logging.info(f"Uber Match Result for {filename}: {json.dumps(result)}")
     except Exception as e:
         logging.error(f"Uber Card Processing Failed for {myblob.name}: {str(e)}")
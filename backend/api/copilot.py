@@ -7,6 +7,8 @@ import pytz
 import re
 from services.database import DatabaseClient
 from services.tessie import TessieClient
+from services.tessie_drive_cache import get_tessie_drive_cache
+from services import telemetry_profile
 from services.vector_store import VectorStore
 from services.agent_orchestrator import SystemOrchestrator
 
@@ -636,8 +638,10 @@ def copilot_tessie_drives(req: func.HttpRequest) -> func.HttpResponse:
         from_ts = int(from_dt_utc.timestamp())
         to_ts = int(to_dt_utc.timestamp())
 
+        # Closed operational days come from the drive cache; only the open
+        # day (and anything not cached yet) costs Tessie calls.
         tessie = TessieClient()
-        raw_drives = tessie.get_tagged_drives(vin, from_ts, to_ts)
+        raw_drives, cache_provenance = get_tessie_drive_cache().get_drives(tessie, vin, from_ts, to_ts)
 
         # Pre-compute Mountain Time boundaries for DB queries (override + supplement)
         from_dt_mt = _ts_to_mt(from_ts)
@@ -1005,7 +1009,8 @@ def copilot_tessie_drives(req: func.HttpRequest) -> func.HttpResponse:
         return copilot_response({
             "tag_filter": tag_filter or None,
             "count": len(processed),
-            "drives": processed
+            "drives": processed,
+            "cache": cache_provenance,
         })
 
     except Exception as e:
@@ -1221,10 +1226,10 @@ def _get_elevations_ft(lat_lons: list) -> list:
         return [None] * len(lat_lons)
     fallback = [None] * len(lat_lons)
     try:
-        import requests as _requests
+        from services import http_pool
         locations = "|".join(f"{lat},{lon}" for lat, lon in lat_lons)
         url = f"https://maps.googleapis.com/maps/api/elevation/json?locations={locations}&key={api_key}"
-        resp = _requests.get(url, timeout=5)
+        resp = http_pool.get(url, timeout=5)
         if resp.status_code == 200:
             data = resp.json()
             if data.get("status") == "OK":
@@ -1274,7 +1279,7 @@ def copilot_tessie_day_summary(req: func.HttpRequest) -> func.HttpResponse:
         to_ts   = int(to_dt_utc.timestamp())
 
         tessie = TessieClient()
-        raw_drives = tessie.get_tagged_drives(vin, from_ts, to_ts)
+        raw_drives, _ = get_tessie_drive_cache().get_drives(tessie, vin, from_ts, to_ts)
         raw_charges = tessie.get_charges(vin, from_ts, to_ts) or []
 
         total_miles = 0.0
@@ -1367,6 +1372,25 @@ def copilot_tessie_day_summary(req: func.HttpRequest) -> func.HttpResponse:
         max_elevation_ft = max(all_elevations) if all_elevations else None
         min_elevation_ft = min(all_elevations) if all_elevations else None
 
+        # ── Telemetry Profiles (archived /states traces, vectorised) ─────────
+        day_profile = None
+        if telemetry_profile.available() and raw_drives_sorted:
+            try:
+                stored = {
+                    row["DriveID"]: row["Payload"]
+                    for row in DatabaseClient().get_drive_telemetry_payloads([date_param], decoded=True)
+                }
+                day_payloads = []
+                for d, drv in zip(raw_drives_sorted, drive_breakdown):
+                    payload = stored.get(f"TESSIE-{d.get('id')}")
+                    if payload is None:
+                        continue
+                    day_payloads.append(payload)
+                    drv["telemetry_profile"] = telemetry_profile.profile_drive(payload)
+                day_profile = telemetry_profile.profile_drives(day_payloads)
+            except Exception as prof_err:
+                logging.warning(f"Telemetry profile failed for {date_param}: {prof_err}")
+
         return copilot_response({
             "date":                     date_param,
             "drive_count":              drive_count,
@@ -1382,6 +1406,7 @@ def copilot_tessie_day_summary(req: func.HttpRequest) -> func.HttpResponse:
             "battery_drain_pct":        battery_drain_total,
             "max_elevation_ft":         max_elevation_ft,
             "min_elevation_ft":         min_elevation_ft,
+            "telemetry_profile":        day_profile,
             "drives":                   drive_breakdown,
         })
 
@@ -1427,7 +1452,7 @@ def copilot_tessie_summary(req: func.HttpRequest) -> func.HttpResponse:
         to_ts = int(to_dt.timestamp())
 
         tessie = TessieClient()
-        raw_drives = tessie.get_tagged_drives(vin, from_ts, to_ts)
+        raw_drives, _ = get_tessie_drive_cache().get_drives(tessie, vin, from_ts, to_ts)
         raw_charges = tessie.get_charges(vin, from_ts, to_ts) or []
 
         # Aggregate drives
@@ -1519,7 +1544,7 @@ def copilot_artifact_raw(req: func.HttpRequest) -> func.HttpResponse:
 
     try:
         from services.sharepoint import SharePointClient
-        import requests
+        from services import http_pool
         sp = SharePointClient()
         sp.resolve_ids()
         
@@ -1532,7 +1557,7 @@ def copilot_artifact_raw(req: func.HttpRequest) -> func.HttpResponse:
         headers = sp._get_headers()
         # Fast search scoped specifically to the drive
         search_url = f"https://graph.microsoft.com/v1.0/drives/{sp.drive_id}/root/search(q='{filename}')"
-        res = requests.get(search_url, headers=headers)
+        res = http_pool.get(search_url, headers=headers)
         
         if res.ok:
             items = res.json().get('value', [])
@@ -1545,7 +1570,7 @@ def copilot_artifact_raw(req: func.HttpRequest) -> func.HttpResponse:
             # The search endpoint doesn't always return the downloadUrl
             # We must fetch the specific item to get the short-lived URL
             item_url = f"https://graph.microsoft.com/v1.0/drives/{sp.drive_id}/items/{item_id}"
-            item_res = requests.get(item_url, headers=headers)
+            item_res = http_pool.get(item_url, headers=headers)
             
             if item_res.ok:
                 full_item = item_res.json()
@@ -524,7 +524,8 @@ def _execute_scrub_day(date_str: str) -> dict:
         dt = datetime.datetime.strptime(date_str, "%Y-%m-%d")
         date_only = dt.date()
 
-        # 1. Delete TRIP- records
+        # 1. Delete TRIP- records (their rollup day is marked while they exist)
+        db.mark_rides_dirty(cursor, "RideID LIKE ?", (f"TRIP-{date_compact}-%",))
         cursor.execute("DELETE FROM Rides.Rides WHERE RideID LIKE ?", (f"TRIP-{date_compact}-%",))
         deleted = cursor.rowcount
         logs.append(f"SCRUB: Deleted {deleted} TRIP-{date_compact}-* records")
@@ -597,6 +598,7 @@ def _execute_scrub_day(date_str: str) -> dict:
                     WHERE RideID = ?
                 """, (new_status, b_id))
         logs.append(f"SCRUB: Unlinked/flagged {len(bookings)} bookings on {date_str}.")
+        db.mark_rides_dirty(cursor, "CAST(Timestamp_Start AS DATE) = ?", (date_only,))
 
         conn.commit()
         return {"success": True, "logs": logs}
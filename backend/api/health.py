@@ -8,7 +8,12 @@ bp = func.Blueprint()
 
 @bp.route(route="health", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
 def health_check(req: func.HttpRequest) -> func.HttpResponse:
-    return func.HttpResponse("OK", status_code=200)
+    # Pool metrics are process-local: each scaled-out instance reports its own.
+    # Reading them never opens a connection, so this stays a liveness probe.
+    from services.db_pool import pool_metrics
+    from services.http_pool import http_metrics
+    body = {"status": "OK", "sqlPool": pool_metrics(), "http": http_metrics()}
+    return func.HttpResponse(json.dumps(body), status_code=200, mimetype="application/json")
 
 @bp.route(route="ping", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
 def ping(req: func.HttpRequest) -> func.HttpResponse:
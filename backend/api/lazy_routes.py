@@ -0,0 +1,141 @@
+"""
+Deferred blueprint registration for function_app.py.
+
+Importing every blueprint at startup pulls in openai, stripe, googlemaps,
+azure.ai.vision, pywebpush and pyodbc (through services.*) before the worker
+can answer anything, so a cold /ping or /quote pays for all of them. With
+LAZY_BLUEPRINTS=1, function_app registers HTTP routes from
+api/route_manifest.json instead: each route gets a thin stub with the same
+function name, route, methods and auth level, and the real module is
+imported on the first request to any of its routes.
+
+Only blueprints whose functions are all plain HTTP routes are deferred.
+Timer, blob and MCP tool triggers carry bindings the host has to see at
+indexing time (and the MCP extension aggregates every tool trigger), so
+those modules are imported eagerly in both modes — as is any module missing
+from the manifest, so a stale manifest never drops routes.
+
+The manifest is generated from the decorators themselves:
+
+    python scripts/build_route_manifest.py
+
+and tests/test_cold_start.py fails when it drifts from them.
+
+Every blueprint import, eager or deferred, is timed into `import_timings()`,
+which /diag reports.
+"""
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import azure.functions as func
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "route_manifest.json")
+
+_lock = threading.Lock()
+_import_ms: Dict[str, float] = {}
+_handlers: Dict[str, Dict[str, Callable]] = {}
+
+
+def timed_import(module_path: str):
+    """importlib.import_module, recording how long the first import took."""
+    t0 = time.perf_counter()
+    module = importlib.import_module(module_path)
+    elapsed = round((time.perf_counter() - t0) * 1000, 1)
+    with _lock:
+        _import_ms.setdefault(module_path, elapsed)
+    return module
+
+
+def import_timings() -> Dict[str, float]:
+    """Per-blueprint import ms, slowest first."""
+    with _lock:
+        return dict(sorted(_import_ms.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def _functions(bp) -> List[func.Function]:
+    """Built functions of a blueprint, via a scratch app so nothing is registered twice."""
+    scratch = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+    scratch.register_blueprint(bp)
+    return scratch.get_functions()
+
+
+def describe_blueprint(bp) -> Dict[str, Any]:
+    """Manifest entry for one blueprint: its routes if it can be deferred."""
+    routes = []
+    for fn in _functions(bp):
+        bindings = json.loads(fn.get_function_json())["bindings"]
+        trigger = next(b for b in bindings if b.get("direction") == "IN" and b["type"].endswith("Trigger"))
+        if trigger["type"] != "httpTrigger" or len(bindings) != 2:
+            return {"lazy": False, "reason": f"{fn.get_function_name()}: {trigger['type']}"}
+        routes.append({
+            "name": fn.get_function_name(),
+            "route": trigger.get("route"),
+            "methods": trigger.get("methods"),
+            "auth_level": trigger.get("authLevel"),
+        })
+    return {"lazy": True, "routes": routes}
+
+
+def build_manifest(module_paths: Iterable[str]) -> Dict[str, Any]:
+    """Import every blueprint and describe its routes (used by the build script)."""
+    return {path: describe_blueprint(importlib.import_module(path).bp) for path in module_paths}
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Route manifest unavailable, importing every blueprint: {e}")
+        return {}
+
+
+def _resolve(module_path: str, name: str) -> Callable:
+    handlers = _handlers.get(module_path)
+    if handlers is None:
+        # importlib serialises concurrent imports of the same module itself.
+        module = timed_import(module_path)
+        handlers = {fn.get_function_name(): fn.get_user_function() for fn in _functions(module.bp)}
+        with _lock:
+            handlers = _handlers.setdefault(module_path, handlers)
+        logging.info(f"Deferred blueprint loaded on first request: {module_path}")
+    return handlers[name]
+
+
+def _stub(module_path: str, name: str) -> Callable:
+    def handler(req: func.HttpRequest) -> func.HttpResponse:
+        try:
+            target = _resolve(module_path, name)
+        except Exception as e:
+            logging.error(f"ERROR: deferred {module_path}: {e}")
+            return func.HttpResponse(
+                json.dumps({"error": f"{module_path} failed to load: {e}"}),
+                status_code=500, mimetype="application/json")
+        return target(req)
+
+    handler.__name__ = name
+    return handler
+
+
+def register_deferred(app: func.FunctionApp, module_paths: Iterable[str],
+                      manifest: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Register stub routes for every deferrable blueprint; returns the module
+    paths that were deferred (the caller imports the rest as usual)."""
+    manifest = load_manifest() if manifest is None else manifest
+    deferred = []
+    for module_path in module_paths:
+        entry = manifest.get(module_path)
+        if not entry or not entry.get("lazy"):
+            continue
+        for route in entry["routes"]:
+            kwargs = {"route": route["route"], "methods": route["methods"]}
+            if route.get("auth_level"):
+                kwargs["auth_level"] = func.AuthLevel[route["auth_level"]]
+            app.function_name(name=route["name"])(app.route(**kwargs)(_stub(module_path, route["name"])))
+        deferred.append(module_path)
+    return deferred
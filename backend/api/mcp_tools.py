@@ -275,16 +275,15 @@ def get_drives(context) -> str:
 
     try:
         from services.tessie import TessieClient
+        from services.tessie_drive_cache import get_tessie_drive_cache
         tessie = TessieClient()
         vin = _get_vin()
         if not vin:
             return json.dumps({"error": "Vehicle VIN not configured"})
 
         from_ts, to_ts = _operational_window_ts(date_str)
-        raw_drives = sorted(
-            tessie.get_tagged_drives(vin, from_ts, to_ts) or [],
-            key=lambda d: d.get("started_at", 0),
-        )
+        # Sorted by started_at; a closed day is served from the drive cache.
+        raw_drives, cache_provenance = get_tessie_drive_cache().get_drives(tessie, vin, from_ts, to_ts)
 
         local_tz = get_timezone()
 
@@ -350,6 +349,7 @@ def get_drives(context) -> str:
             "battery_start_pct":     battery_start,
             "battery_end_pct":       battery_end,
             "drives":                drives,
+            "cache":                 cache_provenance,
         }, default=str)
     except Exception as e:
         logging.error(f"MCP get_drives failed for {date_str}: {e}")
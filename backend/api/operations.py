@@ -2,13 +2,13 @@ import logging
 import azure.functions as func
 import json
 import os
-import threading
 from datetime import datetime, timedelta
 from services.graph import GraphClient
 from services.auth_guard import cors_headers as _get_cors, require_function_key
 from services.tessie_sync import TessieSyncService
 from services.cloud_watcher import CloudWatcherService
 from services.job_tracker import JobTracker
+from services.job_executor import dedupe_key, get_job_executor
 
 def calendar_week_of_month(dt: datetime) -> int:
     """
@@ -56,12 +56,10 @@ def run_async_job(tool_name: str, task_func, *args, **kwargs) -> dict:
     elif len(args) > 0 and isinstance(args[0], str):
         target_path = args[0]
         
-    job_id = tracker.create_job(tool_name, target_path)
-    
-    def worker():
+    def worker(job_id: str, wait_ms: float):
         try:
             # B1/B4: Transition queued -> running (starts job logs + emits job_started event)
-            tracker.start_job(job_id)
+            tracker.start_job(job_id, queue_wait_ms=wait_ms)
             
             # Call the synchronous task function
             result = task_func(*args, **kwargs)
@@ -81,16 +79,21 @@ def run_async_job(tool_name: str, task_func, *args, **kwargs) -> dict:
                 [f"> [CRITICAL] Background job failed: {str(e)}"], 
                 error=str(e)
             )
-            
-    thread = threading.Thread(target=worker)
-    thread.daemon = True
-    thread.start()
+
+    # Bounded pool with per-operation limits; an identical active job is joined
+    submitted = get_job_executor().submit(
+        tool_name,
+        dedupe_key(tool_name, args, kwargs),
+        lambda: tracker.create_job(tool_name, target_path),
+        worker,
+    )
     
     # C1 Standard Async Response Schema
     return {
         "status": "accepted",
         "execution": "async",
-        "jobId": job_id,
+        "jobId": submitted["jobId"],
+        "deduplicated": submitted["deduplicated"],
         "errorType": None
     }
 
@@ -115,6 +118,9 @@ def get_job_status(req: func.HttpRequest) -> func.HttpResponse:
             headers=_cors(req),
             mimetype="application/json"
         )
+
+    # Live queue position / depth / wait metrics from this instance's executor
+    job_data["queue"] = get_job_executor().snapshot(job_id)
         
     return func.HttpResponse(
         json.dumps(job_data),
@@ -289,6 +295,41 @@ def scan_day_trips(req: func.HttpRequest) -> func.HttpResponse:
             status_code=500, headers=_cors(req), mimetype="application/json"
         )
 
+@bp.route(route="operations/ocr-cache/invalidate", methods=["POST", "OPTIONS"], auth_level=func.AuthLevel.ANONYMOUS)
+def invalidate_ocr_cache(req: func.HttpRequest) -> func.HttpResponse:
+    """Drops the cached OCR text / card extractions for one day folder, so
+    the next scan-day-trips re-OCRs every screenshot in it (e.g. after an
+    extraction fix that should apply to an already-scanned day)."""
+    if req.method == "OPTIONS":
+        return func.HttpResponse(status_code=204, headers=_cors(req))
+
+    auth_guard_result = require_function_key(req)
+    if auth_guard_result is not None:
+        return auth_guard_result
+
+    try:
+        data = req.get_json() if req.get_body() else {}
+        date_str = data.get("date")
+        try:
+            datetime.strptime(date_str or "", "%Y-%m-%d")
+        except ValueError:
+            return func.HttpResponse(
+                json.dumps({"success": False, "error": "date is required (YYYY-MM-DD)"}),
+                status_code=400, headers=_cors(req), mimetype="application/json"
+            )
+        from services.ocr_cache import OcrCache
+        removed = OcrCache().invalidate_day(date_str)
+        return func.HttpResponse(
+            json.dumps({"success": True, "date": date_str, "removed": removed}),
+            status_code=200, headers=_cors(req), mimetype="application/json"
+        )
+    except Exception as e:
+        logging.error(f"Invalidate OCR Cache Error: {e}")
+        return func.HttpResponse(
+            json.dumps({"success": False, "error": str(e)}),
+            status_code=500, headers=_cors(req), mimetype="application/json"
+        )
+
 @bp.route(route="operations/get-day-trips", methods=["GET", "OPTIONS"], auth_level=func.AuthLevel.ANONYMOUS)
 def get_day_trips(req: func.HttpRequest) -> func.HttpResponse:
     if req.method == "OPTIONS":
@@ -430,6 +471,7 @@ def scrub_day(req: func.HttpRequest) -> func.HttpResponse:
         # rescan brings these back with fresh data exactly as the hard delete
         # allowed — but a rescan that finds nothing (an empty OneDrive folder,
         # or a Graph read that failed and looked empty) no longer costs the day.
+        db.mark_rides_dirty(cursor, "RideID LIKE ?", (f"TRIP-{date_compact}-%",))
         cursor.execute("""
             UPDATE Rides.Rides
             SET DeletedAt = GETUTCDATE(), LastUpdated = GETUTCDATE()
@@ -548,6 +590,7 @@ def scrub_day(req: func.HttpRequest) -> func.HttpResponse:
                 })
         
         logs.append(f"SCRUB: Unlinked/flagged {len(bookings)} private booking(s) on {date_str}.")
+        db.mark_rides_dirty(cursor, "CAST(Timestamp_Start AS DATE) = ?", (date_only,))
 
         # 4. Write audit-log row (idempotent)
         # Note: RepairLog table is pre-created in the database as Azure Function user lacks DDL permission.
@@ -920,7 +963,8 @@ def restore_trip(req: func.HttpRequest) -> func.HttpResponse:
 
     try:
         from services.database import DatabaseClient
-        conn = DatabaseClient().get_connection()
+        db = DatabaseClient()
+        conn = db.get_connection()
         if not conn:
             return func.HttpResponse(
                 json.dumps({"success": False, "error": "Database connection failed"}),
@@ -957,6 +1001,8 @@ def restore_trip(req: func.HttpRequest) -> func.HttpResponse:
                 WHERE RideID = ? AND Classification = 'Untagged'
             """, (_client_token_from_ride_id(ride_id), tessie_drive_id))
             drive_retagged = cursor.rowcount > 0
+        if restored:
+            db.mark_rides_dirty(cursor, "RideID IN (?, ?)", (ride_id, tessie_drive_id))
 
         conn.commit()
         cursor.close()
@@ -1045,6 +1091,9 @@ def delete_trip(req: func.HttpRequest) -> func.HttpResponse:
             except Exception as graph_err:
                 logging.warning(f"Non-fatal: Failed to delete calendar event {calendar_event_id}: {graph_err}")
 
+        # Mark the trip's (and its drive's) rollup day while the row still exists.
+        db.mark_rides_dirty(cursor, "RideID IN (?, ?)", (ride_id, tessie_drive_id))
+
         # Soft delete (?soft=true): flag the row instead of removing it.
         soft = (req.params.get("soft") or "").strip().lower() in ("1", "true", "yes")
         if soft:
@@ -10,7 +10,10 @@ Design principles:
   - No single source is trusted.
   - Never raises an exception to the HTTP caller — always returns HTTP 200.
   - Every external call has a hard timeout via asyncio.wait_for.
-  - Results are cached for 30 min (in-process dict + DB row when DB is up).
+  - Results are cached for 30 min in services/result_cache.py (in-process LRU
+    in front of the shared Rides.ResultCache table), keyed by pipeline
+    version. For 6 h after that the stale result is returned at once while a
+    background refresh recomputes it; `cache` in the response says which.
   - IANA timezone "America/Denver" is used for all local-date conversions.
 """
 
@@ -24,6 +27,7 @@ import time
 import pytz
 
 from services.database import DatabaseClient
+from services.result_cache import ResultCache
 
 log = logging.getLogger(__name__)
 
@@ -34,13 +38,15 @@ _MT = pytz.timezone("America/Denver")
 _UTC = pytz.utc
 _PIPELINE_VERSION = "2.0.0"
 _CACHE_TTL_S = 1800          # 30 minutes
+_CACHE_STALE_S = 6 * 3600    # served instantly while revalidating
 _DEFAULT_TIMEOUT_S = 5.0
 _DB_TIMEOUT_S = 20.0         # Azure SQL can take 15-30s on cold start
 _ONEDRIVE_TIMEOUT_S = 10.0
 _NOTIFICATION_THRESHOLD = 75
 
-# In-process cache: (date_str, pipeline_version) → {payload, expires_at}
-_mem_cache: dict = {}
+# Scored payloads per date, shared across instances: "pre_shift:<version>:<date>"
+_result_cache = ResultCache("pre_shift", _PIPELINE_VERSION,
+                            ttl_sec=_CACHE_TTL_S, stale_sec=_CACHE_STALE_S)
 
 # In-memory cache for resolved SharePoint/OneDrive Site and Drive IDs
 # Format: {"value": (site_id, drive_id), "expires": float_timestamp}
@@ -691,8 +697,6 @@ def _score_tier4(timeline_r: dict) -> dict:
 
 # ── MS Graph helpers ───────────────────────────────────────────────────────────
 
-_graph_token_cache: dict = {}
-
 async def _get_graph_token() -> str | None:
     """Obtain MS Graph token via client credentials. Returns None if not configured."""
     client_id     = os.environ.get("GRAPH_CLIENT_ID") or os.environ.get("MS_GRAPH_CLIENT_ID") or os.environ.get("OAUTH_CLIENT_ID")
@@ -701,29 +705,12 @@ async def _get_graph_token() -> str | None:
     if not all([client_id, client_secret, tenant_id]):
         return None
 
-    now = time.time()
-    cached = _graph_token_cache.get("token")
-    if cached and cached["expires_at"] > now + 60:
-        return cached["value"]
-
-    import requests as _req
-    url  = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "scope": "https://graph.microsoft.com/.default",
-    }
+    from services.graph_token import get_graph_token
     try:
-        resp = _req.post(url, data=data, timeout=5)
-        if resp.status_code != 200:
-            return None
-        resp_data = resp.json()
-        token_val = resp_data.get("access_token")
-        expires_in = int(resp_data.get("expires_in", 3600))
-        _graph_token_cache["token"] = {"value": token_val,
-                                       "expires_at": now + expires_in}
-        return token_val
+        # Shared with GraphClient: a warm token costs no round trip. A cold
+        # one is fetched off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(
+            None, get_graph_token, tenant_id, client_id, client_secret)
     except Exception as e:
         log.warning(f"Failed to fetch MS Graph token: {e}")
         return None
@@ -754,6 +741,25 @@ def _build_onedrive_path(date_str: str, subfolder_hint: str = "Uber Driver") ->
 
 
 
+_delta_seeding: set = set()
+
+def _seed_delta_mirror(delta) -> None:
+    """Run the first (full) delta enumeration of a drive on a daemon thread,
+    at most once per drive per process."""
+    if delta.drive in _delta_seeding:
+        return
+    _delta_seeding.add(delta.drive)
+    import threading
+
+    def _run():
+        try:
+            delta.sync()
+        except Exception as e:
+            log.warning(f"[PreShift] Delta mirror seed failed for {delta.drive}: {e}")
+            _delta_seeding.discard(delta.drive)
+    threading.Thread(target=_run, daemon=True).start()
+
+
 async def _graph_count_files(token: str, folder_path: str,
                              include_extensions: list[str],
                              exclude_patterns: list[str],
@@ -797,6 +803,23 @@ async def _graph_count_files(token: str, folder_path: str,
         return resp.json()
 
     def _fetch_all():
+        # Delta mirror first (services/onedrive_delta.py): once seeded, a count
+        # costs one delta round trip when nothing changed instead of a full
+        # children listing. The first call seeds it in the background and
+        # counts live, so a cold mirror never eats the OneDrive timeout.
+        try:
+            from services.onedrive_delta import DriveDeltaSync
+            delta = DriveDeltaSync(lambda: token, f"drives/{drive_id}")
+            if delta.has_state():
+                delta.sync()
+                listed = delta.list_folder(folder_path)
+                if listed is not None:
+                    return listed
+            else:
+                _seed_delta_mirror(delta)
+        except Exception as e:
+            log.warning(f"[PreShift] Delta listing unavailable, listing children directly: {e}")
+
         all_files = []
         next_url = base_url
         while next_url:
@@ -1119,37 +1142,6 @@ def _compute_overall(t1: dict, t2: dict, t3: dict,
     return "PASS", overall_conf
 
 
-# ── Caching ────────────────────────────────────────────────────────────────────
-
-def _cache_key(date_str: str) -> str:
-    return f"{date_str}:{_PIPELINE_VERSION}"
-
-
-def _cache_get(date_str: str) -> dict | None:
-    key   = _cache_key(date_str)
-    entry = _mem_cache.get(key)
-    if entry and time.time() < entry["expires_at"]:
-        age = int(time.time() - entry["stored_at"])
-        payload = dict(entry["payload"])
-        payload["cache"] = {"hit": True, "age_seconds": age,
-                            "pipeline_version": _PIPELINE_VERSION}
-        return payload
-    return None
-
-
-def _cache_set(date_str: str, payload: dict):
-    key = _cache_key(date_str)
-    _mem_cache[key] = {
-        "payload": payload,
-        "stored_at": time.time(),
-        "expires_at": time.time() + _CACHE_TTL_S,
-    }
-    # Evict stale entries to prevent unbounded growth
-    stale = [k for k, v in _mem_cache.items() if time.time() > v["expires_at"]]
-    for k in stale:
-        _mem_cache.pop(k, None)
-
-
 # ── Notification (feature-flagged) ────────────────────────────────────────────
 
 def _maybe_notify(overall_status: str, overall_conf: int | None, date_str: str):
@@ -1206,6 +1198,126 @@ def _maybe_notify(overall_status: str, overall_conf: int | None, date_str: str):
         log.warning(f"[PreShift] Notification failed (non-fatal): {notify_err}")
 
 
+def _compute_payload(date_str: str) -> dict:
+    """Run every source for `date_str` and score it (the uncached path)."""
+    # ── UTC window ──
+    start_utc, end_utc = _mt_date_to_utc_window(date_str)
+
+    # ── Run all sources concurrently (IO Parallelism) ──
+    async def _run_all():
+        now_t = time.time()
+        drive_cached = _drive_cache and _drive_cache.get("expires", 0) > now_t
+        od_timeout = 3.0 if drive_cached else _ONEDRIVE_TIMEOUT_S
+        
+        results = await asyncio.gather(
+            # Consolidate DB query: ONE connection, ONE cursor handoff
+            safe_call(_fetch_all_db_data(start_utc, end_utc),
+                      _DB_TIMEOUT_S, "db_all_data"),
+            # Tessie
+            safe_call(_src_tessie_trip_count(date_str, start_utc, end_utc),
+                      _DEFAULT_TIMEOUT_S, "tessie_trip_count"),
+            # OneDrive / Graph - Trip Count
+            safe_call(_src_onedrive_trip_count(date_str),
+                      od_timeout, "onedrive_trip_count"),
+            # OneDrive / Graph - Expenses Count
+            safe_call(_src_onedrive_expense_count(date_str),
+                      od_timeout, "onedrive_expense_count"),
+            # Bank / Teller Placeholder API
+            safe_call(_src_bank_earnings(date_str),
+                      _DEFAULT_TIMEOUT_S, "bank_earnings"),
+            safe_call(_src_bank_trip_count(date_str),
+                      _DEFAULT_TIMEOUT_S, "bank_expense_count"),
+            return_exceptions=False
+        )
+        return results
+
+    loop = asyncio.new_event_loop()
+    try:
+        (db_data_res, tessie_trips, od_trips, od_expenses,
+         bank_earnings, bank_expenses) = loop.run_until_complete(_run_all())
+    finally:
+        loop.close()
+
+    # ── Map Consolidated DB results to the Scoring Engine source blocks ──
+    db_latency = db_data_res["latency_ms"]
+    db_status = db_data_res["status"]
+    
+    if db_status == "OK" and db_data_res["value"] is not None:
+        db_val = db_data_res["value"]
+        db_trips = _source_result("OK", db_val["trip_count"], db_latency)
+        db_earnings = _source_result("OK", db_val["earnings_sum"], db_latency)
+        db_expenses = _source_result("OK", db_val["expense_count"], db_latency)
+        ocr_earnings = _source_result("OK", db_val["ocr_earnings"], db_latency)
+        timeline_r = _source_result("OK", db_val["timeline_data"], db_latency)
+    else:
+        err_msg = db_data_res["error"] or "Consolidated SQL query failure"
+        db_trips = _source_result("UNAVAILABLE", None, db_latency, err_msg)
+        db_earnings = _source_result("UNAVAILABLE", None, db_latency, err_msg)
+        db_expenses = _source_result("UNAVAILABLE", None, db_latency, err_msg)
+        ocr_earnings = _source_result("UNAVAILABLE", None, db_latency, err_msg)
+        timeline_r = _source_result("UNAVAILABLE", None, db_latency, err_msg)
+
+    # ── Score tiers ──
+    tier1 = _score_tier1(db_trips,    tessie_trips, od_trips,    date_str)
+    tier2 = _score_tier2(db_earnings, ocr_earnings, bank_earnings)
+    tier3 = _score_tier3(db_expenses, od_expenses,  bank_expenses, date_str)
+    tier4 = _score_tier4(timeline_r)
+
+    overall_status, overall_conf = _compute_overall(tier1, tier2, tier3, tier4)
+
+    # ── Build payload ──
+    generated_at = datetime.datetime.utcnow().isoformat() + "Z"
+    payload = {
+        "date": date_str,
+        "generated_at": generated_at,
+        "pipeline_version": _PIPELINE_VERSION,
+        "overall_status": overall_status,
+        "overall_confidence": overall_conf,
+        "tiers": {
+            "tier1_trips":    tier1,
+            "tier2_earnings": tier2,
+            "tier3_expenses": tier3,
+            "tier4_timeline": tier4,
+        },
+        "systems": {
+            "db":       {"status": db_status,
+                         "online": db_status == "OK",
+                         "latency_ms": db_latency},
+            "tessie":   {"status": tessie_trips["status"],
+                         "online": tessie_trips["status"] == "OK",
+                         "latency_ms": tessie_trips["latency_ms"]},
+            "onedrive": {"status": od_trips["status"],
+                         "online": od_trips["status"] == "OK",
+                         "latency_ms": od_trips["latency_ms"]},
+            "bank":     {"status": bank_earnings["status"],
+                         "online": bank_earnings["status"] == "OK",
+                         "latency_ms": bank_earnings["latency_ms"]},
+        },
+    }
+
+    # ── Notify ──
+    _maybe_notify(overall_status, overall_conf, date_str)
+
+    # ── Structured Observability Logging (Production telemetry diagnostics) ──
+    diagnostics = {
+        "component": "pre_shift_check",
+        "db_latency_ms": db_latency,
+        "graph_drive_source": _last_resolution_meta["source"],
+        "graph_resolution_latency_ms": _last_resolution_meta["resolution_latency_ms"],
+        "onedrive_trips_latency_ms": od_trips["latency_ms"],
+        "onedrive_expenses_latency_ms": od_expenses["latency_ms"],
+        "onedrive_file_count_trips": od_trips["value"] if od_trips["value"] is not None else None,
+        "onedrive_file_count_expenses": od_expenses["value"] if od_expenses["value"] is not None else None,
+        "onedrive_status_trips": "OK" if od_trips["status"] == "OK" else "UNAVAILABLE",
+        "onedrive_status_expenses": "OK" if od_expenses["status"] == "OK" else "UNAVAILABLE",
+        "tessie_latency_ms": tessie_trips["latency_ms"]
+    }
+    log.info(f"[PreShift Diagnostic] {json.dumps(diagnostics)}")
+
+    log.info(f"[PreShift] {date_str} → {overall_status} ({overall_conf}/100)")
+    return payload
+
+
 # ── Main handler ───────────────────────────────────────────────────────────────
 
 @bp.route(route="pre-shift-check", methods=["GET", "OPTIONS"],
@@ -1238,134 +1350,15 @@ def pre_shift_check(req: func.HttpRequest) -> func.HttpResponse:
             now_mt   = datetime.datetime.now(_MT)
             date_str = (now_mt - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
 
-        # ── Cache check ──
-        if not force_refresh:
-            cached = _cache_get(date_str)
-            if cached:
-                log.info(f"[PreShift] Cache HIT for {date_str}")
-                return func.HttpResponse(
-                    json.dumps(cached, default=str),
-                    status_code=200, mimetype="application/json", headers=CORS_HEADERS
-                )
-
-        # ── UTC window ──
-        start_utc, end_utc = _mt_date_to_utc_window(date_str)
-
-        # ── Run all sources concurrently (IO Parallelism) ──
-        async def _run_all():
-            now_t = time.time()
-            drive_cached = _drive_cache and _drive_cache.get("expires", 0) > now_t
-            od_timeout = 3.0 if drive_cached else _ONEDRIVE_TIMEOUT_S
-            
-            results = await asyncio.gather(
-                # Consolidate DB query: ONE connection, ONE cursor handoff
-                safe_call(_fetch_all_db_data(start_utc, end_utc),
-                          _DB_TIMEOUT_S, "db_all_data"),
-                # Tessie
-                safe_call(_src_tessie_trip_count(date_str, start_utc, end_utc),
-                          _DEFAULT_TIMEOUT_S, "tessie_trip_count"),
-                # OneDrive / Graph - Trip Count
-                safe_call(_src_onedrive_trip_count(date_str),
-                          od_timeout, "onedrive_trip_count"),
-                # OneDrive / Graph - Expenses Count
-                safe_call(_src_onedrive_expense_count(date_str),
-                          od_timeout, "onedrive_expense_count"),
-                # Bank / Teller Placeholder API
-                safe_call(_src_bank_earnings(date_str),
-                          _DEFAULT_TIMEOUT_S, "bank_earnings"),
-                safe_call(_src_bank_trip_count(date_str),
-                          _DEFAULT_TIMEOUT_S, "bank_expense_count"),
-                return_exceptions=False
-            )
-            return results
-
-        loop = asyncio.new_event_loop()
-        try:
-            (db_data_res, tessie_trips, od_trips, od_expenses,
-             bank_earnings, bank_expenses) = loop.run_until_complete(_run_all())
-        finally:
-            loop.close()
-
-        # ── Map Consolidated DB results to the Scoring Engine source blocks ──
-        db_latency = db_data_res["latency_ms"]
-        db_status = db_data_res["status"]
-        
-        if db_status == "OK" and db_data_res["value"] is not None:
-            db_val = db_data_res["value"]
-            db_trips = _source_result("OK", db_val["trip_count"], db_latency)
-            db_earnings = _source_result("OK", db_val["earnings_sum"], db_latency)
-            db_expenses = _source_result("OK", db_val["expense_count"], db_latency)
-            ocr_earnings = _source_result("OK", db_val["ocr_earnings"], db_latency)
-            timeline_r = _source_result("OK", db_val["timeline_data"], db_latency)
-        else:
-            err_msg = db_data_res["error"] or "Consolidated SQL query failure"
-            db_trips = _source_result("UNAVAILABLE", None, db_latency, err_msg)
-            db_earnings = _source_result("UNAVAILABLE", None, db_latency, err_msg)
-            db_expenses = _source_result("UNAVAILABLE", None, db_latency, err_msg)
-            ocr_earnings = _source_result("UNAVAILABLE", None, db_latency, err_msg)
-            timeline_r = _source_result("UNAVAILABLE", None, db_latency, err_msg)
-
-        # ── Score tiers ──
-        tier1 = _score_tier1(db_trips,    tessie_trips, od_trips,    date_str)
-        tier2 = _score_tier2(db_earnings, ocr_earnings, bank_earnings)
-        tier3 = _score_tier3(db_expenses, od_expenses,  bank_expenses, date_str)
-        tier4 = _score_tier4(timeline_r)
-
-        overall_status, overall_conf = _compute_overall(tier1, tier2, tier3, tier4)
-
-        # ── Build payload ──
-        generated_at = datetime.datetime.utcnow().isoformat() + "Z"
-        payload = {
-            "date": date_str,
-            "generated_at": generated_at,
-            "pipeline_version": _PIPELINE_VERSION,
-            "overall_status": overall_status,
-            "overall_confidence": overall_conf,
-            "cache": {"hit": False, "age_seconds": 0,
-                      "pipeline_version": _PIPELINE_VERSION},
-            "tiers": {
-                "tier1_trips":    tier1,
-                "tier2_earnings": tier2,
-                "tier3_expenses": tier3,
-                "tier4_timeline": tier4,
-            },
-            "systems": {
-                "db":       {"status": db_status,
-                             "online": db_status == "OK",
-                             "latency_ms": db_latency},
-                "tessie":   {"status": tessie_trips["status"],
-                             "online": tessie_trips["status"] == "OK",
-                             "latency_ms": tessie_trips["latency_ms"]},
-                "onedrive": {"status": od_trips["status"],
-                             "online": od_trips["status"] == "OK",
-                             "latency_ms": od_trips["latency_ms"]},
-                "bank":     {"status": bank_earnings["status"],
-                             "online": bank_earnings["status"] == "OK",
-                             "latency_ms": bank_earnings["latency_ms"]},
-            },
-        }
-
-        # ── Cache & notify ──
-        _cache_set(date_str, payload)
-        _maybe_notify(overall_status, overall_conf, date_str)
-
-        # ── Structured Observability Logging (Production telemetry diagnostics) ──
-        diagnostics = {
-            "component": "pre_shift_check",
-            "db_latency_ms": db_latency,
-            "graph_drive_source": _last_resolution_meta["source"],
-            "graph_resolution_latency_ms": _last_resolution_meta["resolution_latency_ms"],
-            "onedrive_trips_latency_ms": od_trips["latency_ms"],
-            "onedrive_expenses_latency_ms": od_expenses["latency_ms"],
-            "onedrive_file_count_trips": od_trips["value"] if od_trips["value"] is not None else None,
-            "onedrive_file_count_expenses": od_expenses["value"] if od_expenses["value"] is not None else None,
-            "onedrive_status_trips": "OK" if od_trips["status"] == "OK" else "UNAVAILABLE",
-            "onedrive_status_expenses": "OK" if od_expenses["status"] == "OK" else "UNAVAILABLE",
-            "tessie_latency_ms": tessie_trips["latency_ms"]
-        }
-        log.info(f"[PreShift Diagnostic] {json.dumps(diagnostics)}")
-
-        log.info(f"[PreShift] {date_str} → {overall_status} ({overall_conf}/100)")
+        # ── Cache (instant stale answer while a refresh runs) ──
+        payload, cache_meta = _result_cache.get_or_compute(
+            _result_cache.key(date_str), lambda: _compute_payload(date_str),
+            refresh=force_refresh)
+        if cache_meta["hit"]:
+            log.info(f"[PreShift] Cache HIT ({cache_meta['tier']}, {cache_meta['age_seconds']}s"
+                     f"{', stale' if cache_meta['stale'] else ''}) for {date_str}")
+        payload = dict(payload)
+        payload["cache"] = {**cache_meta, "pipeline_version": _PIPELINE_VERSION}
 
         return func.HttpResponse(
             json.dumps(payload, default=str),
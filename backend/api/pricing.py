@@ -3,6 +3,8 @@ import azure.functions as func
 import json
 import os
 import googlemaps
+from concurrent.futures import ThreadPoolExecutor
+from services.maps_cache import get_maps_cache
 from services.pricing import PricingEngine
 
 bp = func.Blueprint()
@@ -32,58 +34,57 @@ def quote(req: func.HttpRequest) -> func.HttpResponse:
             raise Exception("Google Maps API Key missing from environment")
             
         gmaps = googlemaps.Client(key=gmaps_key)
-        
+        maps = get_maps_cache()
+
         # Directions API
         stops = req_body.get('stops', [])
         valid_stops = [s for s in stops if s and s.strip()]
-        
-        directions_res = gmaps.directions(
-            origin=pickup,
-            destination=dropoff,
-            waypoints=valid_stops,
-            mode="driving",
-            region="us"
-        )
-        
-        if not directions_res:
-             logging.warning(f"No directions found for {pickup} -> {dropoff}")
-             raise Exception(f"Unable to find a driving route between these addresses")
-             
-        route = directions_res[0]
-        legs = route.get('legs', [])
-        
-        total_dist_meters = sum(leg['distance']['value'] for leg in legs)
-        total_duration_sec = sum(leg['duration']['value'] for leg in legs)
-        
-        dist_miles = total_dist_meters * 0.000621371
-        dur_text = legs[0]['duration']['text'] if len(legs) == 1 else f"{total_duration_sec // 60} mins"
-        
-        actual_origin = legs[0]['start_address']
-        actual_dest = legs[-1]['end_address']
 
         trip_type = req_body.get('tripType', 'one-way')
         return_stops = req_body.get('returnStops', [])
         valid_return_stops = [s for s in return_stops if s and s.strip()]
 
-        return_dist_miles = 0.0
-        return_duration_sec = 0
-
-        if trip_type == 'round-trip':
-            return_res = gmaps.directions(
-                origin=dropoff,
-                destination=pickup,
-                waypoints=valid_return_stops,
-                mode="driving",
-                region="us"
-            )
-            if return_res:
-                return_legs = return_res[0].get('legs', [])
-                return_dist_miles = sum(leg['distance']['value'] for leg in return_legs) * 0.000621371
-                return_duration_sec = sum(leg['duration']['value'] for leg in return_legs)
-            else:
-                # Couldn't route the return leg — assume it mirrors the outbound
-                return_dist_miles = dist_miles
-                return_duration_sec = total_duration_sec
+        # The outbound route, the return route and both county lookups are
+        # independent, so they run together (each served from the maps cache
+        # when this run was quoted recently). Counties are looked up for the
+        # addresses as entered — Google resolves them to the same place the
+        # route does.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            outbound_f = pool.submit(maps.route_legs, gmaps, pickup, dropoff, valid_stops)
+            return_f = (pool.submit(maps.route_legs, gmaps, dropoff, pickup, valid_return_stops)
+                        if trip_type == 'round-trip' else None)
+            origin_county_f = pool.submit(maps.county_of, gmaps, pickup)
+            dest_county_f = pool.submit(maps.county_of, gmaps, dropoff)
+
+            legs = outbound_f.result()
+            if not legs:
+                 logging.warning(f"No directions found for {pickup} -> {dropoff}")
+                 raise Exception(f"Unable to find a driving route between these addresses")
+
+            total_dist_meters = sum(leg['distance']['value'] for leg in legs)
+            total_duration_sec = sum(leg['duration']['value'] for leg in legs)
+
+            dist_miles = total_dist_meters * 0.000621371
+            dur_text = legs[0]['duration']['text'] if len(legs) == 1 else f"{total_duration_sec // 60} mins"
+
+            actual_origin = legs[0]['start_address']
+            actual_dest = legs[-1]['end_address']
+
+            return_dist_miles = 0.0
+            return_duration_sec = 0
+
+            if return_f is not None:
+                return_legs = return_f.result()
+                if return_legs:
+                    return_dist_miles = sum(leg['distance']['value'] for leg in return_legs) * 0.000621371
+                    return_duration_sec = sum(leg['duration']['value'] for leg in return_legs)
+                else:
+                    # Couldn't route the return leg — assume it mirrors the outbound
+                    return_dist_miles = dist_miles
+                    return_duration_sec = total_duration_sec
+
+            origin_county = origin_county_f.result()
+            dest_county = dest_county_f.result()
 
         total_dist_miles = dist_miles + return_dist_miles
 
@@ -113,20 +114,6 @@ def quote(req: func.HttpRequest) -> func.HttpResponse:
         ]
         teller_cities = ["woodland park", "divide", "florissant", "cripple creek", "victor", "teller county"]
 
-        def county_of(address: str) -> str:
-            try:
-                geo = gmaps.geocode(address)
-                if geo:
-                    for comp in geo[0].get('address_components', []):
-                        if 'administrative_area_level_2' in comp.get('types', []):
-                            return comp.get('long_name', '').lower()
-            except Exception as geo_err:
-                logging.warning(f"County lookup failed for {address}: {geo_err}")
-            return ""
-
-        origin_county = county_of(actual_origin)
-        dest_county = county_of(actual_dest)
-
         is_origin_local = 'el paso' in origin_county if origin_county else any(city in origin_lower for city in el_paso_cities)
         is_dest_local = 'el paso' in dest_county if dest_county else any(city in dest_lower for city in el_paso_cities)
         is_teller_county = (
@@ -74,3 +74,23 @@ def timer_nightly_sync(nightlyTimer: func.TimerRequest) -> None:
             logging.info("[NightlyDedup] ✅ No duplicates found — data is clean.")
     except Exception as e:
         logging.error(f"[NightlyDedup] ❌ Failed: {e}", exc_info=True)
+
+    # ── Daily rollup refresh ──────────────────────────────────────────────────
+    # The sync and dedup above mark the days they touch dirty; recompute them
+    # now so the morning's first chart reads a clean Rides.DailyRollup.
+    try:
+        from services.database import DatabaseClient
+        refreshed = DatabaseClient().refresh_daily_rollup()
+        logging.info(f"[NightlyRollup] ✅ Recomputed {refreshed} day(s).")
+    except Exception as e:
+        logging.error(f"[NightlyRollup] ❌ Failed: {e}", exc_info=True)
+
+    # ── Reverse-geocode cache pre-warm ────────────────────────────────────────
+    # Copy addresses of newly tagged Tessie locations into Rides.GeocodeCache
+    # so tomorrow's drives to those zones never reach Nominatim.
+    try:
+        from services.geocode_cache import get_geocode_cache
+        added = get_geocode_cache().prewarm_from_location_intelligence()
+        logging.info(f"[NightlyGeocode] ✅ Seeded {added} cell(s) from Location_Intelligence.")
+    except Exception as e:
+        logging.error(f"[NightlyGeocode] ❌ Failed: {e}", exc_info=True)
@@ -4,7 +4,6 @@ import os
 import csv
 import io
 import datetime
-from azure.storage.blob import BlobServiceClient
 from services.database import DatabaseClient
 
 bp = func.Blueprint()
@@ -27,6 +26,8 @@ def timer_reports(myTimer: func.TimerRequest) -> None:
             logging.error("AZUREWEBJOBSSTORAGE not found.")
             return
 
+        # Imported here: azure.storage.blob adds ~300 ms to every cold start.
+        from azure.storage.blob import BlobServiceClient
         blob_service_client = BlobServiceClient.from_connection_string(connect_str)
         container_name = "reports"
         
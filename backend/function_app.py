@@ -1,10 +1,9 @@
 import azure.functions as func
 import sys
 import os
-import requests
 import logging
 import json
-import importlib
+import time
 
 # Path fix - MUST BE ABSOLUTE to prevent blueprint import failures
 app_root = os.path.dirname(os.path.abspath(__file__))
@@ -12,6 +11,12 @@ if app_root not in sys.path:
     sys.path.append(app_root)
     logging.info(f"Added {app_root} to sys.path")
 
+from api import lazy_routes
+
+# LAZY_BLUEPRINTS=1 registers plain HTTP routes from api/route_manifest.json and
+# imports their modules on first request (see api/lazy_routes.py).
+LAZY_BLUEPRINTS = os.environ.get("LAZY_BLUEPRINTS", "0") == "1"
+
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 
 @app.route(route="ping", methods=["GET"])
@@ -58,10 +63,20 @@ blueprints = [
 ]
 
 registration_logs = []
+_startup_t0 = time.perf_counter()
+deferred = set()
+if LAZY_BLUEPRINTS:
+    try:
+        deferred = set(lazy_routes.register_deferred(app, blueprints))
+    except Exception as e:
+        logging.error(f"ERROR: lazy registration failed, importing every blueprint: {e}")
 for module_path in blueprints:
+    if module_path in deferred:
+        registration_logs.append(f"DEFERRED: {module_path}")
+        continue
     try:
         logging.info(f"Attempting to register blueprint: {module_path}")
-        module = importlib.import_module(module_path)
+        module = lazy_routes.timed_import(module_path)
         if hasattr(module, 'bp'):
             app.register_blueprint(module.bp)
             registration_logs.append(f"SUCCESS: {module_path}")
@@ -73,6 +88,12 @@ for module_path in blueprints:
         err_msg = f"ERROR: {module_path}: {str(e)}"
         registration_logs.append(err_msg)
         logging.error(err_msg)
+startup_import_ms = round((time.perf_counter() - _startup_t0) * 1000, 1)
+
+# Bring the schema to the latest migration once per instance, off the request
+# path; until it finishes, data paths keep running their own idempotent DDL.
+from services import schema_migrations
+schema_migrations.start_background()
 
 @app.route(route="diag", methods=["GET"])
 def diag(req: func.HttpRequest) -> func.HttpResponse:
@@ -84,6 +105,10 @@ def diag(req: func.HttpRequest) -> func.HttpResponse:
         "files": os.listdir('.'),
         "api_files": os.listdir('api') if os.path.exists('api') else "MISSING api",
         "registration_logs": registration_logs,
+        "startup_mode": "lazy" if LAZY_BLUEPRINTS else "eager",
+        "startup_import_ms": startup_import_ms,
+        "import_ms": lazy_routes.import_timings(),
+        "schema_verified": schema_migrations.schema_verified(),
         "env_vars": {k: "SET" for k in os.environ.keys() if "KEY" in k or "SECRET" in k or "CONN" in k}
     }
     return func.HttpResponse(json.dumps(info, indent=2), mimetype="application/json")
@@ -0,0 +1,91 @@
+"""
+Drive-telemetry read benchmark: what each production reader pays per drive
+to load a stored one-hour, 8-channel /states trace (1 Hz), against the old
+json.loads of RawJSONPayload.
+
+  * as_lists        — get_drive_telemetry_payloads(decoded=False)
+  * decode_telemetry — get_drive_telemetry_payloads(decoded=True), the
+                      path VehicleAgent and the day-summary profile take
+  * VehicleAgent    — a full query over a day of such drives, blob rows
+                      against legacy JSON rows
+
+    python scripts/bench_telemetry_read.py [--drives 12] [--repeat 50]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services.telemetry_codec import as_lists, decode_telemetry, encode_telemetry  # noqa: E402
+
+
+def synthetic(start=1780376400, n=3600, seed=7):
+    rng = random.Random(seed)
+    return {
+        "timestamps": [start + i for i in range(n)],
+        "speeds": [None if i % 97 == 0 else rng.randint(0, 70) for i in range(n)],
+        "battery_levels": [80 - i // 120 for i in range(n)],
+        "odometers": [round(41000 + i * 0.01, 2) for i in range(n)],
+        "elevations": [round(6035 + 40 * math.sin(i / 200), 1) for i in range(n)],
+        "powers": [round(rng.uniform(-40, 120), 1) for i in range(n)],
+        "pack_current": [round(rng.uniform(-250, 80), 1) for i in range(n)],
+        "pack_voltage": [round(rng.uniform(340, 400), 1) for i in range(n)],
+    }
+
+
+def _ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+class _DB:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_drive_telemetry_payloads(self, dates=None, decoded=False):
+        return [{"DriveID": i, "LastUpdated": None, "Payload": load(decoded)}
+                for i, load in enumerate(self.rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drives", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payload = synthetic()
+    raw = json.dumps(payload)
+    blob = encode_telemetry(payload)
+    base = _ms(lambda: json.loads(raw), args.repeat)
+    print(f"one drive: json.loads {base:6.2f} ms")
+    for name, fn in (("as_lists", lambda: as_lists(blob)),
+                     ("decode_telemetry", lambda: decode_telemetry(blob))):
+        ms = _ms(fn, args.repeat)
+        print(f"           {name:<16} {ms:6.2f} ms  ({base / ms:4.1f}x json.loads)")
+
+    # VehicleAgent imports services.database, which needs pyodbc.
+    sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+    from services.agents.summit_intelligence import VehicleAgent
+
+    drives = [synthetic(start=1780376400 + d * 3600, seed=d) for d in range(args.drives)]
+    blobs = [encode_telemetry(p) for p in drives]
+    raws = [json.dumps(p) for p in drives]
+    new = VehicleAgent(_DB([lambda decoded, b=b: decode_telemetry(b) if decoded else as_lists(b) for b in blobs]))
+    old = VehicleAgent(_DB([lambda decoded, r=r: json.loads(r) for r in raws]))
+    blob_ms = _ms(lambda: new.query(date_str="2026-06-02"), max(args.repeat // 10, 1))
+    json_ms = _ms(lambda: old.query(date_str="2026-06-02"), max(args.repeat // 10, 1))
+    print(f"VehicleAgent, {args.drives} drives: blob rows {blob_ms:7.1f} ms  legacy JSON rows {json_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Transfer-pair detection benchmark: bucketed find_transfer_pairs vs. the old
+pairwise scan, over synthetic month/year-scale backfills (10k and 100k
+transactions across both accounts, ~10% of them real transfer pairs).
+
+The pairwise scan is only timed up to --pairwise-max transactions; past that
+it takes minutes.
+
+    python scripts/bench_transfer_pairs.py [--sizes 10000 100000] [--pairwise-max 10000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services.payment_categorizer import (  # noqa: E402
+    BUSINESS_ACCOUNT, PERSONAL_ACCOUNT, find_transfer_pairs,
+)
+
+
+def _pairwise(transactions):
+    transfer_ids = set()
+    accounts = {BUSINESS_ACCOUNT, PERSONAL_ACCOUNT}
+    for i, a in enumerate(transactions):
+        if a["id"] in transfer_ids:
+            continue
+        for b in transactions[i + 1:]:
+            if (b["id"] not in transfer_ids and a["date"] == b["date"]
+                    and round(abs(a["amount"]), 2) == round(abs(b["amount"]), 2)
+                    and (a["amount"] > 0) != (b["amount"] > 0)
+                    and {a["account"], b["account"]} == accounts):
+                transfer_ids.update((a["id"], b["id"]))
+                break
+    return transfer_ids
+
+
+def synthetic(size, seed=7):
+    rng = random.Random(seed)
+    start = datetime.date(2026, 1, 1)
+    days = max(size // 270, 1)  # ~270 transactions a day, a busy backfill
+    txs = []
+    while len(txs) < size:
+        day = start + datetime.timedelta(days=rng.randrange(days))
+        amount = round(rng.uniform(1, 400), 2)
+        if rng.random() < 0.1:
+            txs.append({"id": f"t{len(txs)}", "account": BUSINESS_ACCOUNT, "amount": -amount, "date": day})
+            txs.append({"id": f"t{len(txs)}", "account": PERSONAL_ACCOUNT, "amount": amount, "date": day})
+        else:
+            txs.append({"id": f"t{len(txs)}", "account": rng.choice((BUSINESS_ACCOUNT, PERSONAL_ACCOUNT)),
+                        "amount": amount * rng.choice((1, -1)), "date": day})
+    rng.shuffle(txs)
+    return txs[:size]
+
+
+def _time(fn, txs):
+    t0 = time.perf_counter()
+    result = fn(txs)
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--pairwise-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        txs = synthetic(size)
+        ms, found = _time(find_transfer_pairs, txs)
+        line = f"{size:>7} txs  bucketed {ms:9.1f} ms  ({len(found)} transfer ids)"
+        if size <= args.pairwise_max:
+            ref_ms, ref = _time(_pairwise, txs)
+            line += f"  pairwise {ref_ms:9.1f} ms  same={ref == found}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
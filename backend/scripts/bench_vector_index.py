@@ -0,0 +1,70 @@
+"""
+Evidence Mode retrieval benchmark: in-process index vs. SQL VECTOR_DISTANCE.
+
+Times LocalVectorIndex.search over 10k and 100k synthetic 1536-d vectors, and
+the SQL path of VectorStore when SQL_CONNECTION_STRING is set (OpenAI is not
+called; a random query vector is used).
+
+    python scripts/bench_vector_index.py [--queries 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np  # noqa: E402
+
+from services.vector_index import DIM, LocalVectorIndex  # noqa: E402
+
+
+def _timed(fn, queries):
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench_local(size, queries):
+    rng = np.random.default_rng(7)
+    index = LocalVectorIndex.__new__(LocalVectorIndex)
+    LocalVectorIndex.__init__(index, db=None)
+    t0 = time.perf_counter()
+    matrix = rng.standard_normal((size, DIM), dtype=np.float32)
+    for i in range(size):
+        index._upsert({"vector_id": f"V-{i}", "timestamp_utc": None}, matrix[i])
+    load_s = time.perf_counter() - t0
+    p50, p95 = _timed(lambda q: index.search(q, 5, -1.0), queries)
+    print(f"local  {size:>7} vectors  load {load_s:6.1f}s  p50 {p50:7.2f} ms  p95 {p95:7.2f} ms")
+
+
+def bench_sql(queries):
+    from services.database import DatabaseClient
+    from services.vector_store import VectorStore
+    vs = VectorStore.__new__(VectorStore)
+    vs.db = DatabaseClient()
+    rows = vs.db.execute_query_params("SELECT COUNT(*) AS n FROM System_Vectors", ()) or [{"n": "?"}]
+    p50, p95 = _timed(lambda q: vs._query_evidence_sql(q.tolist(), 5, 0.0), queries)
+    print(f"sql    {rows[0]['n']:>7} vectors              p50 {p50:7.2f} ms  p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    queries = [np.random.default_rng(i).standard_normal(DIM, dtype=np.float32) for i in range(args.queries)]
+    for size in (10_000, 100_000):
+        bench_local(size, queries)
+    if os.environ.get("SQL_CONNECTION_STRING"):
+        bench_sql(queries)
+    else:
+        print("sql    skipped (SQL_CONNECTION_STRING not set)")
+
+
+if __name__ == "__main__":
+    main()
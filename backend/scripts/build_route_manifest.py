@@ -0,0 +1,34 @@
+"""
+Regenerate api/route_manifest.json from the blueprint decorators.
+
+Run after adding, removing or changing a route, timer or MCP tool; the
+LAZY_BLUEPRINTS=1 startup mode registers HTTP routes from this file.
+
+    python scripts/build_route_manifest.py
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+os.environ["LAZY_BLUEPRINTS"] = "0"
+
+import function_app  # noqa: E402
+from api.lazy_routes import MANIFEST_PATH, build_manifest  # noqa: E402
+
+
+def main():
+    manifest = build_manifest(function_app.blueprints)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    lazy = [path for path, entry in manifest.items() if entry["lazy"]]
+    print(f"Wrote {MANIFEST_PATH}: {len(lazy)} deferrable, {len(manifest) - len(lazy)} eager")
+    for path, entry in manifest.items():
+        if not entry["lazy"]:
+            print(f"  eager {path} ({entry['reason']})")
+
+
+if __name__ == "__main__":
+    main()
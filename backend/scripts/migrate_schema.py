@@ -0,0 +1,51 @@
+"""
+Apply pending schema migrations (services/schema_migrations.py) and report
+the database's version. Run at deploy time so the first request to a new
+instance finds the schema already current; safe to re-run.
+
+    python scripts/migrate_schema.py [--status]
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services import schema_migrations  # noqa: E402
+from services.database import DatabaseClient  # noqa: E402
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--status", action="store_true", help="list applied versions without migrating")
+    args = parser.parse_args()
+
+    conn = DatabaseClient().get_connection()
+    if not conn:
+        sys.exit("Database unavailable (check SQL_CONNECTION_STRING).")
+    try:
+        if args.status:
+            cursor = conn.cursor()
+            cursor.execute(schema_migrations.SCHEMA_VERSION_DDL)
+            conn.commit()
+            applied = schema_migrations.applied_versions(cursor)
+        else:
+            newly = schema_migrations.migrate(conn)
+            print(f"Applied: {newly or 'nothing, already current'}")
+            applied = schema_migrations.applied_versions(conn.cursor())
+    finally:
+        conn.close()
+
+    pending = [m for m in schema_migrations.MIGRATIONS if m.version not in applied]
+    print(f"Schema version {max(applied, default=0)} of {schema_migrations.LATEST_VERSION}.")
+    for m in pending:
+        print(f"  pending: {m.version} {m.name}")
+    sys.exit(1 if pending else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Convert legacy dbo.Drive_Telemetry rows from RawJSONPayload to the compact
+TelemetryBlob encoding (services/telemetry_codec.py).
+
+Each row is encoded, decoded back and compared with the original before it is
+written; a row that does not round-trip exactly is left as JSON and reported.
+Converted rows have RawJSONPayload set to NULL unless --keep-json is given.
+Safe to re-run: only rows without a TelemetryBlob are touched.
+
+    python scripts/migrate_telemetry_blobs.py [--batch 200] [--dry-run] [--keep-json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pyodbc
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services.telemetry_codec import as_lists, encode_telemetry  # noqa: E402
+
+load_dotenv()
+
+
+def migrate(batch: int, dry_run: bool, keep_json: bool):
+    conn_str = os.environ.get("SQL_CONNECTION_STRING")
+    if not conn_str:
+        print("Error: SQL_CONNECTION_STRING not found.")
+        return
+
+    conn = pyodbc.connect(conn_str)
+    cursor = conn.cursor()
+    cursor.execute(
+        "IF COL_LENGTH('dbo.Drive_Telemetry', 'TelemetryBlob') IS NULL "
+        "ALTER TABLE dbo.Drive_Telemetry ADD TelemetryBlob VARBINARY(MAX) NULL"
+    )
+    conn.commit()
+
+    converted = skipped = json_bytes = blob_bytes = 0
+    json_s = blob_s = 0.0
+    failed = set()
+    try:
+        while True:
+            exclude = ""
+            if failed:
+                exclude = " AND DriveID NOT IN (" + ", ".join("?" for _ in failed) + ")"
+            cursor.execute(
+                f"SELECT TOP (?) DriveID, RawJSONPayload FROM dbo.Drive_Telemetry "
+                f"WHERE TelemetryBlob IS NULL AND RawJSONPayload IS NOT NULL{exclude} "
+                f"ORDER BY DriveID",
+                (batch, *failed))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for drive_id, raw_json in rows:
+                try:
+                    t0 = time.perf_counter()
+                    payload = json.loads(raw_json)
+                    json_s += time.perf_counter() - t0
+                    blob = encode_telemetry(payload)
+                    t0 = time.perf_counter()
+                    restored = as_lists(blob)
+                    blob_s += time.perf_counter() - t0
+                    if restored != payload:
+                        raise ValueError("round trip mismatch")
+                except Exception as e:
+                    print(f"  {drive_id}: left as JSON ({e})")
+                    failed.add(drive_id)
+                    skipped += 1
+                    continue
+                json_bytes += len(raw_json.encode("utf-8"))
+                blob_bytes += len(blob)
+                updates.append((blob, drive_id))
+
+            if updates and not dry_run:
+                set_json = "" if keep_json else ", RawJSONPayload = NULL"
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    f"UPDATE dbo.Drive_Telemetry SET TelemetryBlob = ?{set_json} WHERE DriveID = ?",
+                    updates)
+                conn.commit()
+            converted += len(updates)
+            print(f"Converted {converted} row(s) so far...")
+            if dry_run:
+                # Nothing was written, so the same rows would come back.
+                break
+    finally:
+        conn.close()
+
+    ratio = json_bytes / blob_bytes if blob_bytes else 0
+    print(f"{'Would convert' if dry_run else 'Converted'} {converted} row(s), {skipped} left as JSON.")
+    print(f"Size: {json_bytes:,} B JSON -> {blob_bytes:,} B blob ({ratio:.1f}x smaller).")
+    if blob_s:
+        print(f"Load: json.loads {json_s * 1000:.0f} ms vs. blob decode-to-lists {blob_s * 1000:.0f} ms.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--keep-json", action="store_true")
+    args = parser.parse_args()
+    migrate(args.batch, args.dry_run, args.keep_json)
@@ -0,0 +1,69 @@
+-- Covering indexes for DatabaseClient.get_summary_metrics_for_range.
+--
+-- That method feeds the Financials dashboard, /driver/dashboard's today/week/
+-- month tiles and the MCP get_day_summary tool. It used to issue six scalar
+-- queries, three of them filtering on CAST(Timestamp AS DATE) /
+-- CAST(Start_Time AS DATE), which no index can seek. It is now one statement
+-- whose range predicates compare the bare column, and each of its four
+-- branches is answered by one of the indexes below without touching the base
+-- table:
+--
+--   Rides.Rides            Timestamp_Start range, sums Driver_Earnings/Tip/Fare
+--                          filtered by TripType/PaymentStatus/DeletedAt/IsTest.
+--                          Fare is INCLUDEd as well: paid private bookings sum
+--                          Fare + Tip, and without it every private row would
+--                          cost a key lookup.
+--   Rides.PrivatePayments  PaymentDate range, sums Amount where DeletedAt IS NULL.
+--   Rides.ManualExpenses   Timestamp range, sums Amount split by ExpenseType /
+--                          Category.
+--   Rides.ChargingSessions Start_Time range, sums Cost.
+--
+-- Idempotent: each CREATE is guarded, so re-running is a no-op. ONLINE = ON
+-- keeps the tables writable during the build (Azure SQL supports it on every
+-- tier this database runs on).
+--
+-- ROLLBACK:
+--   DROP INDEX IX_Rides_TimestampStart_Summary       ON Rides.Rides;
+--   DROP INDEX IX_PrivatePayments_PaymentDate         ON Rides.PrivatePayments;
+--   DROP INDEX IX_ManualExpenses_Timestamp            ON Rides.ManualExpenses;
+--   DROP INDEX IX_ChargingSessions_StartTime          ON Rides.ChargingSessions;
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_Rides_TimestampStart_Summary' AND object_id = OBJECT_ID('Rides.Rides')
+)
+CREATE INDEX IX_Rides_TimestampStart_Summary
+    ON Rides.Rides (Timestamp_Start)
+    INCLUDE (TripType, Driver_Earnings, Tip, Fare, PaymentStatus, DeletedAt, IsTest)
+    WITH (ONLINE = ON);
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_PrivatePayments_PaymentDate' AND object_id = OBJECT_ID('Rides.PrivatePayments')
+)
+CREATE INDEX IX_PrivatePayments_PaymentDate
+    ON Rides.PrivatePayments (PaymentDate)
+    INCLUDE (Amount, DeletedAt)
+    WITH (ONLINE = ON);
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_ManualExpenses_Timestamp' AND object_id = OBJECT_ID('Rides.ManualExpenses')
+)
+CREATE INDEX IX_ManualExpenses_Timestamp
+    ON Rides.ManualExpenses (Timestamp)
+    INCLUDE (Amount, ExpenseType, Category)
+    WITH (ONLINE = ON);
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_ChargingSessions_StartTime' AND object_id = OBJECT_ID('Rides.ChargingSessions')
+)
+CREATE INDEX IX_ChargingSessions_StartTime
+    ON Rides.ChargingSessions (Start_Time)
+    INCLUDE (Cost)
+    WITH (ONLINE = ON);
+GO
@@ -1,7 +1,7 @@
 import logging
 import os
-import requests
 from typing import Dict, Any, Optional
+from services import http_pool
 
 class GeoAgent:
     def __init__(self):
@@ -32,7 +32,7 @@ class GeoAgent:
             url = "https://maps.googleapis.com/maps/api/elevation/json"
             locations = f"{start[0]},{start[1]}|{end[0]},{end[1]}"
             params = {"locations": locations, "key": self.gmaps_key}
-            resp = requests.get(url, params=params, timeout=10)
+            resp = http_pool.get(url, params=params, timeout=10)
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get('status') == 'OK' and len(data.get('results', [])) == 2:
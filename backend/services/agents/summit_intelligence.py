@@ -6,8 +6,14 @@ import re
 from typing import Dict, Any, List, Optional, Literal
 from pydantic import BaseModel, Field
 from openai import OpenAI
+from services import telemetry_profile
 from services.database import DatabaseClient
 
+try:
+    import numpy as np
+except ImportError:  # VehicleAgent checks telemetry_profile.available()
+    np = None
+
 # Helper: Sanitize address to city and state for Privacy Enforcement
 def sanitize_address_to_city_state(address: str) -> str:
     if not address:
@@ -316,100 +322,104 @@ class VehicleAgent:
             except Exception as e:
                 logging.error(f"Error parsing dates in VehicleAgent: {e}")
                 
-        # Telemetry is stored as raw JSON payloads containing arrays of points in dbo.Drive_Telemetry
-        # To avoid pulling all rows from the database, we pre-filter by joining Rides.Rides on target_dates if active
-        if target_dates:
-            date_list = ", ".join(f"'{d}'" for d in target_dates)
-            sql = f"""
-                SELECT dt.DriveID, dt.RawJSONPayload, dt.LastUpdated
-                FROM dbo.Drive_Telemetry dt
-                INNER JOIN Rides.Rides r ON dt.DriveID = r.RideID
-                WHERE dt.RawJSONPayload IS NOT NULL
-                  AND CAST(r.Timestamp_Start AS DATE) IN ({date_list})
-            """
-        else:
-            sql = """
-                SELECT DriveID, RawJSONPayload, LastUpdated
-                FROM dbo.Drive_Telemetry
-                WHERE RawJSONPayload IS NOT NULL
-            """
-
-        # Because the telemetry is inside a blob, we load and parse it
-        results = self.db.execute_query_with_results(sql)
+        # Telemetry is stored per drive in dbo.Drive_Telemetry (compact columnar
+        # blob, or a legacy JSON payload). To avoid pulling all rows from the
+        # database, the query is pre-filtered by Rides.Rides dates when given.
+        # Blobs are read as decoded arrays and every sample is filtered and
+        # scored in NumPy; only the points returned become Python objects.
+        if not telemetry_profile.available():
+            logging.warning("VehicleAgent: numpy unavailable, skipping telemetry")
+            return []
+        results = self.db.get_drive_telemetry_payloads(sorted(target_dates) if target_dates else None,
+                                                       decoded=True)
         if not results:
             return []
-            
-        telemetry_points = []
+
+        try:
+            target_days = [(datetime.date.fromisoformat(d) - _EPOCH_DAY).days for d in target_dates]
+        except ValueError as e:
+            logging.error(f"Error parsing dates in VehicleAgent: {e}")
+            return []
+        samples = []
         for r in results:
             try:
-                payload = json.loads(r.get("RawJSONPayload") or "{}")
-                timestamps = payload.get("timestamps", [])
-                battery_levels = payload.get("battery_levels", [])
-                odometers = payload.get("odometers", [])
-                
-                # Check for standard keys
-                if not timestamps or not battery_levels or not odometers:
-                    continue
-                    
-                # Iterate and filter points based on mountain time dates
-                for idx, ts in enumerate(timestamps):
-                    try:
-                        # Convert to MDT date
-                        dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
-                        # Shift to MDT (UTC-6)
-                        mdt_dt = dt - datetime.timedelta(hours=6)
-                        # Remove timezone info to prevent dual-timezone offset like +00:00-06:00
-                        mdt_naive = mdt_dt.replace(tzinfo=None)
-                        mdt_date_str = mdt_naive.strftime("%Y-%m-%d")
-                        
-                        # Apply date filter
-                        if target_dates and mdt_date_str not in target_dates:
-                            continue
-                            
-                        soc = float(battery_levels[idx] if idx < len(battery_levels) else 0.0)
-                        odo = float(odometers[idx] if idx < len(odometers) else 0.0)
-                        
-                        # Calculate dynamic efficiency based on real-time voltage, current, and speed
-                        eff = 250.0 # baseline fallback
-                        speeds = payload.get("speeds", [])
-                        pack_current = payload.get("pack_current", [])
-                        pack_voltage = payload.get("pack_voltage", [])
-                        
-                        if idx < len(speeds) and idx < len(pack_current) and idx < len(pack_voltage):
-                            speed = float(speeds[idx] or 0.0)
-                            curr = float(pack_current[idx] or 0.0)
-                            volt = float(pack_voltage[idx] or 0.0)
-                            
-                            # Power in Watts (discharging is negative current)
-                            power_w = abs(curr) * volt
-                            if speed > 2.0:
-                                calculated_eff = power_w / speed
-                                # Cap it between 100.0 and 800.0 to keep the graph beautifully scaled
-                                eff = max(100.0, min(800.0, calculated_eff))
-                            else:
-                                # When stationary, use standard baseline
-                                eff = 250.0
-                        
-                        point_data = {
-                            "timestamp": mdt_naive.isoformat() + "-06:00",
-                            "soc_pct": soc,
-                            "efficiency_wh_per_mi": round(eff, 1),
-                            "odometer_mi": odo
-                        }
-                        # Enforce schema using Pydantic
-                        validated = VehicleModel(**point_data)
-                        telemetry_points.append(validated.model_dump())
-                    except Exception as ex:
-                        continue
+                drive = _vehicle_samples(r["Payload"], target_days)
             except Exception as err:
                 logging.error(f"Error parsing drive telemetry payload: {err}")
                 continue
-                
-        # Sort chronologically
-        telemetry_points.sort(key=lambda x: x["timestamp"])
-        
-        # Limit to prevent large payloads (e.g. max 100 points)
-        return telemetry_points[:100]
+            if drive is not None:
+                samples.append(drive)
+        if not samples:
+            return []
+
+        ts, soc, eff, odo = (np.concatenate(cols) for cols in zip(*samples))
+        # Chronological, first 100 points (prevents large payloads)
+        telemetry_points = []
+        for i in np.argsort(ts, kind="stable")[:100]:
+            dt = datetime.datetime.fromtimestamp(float(ts[i]), tz=datetime.timezone.utc)
+            # Shift to MDT (UTC-6), without tzinfo so the offset isn't doubled
+            mdt_naive = (dt - datetime.timedelta(hours=6)).replace(tzinfo=None)
+            validated = VehicleModel(
+                timestamp=mdt_naive.isoformat() + "-06:00",
+                soc_pct=float(soc[i]),
+                efficiency_wh_per_mi=round(float(eff[i]), 1),
+                odometer_mi=float(odo[i]),
+            )
+            telemetry_points.append(validated.model_dump())
+        return telemetry_points
+
+
+_EPOCH_DAY = datetime.date(1970, 1, 1)
+
+
+def _fit(values, n: int, fill: float):
+    """`values` as a float64 array of length n (None -> NaN), padded with `fill`."""
+    arr = np.asarray(values if values is not None else [], dtype=np.float64)[:n]
+    if len(arr) < n:
+        arr = np.concatenate([arr, np.full(n - len(arr), fill)])
+    return arr
+
+
+def _vehicle_samples(payload: Dict[str, Any], target_days: List[int]):
+    """(timestamps, soc, efficiency, odometer) arrays for one drive's usable
+    samples, or None when it lacks the timestamp / battery / odometer channels.
+
+    A sample is dropped when its timestamp, SOC or odometer is missing, or
+    when its MDT date is outside `target_days` (days since 1970-01-01).
+    Efficiency is |pack current| x pack voltage / speed, clamped to 100-800
+    Wh/mi while moving (> 2 mph) and 250 otherwise.
+    """
+    timestamps = payload.get("timestamps")
+    battery_levels = payload.get("battery_levels")
+    odometers = payload.get("odometers")
+    if any(v is None or len(v) == 0 for v in (timestamps, battery_levels, odometers)):
+        return None
+
+    ts = np.asarray(timestamps, dtype=np.float64)
+    n = len(ts)
+    # Past the end of a channel the sample reads as 0
+    soc = _fit(battery_levels, n, 0.0)
+    odo = _fit(odometers, n, 0.0)
+
+    eff = np.full(n, 250.0)  # baseline fallback (stationary, or no power channels)
+    speeds = payload.get("speeds")
+    pack_current = payload.get("pack_current")
+    pack_voltage = payload.get("pack_voltage")
+    if speeds is not None and pack_current is not None and pack_voltage is not None:
+        m = min(n, len(speeds), len(pack_current), len(pack_voltage))
+        speed = np.nan_to_num(_fit(speeds, m, 0.0))
+        # Power in Watts (discharging is negative current)
+        power_w = np.abs(np.nan_to_num(_fit(pack_current, m, 0.0))) * np.nan_to_num(_fit(pack_voltage, m, 0.0))
+        moving = speed > 2.0
+        head = eff[:m]
+        # Cap between 100.0 and 800.0 to keep the graph scaled
+        head[moving] = np.clip(power_w[moving] / speed[moving], 100.0, 800.0)
+
+    keep = ~(np.isnan(ts) | np.isnan(soc) | np.isnan(odo))
+    if target_days:
+        mdt_day = np.floor((ts - 6 * 3600) / 86400)
+        keep &= np.isin(mdt_day, target_days)
+    return ts[keep], soc[keep], eff[keep], odo[keep]
 
 
 # ─── MASTER ORCHESTRATOR ─────────────────────────────────────────────────────
@@ -1,8 +1,8 @@
 import os
-import requests
 import logging
 from datetime import datetime
 from .graph import GraphClient
+from . import http_pool
 
 # Stripe metadata is the paid path's ONLY store between checkout and finalize,
 # and it caps each VALUE at 500 characters — well under five autocompleted
@@ -107,7 +107,7 @@ class BookingsClient:
             "Content-Type": "application/json"
         }
         
-        resp = requests.post(url, headers=headers, json=payload)
+        resp = http_pool.post(url, headers=headers, json=payload)
         if not resp.ok:
             logging.error(f"Bookings Availability Error: {resp.text}")
             resp.raise_for_status()
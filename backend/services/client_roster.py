@@ -0,0 +1,112 @@
+"""
+Known private-client roster, cached per process and compiled into one matcher.
+
+`DatabaseClient.get_known_client_names` scans every `INV-%` RideID, and the
+private-booking sync used to call it once per booking and then test every
+client name against every booking and every drive with `in`. The roster now
+changes only when an invoice with a new client token is written, so:
+
+  * `get_client_matcher()` loads it once and caches the compiled matcher for
+    CLIENT_ROSTER_TTL_SEC (other instances' new invoices show up within that).
+    A failed load falls back to DEFAULT_CLIENT_NAMES without caching them,
+    so the next call retries the database.
+  * `invalidate_client_roster()` drops it; DatabaseClient calls it whenever
+    it saves an `INV-` ride, so this instance sees a new client immediately.
+  * ClientMatcher compiles every name into a single regex alternation,
+    longest name first. `find` is one pass per string; `names_in` returns
+    every roster name occurring in a string, also in one pass.
+
+Matching keeps the old substring semantics ("ryan" matches "bryant"); where
+the old loop took whichever matching name a set happened to yield first,
+`find` deterministically takes the leftmost, then longest, match.
+"""
+import os
+import re
+import threading
+import time
+from typing import FrozenSet, Iterable, Optional
+
+CLIENT_ROSTER_TTL_SEC = int(os.environ.get("CLIENT_ROSTER_TTL_SEC", "600"))
+
+# Seed roster, also used as-is when the database can't be read.
+DEFAULT_CLIENT_NAMES = (
+    "jackie", "jacquelyn", "jacquelyn heslep", "esmeralda", "daniel", "ryan", "lauren",
+    "terrance", "lorynne", "nancy", "adrienne", "david", "emerson",
+)
+
+# Canonical Tessie classification for clients known under several names.
+_CANONICAL = {
+    "jackie": "Jacquelyn Heslep",
+    "jacquelyn": "Jacquelyn Heslep",
+    "jacquelyn heslep": "Jacquelyn Heslep",
+    "david": "David Berezov",
+    "david berezov": "David Berezov",
+}
+
+
+class ClientMatcher:
+    """Single-pass lookup of lowercase client names inside text."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names: FrozenSet[str] = frozenset(n for n in names if n)
+        ordered = sorted(self.names, key=lambda n: (-len(n), n))
+        # Every roster name contained in each name, itself included: the
+        # regex reports only the longest name starting at a position, and any
+        # shorter name starting there is a prefix of it.
+        self._contained = {n: frozenset(m for m in ordered if m in n) for n in ordered}
+        alternation = "|".join(re.escape(n) for n in ordered)
+        self._first = re.compile(alternation) if ordered else None
+        self._every = re.compile(f"(?=({alternation}))") if ordered else None
+
+    def find(self, text: str) -> Optional[str]:
+        """The leftmost (then longest) roster name occurring in `text`."""
+        if not self._first or not text:
+            return None
+        m = self._first.search(text)
+        return m.group(0) if m else None
+
+    def names_in(self, text: str) -> FrozenSet[str]:
+        """Every roster name occurring anywhere in `text`."""
+        if not self._every or not text:
+            return frozenset()
+        found = set()
+        for m in self._every.finditer(text):
+            found |= self._contained[m.group(1)]
+        return frozenset(found)
+
+    @staticmethod
+    def classification(name: str) -> str:
+        """Tessie classification for a matched client name."""
+        return _CANONICAL.get(name.lower(), name.capitalize())
+
+
+_lock = threading.Lock()
+_cached: Optional[ClientMatcher] = None
+_cached_at = 0.0
+
+
+def get_client_matcher(db=None) -> ClientMatcher:
+    """The cached roster matcher, (re)loaded from `db` when missing or older
+    than CLIENT_ROSTER_TTL_SEC."""
+    global _cached, _cached_at
+    with _lock:
+        if _cached is not None and time.monotonic() - _cached_at < CLIENT_ROSTER_TTL_SEC:
+            return _cached
+    if db is None:
+        from services.database import DatabaseClient
+        db = DatabaseClient()
+    try:
+        names = db.get_known_client_names(raise_errors=True)
+    except Exception:
+        # Not cached: the next call retries the database.
+        return ClientMatcher(DEFAULT_CLIENT_NAMES)
+    matcher = ClientMatcher(names)
+    with _lock:
+        _cached, _cached_at = matcher, time.monotonic()
+    return matcher
+
+
+def invalidate_client_roster() -> None:
+    global _cached
+    with _lock:
+        _cached = None
@@ -3,6 +3,7 @@ import datetime
 import re
 import json
 import os
+import threading
 from zoneinfo import ZoneInfo
 from typing import Optional
 
@@ -23,6 +24,9 @@ from services.graph import GraphClient
 from services.uber_matcher import UberMatcherService
 from services.database import DatabaseClient
 from services.datetime_utils import get_operational_window
+from services.client_roster import get_client_matcher
+from services.ocr_cache import OcrCache, content_hash, item_version
+from services.onedrive_delta import DriveDeltaSync
 
 log = logging.getLogger(__name__)
 
@@ -34,9 +38,34 @@ class CloudWatcherService:
         self.graph = GraphClient()
         self.uber = UberMatcherService()
         self.db = DatabaseClient()
+        self.ocr_cache = OcrCache(self.db)
+        self._delta = None
         self.camera_roll_path = "Pictures/Camera Roll"
         self.target_root = "Uber Driver"
 
+    # ─────────────────────────────────────────────────────────────────────────
+    # Folder listings via the Graph delta mirror (services/onedrive_delta.py)
+    # ─────────────────────────────────────────────────────────────────────────
+    def _drive_delta(self) -> DriveDeltaSync:
+        if self._delta is None:
+            self._delta = DriveDeltaSync.for_graph_client(self.graph)
+        return self._delta
+
+    def _list_folder(self, path: str, logs: list) -> list:
+        """Files in `path` from the delta mirror (one delta round trip when
+        nothing changed); a live, paginated Graph listing if the mirror is
+        unavailable or does not know the folder yet."""
+        try:
+            delta = self._drive_delta()
+            delta.sync()
+            files = delta.list_folder(path)
+            if files is not None:
+                return files
+        except Exception as e:
+            log.warning(f"Delta listing failed for {path}: {e}")
+            logs.append(f"WARN: Delta sync unavailable ({e}); listing '{path}' directly.")
+        return self.graph.list_folder_files(path)
+
     # ─────────────────────────────────────────────────────────────────────────
     # PUBLIC: Original route-based scan (used by trigger-cloud-scan endpoint)
     # ─────────────────────────────────────────────────────────────────────────
@@ -85,14 +114,34 @@ class CloudWatcherService:
         for path in scan_paths:
             all_results["logs"].append(f"SCAN: Checking OneDrive path '{path}'...")
             try:
-                files = self.graph.list_folder_files(path)
+                # The inbox folders are scanned incrementally: only files added
+                # or changed since this folder's last acknowledged scan.
+                pending_round = None
+                if not explicit_path and path in (self.camera_roll_path, "Pictures/Screenshots"):
+                    try:
+                        files, pending_round = self._drive_delta().pending(path)
+                        all_results["logs"].append(f"INFO: Delta sync — {len(files)} new/changed item(s) in '{path}'.")
+                    except Exception as e:
+                        log.warning(f"Delta sync failed for {path}: {e}")
+                        all_results["logs"].append(f"WARN: Delta sync unavailable ({e}); listing '{path}' directly.")
+                        files = self.graph.list_folder_files(path)
+                else:
+                    files = self._list_folder(path, all_results["logs"])
                 if not files:
                     all_results["logs"].append(f"INFO: Folder '{path}' is empty or not found.")
+                    if pending_round is not None:
+                        self._drive_delta().ack(path, pending_round)
                     continue
 
                 all_results["logs"].append(f"INFO: Found {len(files)} items in '{path}'.")
                 all_results["scanned"] += len(files)
+                errors_before = all_results["errors"]
                 self._process_files(files, path, all_results, target_date)
+                # A file that errored (download/OCR failure) is re-delivered by
+                # leaving the cursor where it was. Unmatched files are consumed;
+                # they come back when they change, or via an explicit-path scan.
+                if pending_round is not None and all_results["errors"] == errors_before:
+                    self._drive_delta().ack(path, pending_round)
             except Exception as e:
                 log.warning(f"Could not list folder {path}: {e}")
                 all_results["logs"].append(f"WARN: Could not access '{path}': {str(e)}")
@@ -133,7 +182,7 @@ class CloudWatcherService:
 
         # 1. List the folder
         try:
-            files = self.graph.list_folder_files(explicit_path)
+            files = self._list_folder(explicit_path, logs)
         except Exception as e:
             return {"success": False, "error": str(e), "trips": [], "logs": [f"ERROR: {e}"]}
 
@@ -166,18 +215,57 @@ class CloudWatcherService:
         # 2. OCR each file in parallel — drastically reduces wait time for large day folders
         from concurrent.futures import ThreadPoolExecutor, as_completed
 
+        # OCR text and GPT card JSON are cached per item (services/ocr_cache.py),
+        # so a rescan only downloads and OCRs files that are new or changed.
+        cached_rows = self.ocr_cache.get_many(f.get("id") for f in image_files)
+        cache_stats = {"hit": 0, "miss": 0}
+        stats_lock = threading.Lock()
+
         def _ocr_one(file):
+            item_id = file.get("id")
+            version = item_version(file)
+            st = {"content": None, "sha256": None, "text": None, "card": None, "dirty": False}
+            cached = cached_rows.get(item_id)
+            if cached and version and cached["version"] == version:
+                st.update(sha256=cached["sha256"], text=cached["text"], card=cached["card"])
+            try:
+                if st["text"] is None:
+                    st["content"] = self.graph.get_file_content(item_id)
+                    st["sha256"] = content_hash(st["content"])
+                    by_hash = self.ocr_cache.get_by_hash(st["sha256"])
+                    if by_hash:
+                        st.update(text=by_hash["text"], card=by_hash["card"], dirty=True)
+            except Exception as e:
+                log.error(f"Error processing {file.get('name', '')}: {e}")
+                return None, f"ERROR: '{file.get('name', '')}' — {e}"
+            with stats_lock:
+                cache_stats["hit" if st["text"] is not None else "miss"] += 1
+            try:
+                return _ocr_parse(file, st)
+            finally:
+                if st["dirty"] and st["sha256"]:
+                    self.ocr_cache.put(item_id, version, st["sha256"], date_str,
+                                       file.get("name", ""), st["text"], st["card"])
+
+        def _ocr_parse(file, st):
             name = file.get("name", "")
             item_id = file.get("id")
+
+            def _content():
+                if st["content"] is None:
+                    st["content"] = self.graph.get_file_content(item_id)
+                return st["content"]
+
             try:
-                content = self.graph.get_file_content(item_id)
-                
                 # ── Step B: Azure Vision for literal text (timestamps, routes) ──
-                text_for_stats = ""
-                try:
-                    text_for_stats = self.uber.ocr.analyze_image_bytes(content) or ""
-                except Exception as ae:
-                    log.warning(f"Azure OCR failed for {name}: {ae}")
+                text_for_stats = st["text"]
+                if text_for_stats is None:
+                    text_for_stats = ""
+                    try:
+                        text_for_stats = self.uber.ocr.analyze_image_bytes(_content()) or ""
+                        st.update(text=text_for_stats, dirty=True)
+                    except Exception as ae:
+                        log.warning(f"Azure OCR failed for {name}: {ae}")
 
                 text_lower = text_for_stats.lower()
 
@@ -311,51 +399,55 @@ class CloudWatcherService:
                 vdata = {}
 
                 try:
-                    _oai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-                    b64 = base64.b64encode(content).decode("utf-8")
-                    vision_resp = _oai.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": (
-                                        "This is a screenshot from the Uber Driver app. It could be a completed trip receipt OR a daily/weekly summary screen.\n"
-                                        "Extract the data and return ONLY a JSON object with these keys:\n"
-                                        "  is_uber_receipt: true if this is a single trip receipt\n"
-                                        "  is_uber_summary: true if this is a daily/weekly summary screen showing total online time\n"
-                                        "  you_earned: (for receipt) the large dollar amount at the very TOP\n"
-                                        "  your_earnings: (for receipt) the amount next to 'Your earnings'\n"
-                                        "  tip: (for receipt) the amount next to 'Tip' or 'Added tip'\n"
-                                        "  rider_payment: (for receipt) the amount next to 'Rider payment'\n"
-                                        "  trip_time: (for receipt) the date and time (e.g. 'May 8, 2026 · 5:40 AM')\n"
-                                        "  online_time: (for summary) the total 'Online' time exactly as shown (e.g. '6h 15m')\n"
-                                        "  duration_min: (for receipt) trip duration in minutes as a number (e.g. 24 or 24.5)\n"
-                                        "  distance_mi: (for receipt) trip distance in miles as a number (e.g. 12.5)\n"
-                                        "  pickup: (for receipt) pickup address or location if visible\n"
-                                        "  dropoff: (for receipt) dropoff address or location if visible\n"
-                                        "  service_type: (for receipt) service type like 'UberX', 'Comfort', 'UberXL', 'Black' if visible\n"
-                                        "Return ONLY valid JSON, no markdown."
-                                    )
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{b64}",
-                                        "detail": "high"
+                    if st["card"] is not None:
+                        vdata = st["card"]
+                    else:
+                        _oai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+                        b64 = base64.b64encode(_content()).decode("utf-8")
+                        vision_resp = _oai.chat.completions.create(
+                            model="gpt-4o-mini",
+                            messages=[{
+                                "role": "user",
+                                "content": [
+                                    {
+                                        "type": "text",
+                                        "text": (
+                                            "This is a screenshot from the Uber Driver app. It could be a completed trip receipt OR a daily/weekly summary screen.\n"
+                                            "Extract the data and return ONLY a JSON object with these keys:\n"
+                                            "  is_uber_receipt: true if this is a single trip receipt\n"
+                                            "  is_uber_summary: true if this is a daily/weekly summary screen showing total online time\n"
+                                            "  you_earned: (for receipt) the large dollar amount at the very TOP\n"
+                                            "  your_earnings: (for receipt) the amount next to 'Your earnings'\n"
+                                            "  tip: (for receipt) the amount next to 'Tip' or 'Added tip'\n"
+                                            "  rider_payment: (for receipt) the amount next to 'Rider payment'\n"
+                                            "  trip_time: (for receipt) the date and time (e.g. 'May 8, 2026 · 5:40 AM')\n"
+                                            "  online_time: (for summary) the total 'Online' time exactly as shown (e.g. '6h 15m')\n"
+                                            "  duration_min: (for receipt) trip duration in minutes as a number (e.g. 24 or 24.5)\n"
+                                            "  distance_mi: (for receipt) trip distance in miles as a number (e.g. 12.5)\n"
+                                            "  pickup: (for receipt) pickup address or location if visible\n"
+                                            "  dropoff: (for receipt) dropoff address or location if visible\n"
+                                            "  service_type: (for receipt) service type like 'UberX', 'Comfort', 'UberXL', 'Black' if visible\n"
+                                            "Return ONLY valid JSON, no markdown."
+                                        )
+                                    },
+                                    {
+                                        "type": "image_url",
+                                        "image_url": {
+                                            "url": f"data:image/jpeg;base64,{b64}",
+                                            "detail": "high"
+                                        }
                                     }
-                                }
-                            ]
-                        }],
-                        max_tokens=300,
-                        temperature=0,
-                        timeout=15.0
-                    )
-                    raw = vision_resp.choices[0].message.content.strip()
-                    raw = re.sub(r"^```(?:json)?\s*", "", raw)
-                    raw = re.sub(r"\s*```$", "", raw)
-                    vdata = _json.loads(raw)
+                                ]
+                            }],
+                            max_tokens=300,
+                            temperature=0,
+                            timeout=15.0
+                        )
+                        raw = vision_resp.choices[0].message.content.strip()
+                        raw = re.sub(r"^```(?:json)?\s*", "", raw)
+                        raw = re.sub(r"\s*```$", "", raw)
+                        vdata = _json.loads(raw)
+                        st.update(card=vdata, dirty=True)
 
                     if vdata.get("is_uber_summary"):
                         ot = vdata.get("online_time", "Unknown")
@@ -495,6 +587,7 @@ class CloudWatcherService:
                 if entry:
                     raw_cards.append(entry)
 
+        logs.append(f"INFO: OCR cache — {cache_stats['hit']} hit(s), {cache_stats['miss']} miss(es).")
 
         if not raw_cards:
             logs.append("INFO: No parseable trip cards found.")
@@ -581,6 +674,9 @@ class CloudWatcherService:
         cursor = conn.cursor()
 
         try:
+            # Keep Rides.DailyRollup in step: the day(s) these TRIP rows sit on
+            # now, and (after the MERGE below) the days they land on.
+            self.db.mark_rides_dirty(cursor, "RideID LIKE ?", (f"TRIP-{date_compact}-%",))
             cursor.execute("""
                 UPDATE Rides.Rides
                 SET DeletedAt = GETUTCDATE(),
@@ -625,6 +721,8 @@ class CloudWatcherService:
                             WHERE RideID = ?
                         """, (cls, tt, r_id))
                         reset_count += 1
+                    self.db.mark_rides_dirty(cursor, f"RideID IN ({','.join('?' * len(to_reset))})",
+                                             tuple(r_id for r_id, _ in to_reset))
                     logs.append(f"INFO: Reset {reset_count} previously matched TESSIE drives back to original states.")
             except Exception as reset_err:
                 logs.append(f"WARN: Failed to reset matched Tessie drives: {reset_err}")
@@ -801,6 +899,11 @@ class CloudWatcherService:
                     "filename": c["filename"],
                 })
 
+            self.db.mark_rides_dirty(cursor, "RideID LIKE ?", (f"TRIP-{date_compact}-%",))
+            if matched_tessie_ids:
+                self.db.mark_rides_dirty(cursor, f"RideID IN ({','.join('?' * len(matched_tessie_ids))})",
+                                         tuple(matched_tessie_ids))
+
             # Call Private Booking Sync to link INV- records with Tessie drives!
             self.sync_private_bookings_for_date(date_str, cursor, logs)
 
@@ -938,7 +1041,7 @@ class CloudWatcherService:
 
         # 1. List the folder
         try:
-            files = self.graph.list_folder_files(explicit_path)
+            files = self._list_folder(explicit_path, logs)
         except Exception as e:
             return {"success": False, "error": str(e), "expenses": [], "logs": [f"ERROR: {e}"]}
 
@@ -1158,6 +1261,13 @@ class CloudWatcherService:
         cursor.execute("SELECT ExpenseID FROM Rides.ManualExpenses WHERE ExpenseID LIKE ?", (f"EXP-{date_compact}-%",))
         existing_rows = cursor.fetchall()
         if existing_rows:
+            # Mark the rows' own days, which can differ from date_str; the
+            # re-saved expenses below mark their new days via save_manual_expense.
+            self.db._mark_rollup_dirty(
+                cursor,
+                "SELECT CAST(Timestamp AS DATE) AS RollupDate FROM Rides.ManualExpenses WHERE ExpenseID LIKE ?",
+                (f"EXP-{date_compact}-%",),
+            )
             cursor.execute("DELETE FROM Rides.ManualExpenses WHERE ExpenseID LIKE ?", (f"EXP-{date_compact}-%",))
             conn.commit()
             logs.append(f"INFO: Cleared {len(existing_rows)} existing expense records in database for {date_str}.")
@@ -1333,7 +1443,7 @@ class CloudWatcherService:
             try:
                 content = self.graph.get_file_content(item_id)
                 results["logs"].append(f"OCR: Analyzing '{name}' ({len(content)} bytes)...")
-                process_result = self.uber.process_image_bytes(content, name)
+                process_result = self.uber.process_image_bytes(content, name, item_id=item_id, source="onedrive")
 
                 status = process_result.get("status")
                 if status == "MATCHED":
@@ -1506,6 +1616,32 @@ class CloudWatcherService:
 
             # Pool of drives still available for 1:1 matching
             unmatched_drives = list(all_tessie_drives)
+
+            def get_tag(drive) -> str:
+                try:
+                    sc_str = drive.get("Sidecar_Artifact_JSON")
+                    if sc_str:
+                        sc = json.loads(sc_str)
+                        if "Sidecar_Artifact_JSON" in sc:
+                            nested = json.loads(sc["Sidecar_Artifact_JSON"])
+                            return (nested.get("tag") or "").lower()
+                        return (sc.get("tag") or "").lower()
+                except:
+                    pass
+                return ""
+
+            # Resolve each drive's client names once (cached roster, one
+            # regex pass per string) instead of per booking per client.
+            clients = get_client_matcher(self.db)
+            for drive in all_tessie_drives:
+                drive["_tag"] = get_tag(drive)
+                drive["_class_clients"] = clients.names_in((drive["Classification"] or "").lower())
+                drive["_tag_clients"] = clients.names_in(drive["_tag"])
+
+            # Every write below stays inside this operational window and none
+            # moves Timestamp_Start, so one mark covers the rollup.
+            self.db.mark_rides_dirty(cursor, "Timestamp_Start >= ? AND Timestamp_Start < ?",
+                                     (op_window_start, op_window_end))
                 
             # 3. Process each booking
             for booking in bookings:
@@ -1525,33 +1661,14 @@ class CloudWatcherService:
                 if "jacquelyn" in search_str:
                     search_str += " jackie"
                 
-                client_name = None
-                try:
-                    known_clients = self.db.get_known_client_names()
-                except Exception:
-                    known_clients = ["jackie", "esmeralda", "daniel", "ryan", "lauren", "terrance", "lorynne", "nancy", "adrienne", "david", "emerson"]
-                for client in known_clients:
-                    if client in search_str:
-                        client_name = client.capitalize()
-                        break
-
-                if client_name:
-                    if client_name.lower() in ["jackie", "jacquelyn", "jacquelyn heslep"]:
-                        tessie_class = "Jacquelyn Heslep"
-                    elif client_name.lower() in ["david", "david berezov"]:
-                        tessie_class = "David Berezov"
-                    else:
-                        tessie_class = client_name
-                else:
-                    tessie_class = "Private_Trip"
+                client = clients.find(search_str)
+                client_name = client.capitalize() if client else None
+                tessie_class = clients.classification(client) if client else "Private_Trip"
 
                 if is_bundle and client_name:
                     # ── BUNDLE: Link ALL drives tagged with this client's name to the INV- record ──
                     # These drives already have the client tag from the Tessie app (e.g. 'Jackie').
-                    client_drives = [
-                        d for d in all_tessie_drives
-                        if client_name.lower() in (d["Classification"] or "").lower()
-                    ]
+                    client_drives = [d for d in all_tessie_drives if client in d["_class_clients"]]
 
                     if not client_drives:
                         # Fallback: proximity match the first drive if no client-tagged drives found
@@ -1609,30 +1726,14 @@ class CloudWatcherService:
                     # ── STANDARD 1:1 PROXIMITY MATCH ──
                     best_drive = None
                     best_diff_seconds = 999999
-                    
-                    def get_tag(drive) -> str:
-                        try:
-                            sc_str = drive.get("Sidecar_Artifact_JSON")
-                            if sc_str:
-                                sc = json.loads(sc_str)
-                                if "Sidecar_Artifact_JSON" in sc:
-                                    nested = json.loads(sc["Sidecar_Artifact_JSON"])
-                                    return (nested.get("tag") or "").lower()
-                                return (sc.get("tag") or "").lower()
-                        except:
-                            pass
-                        return ""
 
                     # 1. Try to find drives that explicitly match the client name first (and are not pickup legs)
                     client_drives = []
                     if client_name:
                         client_drives = [
                             d for d in unmatched_drives
-                            if (
-                                client_name.lower() in (d["Classification"] or "").lower()
-                                or client_name.lower() in get_tag(d)
-                            )
-                            and not any(w in (d["Classification"] or "").lower() or w in get_tag(d) for w in ["pickup", "en route", "charging", "charge"])
+                            if (client in d["_class_clients"] or client in d["_tag_clients"])
+                            and not any(w in (d["Classification"] or "").lower() or w in d["_tag"] for w in ["pickup", "en route", "charging", "charge"])
                             and not (float(d.get("Distance_mi") or 0) < 1.0 and booking.get("Fare", 0) > 0)
                             and d.get("TripType") != "Uber"
                             and (d["Classification"] or "").lower() != "uber_matched"
@@ -1656,7 +1757,7 @@ class CloudWatcherService:
                         # 2. Fall back to normal proximity matching, but skip pickup legs, charging, short staging runs (< 1.0 mi), and Uber drives
                         for drive in unmatched_drives:
                             drive_class = (drive.get("Classification") or "").lower()
-                            drive_tag = get_tag(drive)
+                            drive_tag = drive["_tag"]
                             drive_dist = float(drive.get("Distance_mi") or 0)
                             
                             # Ingestion Guardrail: Skip Uber-specific drives to prevent misattribution to Private bookings
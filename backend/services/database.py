@@ -3,7 +3,12 @@ import logging
 import pyodbc
 import datetime
 import json
+import re
 import uuid
+from contextlib import contextmanager
+
+from services.client_roster import DEFAULT_CLIENT_NAMES, invalidate_client_roster
+from services.schema_migrations import schema_verified
 
 # How long a cabin access code stays valid, measured from the scheduled pickup.
 # This is a SECURITY parameter, not a convenience one: the cabin allow-list
@@ -21,6 +26,22 @@ CABIN_TOKEN_HOURS = 4
 INACTIVE_CLIENTS = ("JACKIE", "ESMERALDA", "ESME", "TERRANCE", "DIANA")
 
 
+def _iso_date(value) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _luis_received_dates(rows) -> dict:
+    """Service date -> date the money for it actually arrived, from
+    (Date, Notes) rows of real Luis payments. See get_luis_received_date_on."""
+    received = {}
+    for service_date, notes in rows:
+        service_date = _iso_date(service_date)
+        match = re.search(r"Reassigned from (\d{4}-\d{2}-\d{2})", notes or "")
+        arrived = match.group(1) if match else service_date
+        received[service_date] = max(received.get(service_date, arrived), arrived)
+    return received
+
+
 def inactive_invoice_predicate(column: str = "RideID") -> str:
     """SQL fragment excluding invoices belonging to inactive clients."""
     return " AND ".join(
@@ -28,11 +49,82 @@ def inactive_invoice_predicate(column: str = "RideID") -> str:
     )
 
 
+# Session temp table for DatabaseClient.save_trips_bulk. Column types mirror
+# what save_trip binds; Timestamp_Start stays text and converts on MERGE.
+_TRIP_STAGE_DDL = """
+CREATE TABLE #TripStage (
+    RideID                NVARCHAR(100) NOT NULL PRIMARY KEY,
+    TripType              NVARCHAR(50)  NULL,
+    Timestamp_Start       NVARCHAR(40)  NULL,
+    Pickup_Location       NVARCHAR(500) NULL,
+    Dropoff_Location      NVARCHAR(500) NULL,
+    Distance_mi           FLOAT         NULL,
+    Duration_min          FLOAT         NULL,
+    Tessie_DriveID        NVARCHAR(100) NULL,
+    Tessie_Distance       FLOAT         NULL,
+    Fare                  FLOAT         NULL,
+    Tip                   FLOAT         NULL,
+    Driver_Earnings       FLOAT         NULL,
+    Platform_Cut          FLOAT         NULL,
+    Start_SOC             FLOAT         NULL,
+    End_SOC               FLOAT         NULL,
+    Energy_Used_kWh       FLOAT         NULL,
+    Efficiency_Wh_mi      FLOAT         NULL,
+    Source_URL            NVARCHAR(1000) NULL,
+    Classification        NVARCHAR(200) NULL,
+    Tessie_Label          NVARCHAR(500) NULL,
+    Sidecar_Artifact_JSON NVARCHAR(MAX) NULL,
+    PaymentStatus         NVARCHAR(20)  NULL
+)
+"""
+
+# Operational day of a Rides.Rides timestamp: the 04:00-to-04:00 window of
+# services.datetime_utils.get_operational_window, as a DATE.
+_OPERATIONAL_DAY = "CAST(DATEADD(hour, -4, {col}) AS DATE)"
+
+# Marks the days produced by a `SELECT ... AS RollupDate` dirty in
+# Rides.DailyRollup. DirtyVersion is bumped on every mark so a refresh that
+# read a day before a concurrent write committed can tell, and leaves it dirty.
+_MARK_ROLLUP_DIRTY = """
+MERGE INTO Rides.DailyRollup WITH (HOLDLOCK) AS target
+USING (SELECT DISTINCT RollupDate FROM ({days}) AS d WHERE RollupDate IS NOT NULL) AS source
+ON (target.RollupDate = source.RollupDate)
+WHEN MATCHED THEN
+    UPDATE SET IsDirty = 1, DirtyVersion = target.DirtyVersion + 1
+WHEN NOT MATCHED THEN
+    INSERT (RollupDate, IsDirty, DirtyVersion) VALUES (source.RollupDate, 1, 1);
+"""
+
+
 class DatabaseClient:
     def __init__(self):
         self.connection_string = os.environ.get("SQL_CONNECTION_STRING")
 
     def get_connection(self):
+        """Borrow a connection from the process-wide pool (services/db_pool.py).
+
+        Returns None when the database is unreachable, exactly as before.
+        `close()` on the result returns it to the pool, so existing
+        try/finally call sites need no changes.
+        """
+        from services.db_pool import get_pool
+        key = "|".join((os.environ.get("SQL_SERVER_NAME") or "",
+                        os.environ.get("SQL_DATABASE_NAME") or "",
+                        self.connection_string or ""))
+        return get_pool(key, self._open_connection).borrow()
+
+    @contextmanager
+    def connection(self):
+        """`with db.connection() as conn:` — conn is None if the DB is down."""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _open_connection(self):
+        """Open a new raw pyodbc connection. Only the pool should call this."""
         server = os.environ.get("SQL_SERVER_NAME")
         database = os.environ.get("SQL_DATABASE_NAME")
 
@@ -68,7 +160,15 @@ class DatabaseClient:
             logging.error(f"SQL Connection Error: {e}")
             return None
 
+    # The DDL helpers below are schema migrations (services/schema_migrations.py).
+    # Each `_ensure_*` gate runs its DDL only until this process has verified
+    # the database is migrated, so hot paths skip the catalog checks after that.
+
     def _ensure_payment_status_column(self, cursor):
+        if not schema_verified():
+            self._add_payment_status_column(cursor)
+
+    def _add_payment_status_column(self, cursor):
         cursor.execute(
             "IF COL_LENGTH('Rides.Rides', 'PaymentStatus') IS NULL "
             "ALTER TABLE Rides.Rides ADD PaymentStatus NVARCHAR(20) NULL"
@@ -240,43 +340,26 @@ class DatabaseClient:
         finally:
             conn.close()
 
-    def save_trip(self, trip_data):
+    # Rides.Rides columns written by save_trip / save_trips_bulk, in the order
+    # _trip_values() produces them.
+    _TRIP_COLUMNS = (
+        "RideID", "TripType", "Timestamp_Start", "Pickup_Location", "Dropoff_Location",
+        "Distance_mi", "Duration_min", "Tessie_DriveID", "Tessie_Distance",
+        "Fare", "Tip", "Driver_Earnings", "Platform_Cut",
+        "Start_SOC", "End_SOC", "Energy_Used_kWh", "Efficiency_Wh_mi",
+        "Source_URL", "Classification", "Tessie_Label", "Sidecar_Artifact_JSON",
+        "PaymentStatus",
+    )
+
+    @staticmethod
+    def _trip_ride_id(trip_data) -> str:
         import hashlib
         source_url = trip_data.get('source_url', '')
         url_hash = hashlib.md5(source_url.encode()).hexdigest()[:8]
-        ride_id = str(trip_data.get('trip_id') or trip_data.get('RideID') or f"R-{url_hash}")
+        return str(trip_data.get('trip_id') or trip_data.get('RideID') or f"R-{url_hash}")
 
-        conn = self.get_connection()
-        if not conn: return
-        cursor = conn.cursor()
-
-        query = """
-        MERGE INTO Rides.Rides AS target
-        USING (SELECT ? AS RideID) AS source
-        ON (target.RideID = source.RideID)
-        WHEN MATCHED THEN
-            UPDATE SET 
-                TripType = ?, Timestamp_Start = ?, Pickup_Location = ?, Dropoff_Location = ?,
-                Distance_mi = ?, Duration_min = ?, Tessie_DriveID = ?, Tessie_Distance = ?,
-                Fare = CASE WHEN ? > 0 THEN ? ELSE target.Fare END,
-                Tip = CASE WHEN ? > 0 THEN ? ELSE target.Tip END,
-                Driver_Earnings = CASE WHEN ? > 0 THEN ? ELSE target.Driver_Earnings END,
-                Platform_Cut = CASE WHEN ? <> 0 THEN ? ELSE target.Platform_Cut END,
-                Start_SOC = ?, End_SOC = ?, Energy_Used_kWh = ?, Efficiency_Wh_mi = ?,
-                Source_URL = ?, Classification = ?, Tessie_Label = COALESCE(target.Tessie_Label, ?), Sidecar_Artifact_JSON = ?,
-                PaymentStatus = COALESCE(?, target.PaymentStatus), LastUpdated = GETDATE()
-        WHEN NOT MATCHED THEN
-            INSERT (
-                RideID, TripType, Timestamp_Start, Pickup_Location, Dropoff_Location,
-                Distance_mi, Duration_min, Tessie_DriveID, Tessie_Distance,
-                Fare, Tip, Driver_Earnings, Platform_Cut,
-                Start_SOC, End_SOC, Energy_Used_kWh, Efficiency_Wh_mi,
-                Source_URL, Classification, Tessie_Label, Sidecar_Artifact_JSON,
-                PaymentStatus, CreatedAt
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE());
-        """
-        
+    @staticmethod
+    def _trip_start(trip_data):
         t_start = trip_data.get('timestamp_epoch') or trip_data.get('started_at')
         if t_start: 
             if isinstance(t_start, (int, float)):
@@ -286,30 +369,26 @@ class DatabaseClient:
             # If it's already a string or datetime, we'll let pyodbc handle it or it's handled in params
         
         # Check for pre-formatted fields from TessieSyncService
-        t_start = t_start or trip_data.get('Timestamp_Start')
+        return t_start or trip_data.get('Timestamp_Start')
 
-        fare = float(trip_data.get('fare') or 0)
-        tip = float(trip_data.get('tip') or 0)
-        earnings = float(trip_data.get('driver_total') or 0)
-        cut = float(trip_data.get('uber_cut') or 0)
+    @staticmethod
+    def _apply_ingestion_guardrail(ride_id, trip_data, existing):
+        """Resolve (Classification, TripType) for an incoming trip.
 
+        `existing` is the stored (Classification, TripType, Sidecar_Artifact_JSON)
+        row, or None for a new ride. A Private classification in the database
+        wins over a non-Private incoming one — unless the Tessie tag itself was
+        changed in the Tessie app, which is an explicit re-classification.
+        """
         # Resolve initial classification & trip type
         incoming_classification = trip_data.get('classification') or trip_data.get('Classification')
         incoming_triptype = trip_data.get('trip_type') or trip_data.get('TripType') or ('Uber' if incoming_classification == 'Uber_Core' else 'Private')
 
-        # Check existing row in DB for Ingestion Guardrails
         existing_classification = None
         existing_triptype = None
         existing_sidecar = None
-        try:
-            cursor.execute("SELECT Classification, TripType, Sidecar_Artifact_JSON FROM Rides.Rides WHERE RideID = ?", (ride_id,))
-            row = cursor.fetchone()
-            if row:
-                existing_classification = row[0]
-                existing_triptype = row[1]
-                existing_sidecar = row[2]
-        except Exception as query_err:
-            logging.warning(f"Failed to query existing ride {ride_id} classification: {query_err}")
+        if existing:
+            existing_classification, existing_triptype, existing_sidecar = existing[0], existing[1], existing[2]
 
         # Bypass guardrail if the Tessie tag itself was explicitly changed in the Tessie app
         tessie_tag_changed = False
@@ -359,36 +438,14 @@ class DatabaseClient:
             incoming_classification = existing_classification
             incoming_triptype = 'Private'
 
-        tessie_label = trip_data.get('Tessie_Label') or trip_data.get('tessie_label') or trip_data.get('tag')
-        payment_status = trip_data.get('payment_status') or trip_data.get('PaymentStatus')
+        return incoming_classification, incoming_triptype
 
-        params = (
+    def _trip_values(self, ride_id, trip_data, classification, triptype) -> tuple:
+        """One row of _TRIP_COLUMNS values for `trip_data` (raw, un-CASEd)."""
+        return (
             ride_id,
-            incoming_triptype,
-            t_start,
-            trip_data.get('start_location') or trip_data.get('pickup_place') or trip_data.get('Pickup_Location'),
-            trip_data.get('end_location') or trip_data.get('dropoff_place') or trip_data.get('Dropoff_Location'),
-            float(trip_data.get('distance_miles') or trip_data.get('Distance_mi') or 0),
-            float(trip_data.get('duration_minutes') or trip_data.get('Duration_min') or 0),
-            trip_data.get('tessie_drive_id') or trip_data.get('Tessie_DriveID'),
-            float(trip_data.get('tessie_distance') or trip_data.get('Tessie_Distance') or 0),
-            fare, fare,
-            tip, tip,
-            earnings, earnings,
-            cut, cut,
-            trip_data.get('start_soc') or trip_data.get('Start_SOC'),
-            trip_data.get('end_soc') or trip_data.get('End_SOC'),
-            trip_data.get('energy_used') or trip_data.get('Energy_Used_kWh'),
-            trip_data.get('efficiency_wh_mi') or trip_data.get('Efficiency_Wh_mi'),
-            source_url,
-            incoming_classification,
-            tessie_label,
-            json.dumps(trip_data) if trip_data else None,
-            payment_status,
-            # For INSERT:
-            ride_id,
-            incoming_triptype,
-            t_start,
+            triptype,
+            self._trip_start(trip_data),
             trip_data.get('start_location') or trip_data.get('pickup_place') or trip_data.get('Pickup_Location'),
             trip_data.get('end_location') or trip_data.get('dropoff_place') or trip_data.get('Dropoff_Location'),
             float(trip_data.get('distance_miles') or trip_data.get('Distance_mi') or 0),
@@ -403,22 +460,218 @@ class DatabaseClient:
             trip_data.get('end_soc') or trip_data.get('End_SOC'),
             trip_data.get('energy_used') or trip_data.get('Energy_Used_kWh'),
             trip_data.get('efficiency_wh_mi') or trip_data.get('Efficiency_Wh_mi'),
-            source_url,
-            incoming_classification,
-            tessie_label,
+            trip_data.get('source_url', ''),
+            classification,
+            trip_data.get('Tessie_Label') or trip_data.get('tessie_label') or trip_data.get('tag'),
             json.dumps(trip_data) if trip_data else None,
-            payment_status
+            trip_data.get('payment_status') or trip_data.get('PaymentStatus'),
         )
 
+    def save_trip(self, trip_data):
+        ride_id = self._trip_ride_id(trip_data)
+
+        conn = self.get_connection()
+        if not conn: return
+        cursor = conn.cursor()
+
+        query = """
+        MERGE INTO Rides.Rides AS target
+        USING (SELECT ? AS RideID) AS source
+        ON (target.RideID = source.RideID)
+        WHEN MATCHED THEN
+            UPDATE SET 
+                TripType = ?, Timestamp_Start = ?, Pickup_Location = ?, Dropoff_Location = ?,
+                Distance_mi = ?, Duration_min = ?, Tessie_DriveID = ?, Tessie_Distance = ?,
+                Fare = CASE WHEN ? > 0 THEN ? ELSE target.Fare END,
+                Tip = CASE WHEN ? > 0 THEN ? ELSE target.Tip END,
+                Driver_Earnings = CASE WHEN ? > 0 THEN ? ELSE target.Driver_Earnings END,
+                Platform_Cut = CASE WHEN ? <> 0 THEN ? ELSE target.Platform_Cut END,
+                Start_SOC = ?, End_SOC = ?, Energy_Used_kWh = ?, Efficiency_Wh_mi = ?,
+                Source_URL = ?, Classification = ?, Tessie_Label = COALESCE(target.Tessie_Label, ?), Sidecar_Artifact_JSON = ?,
+                PaymentStatus = COALESCE(?, target.PaymentStatus), LastUpdated = GETDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (
+                RideID, TripType, Timestamp_Start, Pickup_Location, Dropoff_Location,
+                Distance_mi, Duration_min, Tessie_DriveID, Tessie_Distance,
+                Fare, Tip, Driver_Earnings, Platform_Cut,
+                Start_SOC, End_SOC, Energy_Used_kWh, Efficiency_Wh_mi,
+                Source_URL, Classification, Tessie_Label, Sidecar_Artifact_JSON,
+                PaymentStatus, CreatedAt
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE());
+        """
+
+        # Check existing row in DB for Ingestion Guardrails
+        existing = None
         try:
+            cursor.execute("SELECT Classification, TripType, Sidecar_Artifact_JSON FROM Rides.Rides WHERE RideID = ?", (ride_id,))
+            existing = cursor.fetchone()
+        except Exception as query_err:
+            logging.warning(f"Failed to query existing ride {ride_id} classification: {query_err}")
+
+        classification, triptype = self._apply_ingestion_guardrail(ride_id, trip_data, existing)
+        row = self._trip_values(ride_id, trip_data, classification, triptype)
+        (_, _, t_start, pickup, dropoff, distance, duration, drive_id, tessie_distance,
+         fare, tip, earnings, cut, start_soc, end_soc, energy, efficiency,
+         source_url, _, tessie_label, sidecar, payment_status) = row
+
+        params = (
+            ride_id,
+            triptype, t_start, pickup, dropoff,
+            distance, duration, drive_id, tessie_distance,
+            fare, fare,
+            tip, tip,
+            earnings, earnings,
+            cut, cut,
+            start_soc, end_soc, energy, efficiency,
+            source_url, classification, tessie_label, sidecar,
+            payment_status,
+        ) + row  # For INSERT
+
+        try:
+            self._mark_ride_days_dirty(cursor, [ride_id])
             cursor.execute(query, params)
+            self._mark_ride_days_dirty(cursor, [ride_id])
             conn.commit()
             logging.info(f"Saved ride {ride_id}")
+            if str(ride_id).startswith("INV-"):
+                invalidate_client_roster()
         except Exception as e:
             logging.error(f"SQL Save Trip Error: {e}")
         finally:
             conn.close()
 
+    def save_trips_bulk(self, trips: list) -> int:
+        """Set-based save_trip for a batch (a sync day, a backfill window).
+
+        Same semantics as calling save_trip per trip — same ingestion
+        guardrail, same keep-the-existing-value rules for Fare/Tip/Earnings/
+        Platform_Cut/Tessie_Label/PaymentStatus — in a handful of round trips
+        on one connection instead of two round trips and a connection per trip:
+
+          1. one SELECT ... WHERE RideID IN (...) per _BULK_LOOKUP_CHUNK ids
+             prefetches Classification/TripType/Sidecar for the guardrail;
+          2. the resolved rows go into a session temp table in one
+             fast_executemany batch;
+          3. one MERGE applies them all.
+
+        Later duplicates of a RideID in the batch win, as they would have with
+        sequential save_trip calls. If the set-based path fails, falls back to
+        per-row save_trip so a batch is never lost to a bulk-only problem.
+        Returns the number of trips written.
+        """
+        by_id = {}
+        for trip_data in trips or []:
+            if trip_data:
+                by_id[self._trip_ride_id(trip_data)] = trip_data
+        if not by_id:
+            return 0
+
+        conn = self.get_connection()
+        if not conn:
+            return 0
+        try:
+            cursor = conn.cursor()
+            existing = {}
+            ids = list(by_id)
+            for i in range(0, len(ids), self._BULK_LOOKUP_CHUNK):
+                chunk = ids[i:i + self._BULK_LOOKUP_CHUNK]
+                cursor.execute(
+                    "SELECT RideID, Classification, TripType, Sidecar_Artifact_JSON "
+                    f"FROM Rides.Rides WHERE RideID IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for r in cursor.fetchall():
+                    existing[r[0]] = (r[1], r[2], r[3])
+
+            rows = []
+            for ride_id, trip_data in by_id.items():
+                classification, triptype = self._apply_ingestion_guardrail(
+                    ride_id, trip_data, existing.get(ride_id))
+                rows.append(self._bulk_row(self._trip_values(ride_id, trip_data, classification, triptype)))
+
+            cols = ", ".join(self._TRIP_COLUMNS)
+            cursor.execute(f"IF OBJECT_ID('tempdb..#TripStage') IS NOT NULL DROP TABLE #TripStage; {_TRIP_STAGE_DDL}")
+            cursor.fast_executemany = True
+            cursor.executemany(
+                f"INSERT INTO #TripStage ({cols}) VALUES ({', '.join('?' * len(self._TRIP_COLUMNS))})",
+                rows,
+            )
+            # Old and new operational days of every staged ride: a drive whose
+            # start moved leaves a stale total on the day it moved from.
+            staged_days = ("SELECT " + _OPERATIONAL_DAY.format(col="r.Timestamp_Start") + " AS RollupDate "
+                           "FROM Rides.Rides r JOIN #TripStage s ON s.RideID = r.RideID")
+            self._mark_rollup_dirty(cursor, staged_days)
+            cursor.execute("""
+            MERGE INTO Rides.Rides AS target
+            USING #TripStage AS source
+            ON (target.RideID = source.RideID)
+            WHEN MATCHED THEN
+                UPDATE SET 
+                    TripType = source.TripType, Timestamp_Start = source.Timestamp_Start,
+                    Pickup_Location = source.Pickup_Location, Dropoff_Location = source.Dropoff_Location,
+                    Distance_mi = source.Distance_mi, Duration_min = source.Duration_min,
+                    Tessie_DriveID = source.Tessie_DriveID, Tessie_Distance = source.Tessie_Distance,
+                    Fare = CASE WHEN source.Fare > 0 THEN source.Fare ELSE target.Fare END,
+                    Tip = CASE WHEN source.Tip > 0 THEN source.Tip ELSE target.Tip END,
+                    Driver_Earnings = CASE WHEN source.Driver_Earnings > 0 THEN source.Driver_Earnings ELSE target.Driver_Earnings END,
+                    Platform_Cut = CASE WHEN source.Platform_Cut <> 0 THEN source.Platform_Cut ELSE target.Platform_Cut END,
+                    Start_SOC = source.Start_SOC, End_SOC = source.End_SOC,
+                    Energy_Used_kWh = source.Energy_Used_kWh, Efficiency_Wh_mi = source.Efficiency_Wh_mi,
+                    Source_URL = source.Source_URL, Classification = source.Classification,
+                    Tessie_Label = COALESCE(target.Tessie_Label, source.Tessie_Label),
+                    Sidecar_Artifact_JSON = source.Sidecar_Artifact_JSON,
+                    PaymentStatus = COALESCE(source.PaymentStatus, target.PaymentStatus), LastUpdated = GETDATE()
+            WHEN NOT MATCHED THEN
+                INSERT (""" + cols + """, CreatedAt)
+                VALUES (""" + ", ".join(f"source.{c}" for c in self._TRIP_COLUMNS) + """, GETDATE());
+            """)
+            self._mark_rollup_dirty(cursor, staged_days)
+            cursor.execute("DROP TABLE #TripStage")
+            conn.commit()
+            logging.info(f"Saved {len(rows)} rides in bulk")
+            if any(str(ride_id).startswith("INV-") for ride_id in by_id):
+                invalidate_client_roster()
+            return len(rows)
+        except Exception as e:
+            logging.warning(f"Bulk trip save failed ({e}); falling back to per-row save_trip")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            conn.close()
+            conn = None
+            for trip_data in by_id.values():
+                self.save_trip(trip_data)
+            return len(by_id)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    # SQL Server caps a statement at 2100 parameters.
+    _BULK_LOOKUP_CHUNK = 1000
+
+    @staticmethod
+    def _bulk_row(values: tuple) -> tuple:
+        """Normalise a _trip_values() row for fast_executemany, which binds
+        every row with the first row's parameter types: timestamps go in as
+        text (converted on MERGE exactly as save_trip's parameters are), drive
+        ids as text, and the SOC/energy columns as float."""
+        row = list(values)
+        if isinstance(row[2], datetime.datetime):
+            row[2] = row[2].strftime('%Y-%m-%d %H:%M:%S')
+        elif row[2] is not None:
+            row[2] = str(row[2])
+        if row[7] is not None:
+            row[7] = str(row[7])
+        for i in (13, 14, 15, 16):
+            if row[i] is not None:
+                try:
+                    row[i] = float(row[i])
+                except (TypeError, ValueError):
+                    row[i] = None
+        return tuple(row)
+
     def save_charge(self, charge_data):
         conn = self.get_connection()
         if not conn: return
@@ -441,8 +694,12 @@ class DatabaseClient:
              float(charge_data.get('energy_added') or 0), float(charge_data.get('cost') or 0))
         params = (sid,) + p + (sid,) + p
 
+        charge_days = ("SELECT CAST(Start_Time AS DATE) AS RollupDate "
+                       "FROM Rides.ChargingSessions WHERE SessionID = ?")
         try:
+            self._mark_rollup_dirty(cursor, charge_days, (sid,))
             cursor.execute(query, params)
+            self._mark_rollup_dirty(cursor, charge_days, (sid,))
             conn.commit()
         except Exception as e:
             logging.error(f"SQL Save Charge Error: {e}")
@@ -624,7 +881,11 @@ class DatabaseClient:
             p = (cat, amt, note, ts, kpi, expense_type)
             params = (eid,) + p + (eid,) + p
             
+            expense_days = ("SELECT CAST(Timestamp AS DATE) AS RollupDate "
+                            "FROM Rides.ManualExpenses WHERE ExpenseID = ?")
+            self._mark_rollup_dirty(cursor, expense_days, (eid,))
             cursor.execute(query, params)
+            self._mark_rollup_dirty(cursor, expense_days, (eid,))
             conn.commit()
             logging.info(f"Saved manual expense {eid}")
         except Exception as e:
@@ -800,76 +1061,291 @@ class DatabaseClient:
         results = self.execute_query_params(query, (ride_id,))
         return results[0] if results else None
 
+    # ── Daily rollup (Rides.DailyRollup) ──────────────────────────────────────
+    # One row per day, maintained incrementally: writers mark the days they
+    # touch dirty (_mark_rollup_dirty), refresh_daily_rollup recomputes only
+    # dirty days, and get_daily_metrics reads the rollup instead of
+    # re-aggregating Rides.Rides on every chart. Rides are bucketed by
+    # operational day (04:00–04:00 MT, as in get_summary_metrics_for_range);
+    # payments, expenses and charging by calendar date.
+
+    # Writers mark days on the hot path; the existence check only needs to
+    # run once per process there.
+    _rollup_table_ready = False
+
+    def _ensure_daily_rollup_table(self, cursor):
+        if not schema_verified():
+            self._create_daily_rollup_table(cursor)
+
+    def _create_daily_rollup_table(self, cursor):
+        """Idempotently creates Rides.DailyRollup. Caller commits.
+
+        On first creation every day that already has rides, payments,
+        expenses or charging is seeded dirty, so the first refresh backfills
+        history rather than the charts starting from an empty table.
+        """
+        cursor.execute("""
+            IF OBJECT_ID('Rides.DailyRollup', 'U') IS NULL
+            BEGIN
+                CREATE TABLE Rides.DailyRollup (
+                    RollupDate          DATE          NOT NULL PRIMARY KEY,
+                    UberEarnings        DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    UberTips            DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    UberTripCount       INT           NOT NULL DEFAULT 0,
+                    TotalMiles          FLOAT         NOT NULL DEFAULT 0,
+                    DriveTime_Hours     FLOAT         NOT NULL DEFAULT 0,
+                    PrivateIncome       DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    PrivatePaymentCount INT           NOT NULL DEFAULT 0,
+                    OpEx                DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    CapEx               DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    IsDirty             BIT           NOT NULL DEFAULT 1,
+                    DirtyVersion        INT           NOT NULL DEFAULT 0,
+                    RefreshedAt         DATETIME2     NULL
+                );
+                CREATE INDEX IX_DailyRollup_Dirty ON Rides.DailyRollup (RollupDate)
+                    WHERE IsDirty = 1;
+                INSERT INTO Rides.DailyRollup (RollupDate, IsDirty, DirtyVersion)
+                SELECT RollupDate, 1, 1 FROM (
+                    SELECT """ + _OPERATIONAL_DAY.format(col="Timestamp_Start") + """ AS RollupDate
+                    FROM Rides.Rides WHERE Timestamp_Start IS NOT NULL
+                    UNION SELECT PaymentDate FROM Rides.PrivatePayments
+                    UNION SELECT CAST(Timestamp AS DATE) FROM Rides.ManualExpenses
+                    UNION SELECT CAST(Start_Time AS DATE) FROM Rides.ChargingSessions
+                ) AS d
+                WHERE RollupDate IS NOT NULL;
+            END
+        """)
+
+    def _mark_rollup_dirty(self, cursor, days_sql: str, params=()):
+        """Mark the days selected by `days_sql` (one RollupDate column) dirty.
+
+        Runs on the caller's cursor so the mark commits or rolls back with
+        the write it describes. A failure is logged, never raised: the write
+        itself matters more than the chart, and refresh_daily_rollup(start,
+        end, force=True) can always rebuild a range.
+        """
+        try:
+            if not (DatabaseClient._rollup_table_ready or schema_verified()):
+                self._create_daily_rollup_table(cursor)
+                DatabaseClient._rollup_table_ready = True
+            cursor.execute(_MARK_ROLLUP_DIRTY.format(days=days_sql), params)
+        except Exception as e:
+            logging.warning(f"DailyRollup dirty-mark failed: {e}")
+
+    def _mark_ride_days_dirty(self, cursor, ride_ids):
+        if ride_ids:
+            self.mark_rides_dirty(cursor, f"RideID IN ({','.join('?' * len(ride_ids))})", tuple(ride_ids))
+
+    def mark_rides_dirty(self, cursor, where: str, params=()) -> None:
+        """Mark the days of the Rides.Rides rows matching `where` dirty, on
+        the caller's cursor — for writers outside this class that run their
+        own UPDATE/MERGE/DELETE on Rides.Rides.
+
+        Call it before a write that deletes rows or moves Timestamp_Start,
+        and after one that inserts or moves them (save_trip does both).
+        """
+        self._mark_rollup_dirty(
+            cursor,
+            f"SELECT {_OPERATIONAL_DAY.format(col='Timestamp_Start')} AS RollupDate "
+            f"FROM Rides.Rides WHERE {where}",
+            params,
+        )
+
+    def mark_rollup_range_dirty(self, start_date: str, end_date: str, cursor=None) -> None:
+        """Mark every day in [start_date, end_date] dirty — for writers that
+        change many rows at once (dedup_earnings, repair scripts).
+
+        Pass the writer's `cursor` to mark inside its transaction; without
+        one the mark commits on its own connection.
+        """
+        days_sql = """
+            SELECT DATEADD(day, seq.n, CAST(? AS DATE)) AS RollupDate
+            FROM (SELECT TOP (DATEDIFF(day, CAST(? AS DATE), CAST(? AS DATE)) + 1)
+                         ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) - 1 AS n
+                  FROM sys.all_objects a CROSS JOIN sys.all_objects b) AS seq
+        """
+        if cursor is not None:
+            self._mark_rollup_dirty(cursor, days_sql, (start_date, start_date, end_date))
+            return
+        conn = self.get_connection()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            self._mark_rollup_dirty(cursor, days_sql, (start_date, start_date, end_date))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def refresh_daily_rollup(self, start_date: str = None, end_date: str = None,
+                             force: bool = False) -> int:
+        """Recompute the dirty days of Rides.DailyRollup (optionally only
+        those within [start_date, end_date]). Returns the number of days
+        recomputed.
+
+        force=True marks the whole range dirty first — the rebuild path after
+        a bulk repair that bypassed the writers.
+
+        Concurrency: the dirty days are read with their DirtyVersion, and a
+        day is only cleared if its version is unchanged when the recomputed
+        totals land. A write that commits mid-refresh bumps the version, so
+        its day stays dirty for the next refresh instead of being lost.
+        """
+        if force and start_date and end_date:
+            self.mark_rollup_range_dirty(start_date, end_date)
+        conn = self.get_connection()
+        if not conn:
+            return 0
+        try:
+            cursor = conn.cursor()
+            self._ensure_daily_rollup_table(cursor)
+            conn.commit()
+            where, params = "IsDirty = 1", []
+            if start_date:
+                where += " AND RollupDate >= CAST(? AS DATE)"
+                params.append(start_date)
+            if end_date:
+                where += " AND RollupDate <= CAST(? AS DATE)"
+                params.append(end_date)
+            cursor.execute(f"SELECT RollupDate, DirtyVersion FROM Rides.DailyRollup WHERE {where}", params)
+            dirty = [(r[0], r[1]) for r in cursor.fetchall()]
+            if not dirty:
+                return 0
+            lo = min(d for d, _ in dirty)
+            hi = max(d for d, _ in dirty)
+
+            cursor.execute(
+                "IF OBJECT_ID('tempdb..#RollupDays') IS NOT NULL DROP TABLE #RollupDays; "
+                "CREATE TABLE #RollupDays (RollupDate DATE NOT NULL PRIMARY KEY, SeenVersion INT NOT NULL)"
+            )
+            cursor.fast_executemany = True
+            cursor.executemany("INSERT INTO #RollupDays (RollupDate, SeenVersion) VALUES (?, ?)", dirty)
+
+            # Same Uber dedup rule as the old per-call query:
+            #   days WITH TRIP-*    → only TRIP-* (canonical OCR)
+            #   days WITHOUT TRIP-* → non-TESSIE/UBER legacy records (pre-OCR)
+            # evaluated once per day (Canon) instead of per row.
+            ride_day = _OPERATIONAL_DAY.format(col="r.Timestamp_Start")
+            cursor.execute(f"""
+            WITH Ops AS (
+                SELECT {ride_day} AS RollupDate, r.RideID, r.Driver_Earnings, r.Tip,
+                       r.Distance_mi, r.Duration_min
+                FROM Rides.Rides r
+                WHERE r.Timestamp_Start >= DATEADD(hour, 4, CAST(CAST(? AS DATE) AS DATETIME2))
+                  AND r.Timestamp_Start <  DATEADD(hour, 28, CAST(CAST(? AS DATE) AS DATETIME2))
+                  AND r.Driver_Earnings > 0
+            ),
+            Canon AS (
+                SELECT DISTINCT RollupDate FROM Ops WHERE RideID LIKE 'TRIP-%'
+            ),
+            Uber AS (
+                SELECT o.RollupDate,
+                       SUM(o.Driver_Earnings)              AS UberEarnings,
+                       ISNULL(SUM(o.Tip), 0)               AS UberTips,
+                       COUNT(*)                            AS UberTripCount,
+                       ISNULL(SUM(o.Distance_mi), 0.0)     AS TotalMiles,
+                       ISNULL(SUM(o.Duration_min) / 60.0, 0.0) AS DriveTime_Hours
+                FROM Ops o
+                JOIN #RollupDays d ON d.RollupDate = o.RollupDate
+                WHERE o.RideID LIKE 'TRIP-%'
+                   OR (o.RideID NOT LIKE 'TESSIE-%'
+                       AND o.RideID NOT LIKE 'UBER-%'
+                       AND NOT EXISTS (SELECT 1 FROM Canon c WHERE c.RollupDate = o.RollupDate))
+                GROUP BY o.RollupDate
+            ),
+            Priv AS (
+                SELECT p.PaymentDate AS RollupDate, SUM(p.Amount) AS PrivateIncome,
+                       COUNT(*) AS PrivatePaymentCount
+                FROM Rides.PrivatePayments p
+                JOIN #RollupDays d ON d.RollupDate = p.PaymentDate
+                WHERE p.DeletedAt IS NULL
+                GROUP BY p.PaymentDate
+            ),
+            Exps AS (
+                SELECT CAST(e.Timestamp AS DATE) AS RollupDate,
+                       SUM(CASE WHEN e.ExpenseType = 'OpEx' OR (e.ExpenseType IS NULL AND e.Category NOT IN ('Maintenance', 'General_Expense'))
+                                THEN e.Amount END) AS OpEx,
+                       SUM(CASE WHEN e.ExpenseType = 'CapEx' OR (e.ExpenseType IS NULL AND e.Category IN ('Maintenance', 'General_Expense'))
+                                THEN e.Amount END) AS CapEx
+                FROM Rides.ManualExpenses e
+                JOIN #RollupDays d ON d.RollupDate = CAST(e.Timestamp AS DATE)
+                WHERE e.Timestamp >= CAST(? AS DATE) AND e.Timestamp < DATEADD(day, 1, CAST(? AS DATE))
+                GROUP BY CAST(e.Timestamp AS DATE)
+            ),
+            Chg AS (
+                SELECT CAST(c.Start_Time AS DATE) AS RollupDate, SUM(c.Cost) AS Charging
+                FROM Rides.ChargingSessions c
+                JOIN #RollupDays d ON d.RollupDate = CAST(c.Start_Time AS DATE)
+                WHERE c.Start_Time >= CAST(? AS DATE) AND c.Start_Time < DATEADD(day, 1, CAST(? AS DATE))
+                GROUP BY CAST(c.Start_Time AS DATE)
+            )
+            MERGE INTO Rides.DailyRollup AS target
+            USING (
+                SELECT d.RollupDate, d.SeenVersion,
+                       ISNULL(u.UberEarnings, 0)     AS UberEarnings,
+                       ISNULL(u.UberTips, 0)         AS UberTips,
+                       ISNULL(u.UberTripCount, 0)    AS UberTripCount,
+                       ISNULL(u.TotalMiles, 0)       AS TotalMiles,
+                       ISNULL(u.DriveTime_Hours, 0)  AS DriveTime_Hours,
+                       ISNULL(p.PrivateIncome, 0)    AS PrivateIncome,
+                       ISNULL(p.PrivatePaymentCount, 0) AS PrivatePaymentCount,
+                       ISNULL(x.OpEx, 0) + ISNULL(c.Charging, 0) AS OpEx,
+                       ISNULL(x.CapEx, 0)            AS CapEx
+                FROM #RollupDays d
+                LEFT JOIN Uber u ON u.RollupDate = d.RollupDate
+                LEFT JOIN Priv p ON p.RollupDate = d.RollupDate
+                LEFT JOIN Exps x ON x.RollupDate = d.RollupDate
+                LEFT JOIN Chg  c ON c.RollupDate = d.RollupDate
+            ) AS source
+            ON (target.RollupDate = source.RollupDate)
+            WHEN MATCHED THEN
+                UPDATE SET UberEarnings = source.UberEarnings, UberTips = source.UberTips,
+                           UberTripCount = source.UberTripCount, TotalMiles = source.TotalMiles,
+                           DriveTime_Hours = source.DriveTime_Hours,
+                           PrivateIncome = source.PrivateIncome,
+                           PrivatePaymentCount = source.PrivatePaymentCount,
+                           OpEx = source.OpEx, CapEx = source.CapEx,
+                           IsDirty = CASE WHEN target.DirtyVersion = source.SeenVersion THEN 0 ELSE 1 END,
+                           RefreshedAt = SYSUTCDATETIME();
+            """, (lo, hi, lo, hi, lo, hi))
+            cursor.execute("DROP TABLE #RollupDays")
+            conn.commit()
+            logging.info(f"DailyRollup refreshed {len(dirty)} day(s) between {lo} and {hi}")
+            return len(dirty)
+        except Exception as e:
+            logging.error(f"refresh_daily_rollup failed: {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            return 0
+        finally:
+            conn.close()
+
     def get_daily_metrics(self, start_date, end_date):
-        # Combined Uber + Private earnings per day.
-        # UberEarnings dedup rule:
-        #   days WITH TRIP-*  → only TRIP-* (canonical OCR)
-        #   days WITHOUT TRIP-* → non-TESSIE/UBER legacy records (pre-OCR)
-        # PrivateEarnings comes from Rides.PrivatePayments (Jackie/Daniel etc.)
+        """Combined Uber + Private earnings per day, newest first, days with
+        no activity omitted.
+
+        Reads Rides.DailyRollup — a single range seek on its clustered key —
+        after recomputing any dirty days inside the range, so results are
+        never staler than the last committed write.
+        """
+        self.refresh_daily_rollup(start_date, end_date)
         query = """
-        WITH UberEarnings AS (
-            SELECT
-                CAST(Timestamp_Start AS DATE)          AS EarningDate,
-                ISNULL(SUM(Driver_Earnings), 0)        AS TotalEarnings,
-                ISNULL(SUM(Tip), 0)                    AS TotalTips,
-                COUNT(*)                               AS TripCount,
-                ISNULL(SUM(Distance_mi), 0.0)          AS TotalMiles,
-                ISNULL(SUM(Duration_min) / 60.0, 0.0)  AS DriveTime_Hours
-            FROM Rides.Rides r
-            WHERE Timestamp_Start >= CAST(? AS DATE)
-              AND Timestamp_Start <  DATEADD(day, 1, CAST(? AS DATE))
-              AND Driver_Earnings > 0
-              AND (
-                  RideID LIKE 'TRIP-%'
-                  OR (
-                      RideID NOT LIKE 'TRIP-%'
-                      AND RideID NOT LIKE 'TESSIE-%'
-                      AND RideID NOT LIKE 'UBER-%'
-                      AND NOT EXISTS (
-                          SELECT 1 FROM Rides.Rides t2
-                          WHERE t2.RideID LIKE 'TRIP-%'
-                            AND t2.Driver_Earnings > 0
-                            AND CAST(t2.Timestamp_Start AS DATE) = CAST(r.Timestamp_Start AS DATE)
-                      )
-                  )
-              )
-            GROUP BY CAST(Timestamp_Start AS DATE)
-        ),
-        PrivateEarnings AS (
-            SELECT
-                PaymentDate             AS EarningDate,
-                ISNULL(SUM(Amount), 0)  AS TotalEarnings,
-                0.0                     AS TotalTips,
-                COUNT(*)                AS TripCount,
-                0.0                     AS TotalMiles,
-                0.0                     AS DriveTime_Hours
-            FROM Rides.PrivatePayments
-            WHERE PaymentDate >= CAST(? AS DATE)
-              AND PaymentDate <= CAST(? AS DATE)
-              AND DeletedAt IS NULL
-            GROUP BY PaymentDate
-        ),
-        Combined AS (
-            SELECT EarningDate,
-                   ISNULL(SUM(TotalEarnings),   0)   AS TotalEarnings,
-                   ISNULL(SUM(TotalTips),        0)   AS TotalTips,
-                   ISNULL(SUM(TripCount),        0)   AS TripCount,
-                   ISNULL(SUM(TotalMiles),       0.0) AS TotalMiles,
-                   ISNULL(SUM(DriveTime_Hours),  0.0) AS DriveTime_Hours
-            FROM (
-                SELECT * FROM UberEarnings
-                UNION ALL
-                SELECT * FROM PrivateEarnings
-            ) AS AllEarnings
-            GROUP BY EarningDate
-        )
         SELECT
-            CONVERT(varchar(10), EarningDate, 23) AS DateStr,
-            TotalEarnings, TotalTips, TripCount, TotalMiles, DriveTime_Hours
-        FROM Combined
-        ORDER BY EarningDate DESC
+            CONVERT(varchar(10), RollupDate, 23)              AS DateStr,
+            CAST(UberEarnings + PrivateIncome AS FLOAT)       AS TotalEarnings,
+            CAST(UberTips AS FLOAT)                           AS TotalTips,
+            UberTripCount + PrivatePaymentCount               AS TripCount,
+            TotalMiles,
+            DriveTime_Hours
+        FROM Rides.DailyRollup
+        WHERE RollupDate >= CAST(? AS DATE)
+          AND RollupDate <= CAST(? AS DATE)
+          AND UberTripCount + PrivatePaymentCount > 0
+        ORDER BY RollupDate DESC
         """
-        return self.execute_query_params(query, (start_date, end_date, start_date, end_date))
+        return self.execute_query_params(query, (start_date, end_date))
 
 
     def get_summary_metrics(self, days=30):
@@ -925,6 +1401,7 @@ class DatabaseClient:
             INSERT (PaymentID, Client, Amount, Note, PaymentDate, Timestamp)
             VALUES (?, ?, ?, ?, CAST(? AS DATE), CAST(? AS DATETIME2));
         """
+        payment_days = "SELECT PaymentDate AS RollupDate FROM Rides.PrivatePayments WHERE PaymentID = ?"
         try:
             for p in payments:
                 pid    = str(p.get('id', ''))
@@ -935,11 +1412,13 @@ class DatabaseClient:
                 ts     = str(p.get('timestamp', ''))
                 if not pid or not date:
                     continue
+                self._mark_rollup_dirty(cursor, payment_days, (pid,))
                 cursor.execute(query, (
                     pid,
                     client, amount, note, date, ts,
                     pid, client, amount, note, date, ts
                 ))
+                self._mark_rollup_dirty(cursor, payment_days, (pid,))
             conn.commit()
         except Exception as e:
             logging.error(f"upsert_private_payments error: {e}")
@@ -961,6 +1440,11 @@ class DatabaseClient:
                 "UPDATE Rides.PrivatePayments SET DeletedAt = GETDATE() WHERE PaymentID = ?",
                 (str(payment_id),)
             )
+            self._mark_rollup_dirty(
+                cursor,
+                "SELECT PaymentDate AS RollupDate FROM Rides.PrivatePayments WHERE PaymentID = ?",
+                (str(payment_id),),
+            )
             conn.commit()
         except Exception as e:
             logging.error(f"soft_delete_private_payment error: {e}")
@@ -1004,6 +1488,11 @@ class DatabaseClient:
                 rows, amount = int(row[0] or 0), float(row[1] or 0)
 
                 if rows > 0:
+                    self._mark_rollup_dirty(cur, f"""
+                        SELECT {_OPERATIONAL_DAY.format(col='Timestamp_Start')} AS RollupDate
+                        FROM Rides.Rides
+                        WHERE RideID LIKE ? AND Driver_Earnings > 0 AND Timestamp_Start >= {cutoff}
+                    """, (prefix,))
                     cur.execute(f"""
                         UPDATE Rides.Rides
                         SET Driver_Earnings = 0, Tip = 0, LastUpdated = GETDATE()
@@ -1176,6 +1665,10 @@ class DatabaseClient:
     # every instance counts against the same tally.
 
     def _ensure_cabin_attempts_table(self, cursor):
+        if not schema_verified():
+            self._create_cabin_attempts_table(cursor)
+
+    def _create_cabin_attempts_table(self, cursor):
         cursor.execute("""
             IF NOT EXISTS (SELECT * FROM sys.tables t JOIN sys.schemas s ON t.schema_id = s.schema_id WHERE s.name = 'Rides' AND t.name = 'CabinAttempts')
             BEGIN
@@ -1293,8 +1786,21 @@ class DatabaseClient:
         finally:
             conn.close()
 
+    def _ensure_telemetry_blob_column(self, cursor):
+        if not schema_verified():
+            self._add_telemetry_blob_column(cursor)
+
+    def _add_telemetry_blob_column(self, cursor):
+        # Compact columnar payload (services/telemetry_codec.py). Rows written
+        # before it existed keep RawJSONPayload until
+        # scripts/migrate_telemetry_blobs.py converts them.
+        cursor.execute(
+            "IF COL_LENGTH('dbo.Drive_Telemetry', 'TelemetryBlob') IS NULL "
+            "ALTER TABLE dbo.Drive_Telemetry ADD TelemetryBlob VARBINARY(MAX) NULL"
+        )
+
     def save_drive_telemetry(self, drive_id, telemetry_data):
-        import json
+        from services.telemetry_codec import encode_telemetry
         logging.info(f"Saving Raw Telemetry for Drive: {drive_id}")
         conn = self.get_connection()
         if not conn: return
@@ -1304,14 +1810,15 @@ class DatabaseClient:
         USING (SELECT ? AS DriveID) AS source
         ON (target.DriveID = source.DriveID)
         WHEN MATCHED THEN
-            UPDATE SET RawJSONPayload = ?, LastUpdated = GETDATE()
+            UPDATE SET TelemetryBlob = ?, RawJSONPayload = NULL, LastUpdated = GETDATE()
         WHEN NOT MATCHED THEN
-            INSERT (DriveID, RawJSONPayload, LastUpdated)
+            INSERT (DriveID, TelemetryBlob, LastUpdated)
             VALUES (?, ?, GETDATE());
         """
         try:
-            json_payload = json.dumps(telemetry_data)
-            params = (drive_id, json_payload, drive_id, json_payload)
+            self._ensure_telemetry_blob_column(cursor)
+            blob = encode_telemetry(telemetry_data)
+            params = (drive_id, blob, drive_id, blob)
             cursor.execute(query, params)
             conn.commit()
             logging.info(f"Successfully archived telemetry payload for {drive_id}.")
@@ -1320,11 +1827,115 @@ class DatabaseClient:
         finally:
             conn.close()
 
-    def get_known_client_names(self):
-        import re
+    def save_drive_telemetry_bulk(self, items) -> int:
+        """
+        Archive several drives' telemetry in one round trip: `items` is a list
+        of (drive_id, telemetry_data), staged into #TelemetryStage and merged
+        once. Returns the number written (0 on failure).
+        """
+        from services.telemetry_codec import encode_telemetry
+        rows = {}
+        for drive_id, telemetry_data in items:
+            try:
+                rows[drive_id] = encode_telemetry(telemetry_data)  # last write per id wins
+            except Exception as e:
+                logging.error(f"Error encoding telemetry payload for {drive_id}: {e}")
+        if not rows:
+            return 0
+        conn = self.get_connection()
+        if not conn: return 0
+        cursor = conn.cursor()
+        try:
+            self._ensure_telemetry_blob_column(cursor)
+            cursor.execute("""
+                CREATE TABLE #TelemetryStage (
+                    DriveID       NVARCHAR(100)  NOT NULL PRIMARY KEY,
+                    TelemetryBlob VARBINARY(MAX) NOT NULL
+                )
+            """)
+            cursor.fast_executemany = True
+            cursor.executemany(
+                "INSERT INTO #TelemetryStage (DriveID, TelemetryBlob) VALUES (?, ?)",
+                list(rows.items()))
+            cursor.execute("""
+                MERGE INTO Drive_Telemetry AS target
+                USING #TelemetryStage AS source
+                ON (target.DriveID = source.DriveID)
+                WHEN MATCHED THEN
+                    UPDATE SET TelemetryBlob = source.TelemetryBlob, RawJSONPayload = NULL, LastUpdated = GETDATE()
+                WHEN NOT MATCHED THEN
+                    INSERT (DriveID, TelemetryBlob, LastUpdated)
+                    VALUES (source.DriveID, source.TelemetryBlob, GETDATE());
+            """)
+            cursor.execute("DROP TABLE #TelemetryStage")
+            conn.commit()
+            logging.info(f"Archived telemetry for {len(rows)} drive(s) in one batch.")
+            return len(rows)
+        except Exception as e:
+            logging.error(f"Error saving telemetry batch: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    def get_drive_telemetry_payloads(self, dates=None, decoded=False):
+        """
+        [{DriveID, LastUpdated, Payload}] for archived drive telemetry,
+        optionally only drives whose ride started on one of `dates`
+        (YYYY-MM-DD). Payload is the original dict of lists, or with
+        decoded=True, typed arrays from telemetry_codec.decode_telemetry
+        (legacy JSON rows still come back as lists).
+        """
+        from services.telemetry_codec import as_lists, decode_telemetry, is_encoded
+        conn = self.get_connection()
+        if not conn: return []
+        cursor = conn.cursor()
+        try:
+            self._ensure_telemetry_blob_column(cursor)
+            conn.commit()
+            if dates:
+                placeholders = ", ".join("?" for _ in dates)
+                cursor.execute(f"""
+                    SELECT dt.DriveID, dt.TelemetryBlob, dt.RawJSONPayload, dt.LastUpdated
+                    FROM dbo.Drive_Telemetry dt
+                    INNER JOIN Rides.Rides r ON dt.DriveID = r.RideID
+                    WHERE (dt.TelemetryBlob IS NOT NULL OR dt.RawJSONPayload IS NOT NULL)
+                      AND CAST(r.Timestamp_Start AS DATE) IN ({placeholders})
+                """, tuple(dates))
+            else:
+                cursor.execute("""
+                    SELECT DriveID, TelemetryBlob, RawJSONPayload, LastUpdated
+                    FROM dbo.Drive_Telemetry
+                    WHERE TelemetryBlob IS NOT NULL OR RawJSONPayload IS NOT NULL
+                """)
+            out = []
+            for drive_id, blob, raw_json, updated in cursor.fetchall():
+                try:
+                    if blob is not None and is_encoded(blob):
+                        payload = decode_telemetry(blob) if decoded else as_lists(blob)
+                    else:
+                        payload = json.loads(raw_json or "{}")
+                except Exception as e:
+                    logging.error(f"Error decoding telemetry payload for {drive_id}: {e}")
+                    continue
+                out.append({"DriveID": drive_id, "LastUpdated": updated, "Payload": payload})
+            return out
+        except Exception as e:
+            logging.error(f"Drive telemetry query error: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_known_client_names(self, raise_errors=False):
+        """Lowercase client tokens from every INV- RideID plus the defaults.
+        A full scan — hot paths use services.client_roster's cached matcher.
+        With raise_errors=True a missing connection or failed query raises
+        instead of returning the defaults (callers that cache must not store
+        them as the roster)."""
         conn = self.get_connection()
         if not conn:
-            return ["jackie", "jacquelyn", "jacquelyn heslep", "esmeralda", "daniel", "ryan", "lauren", "terrance", "lorynne", "nancy", "adrienne", "david", "emerson"]
+            if raise_errors:
+                raise RuntimeError("No SQL connection for the client roster")
+            return list(DEFAULT_CLIENT_NAMES)
         cursor = conn.cursor()
         try:
             cursor.execute("""
@@ -1332,7 +1943,7 @@ class DatabaseClient:
                 FROM Rides.Rides 
                 WHERE RideID LIKE 'INV-%'
             """)
-            names = {"jackie", "jacquelyn", "jacquelyn heslep", "esmeralda", "daniel", "ryan", "lauren", "terrance", "lorynne", "nancy", "adrienne", "david", "emerson"}
+            names = set(DEFAULT_CLIENT_NAMES)
             for row in cursor.fetchall():
                 if row[0]:
                     parts = row[0].split('-')
@@ -1344,7 +1955,9 @@ class DatabaseClient:
             return list(names)
         except Exception as e:
             logging.error(f"Error getting known client names: {e}")
-            return ["jackie", "jacquelyn", "jacquelyn heslep", "esmeralda", "daniel", "ryan", "lauren", "terrance", "lorynne", "nancy", "adrienne", "david", "emerson"]
+            if raise_errors:
+                raise
+            return list(DEFAULT_CLIENT_NAMES)
         finally:
             conn.close()
 
@@ -1375,7 +1988,15 @@ class DatabaseClient:
             conn.close()
 
     def get_summary_metrics_for_range(self, start_date_str: str, end_date_str: str) -> dict:
-        """Calculate collected private income, Uber earnings, and expenses for a date range using operational windows."""
+        """Calculate collected private income, Uber earnings, and expenses for a date range using operational windows.
+
+        One round trip: each source table is aggregated once in a derived
+        table and the four are cross-joined into a single row. Every range
+        predicate compares the bare column (no CAST on Timestamp/Start_Time),
+        so the covering indexes in
+        scripts/sql/2026_10_17_summary_metrics_indexes.sql turn each branch
+        into a range seek.
+        """
         from services.datetime_utils import get_operational_window
         start_window_start, _ = get_operational_window(start_date_str)
         _, end_window_end = get_operational_window(end_date_str)
@@ -1392,77 +2013,59 @@ class DatabaseClient:
         
         try:
             cursor = conn.cursor()
-            # 1. Uber Earnings. Driver_Earnings comes from the OCR'd Uber trip
+            # Uber earnings: Driver_Earnings comes from the OCR'd Uber trip
             # detail cards, whose earnings figure ALREADY INCLUDES the tip —
             # never add Tip on top (that double-counts tipped trips). The Tip
             # column is an informational breakdown within Driver_Earnings.
+            # Rides use the operational window; PrivatePayments, expenses and
+            # charging use calendar dates — [start, end + 1 day) is the
+            # sargable form of CAST(col AS DATE) BETWEEN start AND end.
             cursor.execute("""
-                SELECT SUM(Driver_Earnings), SUM(COALESCE(Tip, 0))
-                FROM Rides.Rides
-                WHERE Timestamp_Start >= ? AND Timestamp_Start < ?
-                  AND TripType IN ('Uber', 'Uber_OffApp')
-                  AND DeletedAt IS NULL
-                  AND (IsTest IS NULL OR IsTest = 0)
-            """, (start_window_start, end_window_end))
-            row = cursor.fetchone()
-            uber_sum  = float(row[0] or 0.0) if row else 0.0
-            uber_tips = float(row[1] or 0.0) if row else 0.0
-
-            # 2. Paid Private Bookings
-            cursor.execute("""
-                SELECT SUM(Fare + Tip)
-                FROM Rides.Rides
-                WHERE Timestamp_Start >= ? AND Timestamp_Start < ?
-                  AND TripType = 'Private'
-                  AND PaymentStatus = 'Paid'
-                  AND DeletedAt IS NULL
-                  AND (IsTest IS NULL OR IsTest = 0)
-            """, (start_window_start, end_window_end))
-            row = cursor.fetchone()
-            private_booking_sum = float(row[0] or 0.0) if row else 0.0
-
-            # 3. Private Payments (from PrivatePayments table)
-            cursor.execute("""
-                SELECT SUM(Amount)
-                FROM Rides.PrivatePayments
-                WHERE PaymentDate >= CAST(? AS DATE) AND PaymentDate <= CAST(? AS DATE)
-                  AND DeletedAt IS NULL
-            """, (start_date_str, end_date_str))
-            row = cursor.fetchone()
-            private_payment_sum = float(row[0] or 0.0) if row else 0.0
-
-            # 4. Expenses (split into OpEx and CapEx)
-            # OpEx from ManualExpenses (ExpenseType = 'OpEx' or category fallback)
-            cursor.execute("""
-                SELECT SUM(Amount)
-                FROM Rides.ManualExpenses
-                WHERE CAST(Timestamp AS DATE) >= CAST(? AS DATE) AND CAST(Timestamp AS DATE) <= CAST(? AS DATE)
-                  AND (ExpenseType = 'OpEx' OR (ExpenseType IS NULL AND Category NOT IN ('Maintenance', 'General_Expense')))
-            """, (start_date_str, end_date_str))
+                SELECT r.UberEarnings, r.UberTips, r.PrivateBookings,
+                       p.PrivatePayments, e.OpEx, e.CapEx, c.Charging
+                FROM (
+                    SELECT
+                        SUM(CASE WHEN TripType IN ('Uber', 'Uber_OffApp') THEN Driver_Earnings END) AS UberEarnings,
+                        SUM(CASE WHEN TripType IN ('Uber', 'Uber_OffApp') THEN COALESCE(Tip, 0) END) AS UberTips,
+                        SUM(CASE WHEN TripType = 'Private' AND PaymentStatus = 'Paid' THEN Fare + Tip END) AS PrivateBookings
+                    FROM Rides.Rides
+                    WHERE Timestamp_Start >= ? AND Timestamp_Start < ?
+                      AND TripType IN ('Uber', 'Uber_OffApp', 'Private')
+                      AND DeletedAt IS NULL
+                      AND (IsTest IS NULL OR IsTest = 0)
+                ) r
+                CROSS JOIN (
+                    SELECT SUM(Amount) AS PrivatePayments
+                    FROM Rides.PrivatePayments
+                    WHERE PaymentDate >= CAST(? AS DATE) AND PaymentDate <= CAST(? AS DATE)
+                      AND DeletedAt IS NULL
+                ) p
+                CROSS JOIN (
+                    SELECT
+                        SUM(CASE WHEN ExpenseType = 'OpEx' OR (ExpenseType IS NULL AND Category NOT IN ('Maintenance', 'General_Expense'))
+                                 THEN Amount END) AS OpEx,
+                        SUM(CASE WHEN ExpenseType = 'CapEx' OR (ExpenseType IS NULL AND Category IN ('Maintenance', 'General_Expense'))
+                                 THEN Amount END) AS CapEx
+                    FROM Rides.ManualExpenses
+                    WHERE Timestamp >= CAST(? AS DATE) AND Timestamp < DATEADD(day, 1, CAST(? AS DATE))
+                ) e
+                CROSS JOIN (
+                    SELECT SUM(Cost) AS Charging
+                    FROM Rides.ChargingSessions
+                    WHERE Start_Time >= CAST(? AS DATE) AND Start_Time < DATEADD(day, 1, CAST(? AS DATE))
+                ) c
+            """, (start_window_start, end_window_end,
+                  start_date_str, end_date_str,
+                  start_date_str, end_date_str,
+                  start_date_str, end_date_str))
             row = cursor.fetchone()
-            manual_opex_sum = float(row[0] or 0.0) if row else 0.0
+            vals = [float(v or 0.0) for v in row] if row else [0.0] * 7
+            uber_sum, uber_tips, private_booking_sum, private_payment_sum, \
+                manual_opex_sum, total_capex, charging_sum = vals
 
             # Charging sessions are always OpEx
-            cursor.execute("""
-                SELECT SUM(Cost)
-                FROM Rides.ChargingSessions
-                WHERE CAST(Start_Time AS DATE) >= CAST(? AS DATE) AND CAST(Start_Time AS DATE) <= CAST(? AS DATE)
-            """, (start_date_str, end_date_str))
-            row = cursor.fetchone()
-            charging_sum = float(row[0] or 0.0) if row else 0.0
-
             total_opex = manual_opex_sum + charging_sum
 
-            # CapEx from ManualExpenses (ExpenseType = 'CapEx' or category fallback)
-            cursor.execute("""
-                SELECT SUM(Amount)
-                FROM Rides.ManualExpenses
-                WHERE CAST(Timestamp AS DATE) >= CAST(? AS DATE) AND CAST(Timestamp AS DATE) <= CAST(? AS DATE)
-                  AND (ExpenseType = 'CapEx' OR (ExpenseType IS NULL AND Category IN ('Maintenance', 'General_Expense')))
-            """, (start_date_str, end_date_str))
-            row = cursor.fetchone()
-            total_capex = float(row[0] or 0.0) if row else 0.0
-
             # uber_sum already contains tips (see above) — do not add uber_tips.
             gross_earnings = uber_sum + private_booking_sum + private_payment_sum
             total_expenses = total_opex + total_capex
@@ -1594,6 +2197,10 @@ class DatabaseClient:
     # ═════════════════════════════════════════════════════════════════════
 
     def _ensure_finance_tables(self, cursor):
+        if not schema_verified():
+            self._create_finance_tables(cursor)
+
+    def _create_finance_tables(self, cursor):
         """Idempotently creates the Finance schema and its tables. Caller commits."""
         cursor.execute(
             "IF NOT EXISTS (SELECT * FROM sys.schemas WHERE name = 'Finance') "
@@ -1801,7 +2408,7 @@ class DatabaseClient:
             return
         try:
             cursor = conn.cursor()
-            self._ensure_finance_tables(cursor)
+            self._create_finance_tables(cursor)
             conn.commit()
         except Exception as e:
             logging.error(f"ensure_finance_tables failed: {e}")
@@ -2702,7 +3309,6 @@ class DatabaseClient:
         after multiple reassignments, since each reassignment appends.
         When several payments cover one day, the day isn't fully paid until
         the last one lands, so the latest received date wins."""
-        import re
         conn = self.get_connection()
         if not conn:
             return None
@@ -2715,14 +3321,7 @@ class DatabaseClient:
                 WHERE Category = 'Vehicle Financing' AND Date = ? AND Amount > 0
                   AND (TellerTransactionID IS NULL OR TellerTransactionID NOT LIKE 'luis-summary-%')
             """, (date_str,))
-            received_dates = []
-            for row in cursor.fetchall():
-                match = re.search(r"Reassigned from (\d{4}-\d{2}-\d{2})", row[1] or "")
-                if match:
-                    received_dates.append(match.group(1))
-                else:
-                    received_dates.append(row[0].isoformat() if hasattr(row[0], "isoformat") else str(row[0]))
-            return max(received_dates) if received_dates else None
+            return _luis_received_dates(cursor.fetchall()).get(date_str)
         except Exception as e:
             logging.error(f"get_luis_received_date_on failed: {e}")
             return None
@@ -2752,3 +3351,215 @@ class DatabaseClient:
 
 
 
+
+    # ── Luis chain: set-based recompute (payment_tracker._recompute_luis_chain)
+
+    def _ensure_luis_checkpoint_table(self, cursor):
+        if not schema_verified():
+            self._create_luis_checkpoint_table(cursor)
+
+    def _create_luis_checkpoint_table(self, cursor):
+        """Chain state after CheckpointDate: the running balance and how many
+        consecutive Missed days end on it. A recompute replays from the
+        nearest checkpoint instead of trusting the day before its start."""
+        cursor.execute("""
+            IF OBJECT_ID('Finance.LuisBalanceCheckpoint', 'U') IS NULL
+            CREATE TABLE Finance.LuisBalanceCheckpoint (
+                CheckpointDate DATE          NOT NULL PRIMARY KEY,
+                RunningBalance DECIMAL(10,2) NOT NULL,
+                MissedStreak   INT           NOT NULL,
+                UpdatedAt      DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+            )
+        """)
+
+    def load_luis_chain(self, start_date: str, end_date: str, lookback: int = 14) -> dict:
+        """Everything a Luis chain recompute of start_date..end_date reads, on
+        one connection: the starting state and, for every day replayed, the
+        amount sent, received date and the rows currently stored.
+
+        The replay starts the day after the nearest checkpoint before
+        start_date; with no checkpoint it starts at start_date from the last
+        LuisBalanceLog rows before it (balance, and the Missed streak over up
+        to `lookback` days). Returns None when the DB is unreachable.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            self._ensure_finance_tables(cursor)
+            self._ensure_luis_checkpoint_table(cursor)
+            conn.commit()
+            cursor.execute("""
+                SELECT TOP 1 CheckpointDate, RunningBalance, MissedStreak
+                FROM Finance.LuisBalanceCheckpoint
+                WHERE CheckpointDate < ? ORDER BY CheckpointDate DESC
+            """, (start_date,))
+            cp = cursor.fetchone()
+            if cp:
+                replay_from = (datetime.date.fromisoformat(_iso_date(cp[0]))
+                               + datetime.timedelta(days=1)).isoformat()
+                prior_balance, prior_streak = float(cp[1]), int(cp[2])
+            else:
+                replay_from = start_date
+                cursor.execute("""
+                    SELECT TOP (?) Tier, RunningBalance FROM Finance.LuisBalanceLog
+                    WHERE Date < ? ORDER BY Date DESC
+                """, (lookback, start_date))
+                prior = cursor.fetchall()
+                prior_balance = float(prior[0][1]) if prior else 0.0
+                prior_streak = 0
+                for row in prior:
+                    if row[0] != "Missed":
+                        break
+                    prior_streak += 1
+
+            real_luis = ("Category = 'Vehicle Financing' AND Date BETWEEN ? AND ? "
+                         "AND (TellerTransactionID IS NULL OR TellerTransactionID NOT LIKE 'luis-summary-%')")
+            cursor.execute(f"SELECT Date, SUM(Amount) FROM Finance.Payments WHERE {real_luis} GROUP BY Date",
+                           (replay_from, end_date))
+            sent = {_iso_date(r[0]): float(r[1] or 0.0) for r in cursor.fetchall()}
+            cursor.execute(f"SELECT Date, Notes FROM Finance.Payments WHERE {real_luis} AND Amount > 0",
+                           (replay_from, end_date))
+            received = _luis_received_dates(cursor.fetchall())
+
+            cursor.execute("""
+                SELECT Date, AmountSent, Tier, DeferredAmount, RunningBalance, Notes
+                FROM Finance.LuisBalanceLog WHERE Date BETWEEN ? AND ?
+            """, (replay_from, end_date))
+            log = {_iso_date(r[0]): (round(float(r[1]), 2), r[2], round(float(r[3] or 0), 2),
+                                     round(float(r[4]), 2), r[5])
+                   for r in cursor.fetchall()}
+            cursor.execute("""
+                SELECT ServiceDate, AmountPaid, PaymentReceivedDate
+                FROM Finance.LuisPayments WHERE ServiceDate BETWEEN ? AND ?
+            """, (replay_from, end_date))
+            simple = {_iso_date(r[0]): (round(float(r[1]), 2), _iso_date(r[2])) for r in cursor.fetchall()}
+            cursor.execute("""
+                SELECT TellerTransactionID, Amount, SubCategory, AnomalyReason
+                FROM Finance.Payments
+                WHERE TellerTransactionID LIKE 'luis-summary-%' AND Date BETWEEN ? AND ?
+            """, (replay_from, end_date))
+            flags = {r[0][len("luis-summary-"):]: (round(float(r[1]), 2), r[2], r[3])
+                     for r in cursor.fetchall()}
+            cursor.execute("""
+                SELECT CheckpointDate, RunningBalance, MissedStreak
+                FROM Finance.LuisBalanceCheckpoint WHERE CheckpointDate BETWEEN ? AND ?
+            """, (replay_from, end_date))
+            checkpoints = {_iso_date(r[0]): (round(float(r[1]), 2), int(r[2])) for r in cursor.fetchall()}
+
+            return {
+                "replay_from": replay_from, "prior_balance": prior_balance,
+                "prior_missed_streak": prior_streak, "sent": sent, "received": received,
+                "log": log, "simple": simple, "flags": flags, "checkpoints": checkpoints,
+            }
+        except Exception as e:
+            logging.error(f"load_luis_chain failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def save_luis_chain(self, log_rows=(), simple_rows=(), cleared_flags=(), new_flags=(),
+                        checkpoints=()) -> bool:
+        """Writes a recompute's changed rows in one transaction.
+
+        log_rows:      (Date, AmountSent, Tier, DeferredAmount, RunningBalance, Notes)
+        simple_rows:   (ServiceDate, AmountPaid, PaymentReceivedDate)
+        cleared_flags: dates whose 'luis-summary-{date}' row is deleted
+        new_flags:     save_payment-shaped dicts for summary rows to insert
+        checkpoints:   (CheckpointDate, RunningBalance, MissedStreak)
+
+        Refuses while Luis is manual-ledger-only, like save_luis_log.
+        """
+        from .manual_ledger import PersonKey, is_manual_only
+        if is_manual_only(PersonKey.LUIS):
+            logging.info("[ManualLedger] save_luis_chain refused — Luis is manual-ledger-only")
+            return False
+        if not (log_rows or simple_rows or cleared_flags or new_flags or checkpoints):
+            return True
+        conn = self.get_connection()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            self._ensure_finance_tables(cursor)
+            self._ensure_luis_checkpoint_table(cursor)
+            cursor.fast_executemany = True
+            if log_rows:
+                cursor.execute("""
+                    CREATE TABLE #LuisLogStage (
+                        Date DATE NOT NULL PRIMARY KEY, AmountSent DECIMAL(10,2) NOT NULL,
+                        Tier VARCHAR(20) NOT NULL, DeferredAmount DECIMAL(10,2) NOT NULL,
+                        RunningBalance DECIMAL(10,2) NOT NULL, Notes VARCHAR(500) NULL
+                    )
+                """)
+                cursor.executemany("INSERT INTO #LuisLogStage VALUES (?, ?, ?, ?, ?, ?)", list(log_rows))
+                cursor.execute("""
+                    MERGE INTO Finance.LuisBalanceLog AS target
+                    USING #LuisLogStage AS source
+                    ON (target.Date = source.Date)
+                    WHEN MATCHED THEN
+                        UPDATE SET AmountSent = source.AmountSent, Tier = source.Tier,
+                                   DeferredAmount = source.DeferredAmount,
+                                   RunningBalance = source.RunningBalance, Notes = source.Notes
+                    WHEN NOT MATCHED THEN
+                        INSERT (Date, AmountSent, Tier, DeferredAmount, RunningBalance, Notes)
+                        VALUES (source.Date, source.AmountSent, source.Tier, source.DeferredAmount,
+                                source.RunningBalance, source.Notes);
+                """)
+                cursor.execute("DROP TABLE #LuisLogStage")
+            if simple_rows:
+                cursor.execute("""
+                    CREATE TABLE #LuisPaymentStage (
+                        ServiceDate DATE NOT NULL PRIMARY KEY, AmountPaid DECIMAL(10,2) NOT NULL,
+                        PaymentReceivedDate DATE NOT NULL
+                    )
+                """)
+                cursor.executemany("INSERT INTO #LuisPaymentStage VALUES (?, ?, ?)", list(simple_rows))
+                cursor.execute("""
+                    MERGE INTO Finance.LuisPayments AS target
+                    USING #LuisPaymentStage AS source
+                    ON (target.ServiceDate = source.ServiceDate)
+                    WHEN MATCHED THEN
+                        UPDATE SET AmountPaid = source.AmountPaid,
+                                   PaymentReceivedDate = source.PaymentReceivedDate
+                    WHEN NOT MATCHED THEN
+                        INSERT (ServiceDate, AmountPaid, PaymentReceivedDate)
+                        VALUES (source.ServiceDate, source.AmountPaid, source.PaymentReceivedDate);
+                """)
+                cursor.execute("DROP TABLE #LuisPaymentStage")
+            if cleared_flags:
+                cursor.executemany("DELETE FROM Finance.Payments WHERE TellerTransactionID = ?",
+                                   [(f"luis-summary-{d}",) for d in cleared_flags])
+            if new_flags:
+                cursor.executemany("""
+                    INSERT INTO Finance.Payments
+                        (PaymentID, Date, Account, Direction, Counterparty, Amount, Category,
+                         SubCategory, RecurringFlag, AnomalyFlag, AnomalyReason, TellerTransactionID)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(
+                    str(uuid.uuid4()), p["date"], p["account"], p["direction"], p.get("counterparty"),
+                    p["amount"], p.get("category"), p.get("subcategory"),
+                    int(bool(p.get("recurring_flag"))), int(bool(p.get("anomaly_flag"))),
+                    p.get("anomaly_reason"), p["teller_transaction_id"],
+                ) for p in new_flags])
+            if checkpoints:
+                cursor.executemany("""
+                    MERGE INTO Finance.LuisBalanceCheckpoint AS target
+                    USING (SELECT CAST(? AS DATE) AS CheckpointDate, ? AS RunningBalance, ? AS MissedStreak) AS source
+                    ON (target.CheckpointDate = source.CheckpointDate)
+                    WHEN MATCHED THEN
+                        UPDATE SET RunningBalance = source.RunningBalance, MissedStreak = source.MissedStreak,
+                                   UpdatedAt = SYSUTCDATETIME()
+                    WHEN NOT MATCHED THEN
+                        INSERT (CheckpointDate, RunningBalance, MissedStreak)
+                        VALUES (source.CheckpointDate, source.RunningBalance, source.MissedStreak);
+                """, list(checkpoints))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"save_luis_chain failed: {e}")
+            return False
+        finally:
+            conn.close()
@@ -0,0 +1,402 @@
+"""
+Process-wide SQL connection pool.
+
+Every DatabaseClient method used to open its own pyodbc connection and close it
+on the way out, so each row written by a sync paid a managed-identity token
+fetch plus a TLS handshake (and, on a cold Azure SQL, most of the 25-30s
+connect timeout). This module keeps those connections alive and lends them out.
+
+The pool is invisible to callers on purpose. `DatabaseClient.get_connection()`
+hands back a `PooledConnection`, which behaves like the pyodbc connection it
+wraps except that `close()` returns it to the pool instead of tearing it down.
+Every existing `try/finally: conn.close()` therefore keeps working unchanged,
+and `DatabaseClient.connection()` is the context-manager form for new code.
+
+Rules the pool enforces so a reused connection is indistinguishable from a new
+one:
+
+  * Released connections are ROLLED BACK. The read helpers rely on close()
+    discarding uncommitted work (see DatabaseClient.execute_query_params); a
+    pooled connection must not carry one borrower's open transaction into the
+    next borrower's commit.
+  * Cursors opened through the wrapper are closed on release, and autocommit is
+    reset to pyodbc's default.
+  * A connection that sat idle past VALIDATE_AFTER_SEC is pinged before it is
+    lent out; one that fails the ping is replaced (counted as a reconnect).
+  * Connections are retired after MAX_LIFETIME_SEC. With
+    Authentication=ActiveDirectoryMsi the driver fetches the access token once,
+    at connect time, so recycling inside the token's lifetime is how a pooled
+    connection picks up a fresh token.
+  * Idle connections beyond the minimum are closed after IDLE_TIMEOUT_SEC, so a
+    burst doesn't pin max_size sessions on the server for the life of the host.
+
+pyodbc's threadsafety level is 1: threads may share the module but not a
+connection. A connection is only ever lent to one borrower at a time.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+POOL_MIN_SIZE = int(os.environ.get("SQL_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.environ.get("SQL_POOL_MAX_SIZE", "8"))
+# How long a borrower waits for a free connection before giving up. Callers
+# already treat a None connection as "database unavailable".
+BORROW_TIMEOUT_SEC = float(os.environ.get("SQL_POOL_BORROW_TIMEOUT_SEC", "30"))
+IDLE_TIMEOUT_SEC = float(os.environ.get("SQL_POOL_IDLE_TIMEOUT_SEC", "300"))
+VALIDATE_AFTER_SEC = float(os.environ.get("SQL_POOL_VALIDATE_AFTER_SEC", "30"))
+# Managed-identity tokens live for hours; 45 minutes keeps well clear of expiry.
+MAX_LIFETIME_SEC = float(os.environ.get("SQL_POOL_MAX_LIFETIME_SEC", "2700"))
+
+
+class _Entry:
+    """A live raw connection plus the timestamps the pool ages it by."""
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """A borrowed connection. Forwards everything to the raw pyodbc connection;
+    `close()` hands it back to the pool rather than closing it."""
+
+    def __init__(self, pool: "ConnectionPool", entry: _Entry):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_entry", entry)
+        object.__setattr__(self, "_cursors", [])
+        object.__setattr__(self, "_broken", False)
+
+    def cursor(self):
+        if self._entry is None:
+            raise RuntimeError("Connection already returned to the pool")
+        cur = self._entry.raw.cursor()
+        self._cursors.append(cur)
+        return cur
+
+    def invalidate(self) -> None:
+        """Mark the connection unusable so release discards it instead of
+        lending it out again (e.g. after a communication-link failure)."""
+        object.__setattr__(self, "_broken", True)
+
+    def close(self) -> None:
+        entry = self._entry
+        if entry is None:
+            return
+        cursors = self._cursors
+        object.__setattr__(self, "_entry", None)
+        object.__setattr__(self, "_cursors", [])
+        self._pool._release(entry, cursors, broken=self._broken)
+
+    @property
+    def closed(self) -> bool:
+        return self._entry is None
+
+    def __getattr__(self, name):
+        entry = object.__getattribute__(self, "_entry")
+        if entry is None:
+            raise RuntimeError("Connection already returned to the pool")
+        return getattr(entry.raw, name)
+
+    def __setattr__(self, name, value):
+        # `conn.autocommit = False` and friends must reach the driver.
+        if self._entry is None:
+            raise RuntimeError("Connection already returned to the pool")
+        setattr(self._entry.raw, name, value)
+
+    # Same contract as a pyodbc connection used in a `with` block: commit on
+    # success, roll back on error, and do NOT close.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._entry is None:
+            return False
+        if exc_type is None:
+            self._entry.raw.commit()
+        else:
+            self._entry.raw.rollback()
+        return False
+
+    def __del__(self):
+        # Safety net for call sites that never close. The connection's state
+        # is unknown at this point, so it is discarded rather than reused.
+        try:
+            entry = object.__getattribute__(self, "_entry")
+        except AttributeError:
+            return
+        if entry is not None:
+            object.__setattr__(self, "_entry", None)
+            try:
+                self._pool._release(entry, [], broken=True)
+            except Exception:
+                pass
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of connections produced by `connect`.
+
+    `connect` returns a raw DB-API connection or None (the DatabaseClient
+    contract for "could not connect"). LIFO keeps the hottest connection in use
+    and lets the coldest ones age out under IDLE_TIMEOUT_SEC.
+    """
+
+    def __init__(self, connect: Callable, name: str = "sql",
+                 min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 borrow_timeout: float = BORROW_TIMEOUT_SEC,
+                 idle_timeout: float = IDLE_TIMEOUT_SEC,
+                 validate_after: float = VALIDATE_AFTER_SEC,
+                 max_lifetime: float = MAX_LIFETIME_SEC):
+        self.name = name
+        self._connect = connect
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size))
+        self.borrow_timeout = borrow_timeout
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.max_lifetime = max_lifetime
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._live = 0
+        self._closed = False
+        self._stats = {
+            "borrows": 0,
+            "borrow_wait_ms_total": 0.0,
+            "borrow_wait_ms_max": 0.0,
+            "timeouts": 0,
+            "opened": 0,
+            "reconnects": 0,
+            "connect_failures": 0,
+            "discarded": 0,
+            "evicted_idle": 0,
+        }
+
+    # ── borrowing ────────────────────────────────────────────────────────────
+    def borrow(self, timeout: Optional[float] = None) -> Optional[PooledConnection]:
+        """Lend a connection, or None if none could be opened in time."""
+        timeout = self.borrow_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        stale = []
+        with self._cond:
+            while True:
+                stale.extend(self._evict_idle_locked(time.monotonic()))
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._live < self.max_size:
+                    self._live += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    entry = False
+                    break
+                self._cond.wait(remaining)
+        for raw in stale:
+            self._discard(raw)
+        if entry is False:
+            logging.error(f"SQL pool '{self.name}' exhausted: "
+                          f"{self.max_size} connections in use for {timeout:.0f}s")
+            return None
+
+        # Slow work (connect, ping) happens outside the lock. The slot is
+        # already reserved in _live, so max_size still holds.
+        if entry is not None:
+            entry = self._checked(entry)
+        else:
+            entry = self._open(reconnect=False)
+        if entry is None:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            return None
+
+        waited_ms = (time.monotonic() - started) * 1000.0
+        with self._cond:
+            self._stats["borrows"] += 1
+            self._stats["borrow_wait_ms_total"] += waited_ms
+            self._stats["borrow_wait_ms_max"] = max(self._stats["borrow_wait_ms_max"], waited_ms)
+        return PooledConnection(self, entry)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """`with pool.connection() as conn:` — conn may be None; always released."""
+        conn = self.borrow(timeout)
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _checked(self, entry: _Entry) -> Optional[_Entry]:
+        """Return `entry` if it is still fit to lend, else a fresh replacement."""
+        now = time.monotonic()
+        if now - entry.created_at >= self.max_lifetime:
+            self._discard(entry.raw)
+            return self._open(reconnect=True)
+        if now - entry.last_used >= self.validate_after and not self._ping(entry.raw):
+            self._discard(entry.raw)
+            return self._open(reconnect=True)
+        return entry
+
+    def _open(self, reconnect: bool) -> Optional[_Entry]:
+        try:
+            raw = self._connect()
+        except Exception as e:
+            logging.error(f"SQL pool '{self.name}' connect failed: {e}")
+            raw = None
+        with self._cond:
+            if raw is None:
+                self._stats["connect_failures"] += 1
+                return None
+            self._stats["opened"] += 1
+            if reconnect:
+                self._stats["reconnects"] += 1
+        return _Entry(raw)
+
+    @staticmethod
+    def _ping(raw) -> bool:
+        cur = None
+        try:
+            cur = raw.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            return True
+        except Exception as e:
+            logging.warning(f"SQL pool health check failed, reconnecting: {e}")
+            return False
+        finally:
+            if cur is not None:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+
+    # ── returning ────────────────────────────────────────────────────────────
+    def _release(self, entry: _Entry, cursors, broken: bool = False) -> None:
+        for cur in cursors:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        if not broken:
+            try:
+                entry.raw.rollback()
+                if getattr(entry.raw, "autocommit", False):
+                    entry.raw.autocommit = False
+            except Exception as e:
+                logging.warning(f"SQL pool '{self.name}' dropping connection on release: {e}")
+                broken = True
+
+        with self._cond:
+            if broken or self._closed:
+                self._live -= 1
+                self._stats["discarded"] += 1
+                keep = False
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._discard(entry.raw)
+
+    def _evict_idle_locked(self, now: float) -> list:
+        """Pop connections idle past the timeout (oldest first, never below
+        min_size live). Returns them for the caller to close outside the lock."""
+        stale = []
+        while self._idle and self._live > self.min_size \
+                and now - self._idle[0].last_used >= self.idle_timeout:
+            stale.append(self._idle.popleft().raw)
+            self._live -= 1
+            self._stats["evicted_idle"] += 1
+        return stale
+
+    @staticmethod
+    def _discard(raw) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def close_all(self) -> None:
+        """Close idle connections and stop pooling; borrowed ones close on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry.raw)
+
+    # ── metrics ──────────────────────────────────────────────────────────────
+    def metrics(self) -> dict:
+        with self._cond:
+            s = dict(self._stats)
+            idle = len(self._idle)
+            live = self._live
+        borrows = s["borrows"]
+        return {
+            "name": self.name,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "live": live,
+            "idle": idle,
+            "in_use": live - idle,
+            "borrows": borrows,
+            "borrow_wait_ms_avg": round(s["borrow_wait_ms_total"] / borrows, 2) if borrows else 0.0,
+            "borrow_wait_ms_max": round(s["borrow_wait_ms_max"], 2),
+            "timeouts": s["timeouts"],
+            "opened": s["opened"],
+            "reconnects": s["reconnects"],
+            "connect_failures": s["connect_failures"],
+            "discarded": s["discarded"],
+            "evicted_idle": s["evicted_idle"],
+        }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: str, connect: Callable, **options) -> ConnectionPool:
+    """The process-wide pool for `key`, created on first use.
+
+    `key` identifies the target database (never includes credentials in logs or
+    metrics — only the pool's name is reported). `connect` is only used the
+    first time; later callers share the existing pool.
+    """
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(connect, **options)
+            _pools[key] = pool
+        return pool
+
+
+def pool_metrics() -> list:
+    """Metrics for every pool this process has created (for /api/health)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [p.metrics() for p in pools]
+
+
+def reset_pools() -> None:
+    """Close and forget every pool. Used by tests and after config changes."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for p in pools:
+        p.close_all()
@@ -0,0 +1,262 @@
+"""
+Reverse-geocode cache for TessieClient._resolve_address.
+
+Every drive with a missing start/end address used to cost a Nominatim call,
+and Nominatim's usage policy allows one request per second — a ceiling when
+backfilling a month of drives, and a ban risk when several threads ignore it.
+The same pickup zones come up drive after drive, so results are cached per
+geohash cell:
+
+  * Coordinates snap to a precision-8 geohash (~38 m x 19 m), so two drives
+    ending at the same curb share one lookup.
+  * An in-process LRU sits in front of Rides.GeocodeCache; the SQL table makes
+    results survive host restarts and scale-out.
+  * Misses are throttled process-wide to MIN_INTERVAL_SEC, and a caller that
+    waited on the throttle re-checks the LRU first, so a burst of lookups for
+    one cell costs one request.
+  * prewarm_from_location_intelligence() seeds the table from the addresses
+    Tessie tags already recorded in dbo.Location_Intelligence.
+
+Failed lookups are not cached: the next drive through that cell retries.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from services import http_pool
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
+# Nominatim requires an identifying User-Agent.
+USER_AGENT = "SummitOS/1.0"
+# Nominatim usage policy: an absolute maximum of 1 request per second.
+MIN_INTERVAL_SEC = 1.0
+GEOHASH_PRECISION = 8
+LRU_SIZE = 4096
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch, lon_lo = (ch << 1) | 1, mid
+            else:
+                ch, lon_hi = ch << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = (ch << 1) | 1, mid
+            else:
+                ch, lat_hi = ch << 1, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def _nominatim(lat: float, lon: float) -> Optional[str]:
+    resp = http_pool.get(
+        NOMINATIM_URL,
+        params={"format": "json", "lat": lat, "lon": lon},
+        headers={"User-Agent": USER_AGENT},
+        timeout=5,
+    )
+    if resp.status_code != 200:
+        return None
+    addr = resp.json().get("address", {})
+    return f"{addr.get('road', 'Unknown Road')}, {addr.get('city', 'Unknown City')}"
+
+
+class ReverseGeocodeCache:
+    def __init__(self, db=None, fetch=_nominatim, lru_size: int = LRU_SIZE):
+        self._db = db
+        self._fetch = fetch
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lru_size = lru_size
+        self._lru_lock = threading.Lock()
+        self._throttle_lock = threading.Lock()
+        self._last_request_at = 0.0
+        self._table_ready = False
+        self.stats = {"lru": 0, "sql": 0, "fetched": 0, "failed": 0}
+
+    @property
+    def db(self):
+        if self._db is None:
+            from services.database import DatabaseClient
+            self._db = DatabaseClient()
+        return self._db
+
+    # ── LRU ───────────────────────────────────────────────────────────────────
+
+    def _lru_get(self, cell: str) -> Optional[str]:
+        with self._lru_lock:
+            hit = self._lru.get(cell)
+            if hit is not None:
+                self._lru.move_to_end(cell)
+            return hit
+
+    def _lru_put(self, cell: str, address: str) -> None:
+        with self._lru_lock:
+            self._lru[cell] = address
+            self._lru.move_to_end(cell)
+            while len(self._lru) > self._lru_size:
+                self._lru.popitem(last=False)
+
+    # ── SQL ───────────────────────────────────────────────────────────────────
+
+    def _ensure_table(self, cursor) -> None:
+        if self._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.GeocodeCache', 'U') IS NULL
+            CREATE TABLE Rides.GeocodeCache (
+                Geohash   VARCHAR(12)   NOT NULL PRIMARY KEY,
+                Address   NVARCHAR(400) NOT NULL,
+                Source    NVARCHAR(40)  NOT NULL,
+                CreatedAt DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+            )
+        """)
+        self._table_ready = True
+
+    def _sql_get(self, cell: str) -> Optional[str]:
+        conn = self.db.get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            conn.commit()
+            cursor.execute("SELECT Address FROM Rides.GeocodeCache WHERE Geohash = ?", (cell,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logging.warning(f"Geocode cache lookup failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def _sql_put(self, cell: str, address: str, source: str) -> None:
+        conn = self.db.get_connection()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                MERGE INTO Rides.GeocodeCache WITH (HOLDLOCK) AS target
+                USING (SELECT ? AS Geohash) AS source
+                ON (target.Geohash = source.Geohash)
+                WHEN NOT MATCHED THEN
+                    INSERT (Geohash, Address, Source) VALUES (?, ?, ?);
+            """, (cell, cell, address[:400], source))
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Geocode cache write failed for {cell}: {e}")
+        finally:
+            conn.close()
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def _throttled_fetch(self, cell: str, lat: float, lon: float) -> Optional[str]:
+        with self._throttle_lock:
+            # Another thread may have resolved this cell while we waited.
+            hit = self._lru_get(cell)
+            if hit is not None:
+                return hit
+            wait = MIN_INTERVAL_SEC - (time.monotonic() - self._last_request_at)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return self._fetch(lat, lon)
+            finally:
+                self._last_request_at = time.monotonic()
+
+    def resolve(self, lat, lon) -> Optional[str]:
+        """Address for (lat, lon), or None if the provider could not say."""
+        if not lat or not lon:
+            return None
+        lat, lon = float(lat), float(lon)
+        cell = geohash(lat, lon)
+
+        hit = self._lru_get(cell)
+        if hit is not None:
+            self.stats["lru"] += 1
+            return hit
+        hit = self._sql_get(cell)
+        if hit is not None:
+            self.stats["sql"] += 1
+            self._lru_put(cell, hit)
+            return hit
+
+        try:
+            address = self._throttled_fetch(cell, lat, lon)
+        except Exception as e:
+            logging.warning(f"Reverse geocode failed for {cell}: {e}")
+            address = None
+        if not address:
+            self.stats["failed"] += 1
+            return None
+        self.stats["fetched"] += 1
+        self._lru_put(cell, address)
+        self._sql_put(cell, address, "nominatim")
+        return address
+
+    def prewarm_from_location_intelligence(self) -> int:
+        """Seed Rides.GeocodeCache with the addresses recorded against tagged
+        Tessie locations. Cells already cached keep their address. Returns the
+        number of cells added."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                SELECT Latitude, Longitude, Address FROM dbo.Location_Intelligence
+                WHERE Latitude IS NOT NULL AND Longitude IS NOT NULL
+                  AND Address IS NOT NULL AND Address NOT IN ('', 'Unknown')
+                ORDER BY Frequency DESC
+            """)
+            cells = {}
+            for lat, lon, address in cursor.fetchall():
+                # Most frequent label wins a shared cell.
+                cells.setdefault(geohash(float(lat), float(lon)), str(address)[:400])
+            if not cells:
+                return 0
+            cursor.execute("CREATE TABLE #GeocodeSeed (Geohash VARCHAR(12) PRIMARY KEY, Address NVARCHAR(400))")
+            cursor.fast_executemany = True
+            cursor.executemany("INSERT INTO #GeocodeSeed (Geohash, Address) VALUES (?, ?)", list(cells.items()))
+            cursor.execute("""
+                MERGE INTO Rides.GeocodeCache WITH (HOLDLOCK) AS target
+                USING #GeocodeSeed AS source
+                ON (target.Geohash = source.Geohash)
+                WHEN NOT MATCHED THEN
+                    INSERT (Geohash, Address, Source) VALUES (source.Geohash, source.Address, 'location_intelligence');
+            """)
+            added = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else 0
+            cursor.execute("DROP TABLE #GeocodeSeed")
+            conn.commit()
+            return added
+        finally:
+            conn.close()
+
+
+_shared: Optional[ReverseGeocodeCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_geocode_cache() -> ReverseGeocodeCache:
+    """The process-wide cache (one LRU and one throttle for every client)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ReverseGeocodeCache()
+        return _shared
@@ -4,6 +4,9 @@ import logging
 from datetime import datetime
 import pytz
 
+from services import http_pool
+from services.graph_token import get_graph_token
+
 class GraphClient:
     def __init__(self):
         self.tenant_id = os.environ.get("OAUTH_TENANT_ID")
@@ -15,26 +18,9 @@ class GraphClient:
             raise Exception("Missing Microsoft Graph credentials in env")
 
     def _get_token(self):
-        # OPTION 1: Client Credentials (Service Principal) - Preferred to bypass MFA
-        url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-        
-        # Default to App Credentials (Client Credentials Flow)
-        data = {
-            "client_id": self.client_id,
-            "scope": "https://graph.microsoft.com/.default",
-            "client_secret": self.client_secret,
-            "grant_type": "client_credentials"
-        }
-            
-        resp = requests.post(url, data=data)
-        
-        if not resp.ok:
-            logging.error(f"Graph Token Error: {resp.status_code} {resp.text}")
-            raise Exception(f"Graph Token Error: {resp.status_code} {resp.text}")
-            
-        return resp.json().get("access_token")
-            
-        return resp.json().get("access_token")
+        # Client Credentials (Service Principal) - Preferred to bypass MFA.
+        # Shared per app registration across every GraphClient in the process.
+        return get_graph_token(self.tenant_id, self.client_id, self.client_secret)
 
     def _format_iso_z(self, dt: datetime) -> str:
         """Helper to format datetime to ISO 8601 with Z suffix (UTC)."""
@@ -86,7 +72,7 @@ class GraphClient:
             "Content-Type": "application/json"
         }
         
-        resp = requests.get(url, headers=headers, params=params)
+        resp = http_pool.get(url, headers=headers, params=params)
         if not resp.ok:
             logging.error(f"Graph API Error: {resp.text}")
             raise Exception(f"Graph Search Error: {resp.status_code} {resp.text}")
@@ -174,7 +160,7 @@ class GraphClient:
         
         logging.info(f"Graph POST to {url} with payload subject={subject}")
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=30)
+            resp = http_pool.post(url, headers=headers, json=payload, timeout=30)
         except requests.exceptions.Timeout:
             logging.error("Graph POST Timed out after 30s")
             raise Exception("Graph API Timeout")
@@ -198,7 +184,7 @@ class GraphClient:
             token = self._get_token()
             url = f"https://graph.microsoft.com/v1.0/users/{self.user_email}/calendar/events/{event_id}"
             headers = {"Authorization": f"Bearer {token}"}
-            resp = requests.delete(url, headers=headers)
+            resp = http_pool.delete(url, headers=headers)
             if not resp.ok and resp.status_code != 404:
                 logging.error(f"Graph Delete Event Error: {resp.status_code} {resp.text}")
                 return False
@@ -245,7 +231,7 @@ class GraphClient:
             "Content-Type": "application/json"
         }
         
-        resp = requests.post(url, headers=headers, json=payload)
+        resp = http_pool.post(url, headers=headers, json=payload)
         if not resp.ok:
             logging.error(f"Graph SendMail Error: {resp.text}")
             raise Exception(f"Graph SendMail Error: {resp.status_code} {resp.text}")
@@ -268,7 +254,7 @@ class GraphClient:
             "Content-Type": "application/json"
         }
         
-        resp = requests.get(url, headers=headers, params=params)
+        resp = http_pool.get(url, headers=headers, params=params)
         if not resp.ok:
             logging.error(f"Graph Business Hours Error: {resp.text}")
             raise Exception(f"Graph Business Hours Error: {resp.status_code} {resp.text}")
@@ -295,7 +281,7 @@ class GraphClient:
             "Content-Type": "application/json",
             "Prefer": 'outlook.timezone="America/Denver"',
         }
-        resp = requests.get(url, headers=headers, params=params)
+        resp = http_pool.get(url, headers=headers, params=params)
         if not resp.ok:
             logging.error(f"Graph Calendar View Error: {resp.text}")
             raise Exception(f"Graph Calendar View Error: {resp.status_code} {resp.text}")
@@ -325,7 +311,7 @@ class GraphClient:
         # Time Off is typically characterized by serviceId being null or specific type.
         # We will return the raw list and let the caller filter.
         
-        resp = requests.get(url, headers=headers, params=params)
+        resp = http_pool.get(url, headers=headers, params=params)
         if not resp.ok:
             logging.error(f"Graph Staff Calendar Error: {resp.text}")
             raise Exception(f"Graph Staff Calendar Error: {resp.status_code} {resp.text}")
@@ -355,7 +341,7 @@ class GraphClient:
         }
         
         logging.info(f"Publishing Booking Page for {biz_id}...")
-        resp = requests.patch(url, headers=headers, json=payload)
+        resp = http_pool.patch(url, headers=headers, json=payload)
         
         if not resp.ok:
             logging.error(f"Graph Publish Error: {resp.text}")
@@ -376,7 +362,7 @@ class GraphClient:
         headers = {
             "Authorization": f"Bearer {token}"
         }
-        resp = requests.get(url, headers=headers)
+        resp = http_pool.get(url, headers=headers)
         if resp.ok:
             return resp.json()
         return None
@@ -394,7 +380,7 @@ class GraphClient:
         }
         
         logging.info(f"Creating new Booking Service in {biz_id}: {service_payload.get('displayName')}...")
-        resp = requests.post(url, headers=headers, json=service_payload)
+        resp = http_pool.post(url, headers=headers, json=service_payload)
         
         if not resp.ok:
             logging.error(f"Graph Create Service Error: {resp.text}")
@@ -410,7 +396,7 @@ class GraphClient:
         token = self._get_token()
         url = f"https://graph.microsoft.com/v1.0/users/{self.user_email}/drive/root"
         headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(url, headers=headers)
+        resp = http_pool.get(url, headers=headers)
         if not resp.ok:
             logging.error(f"Graph Drive Root Error: {resp.text}")
             raise Exception(f"Graph Drive Root Error: {resp.status_code} {resp.text}")
@@ -427,7 +413,7 @@ class GraphClient:
         encoded_path = quote(path)
         url = f"https://graph.microsoft.com/v1.0/users/{self.user_email}/drive/root:/{encoded_path}"
         headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(url, headers=headers)
+        resp = http_pool.get(url, headers=headers)
         if resp.status_code == 404:
             return None
         if not resp.ok:
@@ -449,7 +435,7 @@ class GraphClient:
             "folder": {},
             "@microsoft.graph.conflictBehavior": "fail"
         }
-        resp = requests.post(url, headers=headers, json=payload)
+        resp = http_pool.post(url, headers=headers, json=payload)
         if resp.status_code == 409:
             # Folder already exists — fetch it by path to get the ID
             logging.info(f"Folder '{folder_name}' already exists under parent {parent_id}, re-fetching.")
@@ -494,21 +480,26 @@ class GraphClient:
         return last_id
 
     def list_folder_files(self, path: str):
-        """Lists all files in a given folder path."""
+        """Lists all files in a given folder path, following @odata.nextLink
+        (Graph pages children at 200 items by default)."""
         token = self._get_token()
         from urllib.parse import quote
         encoded_path = quote(path)
         url = f"https://graph.microsoft.com/v1.0/users/{self.user_email}/drive/root:/{encoded_path}:/children"
         headers = {"Authorization": f"Bearer {token}"}
-        
-        resp = requests.get(url, headers=headers)
-        if not resp.ok:
-            if resp.status_code == 404:
-                return []
-            logging.error(f"Graph List Files Error: {resp.text}")
-            return []
-        
-        return resp.json().get("value", [])
+
+        items = []
+        while url:
+            resp = http_pool.get(url, headers=headers)
+            if not resp.ok:
+                if resp.status_code == 404:
+                    return []
+                logging.error(f"Graph List Files Error: {resp.text}")
+                return items
+            data = resp.json()
+            items.extend(data.get("value", []))
+            url = data.get("@odata.nextLink")
+        return items
 
     def move_file(self, item_id: str, destination_parent_id: str, new_name: str = None):
         """Moves a file to a new parent folder. Optionally renames it."""
@@ -526,7 +517,7 @@ class GraphClient:
         if new_name:
             payload["name"] = new_name
 
-        resp = requests.patch(url, headers=headers, json=payload)
+        resp = http_pool.patch(url, headers=headers, json=payload)
         if not resp.ok:
             logging.error(f"Graph Move File Error: {resp.text}")
             raise Exception(f"Graph Move File Error: {resp.status_code} {resp.text}")
@@ -538,7 +529,7 @@ class GraphClient:
         url = f"https://graph.microsoft.com/v1.0/users/{self.user_email}/drive/items/{item_id}/content"
         headers = {"Authorization": f"Bearer {token}"}
         
-        resp = requests.get(url, headers=headers)
+        resp = http_pool.get(url, headers=headers)
         if not resp.ok:
             logging.error(f"Graph Download Error: {resp.text}")
             raise Exception(f"Graph Download Error: {resp.status_code} {resp.text}")
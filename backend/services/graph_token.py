@@ -0,0 +1,127 @@
+"""
+Process-wide cache of Microsoft Graph app-only (client credentials) tokens.
+
+GraphClient used to post to the identity endpoint on every call, so an OCR
+scan of 40 screenshots cost 40+ token round trips from four worker threads.
+Tokens are now cached per (tenant, client, scope) and reused until shortly
+before `expires_in`:
+
+  * more than REFRESH_AHEAD_S left: served from the cache;
+  * less than that but more than EXPIRY_SKEW_S: served from the cache while
+    one background thread fetches the replacement;
+  * less than EXPIRY_SKEW_S left (or nothing cached): fetched inline, with
+    concurrent callers for the same key waiting on one request instead of
+    each sending their own.
+
+A failed background refresh is logged and retried by the next caller; a
+failed inline fetch raises, as GraphClient._get_token always has.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+
+DEFAULT_SCOPE = "https://graph.microsoft.com/.default"
+
+# Never hand out a token with less than this left: a long paginated listing
+# must not have it expire mid-flight.
+EXPIRY_SKEW_S = 120
+# Start a background refresh once a token is this close to expiring.
+REFRESH_AHEAD_S = 600
+
+_HTTP_TIMEOUT_S = 10
+
+_Key = Tuple[str, str, str]
+
+
+class _Entry:
+    __slots__ = ("token", "expires_at", "refreshing", "lock")
+
+    def __init__(self):
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+
+class TokenCache:
+    def __init__(self):
+        self._entries: Dict[_Key, _Entry] = {}
+        self._guard = threading.Lock()
+
+    def _entry(self, key: _Key) -> _Entry:
+        with self._guard:
+            return self._entries.setdefault(key, _Entry())
+
+    @staticmethod
+    def _fetch(tenant_id: str, client_id: str, client_secret: str, scope: str):
+        url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
+        data = {
+            "client_id": client_id,
+            "scope": scope,
+            "client_secret": client_secret,
+            "grant_type": "client_credentials",
+        }
+        resp = requests.post(url, data=data, timeout=_HTTP_TIMEOUT_S)
+        if not resp.ok:
+            logging.error(f"Graph Token Error: {resp.status_code} {resp.text}")
+            raise Exception(f"Graph Token Error: {resp.status_code} {resp.text}")
+        body = resp.json()
+        return body.get("access_token"), time.time() + int(body.get("expires_in", 3600))
+
+    def _store(self, entry: _Entry, key: _Key, secret: str) -> str:
+        token, expires_at = self._fetch(key[0], key[1], secret, key[2])
+        entry.token, entry.expires_at = token, expires_at
+        return token
+
+    def _refresh_in_background(self, entry: _Entry, key: _Key, secret: str) -> None:
+        def run():
+            try:
+                with entry.lock:
+                    # An inline fetch may have beaten us to it.
+                    if entry.expires_at - time.time() <= REFRESH_AHEAD_S:
+                        self._store(entry, key, secret)
+            except Exception as e:
+                logging.warning(f"Background Graph token refresh failed: {e}")
+            finally:
+                entry.refreshing = False
+
+        threading.Thread(target=run, name="graph-token-refresh", daemon=True).start()
+
+    def get(self, tenant_id: str, client_id: str, client_secret: str,
+            scope: str = DEFAULT_SCOPE) -> str:
+        key = (tenant_id, client_id, scope)
+        entry = self._entry(key)
+        left = entry.expires_at - time.time()
+        if entry.token and left > EXPIRY_SKEW_S:
+            if left <= REFRESH_AHEAD_S and not entry.refreshing:
+                with self._guard:
+                    start, entry.refreshing = not entry.refreshing, True
+                if start:
+                    self._refresh_in_background(entry, key, client_secret)
+            return entry.token
+        with entry.lock:
+            if entry.token and entry.expires_at - time.time() > EXPIRY_SKEW_S:
+                return entry.token
+            return self._store(entry, key, client_secret)
+
+    def invalidate(self, tenant_id: str, client_id: str, scope: str = DEFAULT_SCOPE) -> None:
+        """Drop a cached token, e.g. after Graph rejected it with a 401."""
+        entry = self._entry((tenant_id, client_id, scope))
+        with entry.lock:
+            entry.token, entry.expires_at = None, 0.0
+
+
+_cache = TokenCache()
+
+
+def get_graph_token(tenant_id: str, client_id: str, client_secret: str,
+                    scope: str = DEFAULT_SCOPE) -> str:
+    """Cached client-credentials token for this app registration."""
+    return _cache.get(tenant_id, client_id, client_secret, scope)
+
+
+def invalidate_graph_token(tenant_id: str, client_id: str, scope: str = DEFAULT_SCOPE) -> None:
+    _cache.invalidate(tenant_id, client_id, scope)
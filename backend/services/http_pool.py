@@ -0,0 +1,173 @@
+"""
+Process-wide outbound HTTP layer.
+
+TessieClient, GraphClient, GeoAgent, the elevation lookup and the Nominatim
+reverse geocoder all called bare `requests.get/post`, which opens a fresh
+TCP+TLS connection per call (and most GraphClient calls had no timeout at
+all, so a stalled Graph request could hang a worker until the host killed
+it). This module keeps one keep-alive `requests.Session` per host and routes
+every service client through it.
+
+`get/post/put/patch/delete/request` take the same arguments as their
+`requests` namesakes and return a `requests.Response`, so migrating a call
+site is a one-word change. On top of the plain session they add:
+
+  * A default timeout (DEFAULT_TIMEOUT) when the caller passes none.
+  * Retries with full jitter for 429 and 5xx, honouring `Retry-After`
+    (capped at MAX_RETRY_AFTER_SEC). Non-idempotent methods (POST, PATCH) are
+    retried on 429 only — the request was refused, not half-processed — so a
+    5xx after a calendar insert or a mail send never sends it twice.
+    Connection errors are retried for idempotent methods only.
+  * Per-host call count, status histogram and latency, read by /health.
+
+The final response is returned as-is whatever its status, and a final
+connection error is raised as-is, so existing `resp.ok` / `except
+requests.exceptions.Timeout` handling is unchanged.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+# (connect, read) seconds.
+DEFAULT_TIMEOUT = (
+    float(os.environ.get("HTTP_CONNECT_TIMEOUT_SEC", "5")),
+    float(os.environ.get("HTTP_READ_TIMEOUT_SEC", "30")),
+)
+BACKOFF_BASE_SEC = 0.5
+BACKOFF_CAP_SEC = 8.0
+MAX_RETRY_AFTER_SEC = 30.0
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+_metrics: Dict[str, dict] = {}
+_metrics_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def session_for(url: str) -> requests.Session:
+    """The shared keep-alive session for `url`'s host."""
+    host = _host(url)
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _record(host: str, status, elapsed_ms: float, retried: bool) -> None:
+    with _metrics_lock:
+        m = _metrics.setdefault(host, {
+            "calls": 0, "retries": 0, "errors": 0, "status": {},
+            "totalMs": 0.0, "maxMs": 0.0,
+        })
+        m["calls"] += 1
+        if retried:
+            m["retries"] += 1
+        if status is None:
+            m["errors"] += 1
+        else:
+            key = str(status)
+            m["status"][key] = m["status"].get(key, 0) + 1
+        m["totalMs"] += elapsed_ms
+        m["maxMs"] = max(m["maxMs"], elapsed_ms)
+
+
+def http_metrics() -> dict:
+    """Per-host counters since process start (or the last reset)."""
+    with _metrics_lock:
+        out = {}
+        for host, m in _metrics.items():
+            out[host] = dict(
+                m,
+                status=dict(m["status"]),
+                totalMs=round(m["totalMs"], 1),
+                maxMs=round(m["maxMs"], 1),
+                avgMs=round(m["totalMs"] / m["calls"], 1) if m["calls"] else 0.0,
+            )
+        return out
+
+
+def reset_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _retry_delay(attempt: int, resp: Optional[requests.Response]) -> float:
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER_SEC)
+            except ValueError:
+                pass  # HTTP-date form; fall through to backoff
+    return random.uniform(0, min(BACKOFF_BASE_SEC * (2 ** attempt), BACKOFF_CAP_SEC))
+
+
+def request(method: str, url: str, *, timeout=None, retries: Optional[int] = None,
+            **kwargs) -> requests.Response:
+    method = method.upper()
+    host = _host(url)
+    session = session_for(url)
+    retries = MAX_RETRIES if retries is None else retries
+    idempotent = method in IDEMPOTENT_METHODS
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            resp = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            _record(host, None, (time.monotonic() - started) * 1000, attempt > 0)
+            if not idempotent or attempt >= retries:
+                raise
+            delay = _retry_delay(attempt, None)
+        else:
+            _record(host, resp.status_code, (time.monotonic() - started) * 1000, attempt > 0)
+            retryable = resp.status_code == 429 or (idempotent and resp.status_code in RETRY_STATUSES)
+            if not retryable or attempt >= retries:
+                return resp
+            delay = _retry_delay(attempt, resp)
+            logging.info(f"HTTP {resp.status_code} from {host}; retry {attempt + 1}/{retries} in {delay:.1f}s")
+        attempt += 1
+        time.sleep(delay)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return request("PATCH", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
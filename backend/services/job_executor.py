@@ -0,0 +1,211 @@
+"""
+Bounded executor for the background jobs started by api/operations.py.
+
+run_async_job used to start one daemon thread per request with no cap, so a
+few dashboard clicks could run several OCR scans at once — each with its own
+worker pool against Graph and Azure Vision. Jobs now go through one
+process-wide JobExecutor:
+
+  * At most JOB_WORKERS jobs run at a time (env JOB_EXECUTOR_WORKERS).
+  * Each operation belongs to a limit group (LIMIT_GROUPS; an operation not
+    listed is its own group) and each group has a limit (OPERATION_LIMITS,
+    default DEFAULT_OPERATION_LIMIT). The OCR-heavy operations share the
+    "OCR" group, so a cloud scan, a trip ingestion and a receipt ingestion
+    never run at once. A job whose group is at its limit waits in the queue
+    without holding a worker, so other groups can still run.
+  * Queued jobs start in FIFO order, skipping any whose group is full.
+  * Submitting a job identical to one that is still queued or running (same
+    operation and arguments, e.g. a second "scan 2026-06-02") returns the
+    existing job id instead of starting another. The JobTracker row is
+    inserted outside the executor lock; the key is reserved first so an
+    identical request arriving meanwhile waits for that id.
+
+`snapshot(job_id)` reports queue depth, the job's position, running counts
+and recent queue-wait times; /job-status merges it into the JobTracker row.
+Limits are per worker process; JobTracker remains the cross-instance record.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+JOB_WORKERS = int(os.environ.get("JOB_EXECUTOR_WORKERS", "4"))
+DEFAULT_OPERATION_LIMIT = 2
+# OCR-heavy operations fan out to Graph and Azure Vision themselves, so they
+# share one slot rather than getting one each.
+LIMIT_GROUPS: Dict[str, str] = {
+    "Unified Cloud Scan": "OCR",
+    "OCR Trip Ingestion": "OCR",
+    "Expense Receipt Ingestion": "OCR",
+}
+OPERATION_LIMITS: Dict[str, int] = {
+    "OCR": 1,
+    "Daily Ingestion Sync": 1,
+}
+_WAIT_SAMPLES = 50
+
+
+def dedupe_key(operation: str, args: tuple, kwargs: dict) -> str:
+    return json.dumps([operation, list(args), kwargs], sort_keys=True, default=str)
+
+
+class _Job:
+    __slots__ = ("job_id", "operation", "group", "key", "run", "queued_at", "started_at", "created")
+
+    def __init__(self, operation: str, group: str, key: str):
+        self.job_id: Optional[str] = None
+        self.operation = operation
+        self.group = group
+        self.key = key
+        self.run: Optional[Callable[[float], None]] = None
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        # Set once create_job has returned (or failed); job_id is None until then.
+        self.created = threading.Event()
+
+
+class JobExecutor:
+    def __init__(self, workers: int = JOB_WORKERS, limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = DEFAULT_OPERATION_LIMIT, groups: Optional[Dict[str, str]] = None):
+        self.workers = workers
+        self.limits = dict(OPERATION_LIMITS if limits is None else limits)
+        self.groups = dict(LIMIT_GROUPS if groups is None else groups)
+        self.default_limit = default_limit
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._pending: "deque[_Job]" = deque()
+        self._running: Dict[str, _Job] = {}
+        self._by_key: Dict[str, _Job] = {}
+        self._waits_ms: "deque[float]" = deque(maxlen=_WAIT_SAMPLES)
+        self._stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0}
+
+    def group_for(self, operation: str) -> str:
+        return self.groups.get(operation, operation)
+
+    def limit_for(self, operation: str) -> int:
+        return self.limits.get(self.group_for(operation), self.default_limit)
+
+    def submit(self, operation: str, key: str, create_job: Callable[[], str],
+               run: Callable[[str, float], None]) -> Dict[str, Any]:
+        """Queue `run(job_id, wait_ms)` unless an identical job is active.
+        The key is reserved under the lock and `create_job` (a JobTracker
+        INSERT) runs outside it, so a slow insert never stalls other submits
+        or snapshot(); an identical request arriving meanwhile waits for the
+        reserved job's id instead of creating its own. Returns
+        {"jobId", "deduplicated"}."""
+        while True:
+            with self._lock:
+                active = self._by_key.get(key)
+                if active is None:
+                    job = _Job(operation, self.group_for(operation), key)
+                    self._by_key[key] = job
+                    break
+            active.created.wait()
+            if active.job_id is not None:
+                with self._lock:
+                    self._stats["deduplicated"] += 1
+                return {"jobId": active.job_id, "deduplicated": True}
+            # The reserving request's create_job failed; try again as a new job.
+
+        try:
+            job_id = create_job()
+        except Exception:
+            with self._lock:
+                if self._by_key.get(key) is job:
+                    del self._by_key[key]
+            job.created.set()
+            raise
+
+        with self._lock:
+            job.job_id = job_id
+            job.run = lambda wait_ms: run(job_id, wait_ms)
+            job.queued_at = time.monotonic()
+            self._pending.append(job)
+            self._stats["submitted"] += 1
+            self._pump()
+        job.created.set()
+        return {"jobId": job_id, "deduplicated": False}
+
+    def _running_in(self, group: str) -> int:
+        return sum(1 for j in self._running.values() if j.group == group)
+
+    def _pump(self) -> None:
+        """Start queued jobs while workers and group limits allow. Holds _lock."""
+        if not self._pending or len(self._running) >= self.workers:
+            return
+        for job in list(self._pending):
+            if len(self._running) >= self.workers:
+                break
+            if self._running_in(job.group) >= self.limit_for(job.operation):
+                continue
+            self._pending.remove(job)
+            job.started_at = time.monotonic()
+            self._running[job.job_id] = job
+            self._waits_ms.append((job.started_at - job.queued_at) * 1000)
+            self._pool.submit(self._execute, job)
+
+    def _execute(self, job: _Job) -> None:
+        ok = False
+        try:
+            job.run(round((job.started_at - job.queued_at) * 1000, 1))
+            ok = True
+        except Exception as e:
+            logging.error(f"JobExecutor: job {job.job_id} ({job.operation}) raised: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(job.job_id, None)
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+                self._stats["completed" if ok else "failed"] += 1
+                self._pump()
+
+    def snapshot(self, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue depth, running counts and wait-time metrics; with `job_id`,
+        also where that job is (queued position, or running)."""
+        with self._lock:
+            running_by_op: Dict[str, int] = {}
+            for j in self._running.values():
+                running_by_op[j.operation] = running_by_op.get(j.operation, 0) + 1
+            queued_by_op: Dict[str, int] = {}
+            for j in self._pending:
+                queued_by_op[j.operation] = queued_by_op.get(j.operation, 0) + 1
+            waits = sorted(self._waits_ms)
+            snap: Dict[str, Any] = {
+                "workers": self.workers,
+                "queueDepth": len(self._pending),
+                "running": len(self._running),
+                "queuedByOperation": queued_by_op,
+                "runningByOperation": running_by_op,
+                "avgWaitMs": round(sum(waits) / len(waits), 1) if waits else None,
+                "maxWaitMs": round(waits[-1], 1) if waits else None,
+                **self._stats,
+            }
+            if job_id is not None:
+                position = next((i + 1 for i, j in enumerate(self._pending) if j.job_id == job_id), None)
+                job = self._running.get(job_id)
+                if position is not None:
+                    queued = self._pending[position - 1]
+                    snap["job"] = {"state": "queued", "position": position, "limitGroup": queued.group,
+                                   "operationLimit": self.limit_for(queued.operation),
+                                   "waitingMs": round((time.monotonic() - queued.queued_at) * 1000, 1)}
+                elif job is not None:
+                    snap["job"] = {"state": "running", "limitGroup": job.group,
+                                   "operationLimit": self.limit_for(job.operation),
+                                   "waitMs": round((job.started_at - job.queued_at) * 1000, 1)}
+            return snap
+
+
+_shared: Optional[JobExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_job_executor() -> JobExecutor:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = JobExecutor()
+        return _shared
@@ -5,6 +5,25 @@ import tempfile
 import logging
 from datetime import datetime
 from services.database import DatabaseClient
+from services.schema_migrations import schema_verified
+
+# Applied by schema migration 7 (services/schema_migrations.py) as well.
+SQL_SERVER_JOBS_DDL = """
+    IF OBJECT_ID('Rides.BackgroundJobs', 'U') IS NULL
+    CREATE TABLE Rides.BackgroundJobs (
+        job_id NVARCHAR(100) PRIMARY KEY,
+        operation NVARCHAR(100) NOT NULL,
+        target_path NVARCHAR(500),
+        status NVARCHAR(50) NOT NULL,
+        logs NVARCHAR(MAX) NOT NULL,
+        created_at NVARCHAR(100) NOT NULL,
+        started_at NVARCHAR(100),
+        completed_at NVARCHAR(100),
+        duration_ms INT,
+        error NVARCHAR(MAX),
+        result NVARCHAR(MAX)
+    )
+"""
 
 class JobTracker:
     _instance = None
@@ -20,24 +39,17 @@ class JobTracker:
         self.table_name = "jobs"
         self.sqlite_db_path = os.path.join(tempfile.gettempdir(), "summitos_jobs.db")
         
-        # Test connection to central SQL Server
-        conn = None
+        # Test connection to central SQL Server (borrowed from the shared pool,
+        # so the probe's connection is reused by the first real job write)
         try:
-            db = DatabaseClient()
-            conn = db.get_connection()
-            if conn:
-                self.is_sql_server = True
-                self.table_name = "Rides.BackgroundJobs"
-                logging.info("JobTracker: Successfully connected to central SQL Server. Enabling shared job tracking.")
+            with DatabaseClient().connection() as conn:
+                if conn:
+                    self.is_sql_server = True
+                    self.table_name = "Rides.BackgroundJobs"
+                    logging.info("JobTracker: Successfully connected to central SQL Server. Enabling shared job tracking.")
         except Exception as e:
             logging.warning(f"JobTracker: Could not connect to SQL Server, falling back to local SQLite: {e}")
             
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
-                
         if not self.is_sql_server:
             logging.info(f"JobTracker: Initialized with SQLite persistence at: {self.sqlite_db_path}")
             
@@ -63,28 +75,15 @@ class JobTracker:
         return conn
 
     def _create_table(self):
+        if self.is_sql_server and schema_verified():
+            return
         conn = self._get_connection()
         if not conn:
             return
         try:
             cursor = conn.cursor()
             if self.is_sql_server:
-                cursor.execute(f"""
-                    IF OBJECT_ID('{self.table_name}', 'U') IS NULL
-                    CREATE TABLE {self.table_name} (
-                        job_id NVARCHAR(100) PRIMARY KEY,
-                        operation NVARCHAR(100) NOT NULL,
-                        target_path NVARCHAR(500),
-                        status NVARCHAR(50) NOT NULL,
-                        logs NVARCHAR(MAX) NOT NULL,
-                        created_at NVARCHAR(100) NOT NULL,
-                        started_at NVARCHAR(100),
-                        completed_at NVARCHAR(100),
-                        duration_ms INT,
-                        error NVARCHAR(MAX),
-                        result NVARCHAR(MAX)
-                    )
-                """)
+                cursor.execute(SQL_SERVER_JOBS_DDL)
                 conn.commit()
             else:
                 cursor.execute(f"""
@@ -166,6 +165,16 @@ class JobTracker:
                     
                 logs = json.loads(row_dict["logs"])
                 result = json.loads(row_dict["result"]) if row_dict.get("result") else None
+
+                # Time spent queued behind the executor's worker / operation limits
+                queue_wait_ms = None
+                if row_dict["started_at"]:
+                    try:
+                        queued_for = (datetime.fromisoformat(row_dict["started_at"])
+                                      - datetime.fromisoformat(row_dict["created_at"]))
+                        queue_wait_ms = int(queued_for.total_seconds() * 1000)
+                    except Exception:
+                        pass
                 
                 # C2 Standard Schema mapping
                 return {
@@ -178,6 +187,7 @@ class JobTracker:
                     "startedAt": row_dict["started_at"],
                     "finishedAt": row_dict["completed_at"],
                     "durationMs": row_dict["duration_ms"],
+                    "queueWaitMs": queue_wait_ms,
                     "errorType": "ExecutionError" if row_dict.get("error") else None,
                     "message": row_dict.get("error") if row_dict.get("error") else (logs[-1] if logs else None),
                     "result": result
@@ -188,7 +198,7 @@ class JobTracker:
             conn.close()
         return None
         
-    def start_job(self, job_id: str):
+    def start_job(self, job_id: str, queue_wait_ms: float = None):
         now_str = datetime.now().isoformat()
         conn = self._get_connection()
         if not conn:
@@ -207,6 +217,8 @@ class JobTracker:
                 row_dict = dict(row)
                 
             logs = json.loads(row_dict["logs"])
+            if queue_wait_ms is not None:
+                logs.append(f"> Waited {queue_wait_ms / 1000:.1f}s in the job queue.")
             logs.append(f"> Background execution started for {row_dict['operation']}.")
             logs_json = json.dumps(logs)
             
@@ -227,6 +239,7 @@ class JobTracker:
                 "operation": row_dict["operation"],
                 "targetPath": row_dict["target_path"],
                 "status": "running",
+                "queueWaitMs": queue_wait_ms,
                 "timestamp": now_str
             }))
             
@@ -0,0 +1,212 @@
+"""
+Google Maps result cache for the public pricing quote (api/pricing.py).
+
+Every quote used to cost a Directions call (two for a round trip) plus two
+Geocoding calls for county detection — 3-4 paid requests and 500 ms+ even when
+the same airport run had been quoted a minute earlier. Results are now cached
+under two kinds of key:
+
+  * county:  normalized address -> county name ("" when Google names none)
+  * route:   (origin, destination, waypoints) -> the legs' distance, duration
+             and resolved start/end addresses
+
+Entries live in an in-process TTL map in front of Rides.MapsCache, so one
+instance's lookups serve every other instance. Only the fields a quote reads
+are stored, and no entry outlives 30 days (Google's caching limit). Quotes
+request no departure time, so Directions answers are traffic-free and a route
+is stable for the life of its TTL.
+
+A failed lookup is not cached. A cache that cannot reach SQL degrades to the
+in-process map; it never fails a quote.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, Optional
+
+ROUTE_TTL_SEC = int(os.environ.get("MAPS_ROUTE_CACHE_TTL_SEC", str(7 * 86400)))
+COUNTY_TTL_SEC = int(os.environ.get("MAPS_COUNTY_CACHE_TTL_SEC", str(30 * 86400)))
+_MAX_TTL_SEC = 30 * 86400
+_LOCAL_MAX = 2048
+
+_SUFFIXES = re.compile(r",\s*(usa|us|united states|united states of america)$")
+
+
+def normalize_address(address: str) -> str:
+    """Case, spacing and trailing-country insensitive form of an address."""
+    s = re.sub(r"\s+", " ", (address or "").strip().lower())
+    s = re.sub(r"\s*,\s*", ", ", s).strip(", .")
+    return _SUFFIXES.sub("", s).strip(", .")
+
+
+def _key(kind: str, *parts) -> str:
+    raw = json.dumps([kind] + list(parts), separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MapsCache:
+    def __init__(self, db=None):
+        self._db = db
+        self._local = {}
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    @property
+    def db(self):
+        if self._db is None:
+            from services.database import DatabaseClient
+            self._db = DatabaseClient()
+        return self._db
+
+    def _ensure_table(self, cursor) -> None:
+        if self._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.MapsCache', 'U') IS NULL
+            CREATE TABLE Rides.MapsCache (
+                CacheKey  CHAR(64)      NOT NULL PRIMARY KEY,
+                Kind      NVARCHAR(20)  NOT NULL,
+                Payload   NVARCHAR(MAX) NOT NULL,
+                ExpiresAt DATETIME2     NOT NULL
+            )
+        """)
+        self._table_ready = True
+
+    def get(self, key: str):
+        """Cached value, or None on a miss or expiry."""
+        now = time.time()
+        with self._lock:
+            hit = self._local.get(key)
+            if hit and hit[0] > now:
+                return hit[1]
+        try:
+            conn = self.db.get_connection()
+        except Exception as e:
+            logging.warning(f"Maps cache unavailable: {e}")
+            return None
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            conn.commit()
+            cursor.execute(
+                "SELECT Payload, DATEDIFF(second, SYSUTCDATETIME(), ExpiresAt) "
+                "FROM Rides.MapsCache WHERE CacheKey = ? AND ExpiresAt > SYSUTCDATETIME()",
+                (key,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            value = json.loads(row[0])
+            self._remember(key, value, int(row[1] or 0))
+            return value
+        except Exception as e:
+            logging.warning(f"Maps cache lookup failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, value, ttl: int) -> None:
+        with self._lock:
+            if len(self._local) >= _LOCAL_MAX:
+                now = time.time()
+                self._local = {k: v for k, v in self._local.items() if v[0] > now}
+                if len(self._local) >= _LOCAL_MAX:
+                    self._local.clear()
+            self._local[key] = (time.time() + ttl, value)
+
+    def put(self, key: str, kind: str, value, ttl: int) -> None:
+        ttl = min(ttl, _MAX_TTL_SEC)
+        self._remember(key, value, ttl)
+        try:
+            conn = self.db.get_connection()
+        except Exception as e:
+            logging.warning(f"Maps cache unavailable: {e}")
+            return
+        if not conn:
+            return
+        payload = json.dumps(value)
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                MERGE INTO Rides.MapsCache WITH (HOLDLOCK) AS target
+                USING (SELECT ? AS CacheKey) AS source
+                ON (target.CacheKey = source.CacheKey)
+                WHEN MATCHED THEN
+                    UPDATE SET Payload = ?, ExpiresAt = DATEADD(second, ?, SYSUTCDATETIME())
+                WHEN NOT MATCHED THEN
+                    INSERT (CacheKey, Kind, Payload, ExpiresAt)
+                    VALUES (?, ?, ?, DATEADD(second, ?, SYSUTCDATETIME()));
+            """, (key, payload, ttl, key, kind, payload, ttl))
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Maps cache write failed: {e}")
+        finally:
+            conn.close()
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    def route_legs(self, gmaps, origin: str, destination: str, waypoints: List[str]) -> Optional[list]:
+        """Driving legs for the route, each shaped like a Directions leg
+        (distance.value, duration.value/text, start_address, end_address).
+        None when Google finds no route."""
+        key = _key("route", normalize_address(origin), normalize_address(destination),
+                   [normalize_address(w) for w in waypoints])
+        legs = self.get(key)
+        if legs is not None:
+            return legs
+        res = gmaps.directions(
+            origin=origin,
+            destination=destination,
+            waypoints=waypoints,
+            mode="driving",
+            region="us"
+        )
+        if not res:
+            return None
+        legs = [{
+            "distance": {"value": leg["distance"]["value"]},
+            "duration": {"value": leg["duration"]["value"], "text": leg["duration"].get("text", "")},
+            "start_address": leg.get("start_address", ""),
+            "end_address": leg.get("end_address", ""),
+        } for leg in res[0].get("legs", [])]
+        self.put(key, "route", legs, ROUTE_TTL_SEC)
+        return legs
+
+    def county_of(self, gmaps, address: str) -> str:
+        """Lower-cased county (administrative_area_level_2) for `address`;
+        "" when Google names none or the lookup fails."""
+        key = _key("county", normalize_address(address))
+        county = self.get(key)
+        if county is not None:
+            return county
+        try:
+            geo = gmaps.geocode(address)
+        except Exception as geo_err:
+            logging.warning(f"County lookup failed for {address}: {geo_err}")
+            return ""
+        county = ""
+        if geo:
+            for comp in geo[0].get('address_components', []):
+                if 'administrative_area_level_2' in comp.get('types', []):
+                    county = comp.get('long_name', '').lower()
+                    break
+        self.put(key, "county", county, COUNTY_TTL_SEC)
+        return county
+
+
+_shared: Optional[MapsCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_maps_cache() -> MapsCache:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MapsCache()
+        return _shared
@@ -1,9 +1,9 @@
 import logging
 import math
 import os
-import requests
 from datetime import datetime
 from typing import Dict, Any, Optional, List
+from services import http_pool
 
 class TripNormalizer:
     def __init__(self):
@@ -80,7 +80,7 @@ class TripNormalizer:
                 "locations": locations,
                 "key": self.gmaps_key
             }
-            resp = requests.get(url, params=params, timeout=10)
+            resp = http_pool.get(url, params=params, timeout=10)
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get('status') == 'OK' and len(data.get('results', [])) == 2:
@@ -0,0 +1,180 @@
+"""
+Persistent OCR / card-extraction cache for OneDrive screenshots.
+
+A day-folder rescan used to download every screenshot again and re-run Azure
+Vision and the GPT card extraction on each one, even when nothing in the
+folder had changed. Both results are pure functions of the image bytes, so
+they are cached in Rides.OcrCache and reused until the file changes.
+
+Keying:
+
+  * Primary: Graph item id + the item's cTag (content tag), which OneDrive
+    bumps only when the bytes change; eTag (bumped on renames and moves too)
+    when no cTag is present. A match needs no download at all.
+  * Fallback: SHA-256 of the downloaded bytes. Catches the same screenshot
+    re-uploaded under a new item id, and items Graph returned without tags.
+
+Rows also carry EXTRACTOR_VERSION. Bump it whenever the GPT prompt or the
+Vision call changes meaning, and every cached result is treated as a miss.
+"""
+import hashlib
+import json
+import logging
+from typing import Dict, Iterable, Optional
+
+from services.database import DatabaseClient
+
+# Bump when the extraction prompt or OCR model changes what a result means.
+EXTRACTOR_VERSION = 1
+
+# SQL Server caps a statement at 2100 parameters.
+_LOOKUP_CHUNK = 1000
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content or b"").hexdigest()
+
+
+def item_version(item: dict) -> Optional[str]:
+    """The Graph tag that changes when this item's bytes change."""
+    return item.get("cTag") or item.get("eTag") or None
+
+
+class OcrCache:
+    """Read-through store of (OCR text, parsed card JSON) per OneDrive item."""
+
+    _table_ready = False
+
+    def __init__(self, db: DatabaseClient = None):
+        self.db = db or DatabaseClient()
+
+    def _ensure_table(self, cursor):
+        if OcrCache._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.OcrCache', 'U') IS NULL
+            BEGIN
+                CREATE TABLE Rides.OcrCache (
+                    ItemID           NVARCHAR(200) NOT NULL PRIMARY KEY,
+                    ItemVersion      NVARCHAR(200) NULL,
+                    ContentSha256    CHAR(64)      NOT NULL,
+                    ExtractorVersion INT           NOT NULL,
+                    ScanDate         DATE          NULL,
+                    FileName         NVARCHAR(400) NULL,
+                    OcrText          NVARCHAR(MAX) NULL,
+                    CardJSON         NVARCHAR(MAX) NULL,
+                    UpdatedAt        DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+                );
+                CREATE INDEX IX_OcrCache_ContentSha256 ON Rides.OcrCache (ContentSha256);
+                CREATE INDEX IX_OcrCache_ScanDate ON Rides.OcrCache (ScanDate);
+            END
+        """)
+        OcrCache._table_ready = True
+
+    @staticmethod
+    def _row(r) -> dict:
+        card = None
+        if r[4]:
+            try:
+                card = json.loads(r[4])
+            except ValueError:
+                card = None
+        return {"item_id": r[0], "version": r[1], "sha256": r[2], "text": r[3], "card": card}
+
+    def get_many(self, item_ids: Iterable[str]) -> Dict[str, dict]:
+        """Current-extractor rows for these item ids, keyed by item id. One
+        round trip per _LOOKUP_CHUNK ids; callers compare `version` themselves."""
+        ids = [i for i in item_ids if i]
+        if not ids:
+            return {}
+        conn = self.db.get_connection()
+        if not conn:
+            return {}
+        found = {}
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            conn.commit()
+            for i in range(0, len(ids), _LOOKUP_CHUNK):
+                chunk = ids[i:i + _LOOKUP_CHUNK]
+                cursor.execute(
+                    "SELECT ItemID, ItemVersion, ContentSha256, OcrText, CardJSON "
+                    "FROM Rides.OcrCache WHERE ExtractorVersion = ? "
+                    f"AND ItemID IN ({','.join('?' * len(chunk))})",
+                    [EXTRACTOR_VERSION] + chunk,
+                )
+                for r in cursor.fetchall():
+                    found[r[0]] = self._row(r)
+        except Exception as e:
+            logging.warning(f"OCR cache lookup failed: {e}")
+        finally:
+            conn.close()
+        return found
+
+    def get_by_hash(self, sha256: str) -> Optional[dict]:
+        conn = self.db.get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT TOP 1 ItemID, ItemVersion, ContentSha256, OcrText, CardJSON "
+                "FROM Rides.OcrCache WHERE ContentSha256 = ? AND ExtractorVersion = ? "
+                "ORDER BY UpdatedAt DESC",
+                (sha256, EXTRACTOR_VERSION),
+            )
+            r = cursor.fetchone()
+            return self._row(r) if r else None
+        except Exception as e:
+            logging.warning(f"OCR cache hash lookup failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def put(self, item_id: str, version: Optional[str], sha256: str, scan_date: str,
+            file_name: str, text: Optional[str], card: Optional[dict]) -> None:
+        """Upsert one item's results. Never raises: a cache write failing
+        costs the next scan an OCR call, not this scan its trips."""
+        if not item_id:
+            return
+        conn = self.db.get_connection()
+        if not conn:
+            return
+        card_json = json.dumps(card) if card is not None else None
+        p = (version, sha256, EXTRACTOR_VERSION, scan_date, (file_name or "")[:400], text, card_json)
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                MERGE INTO Rides.OcrCache AS target
+                USING (SELECT ? AS ItemID) AS source
+                ON (target.ItemID = source.ItemID)
+                WHEN MATCHED THEN
+                    UPDATE SET ItemVersion = ?, ContentSha256 = ?, ExtractorVersion = ?,
+                               ScanDate = CAST(? AS DATE), FileName = ?, OcrText = ?, CardJSON = ?,
+                               UpdatedAt = SYSUTCDATETIME()
+                WHEN NOT MATCHED THEN
+                    INSERT (ItemID, ItemVersion, ContentSha256, ExtractorVersion, ScanDate, FileName, OcrText, CardJSON)
+                    VALUES (?, ?, ?, ?, CAST(? AS DATE), ?, ?, ?);
+            """, (item_id,) + p + (item_id,) + p)
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"OCR cache write failed for {item_id}: {e}")
+        finally:
+            conn.close()
+
+    def invalidate_day(self, scan_date: str) -> int:
+        """Forget every cached result scanned for `scan_date` so the next scan
+        of that day re-OCRs from scratch. Returns the number of rows removed."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("DELETE FROM Rides.OcrCache WHERE ScanDate = CAST(? AS DATE)", (scan_date,))
+            removed = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else 0
+            conn.commit()
+            return removed
+        finally:
+            conn.close()
@@ -0,0 +1,422 @@
+"""
+Incremental OneDrive sync over the Graph `/delta` API.
+
+Every cloud scan and pre-shift check used to list its folders from scratch
+(`.../children`), so a scan of a busy camera roll cost time proportional to
+the folder, not to what changed. This module keeps a persisted mirror of the
+drive's item tree and advances it with delta queries: each sync fetches only
+the items added, changed or deleted since the stored delta link, with full
+`@odata.nextLink` pagination, and applies them to the mirror in one
+transaction together with the new link. A folder listing is then read from
+the mirror without touching Graph.
+
+Why one link per drive rather than per watched folder: on OneDrive for
+Business / SharePoint, Graph only supports delta on the drive root, and delta
+items carry no `parentReference.path` (a folder rename does not re-emit its
+descendants). So items are mirrored by id and parent id, and paths are
+resolved by walking the folder tree. What is persisted per watched folder is
+a cursor: every applied round gets a number, each mirrored item records the
+round that last changed it, and `pending(folder)` returns the files changed
+since that folder's cursor. A pre-shift check advancing the drive's link
+therefore never swallows changes a camera-roll scan has not seen yet.
+
+A 410 Gone from Graph means the link expired: the next round re-enumerates
+the drive and replaces the mirror wholesale.
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from services import http_pool
+
+GRAPH = "https://graph.microsoft.com/v1.0"
+
+# Folders whose changes sync() reports. Everything else in the drive is
+# mirrored (paths can only be resolved from the full tree) but not surfaced.
+WATCHED_ROOTS = ("Pictures/Camera Roll", "Pictures/Screenshots", "Uber Driver")
+
+_SELECT = "id,name,parentReference,file,folder,deleted,root,cTag,eTag,size,lastModifiedDateTime"
+_HTTP_TIMEOUT_S = 20
+# SQL Server caps a statement at 2100 parameters.
+_CHUNK = 1000
+
+# One sync at a time per drive within this process: two overlapping rounds
+# would both start from the same link and race to store the next one.
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(drive_key: str) -> threading.RLock:
+    with _locks_guard:
+        return _locks.setdefault(drive_key, threading.RLock())
+
+
+def _norm(path: str) -> str:
+    return "/".join(p for p in (path or "").strip().strip("/").lower().split("/") if p)
+
+
+@dataclass
+class DeltaChanges:
+    """Files under WATCHED_ROOTS added/changed, and ids deleted, in one round."""
+    upserted: List[dict] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    resynced: bool = False
+
+    def under(self, path: str) -> List[dict]:
+        """Changed files whose parent folder is exactly `path`."""
+        want = _norm(path)
+        return [i for i in self.upserted if _norm(i.get("_folder_path", "")) == want]
+
+
+class DeltaStore:
+    """SQL persistence for the mirror: Rides.DriveDeltaState holds one delta
+    link and round number per drive, Rides.DriveItems the drive's items, and
+    Rides.DriveWatchCursor the last round each watched folder consumed."""
+
+    _tables_ready = False
+
+    def __init__(self, db=None):
+        if db is None:
+            from services.database import DatabaseClient
+            db = DatabaseClient()
+        self.db = db
+
+    def _ensure_tables(self, cursor):
+        if DeltaStore._tables_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.DriveDeltaState', 'U') IS NULL
+            CREATE TABLE Rides.DriveDeltaState (
+                DriveKey   NVARCHAR(200) NOT NULL PRIMARY KEY,
+                DeltaLink  NVARCHAR(MAX) NULL,
+                SyncRound  BIGINT        NOT NULL DEFAULT 0,
+                UpdatedAt  DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+            )
+        """)
+        cursor.execute("""
+            IF OBJECT_ID('Rides.DriveWatchCursor', 'U') IS NULL
+            CREATE TABLE Rides.DriveWatchCursor (
+                DriveKey   NVARCHAR(200) NOT NULL,
+                WatchPath  NVARCHAR(400) NOT NULL,
+                SyncRound  BIGINT        NOT NULL,
+                UpdatedAt  DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME(),
+                CONSTRAINT PK_DriveWatchCursor PRIMARY KEY (DriveKey, WatchPath)
+            )
+        """)
+        cursor.execute("""
+            IF OBJECT_ID('Rides.DriveItems', 'U') IS NULL
+            BEGIN
+                CREATE TABLE Rides.DriveItems (
+                    DriveKey     NVARCHAR(200) NOT NULL,
+                    ItemID       NVARCHAR(200) NOT NULL,
+                    ParentID     NVARCHAR(200) NULL,
+                    Name         NVARCHAR(400) NULL,
+                    IsFolder     BIT           NOT NULL,
+                    IsRoot       BIT           NOT NULL DEFAULT 0,
+                    CTag         NVARCHAR(200) NULL,
+                    ETag         NVARCHAR(200) NULL,
+                    Size         BIGINT        NULL,
+                    LastModified NVARCHAR(40)  NULL,
+                    SyncRound    BIGINT        NOT NULL,
+                    CONSTRAINT PK_DriveItems PRIMARY KEY (DriveKey, ItemID)
+                );
+                CREATE INDEX IX_DriveItems_Parent ON Rides.DriveItems (DriveKey, ParentID);
+            END
+        """)
+        DeltaStore._tables_ready = True
+
+    def load_state(self, drive_key: str):
+        """(delta link or None, last applied round)."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            self._ensure_tables(cursor)
+            conn.commit()
+            cursor.execute("SELECT DeltaLink, SyncRound FROM Rides.DriveDeltaState WHERE DriveKey = ?", (drive_key,))
+            row = cursor.fetchone()
+            return (row[0], int(row[1] or 0)) if row else (None, 0)
+        finally:
+            conn.close()
+
+    def apply(self, drive_key: str, rows: List[tuple], deleted: List[str],
+              delta_link: str, replace: bool, sync_round: int) -> None:
+        """Write one round's changes and its new link atomically. `rows` are
+        (ItemID, ParentID, Name, IsFolder, IsRoot, CTag, ETag, Size, LastModified)
+        and are stamped with `sync_round`."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            self._ensure_tables(cursor)
+            if replace:
+                cursor.execute("DELETE FROM Rides.DriveItems WHERE DriveKey = ?", (drive_key,))
+            else:
+                gone = list(deleted) + [r[0] for r in rows]
+                for i in range(0, len(gone), _CHUNK):
+                    chunk = gone[i:i + _CHUNK]
+                    cursor.execute(
+                        f"DELETE FROM Rides.DriveItems WHERE DriveKey = ? AND ItemID IN ({','.join('?' * len(chunk))})",
+                        [drive_key] + chunk,
+                    )
+            if rows:
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    "INSERT INTO Rides.DriveItems (DriveKey, ItemID, ParentID, Name, IsFolder, IsRoot, "
+                    "CTag, ETag, Size, LastModified, SyncRound) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(drive_key,) + tuple(r) + (sync_round,) for r in rows],
+                )
+            cursor.execute("""
+                MERGE INTO Rides.DriveDeltaState AS target
+                USING (SELECT ? AS DriveKey) AS source
+                ON (target.DriveKey = source.DriveKey)
+                WHEN MATCHED THEN
+                    UPDATE SET DeltaLink = ?, SyncRound = ?, UpdatedAt = SYSUTCDATETIME()
+                WHEN NOT MATCHED THEN
+                    INSERT (DriveKey, DeltaLink, SyncRound) VALUES (?, ?, ?);
+            """, (drive_key, delta_link, sync_round, drive_key, delta_link, sync_round))
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conn.close()
+
+    def folders(self, drive_key: str) -> List[tuple]:
+        """(ItemID, ParentID, Name, IsRoot) for every mirrored folder."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT ItemID, ParentID, Name, IsRoot FROM Rides.DriveItems "
+                "WHERE DriveKey = ? AND IsFolder = 1", (drive_key,))
+            return [tuple(r) for r in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def children(self, drive_key: str, parent_id: str, since_round: int = 0) -> List[tuple]:
+        """Mirrored rows (same order as apply()) of the files in one folder,
+        optionally only those changed after `since_round`."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT ItemID, ParentID, Name, IsFolder, IsRoot, CTag, ETag, Size, LastModified "
+                "FROM Rides.DriveItems WHERE DriveKey = ? AND ParentID = ? AND IsFolder = 0 "
+                "AND SyncRound > ?",
+                (drive_key, parent_id, since_round))
+            return [tuple(r) for r in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def load_cursor(self, drive_key: str, watch_path: str) -> Optional[int]:
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT SyncRound FROM Rides.DriveWatchCursor WHERE DriveKey = ? AND WatchPath = ?",
+                (drive_key, watch_path))
+            row = cursor.fetchone()
+            return int(row[0]) if row else None
+        finally:
+            conn.close()
+
+    def save_cursor(self, drive_key: str, watch_path: str, sync_round: int) -> None:
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database unavailable")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                MERGE INTO Rides.DriveWatchCursor AS target
+                USING (SELECT ? AS DriveKey, ? AS WatchPath) AS source
+                ON (target.DriveKey = source.DriveKey AND target.WatchPath = source.WatchPath)
+                WHEN MATCHED THEN
+                    UPDATE SET SyncRound = ?, UpdatedAt = SYSUTCDATETIME()
+                WHEN NOT MATCHED THEN
+                    INSERT (DriveKey, WatchPath, SyncRound) VALUES (?, ?, ?);
+            """, (drive_key, watch_path, sync_round, drive_key, watch_path, sync_round))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class DriveDeltaSync:
+    """Delta-driven mirror of one drive.
+
+    `drive` is the Graph drive segment, e.g. "users/<upn>/drive" or
+    "drives/<drive-id>"; `get_token` returns a bearer token for it.
+    """
+
+    def __init__(self, get_token: Callable[[], str], drive: str, store: DeltaStore = None):
+        self.get_token = get_token
+        self.drive = drive.strip("/")
+        self.store = store or DeltaStore()
+        self.last_round = 0
+
+    @classmethod
+    def for_graph_client(cls, graph, store: DeltaStore = None) -> "DriveDeltaSync":
+        return cls(graph._get_token, f"users/{graph.user_email}/drive", store)
+
+    def has_state(self) -> bool:
+        return bool(self.store.load_state(self.drive)[0])
+
+    # ── Graph paging ─────────────────────────────────────────────────────────
+
+    def _get(self, url: str) -> requests.Response:
+        headers = {"Authorization": f"Bearer {self.get_token()}"}
+        # 429/503 throttling is retried (honouring Retry-After) by http_pool.
+        return http_pool.get(url, headers=headers, timeout=_HTTP_TIMEOUT_S)
+
+    def _fetch_round(self, link: Optional[str]):
+        """All pages from `link` (or a fresh enumeration) up to the next
+        deltaLink. Returns (items, delta_link, resynced)."""
+        initial = f"{GRAPH}/{self.drive}/root/delta?$select={_SELECT}"
+        url, resynced, items = link or initial, link is None, []
+        while True:
+            resp = self._get(url)
+            if resp.status_code == 410 and not resynced:
+                logging.warning(f"[DriveDelta] Delta link for {self.drive} expired; re-enumerating")
+                url, resynced, items = initial, True, []
+                continue
+            if not resp.ok:
+                raise RuntimeError(f"Graph Delta Error: {resp.status_code} {resp.text[:300]}")
+            data = resp.json()
+            items.extend(data.get("value", []))
+            if data.get("@odata.nextLink"):
+                url = data["@odata.nextLink"]
+                continue
+            return items, data.get("@odata.deltaLink"), resynced
+
+    # ── Mirror ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _row(item: dict) -> tuple:
+        return (
+            item["id"],
+            (item.get("parentReference") or {}).get("id"),
+            item.get("name"),
+            1 if "folder" in item or "root" in item else 0,
+            1 if "root" in item else 0,
+            item.get("cTag"),
+            item.get("eTag"),
+            item.get("size"),
+            item.get("lastModifiedDateTime"),
+        )
+
+    @staticmethod
+    def _as_item(row: tuple) -> dict:
+        """A mirrored row in the shape of a Graph driveItem, so callers that
+        took list_folder_files() output keep working."""
+        item = {"id": row[0], "name": row[2] or "", "cTag": row[5], "eTag": row[6],
+                "size": row[7], "lastModifiedDateTime": row[8],
+                "parentReference": {"id": row[1]}}
+        if row[3]:
+            item["folder"] = {}
+        else:
+            item["file"] = {}
+        return item
+
+    def _folder_paths(self) -> Dict[str, str]:
+        """folder id -> normalised path relative to the drive root."""
+        nodes = {fid: (parent, name, is_root) for fid, parent, name, is_root in self.store.folders(self.drive)}
+        paths: Dict[str, str] = {}
+
+        def resolve(fid, depth=0):
+            if fid in paths:
+                return paths[fid]
+            node = nodes.get(fid)
+            if node is None or depth > 64:
+                return None
+            parent, name, is_root = node
+            if is_root:
+                paths[fid] = ""
+                return ""
+            base = resolve(parent, depth + 1)
+            if base is None:
+                return None
+            paths[fid] = _norm(f"{base}/{name}")
+            return paths[fid]
+
+        for fid in nodes:
+            resolve(fid)
+        return paths
+
+    def sync(self) -> DeltaChanges:
+        """Advance the mirror to now. Returns the files under WATCHED_ROOTS
+        that were added or changed, and every deleted item id."""
+        with _lock_for(self.drive):
+            link, last_round = self.store.load_state(self.drive)
+            items, delta_link, resynced = self._fetch_round(link)
+            if not delta_link:
+                raise RuntimeError("Graph Delta Error: round ended without a deltaLink")
+
+            latest: Dict[str, dict] = {}
+            for item in items:            # later entries for an id win
+                if item.get("id"):
+                    latest[item["id"]] = item
+            deleted = [i for i, it in latest.items() if "deleted" in it]
+            live = [it for it in latest.values() if "deleted" not in it]
+            self.last_round = last_round + 1
+            self.store.apply(self.drive, [self._row(it) for it in live], deleted,
+                             delta_link, replace=resynced, sync_round=self.last_round)
+
+            paths = self._folder_paths()
+            watched = [_norm(r) for r in WATCHED_ROOTS]
+            changed = []
+            for it in live:
+                if "folder" in it or "root" in it:
+                    continue
+                folder = paths.get((it.get("parentReference") or {}).get("id"))
+                if folder is None:
+                    continue
+                if any(folder == w or folder.startswith(w + "/") for w in watched):
+                    changed.append(dict(it, _folder_path=folder))
+            logging.info(
+                f"[DriveDelta] {self.drive}: {len(items)} delta item(s), "
+                f"{len(changed)} watched file change(s), {len(deleted)} deletion(s)"
+                + (" (full resync)" if resynced else "")
+            )
+            return DeltaChanges(upserted=changed, deleted=deleted, resynced=resynced)
+
+    def list_folder(self, path: str) -> Optional[List[dict]]:
+        """Files directly inside `path`, read from the mirror. None when the
+        folder is not in the mirror (callers fall back to a live listing);
+        [] when it exists and is empty."""
+        want = _norm(path)
+        for fid, folder_path in self._folder_paths().items():
+            if folder_path == want:
+                return [self._as_item(r) for r in self.store.children(self.drive, fid)]
+        return None
+
+    def pending(self, path: str):
+        """Sync, then return (files directly inside `path` changed since the
+        folder's cursor, round to ack). A folder with no cursor yet gets its
+        whole listing. Call ack(path, round) once the files are processed —
+        until then a crash re-delivers them."""
+        with _lock_for(self.drive):
+            self.sync()
+            want = _norm(path)
+            since = self.store.load_cursor(self.drive, want) or 0
+            for fid, folder_path in self._folder_paths().items():
+                if folder_path == want:
+                    rows = self.store.children(self.drive, fid, since_round=since)
+                    return [self._as_item(r) for r in rows], self.last_round
+            return [], self.last_round
+
+    def ack(self, path: str, sync_round: int) -> None:
+        self.store.save_cursor(self.drive, _norm(path), sync_round)
@@ -8,6 +8,7 @@ negative = money out, positive = money in.
 from __future__ import annotations
 
 import datetime
+from collections import defaultdict, deque
 
 BUSINESS_ACCOUNT = "9776"
 PERSONAL_ACCOUNT = "2085"
@@ -18,6 +19,8 @@ LUIS_START_DATE = datetime.date(2026, 7, 1)
 LUIS_FULL_AMOUNT = 190.00
 LUIS_ROUGH_AMOUNT = 130.00
 LUIS_ROUGH_DEFERRED = 60.00
+# Prior days a Missed day looks back over when escalating.
+LUIS_ESCALATION_LOOKBACK = 14
 
 FORMER_CLIENTS = ("esmeralda", "terrance")
 # Jacquelyn Heslep was flagged as a former client while she was on a deferred
@@ -243,6 +246,38 @@ def check_consecutive_missed(previous_tiers_most_recent_first: list[str]) -> str
     return None
 
 
+def walk_luis_chain(start: datetime.date, end: datetime.date, amounts_sent: dict,
+                    prior_balance: float, prior_missed_streak: int = 0):
+    """Yields classify_luis_payment's result for every day from start through
+    end (inclusive), each day's balance carried into the next.
+
+    amounts_sent maps ISO date -> amount sent that day; absent days are $0.
+    prior_missed_streak is the number of consecutive Missed days ending the
+    day before start. Each result also carries date, amount_sent and
+    missed_streak (consecutive Missed days ending that day, capped at
+    LUIS_ESCALATION_LOOKBACK), and a Missed day's anomaly_reason is escalated
+    by check_consecutive_missed.
+    """
+    balance = prior_balance
+    streak = min(prior_missed_streak, LUIS_ESCALATION_LOOKBACK)
+    day = start
+    while day <= end:
+        date_str = day.isoformat()
+        amount_sent = round(float(amounts_sent.get(date_str, 0.0)), 2)
+        result = classify_luis_payment(amount_sent, balance, day)
+        if result["tier"] == "Missed":
+            escalation = check_consecutive_missed(["Missed"] * streak)
+            if escalation:
+                result["anomaly_reason"] = escalation
+            streak = min(streak + 1, LUIS_ESCALATION_LOOKBACK)
+        else:
+            streak = 0
+        result.update(date=date_str, amount_sent=amount_sent, missed_streak=streak)
+        yield result
+        balance = result["new_balance"]
+        day += datetime.timedelta(days=1)
+
+
 def should_flag_missing_emerson(check_date, had_payment: bool) -> str | None:
     """Emerson is off Wednesday/Thursday — never flag missing income those days."""
     if isinstance(check_date, str):
@@ -261,40 +296,32 @@ def find_transfer_pairs(transactions: list[dict]) -> set:
 
     Matches same-day, equal-magnitude, opposite-sign pairs between the 9776
     and 2085 accounts, and Cash App/Venmo inbound-to-2085 matched to a
-    same-day outbound-to-9776 of the same amount.
+    same-day outbound-to-9776 of the same amount. (A passthrough is always
+    between those two accounts too, so the counterparty never changes the
+    outcome.)
+
+    Greedy in input order: each unmatched transaction takes the earliest
+    later unmatched one it pairs with. Candidates are bucketed by (date,
+    magnitude, direction, account), so this is linear rather than a
+    pairwise scan — month and year backfills pass tens of thousands.
     """
+    counterpart = {BUSINESS_ACCOUNT: PERSONAL_ACCOUNT, PERSONAL_ACCOUNT: BUSINESS_ACCOUNT}
+    buckets: dict[tuple, deque] = defaultdict(deque)
+    for j, tx in enumerate(transactions):
+        if tx["account"] in counterpart:
+            buckets[(tx["date"], round(abs(tx["amount"]), 2), tx["amount"] > 0, tx["account"])].append(j)
+
     transfer_ids: set = set()
-    n = len(transactions)
-    for i in range(n):
-        a = transactions[i]
-        if a["id"] in transfer_ids:
+    for i, a in enumerate(transactions):
+        if a["id"] in transfer_ids or a["account"] not in counterpart:
             continue
-        for j in range(i + 1, n):
-            b = transactions[j]
-            if b["id"] in transfer_ids:
-                continue
-            if a["date"] != b["date"]:
-                continue
-            if round(abs(a["amount"]), 2) != round(abs(b["amount"]), 2):
-                continue
-            if (a["amount"] > 0) == (b["amount"] > 0):
-                continue  # must be opposite direction
-
-            accounts = {a["account"], b["account"]}
-            is_cross_account_transfer = accounts == {BUSINESS_ACCOUNT, PERSONAL_ACCOUNT}
-
-            a_text = (a.get("counterparty") or "").lower()
-            b_text = (b.get("counterparty") or "").lower()
-            is_passthrough = (
-                a["account"] == PERSONAL_ACCOUNT and b["account"] == BUSINESS_ACCOUNT
-                and ("cash app" in a_text or "venmo" in a_text)
-            ) or (
-                b["account"] == PERSONAL_ACCOUNT and a["account"] == BUSINESS_ACCOUNT
-                and ("cash app" in b_text or "venmo" in b_text)
-            )
-
-            if is_cross_account_transfer or is_passthrough:
-                transfer_ids.add(a["id"])
-                transfer_ids.add(b["id"])
-                break
+        candidates = buckets.get(
+            (a["date"], round(abs(a["amount"]), 2), not a["amount"] > 0, counterpart[a["account"]]))
+        # Earlier and already-matched candidates can never pair again.
+        while candidates and (candidates[0] <= i or transactions[candidates[0]]["id"] in transfer_ids):
+            candidates.popleft()
+        if candidates:
+            b = transactions[candidates.popleft()]
+            transfer_ids.add(a["id"])
+            transfer_ids.add(b["id"])
     return transfer_ids
@@ -19,12 +19,12 @@ from .payment_categorizer import (
     BUSINESS_ACCOUNT,
     PERSONAL_ACCOUNT,
     EMERSON_KEYWORD,
+    LUIS_ESCALATION_LOOKBACK,
     LUIS_START_DATE,
     categorize_payee,
-    classify_luis_payment,
-    check_consecutive_missed,
     should_flag_missing_emerson,
     find_transfer_pairs,
+    walk_luis_chain,
 )
 from .manual_ledger import PersonKey, is_manual_only
 
@@ -34,6 +34,9 @@ DAILY_TARGETS = {
     "food_dining": 20.00,
 }
 
+# Days between stored Luis balance checkpoints.
+LUIS_CHECKPOINT_DAYS = 7
+
 REVENUE_CATEGORIES = (
     "Uber Revenue", "Booking Revenue", "Private Client Revenue", "Tip/Fare",
 )
@@ -179,6 +182,13 @@ class PaymentTrackerService:
         an in-memory total, so it reflects whatever's actually on record —
         including edits made after the original sync.
 
+        Set-based: one read of the whole range (db.load_luis_chain), the
+        chain walked in memory, and only the rows whose values changed
+        written back in one transaction. The walk starts from the nearest
+        balance checkpoint before start_date (one is stored every
+        LUIS_CHECKPOINT_DAYS days), falling back to the log row before
+        start_date when there is none.
+
         ManualOnly short-circuit: this is the single chokepoint every automatic
         Luis producer flows through (daily sync, payment reassignment, backfill
         and repair paths all call this). While Luis is manual-ledger-only it
@@ -193,60 +203,68 @@ class PaymentTrackerService:
             )
             return
 
-        prior_balance = self.db.get_luis_balance_before(start_date)
-        current = datetime.date.fromisoformat(start_date)
-        end = max(current, datetime.date.today())
-
-        while current <= end:
-            date_str = current.isoformat()
-            amount_sent = self.db.get_luis_amount_sent_on(date_str)
-
-            result = classify_luis_payment(amount_sent, prior_balance, date_str)
-
-            if result["tier"] == "Missed":
-                history = self.db.get_luis_balance_history(limit_days=14)
-                prior_tiers = [h["tier"] for h in history["history"] if h["date"] < date_str]
-                escalation = check_consecutive_missed(prior_tiers)
-                if escalation:
-                    result["anomaly_reason"] = escalation
-
-            self.db.save_luis_log(
-                date=date_str,
-                amount_sent=amount_sent,
-                tier=result["tier"],
-                deferred_amount=result["deferred_amount"],
-                running_balance=result["new_balance"],
-                notes=result["anomaly_reason"],
-            )
+        start = datetime.date.fromisoformat(start_date)
+        end = max(start, datetime.date.today())
+        state = self.db.load_luis_chain(start_date, end.isoformat(), lookback=LUIS_ESCALATION_LOOKBACK)
+        if state is None:
+            logging.error(f"Luis chain recompute from {start_date} skipped — database unavailable")
+            return
+
+        log_rows, simple_rows, cleared_flags, new_flags, checkpoints = [], [], [], [], []
+        for day in walk_luis_chain(datetime.date.fromisoformat(state["replay_from"]), end,
+                                   state["sent"], state["prior_balance"], state["prior_missed_streak"]):
+            date_str, amount_sent = day["date"], day["amount_sent"]
+
+            log_row = (amount_sent, day["tier"], round(day["deferred_amount"], 2),
+                       day["new_balance"], day["anomaly_reason"])
+            if state["log"].get(date_str) != log_row:
+                log_rows.append((date_str,) + log_row)
 
             # Financials > Luis Canales card: simple month-scoped Good/Bad
             # tally, separate from the tiered LuisBalanceLog above. Same
             # July-2026-onward cutoff as the tiered system. Received date
             # comes from the reassignment audit trail, so a payment posted
             # a day late and reassigned back keeps its LateFlag.
-            if current >= LUIS_START_DATE:
-                received = self.db.get_luis_received_date_on(date_str) if amount_sent > 0 else None
-                self.db.upsert_luis_simple_payment(date_str, amount_sent, received)
+            if date_str >= LUIS_START_DATE.isoformat():
+                received = (state["received"].get(date_str) if amount_sent > 0 else None) or date_str
+                if state["simple"].get(date_str) != (amount_sent, received):
+                    simple_rows.append((date_str, amount_sent, received))
+
+            # The synthetic daily-summary flag row. An unchanged one is left
+            # alone, so an operator's resolution of it sticks.
+            flag = None
+            if day["anomaly_flag"] or day["anomaly_reason"]:
+                flag = (amount_sent, day["tier"], day["anomaly_reason"] or f"Luis tier: {day['tier']}")
+            existing_flag = state["flags"].get(date_str)
+            if existing_flag != flag:
+                if existing_flag is not None:
+                    cleared_flags.append(date_str)
+                if flag is not None:
+                    new_flags.append({
+                        "date": date_str,
+                        "account": BUSINESS_ACCOUNT,
+                        "direction": "outbound",
+                        "counterparty": "Luis Canales (daily summary)",
+                        "amount": amount_sent,
+                        "category": "Vehicle Financing",
+                        "subcategory": flag[1],
+                        "recurring_flag": False,
+                        "anomaly_flag": True,
+                        "anomaly_reason": flag[2],
+                        "teller_transaction_id": f"luis-summary-{date_str}",
+                    })
 
-            self.db.clear_luis_summary_flag(date_str)
-            if result["anomaly_flag"] or result["anomaly_reason"]:
-                self.db.save_payment({
-                    "date": date_str,
-                    "account": BUSINESS_ACCOUNT,
-                    "direction": "outbound",
-                    "counterparty": "Luis Canales (daily summary)",
-                    "amount": amount_sent,
-                    "category": "Vehicle Financing",
-                    "subcategory": result["tier"],
-                    "recurring_flag": False,
-                    "anomaly_flag": True,
-                    "anomaly_reason": result["anomaly_reason"] or f"Luis tier: {result['tier']}",
-                    "teller_transaction_id": f"luis-summary-{date_str}",
-                    "notes": None,
-                })
+            if datetime.date.fromisoformat(date_str).toordinal() % LUIS_CHECKPOINT_DAYS == 0:
+                checkpoint = (day["new_balance"], day["missed_streak"])
+                if state["checkpoints"].get(date_str) != checkpoint:
+                    checkpoints.append((date_str,) + checkpoint)
 
-            prior_balance = result["new_balance"]
-            current += datetime.timedelta(days=1)
+        self.db.save_luis_chain(log_rows, simple_rows, cleared_flags, new_flags, checkpoints)
+        logging.info(
+            f"Luis chain recomputed {state['replay_from']}..{end.isoformat()}: "
+            f"{len(log_rows)} log, {len(simple_rows)} card, {len(cleared_flags)}/{len(new_flags)} "
+            f"flag cleared/added, {len(checkpoints)} checkpoint row(s) changed"
+        )
 
     def reassign_luis_payment(self, payment_id: str, target_date: str) -> dict:
         """Moves a Luis Canales payment from the date Teller posted it to
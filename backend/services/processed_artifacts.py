@@ -0,0 +1,141 @@
+"""
+Index of screenshots already turned into rides, for Uber-card idempotency.
+
+UberMatcherService used to ask "was this screenshot processed?" with
+`Sidecar_Artifact_JSON LIKE '%"<filename>"%'` — a scan over every ride's JSON
+blob on each blob-trigger invocation, and only after paying for OCR.
+Rides.ProcessedArtifacts records each processed artifact under every identity
+it has, each with its own index:
+
+  * ContentSha256 — the image bytes. Catches the same screenshot re-uploaded
+    under another name or from another source. Checked before OCR.
+  * ItemID — the OneDrive/Graph item id, when the artifact came from OneDrive.
+    Checked before OCR.
+  * FileName — the identity the old LIKE check used. Only consulted after the
+    card parses, exactly as before, since upload filenames are not unique.
+
+Schema migration 9 creates the table and seeds it with the filenames already
+recorded in ride sidecars, so rides processed before it existed are still
+recognised; the first time one of those is seen again its hash is recorded.
+"""
+import logging
+from typing import Optional
+
+from services.database import DatabaseClient
+from services.schema_migrations import schema_verified
+
+TABLE_DDL = """
+    IF OBJECT_ID('Rides.ProcessedArtifacts', 'U') IS NULL
+    BEGIN
+        CREATE TABLE Rides.ProcessedArtifacts (
+            ArtifactID    BIGINT IDENTITY(1,1) PRIMARY KEY,
+            RideID        NVARCHAR(100) NOT NULL,
+            FileName      NVARCHAR(400) NULL,
+            ContentSha256 CHAR(64)      NULL,
+            ItemID        NVARCHAR(200) NULL,
+            Source        NVARCHAR(40)  NOT NULL,
+            RecordedAt    DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+        );
+        CREATE INDEX IX_ProcessedArtifacts_Sha256 ON Rides.ProcessedArtifacts (ContentSha256);
+        CREATE INDEX IX_ProcessedArtifacts_ItemID ON Rides.ProcessedArtifacts (ItemID);
+        CREATE INDEX IX_ProcessedArtifacts_FileName ON Rides.ProcessedArtifacts (FileName);
+    END
+"""
+
+# Seeds the index from rides processed before it existed (migration 9).
+BACKFILL_SQL = """
+    INSERT INTO Rides.ProcessedArtifacts (RideID, FileName, Source)
+    SELECT r.RideID, LEFT(JSON_VALUE(r.Sidecar_Artifact_JSON, '$.filename'), 400), 'backfill'
+    FROM Rides.Rides r
+    WHERE ISJSON(r.Sidecar_Artifact_JSON) = 1
+      AND JSON_VALUE(r.Sidecar_Artifact_JSON, '$.filename') IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM Rides.ProcessedArtifacts a
+          WHERE a.FileName = LEFT(JSON_VALUE(r.Sidecar_Artifact_JSON, '$.filename'), 400)
+      )
+"""
+
+# One seek per identity; the strongest identity that matches wins.
+_FIND_SQL = """
+    SELECT TOP 1 m.RideID, m.MatchedOn, r.Driver_Earnings, r.Fare
+    FROM (
+        SELECT RideID, 'sha256' AS MatchedOn, 1 AS Rank FROM Rides.ProcessedArtifacts WHERE ContentSha256 = ?
+        UNION ALL
+        SELECT RideID, 'item_id', 2 FROM Rides.ProcessedArtifacts WHERE ItemID = ?
+        UNION ALL
+        SELECT RideID, 'filename', 3 FROM Rides.ProcessedArtifacts WHERE FileName = ?
+    ) m
+    LEFT JOIN Rides.Rides r ON r.RideID = m.RideID
+    ORDER BY m.Rank
+"""
+
+
+class ProcessedArtifacts:
+    """Lookup and record of processed screenshots, keyed three ways."""
+
+    def __init__(self, db: DatabaseClient = None):
+        self.db = db or DatabaseClient()
+
+    def _ensure_table(self, cursor):
+        if not schema_verified():
+            cursor.execute(TABLE_DDL)
+
+    def find(self, sha256: Optional[str] = None, item_id: Optional[str] = None,
+             filename: Optional[str] = None) -> Optional[dict]:
+        """The ride an artifact was already processed into, or None. Pass
+        only the identities to check; a None identity never matches. Returns
+        None, never raises, when the DB is unreachable — the caller then
+        processes the artifact as new, as it would have before the index."""
+        if not (sha256 or item_id or filename):
+            return None
+        conn = self.db.get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute(_FIND_SQL, (sha256, item_id, (filename or "")[:400] or None))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return {"ride_id": row[0], "matched_on": row[1],
+                    "driver_earnings": float(row[2]) if row[2] is not None else None,
+                    "rider_payment": float(row[3]) if row[3] is not None else None}
+        except Exception as e:
+            logging.warning(f"Processed-artifact lookup failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def record(self, ride_id: str, source: str, filename: Optional[str] = None,
+               sha256: Optional[str] = None, item_id: Optional[str] = None) -> None:
+        """Record that this artifact produced `ride_id`. An existing row with
+        the same hash (or, for hashless legacy rows, the same filename) is
+        filled in rather than duplicated. Never raises: a missed record costs
+        one repeat OCR, not the ride."""
+        if not ride_id:
+            return
+        conn = self.db.get_connection()
+        if not conn:
+            return
+        name = (filename or "")[:400] or None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                MERGE INTO Rides.ProcessedArtifacts WITH (HOLDLOCK) AS target
+                USING (SELECT ? AS ContentSha256, ? AS FileName) AS source
+                ON (target.ContentSha256 = source.ContentSha256
+                    OR (target.ContentSha256 IS NULL AND target.FileName = source.FileName))
+                WHEN MATCHED THEN
+                    UPDATE SET RideID = ?, ContentSha256 = COALESCE(source.ContentSha256, target.ContentSha256),
+                               ItemID = COALESCE(?, target.ItemID), Source = ?, RecordedAt = SYSUTCDATETIME()
+                WHEN NOT MATCHED THEN
+                    INSERT (RideID, FileName, ContentSha256, ItemID, Source)
+                    VALUES (?, source.FileName, source.ContentSha256, ?, ?);
+            """, (sha256, name, ride_id, item_id, source, ride_id, item_id, source))
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Processed-artifact record failed for {ride_id}: {e}")
+        finally:
+            conn.close()
@@ -0,0 +1,276 @@
+"""
+Two-tier cache for expensive, recomputable endpoint results.
+
+The pre-shift check fans out to SQL, Tessie, Graph and Teller for every date
+it scores, and its old module-level dict was empty on every cold start and
+private to each scaled-out instance. ResultCache puts a small in-process LRU
+(MemoryBackend) in front of a shared Rides.ResultCache table (SqlBackend), so
+one instance's answer serves every other instance and survives restarts.
+
+  * Keys are "<namespace>:<version>:<parts>" — bumping the version (e.g. the
+    pipeline version) orphans every older entry instead of serving it.
+  * An entry is fresh for ttl_sec. For a further stale_sec it is still
+    returned immediately, while one background refresh per key recomputes it
+    (stale-while-revalidate); after that it is a miss.
+  * `get_or_compute` reports how the value was served (tier, age, stale,
+    refreshing) together with the cache's running hit/miss counters, for the
+    endpoint's `cache` block.
+
+Backends share one small interface (get / put / delete), so another shared
+tier — blob storage, Redis — can be added without touching callers. A
+backend that fails is logged and skipped; the cache never fails a request.
+Results that compute to None are not cached.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_LOCAL_MAX = 256
+
+# Background revalidation; a couple of workers is plenty for dashboard traffic.
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="result-cache")
+
+
+class MemoryBackend:
+    """Per-process LRU of (value, stored_at) with a hard expiry."""
+    name = "memory"
+
+    def __init__(self, max_entries: int = _LOCAL_MAX):
+        self._max = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            if hit[2] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return hit[0], hit[1]
+
+    def put(self, key: str, value: Any, stored_at: float, keep_sec: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, stored_at, stored_at + keep_sec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SqlBackend:
+    """Shared tier in Rides.ResultCache; ages come from the SQL clock."""
+    name = "sql"
+
+    def __init__(self, db=None):
+        self._db = db
+        self._table_ready = False
+
+    @property
+    def db(self):
+        if self._db is None:
+            from services.database import DatabaseClient
+            self._db = DatabaseClient()
+        return self._db
+
+    def _ensure_table(self, cursor) -> None:
+        if self._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.ResultCache', 'U') IS NULL
+            CREATE TABLE Rides.ResultCache (
+                CacheKey  NVARCHAR(200) NOT NULL PRIMARY KEY,
+                Payload   NVARCHAR(MAX) NOT NULL,
+                StoredAt  DATETIME2     NOT NULL,
+                DiscardAt DATETIME2     NOT NULL
+            )
+        """)
+        self._table_ready = True
+
+    def _run(self, fn):
+        try:
+            conn = self.db.get_connection()
+        except Exception as e:
+            logging.warning(f"Result cache unavailable: {e}")
+            return None
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            result = fn(cursor)
+            conn.commit()
+            return result
+        except Exception as e:
+            logging.warning(f"Result cache query failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        def _select(cursor):
+            cursor.execute(
+                "SELECT Payload, DATEDIFF(second, StoredAt, SYSUTCDATETIME()) "
+                "FROM Rides.ResultCache WHERE CacheKey = ? AND DiscardAt > SYSUTCDATETIME()",
+                (key,))
+            return cursor.fetchone()
+
+        row = self._run(_select)
+        if not row:
+            return None
+        return json.loads(row[0]), time.time() - max(int(row[1] or 0), 0)
+
+    def put(self, key: str, value: Any, stored_at: float, keep_sec: int) -> None:
+        payload = json.dumps(value, default=str)
+        age = max(int(time.time() - stored_at), 0)
+
+        def _merge(cursor):
+            cursor.execute("""
+                MERGE INTO Rides.ResultCache WITH (HOLDLOCK) AS target
+                USING (SELECT ? AS CacheKey) AS source
+                ON (target.CacheKey = source.CacheKey)
+                WHEN MATCHED THEN
+                    UPDATE SET Payload = ?,
+                               StoredAt = DATEADD(second, -?, SYSUTCDATETIME()),
+                               DiscardAt = DATEADD(second, ?, SYSUTCDATETIME())
+                WHEN NOT MATCHED THEN
+                    INSERT (CacheKey, Payload, StoredAt, DiscardAt)
+                    VALUES (?, ?, DATEADD(second, -?, SYSUTCDATETIME()), DATEADD(second, ?, SYSUTCDATETIME()));
+            """, (key, payload, age, keep_sec - age, key, payload, age, keep_sec - age))
+
+        self._run(_merge)
+
+    def delete(self, key: str) -> None:
+        self._run(lambda cursor: cursor.execute("DELETE FROM Rides.ResultCache WHERE CacheKey = ?", (key,)))
+
+
+class ResultCache:
+    def __init__(self, namespace: str, version: str, ttl_sec: int, stale_sec: int = 0,
+                 backends: Optional[List[Any]] = None):
+        self.namespace = namespace
+        self.version = version
+        self.ttl_sec = ttl_sec
+        self.stale_sec = stale_sec
+        self.backends = backends if backends is not None else [MemoryBackend(), SqlBackend()]
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0,
+                       "refreshes": 0, "refresh_errors": 0,
+                       **{f"{b.name}_hits": 0 for b in self.backends}}
+
+    def key(self, *parts) -> str:
+        return ":".join([self.namespace, str(self.version)] + [str(p) for p in parts])
+
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float, str]]:
+        """(value, age_seconds, tier) from the first backend holding `key`;
+        a shared-tier hit is copied into the tiers in front of it."""
+        for i, backend in enumerate(self.backends):
+            try:
+                hit = backend.get(key)
+            except Exception as e:
+                logging.warning(f"Result cache {backend.name} read failed: {e}")
+                continue
+            if hit is None:
+                continue
+            value, stored_at = hit
+            for front in self.backends[:i]:
+                self._write(front, key, value, stored_at)
+            return value, max(time.time() - stored_at, 0.0), backend.name
+        return None
+
+    def _write(self, backend, key: str, value: Any, stored_at: float) -> None:
+        try:
+            backend.put(key, value, stored_at, self.ttl_sec + self.stale_sec)
+        except Exception as e:
+            logging.warning(f"Result cache {backend.name} write failed: {e}")
+
+    def put(self, key: str, value: Any) -> None:
+        stored_at = time.time()
+        for backend in self.backends:
+            self._write(backend, key, value, stored_at)
+
+    def invalidate(self, key: str) -> None:
+        for backend in self.backends:
+            try:
+                backend.delete(key)
+            except Exception as e:
+                logging.warning(f"Result cache {backend.name} delete failed: {e}")
+
+    def _refresh(self, key: str, compute: Callable[[], Any]) -> None:
+        try:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+            self._count("refreshes")
+        except Exception as e:
+            self._count("refresh_errors")
+            logging.warning(f"Result cache refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _revalidate(self, key: str, compute: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            _refresher.submit(self._refresh, key, compute)
+        except RuntimeError as e:  # interpreter shutting down
+            with self._lock:
+                self._refreshing.discard(key)
+            logging.warning(f"Result cache could not schedule refresh of {key}: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       refresh: bool = False) -> Tuple[Any, Dict[str, Any]]:
+        """Cached value for `key`, computing it on a miss (or when `refresh`).
+        Returns (value, meta) where meta describes how it was served."""
+        if not refresh:
+            hit = self.lookup(key)
+            if hit is not None:
+                value, age, tier = hit
+                stale = age >= self.ttl_sec
+                if stale:
+                    self._count("hits", "stale_hits", f"{tier}_hits")
+                    self._revalidate(key, compute)
+                else:
+                    self._count("hits", f"{tier}_hits")
+                with self._lock:
+                    refreshing = key in self._refreshing
+                return value, self._meta(True, tier, age, stale, refreshing)
+
+        self._count("misses")
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value, self._meta(False, None, 0.0, False, False)
+
+    def _meta(self, hit: bool, tier: Optional[str], age: float, stale: bool, refreshing: bool) -> Dict[str, Any]:
+        return {
+            "hit": hit,
+            "tier": tier,
+            "age_seconds": int(age),
+            "stale": stale,
+            "refreshing": refreshing,
+            "ttl_seconds": self.ttl_sec,
+            "key_version": self.version,
+            "metrics": self.stats(),
+        }
@@ -42,6 +42,8 @@ try:
 except ImportError:                     # pragma: no cover - tests stub the DB
     pyodbc = None                       # type: ignore
 
+from services.schema_migrations import schema_verified
+
 from .flight_types import FlightOccurrence, FlightTelemetry, iso
 from .states import (
     TelemetryState, WorkflowState, assert_transition,
@@ -106,6 +108,8 @@ class ReturnTripStore:
 
     def __init__(self, connection_factory=None):
         if connection_factory is None:
+            # Borrows from the shared pool; every path here closes in a
+            # finally, which hands the connection back.
             from services.database import DatabaseClient
             connection_factory = DatabaseClient().get_connection
         self._connect = connection_factory
@@ -114,9 +118,10 @@ class ReturnTripStore:
     def ensure_schema(self, cursor=None) -> None:
         """Create every table and index if absent. Safe to call repeatedly.
 
-        Called at the head of each write path rather than once at startup:
-        Azure Functions instances come and go, and a cold instance must not be
-        the first thing to discover the table is missing.
+        This is schema migration 6. Write paths go through `_ensure_schema`,
+        which still runs it on an instance that has not yet verified the
+        migrations: a cold instance must not be the first thing to discover
+        the table is missing.
         """
         owned = cursor is None
         conn = None
@@ -135,6 +140,10 @@ class ReturnTripStore:
                 cursor.close()
                 conn.close()
 
+    def _ensure_schema(self, cursor) -> None:
+        if not schema_verified():
+            self.ensure_schema(cursor)
+
     # ── workflow ─────────────────────────────────────────────────────────────
     def create_workflow(self, *, outbound_booking_id: str,
                         status: WorkflowState = WorkflowState.PENDING_RETURN_ESTIMATE,
@@ -154,7 +163,7 @@ class ReturnTripStore:
         workflow_id = new_id()
         now = _utcnow()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             # The claim goes in FIRST. If a workflow is already active for this
             # outbound booking the PK rejects it and we never write the row.
             try:
@@ -325,7 +334,7 @@ class ReturnTripStore:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             if not self._apply_transition(cur, workflow_id,
                                           expected_version=expected_version,
                                           from_state=from_state, to_state=to_state,
@@ -359,7 +368,7 @@ class ReturnTripStore:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             cur.execute(
                 f"UPDATE TOP (?) {SCHEMA}.ReturnTripWorkflow "
                 "SET WorkflowStatus = ?, Version = Version + 1, UpdatedAtUtc = ?, "
@@ -400,7 +409,7 @@ class ReturnTripStore:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             cur.execute(
                 f"INSERT INTO {SCHEMA}.ReturnFlightVerification ("
                 "VerificationId, WorkflowId, Provider, ProviderFlightId, IdentRaw, "
@@ -516,7 +525,7 @@ class ReturnTripStore:
         now = _utcnow()
         version = expected_version
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
 
             # PENDING → VERIFIED → PROCESSING, one step at a time so an
             # illegal jump raises here rather than silently writing a status.
@@ -600,7 +609,7 @@ class ReturnTripStore:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             if material:
                 cur.execute(
                     f"INSERT INTO {SCHEMA}.FlightTelemetrySnapshot ("
@@ -680,7 +689,7 @@ class ReturnTripStore:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             cur.execute(
                 f"UPDATE TOP (?) {SCHEMA}.OutboxEvent "
                 "SET Status = 'Processing', ClaimedAtUtc = ?, "
@@ -766,7 +775,7 @@ class ReturnTripStore:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             self._audit(cur, workflow_id, event_type, **kw)
             conn.commit()
         finally:
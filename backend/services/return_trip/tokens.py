@@ -26,6 +26,8 @@ import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 
+from services.schema_migrations import schema_verified
+
 SCHEMA = "Bookings"
 
 # 32 bytes → 43 url-safe chars. Long enough that guessing is not a threat model
@@ -108,6 +110,10 @@ class TokenService:
                 cursor.close()
                 conn.close()
 
+    def _ensure_schema(self, cursor) -> None:
+        if not schema_verified():
+            self.ensure_schema(cursor)
+
     def issue(self, workflow_id: str, *, ttl_days: int = TOKEN_TTL_DAYS) -> str:
         """Mint a token for a workflow and return the RAW value.
 
@@ -121,7 +127,7 @@ class TokenService:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             # Revoke any previous live token first: reissuing (a resend of the
             # reminder) must not leave two working links, or revoking the one
             # the passenger complained about would silently leave the other.
@@ -159,7 +165,7 @@ class TokenService:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             cur.execute(
                 "SELECT WorkflowId, ResolveCount FROM "
                 f"{SCHEMA}.ReturnTripLinkToken "
@@ -186,7 +192,7 @@ class TokenService:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             now = _utcnow()
             cur.execute(
                 f"UPDATE {SCHEMA}.ReturnTripLinkToken "
@@ -215,7 +221,7 @@ class TokenService:
             raise RuntimeError("Database unavailable")
         cur = conn.cursor()
         try:
-            self.ensure_schema(cur)
+            self._ensure_schema(cur)
             cur.execute(
                 f"UPDATE {SCHEMA}.ReturnTripLinkToken SET RevokedAtUtc = ? "
                 "WHERE WorkflowId = ? AND RevokedAtUtc IS NULL",
@@ -0,0 +1,179 @@
+"""
+Versioned schema migrations, applied once per database instead of per call.
+
+The finance, cabin, telemetry, rollup, return-trip, token and job tables used to be
+created by idempotent `IF OBJECT_ID ... CREATE` DDL at the head of the paths
+that use them — `_ensure_finance_tables` alone runs ~15 catalog checks before
+every finance read. Each of those DDL blocks is now a numbered migration
+below, and `dbo.SchemaVersion` records which have been applied:
+
+  * `migrate(conn)` applies every missing version in order, each in its own
+    transaction, and records it. The DDL stays idempotent, so two instances
+    migrating at once is harmless.
+  * `ensure_migrated()` does that once per process and then sets the
+    in-process "schema verified" flag. function_app starts it in the
+    background at startup; `python scripts/migrate_schema.py` runs it at
+    deploy time.
+  * Hot paths check `schema_verified()` and skip their DDL once it is set.
+    Until then (database unreachable at startup, migration failed) they run
+    it exactly as before, so a cold instance never depends on the runner.
+
+Add a migration by appending to MIGRATIONS with the next version number;
+never renumber or edit an applied one.
+"""
+import logging
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+SCHEMA_VERSION_DDL = """
+    IF OBJECT_ID('dbo.SchemaVersion', 'U') IS NULL
+    CREATE TABLE dbo.SchemaVersion (
+        Version    INT           NOT NULL PRIMARY KEY,
+        Name       NVARCHAR(100) NOT NULL,
+        AppliedAt  DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+    )
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable  # apply(cursor); the runner commits
+
+
+def _db():
+    from services.database import DatabaseClient
+    return DatabaseClient()
+
+
+def _finance_tables(cursor):
+    _db()._create_finance_tables(cursor)
+
+
+def _rides_payment_status(cursor):
+    _db()._add_payment_status_column(cursor)
+
+
+def _cabin_attempts(cursor):
+    _db()._create_cabin_attempts_table(cursor)
+
+
+def _drive_telemetry_blob(cursor):
+    _db()._add_telemetry_blob_column(cursor)
+
+
+def _daily_rollup(cursor):
+    _db()._create_daily_rollup_table(cursor)
+
+
+def _return_trip_tables(cursor):
+    from services.return_trip.store import ReturnTripStore
+    ReturnTripStore(connection_factory=lambda: None).ensure_schema(cursor)
+
+
+def _return_trip_link_tokens(cursor):
+    from services.return_trip.tokens import TokenService
+    TokenService(connection_factory=lambda: None).ensure_schema(cursor)
+
+
+def _background_jobs(cursor):
+    from services.job_tracker import SQL_SERVER_JOBS_DDL
+    cursor.execute(SQL_SERVER_JOBS_DDL)
+
+
+def _luis_balance_checkpoints(cursor):
+    _db()._create_luis_checkpoint_table(cursor)
+
+
+def _processed_artifacts(cursor):
+    from services.processed_artifacts import BACKFILL_SQL, TABLE_DDL
+    cursor.execute(TABLE_DDL)
+    cursor.execute(BACKFILL_SQL)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "finance_tables", _finance_tables),
+    Migration(2, "rides_payment_status", _rides_payment_status),
+    Migration(3, "cabin_attempts", _cabin_attempts),
+    Migration(4, "drive_telemetry_blob", _drive_telemetry_blob),
+    Migration(5, "daily_rollup", _daily_rollup),
+    Migration(6, "return_trip_tables", _return_trip_tables),
+    Migration(7, "background_jobs", _background_jobs),
+    Migration(8, "return_trip_link_tokens", _return_trip_link_tokens),
+    Migration(9, "processed_artifacts", _processed_artifacts),
+    Migration(10, "luis_balance_checkpoints", _luis_balance_checkpoints),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+_lock = threading.Lock()
+_verified = False
+
+
+def schema_verified() -> bool:
+    """True once this process has confirmed the database is at LATEST_VERSION."""
+    return _verified
+
+
+def applied_versions(cursor) -> List[int]:
+    cursor.execute("SELECT Version FROM dbo.SchemaVersion")
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def migrate(conn, migrations: Optional[List[Migration]] = None) -> List[int]:
+    """Apply every migration not yet recorded in dbo.SchemaVersion; returns
+    the versions applied by this call. A failed migration is rolled back and
+    raised, leaving later ones unapplied."""
+    migrations = MIGRATIONS if migrations is None else migrations
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA_VERSION_DDL)
+    conn.commit()
+    done = set(applied_versions(cursor))
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        try:
+            migration.apply(cursor)
+            cursor.execute(
+                "IF NOT EXISTS (SELECT 1 FROM dbo.SchemaVersion WHERE Version = ?) "
+                "INSERT INTO dbo.SchemaVersion (Version, Name) VALUES (?, ?)",
+                (migration.version, migration.version, migration.name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logging.info(f"Schema migration {migration.version} ({migration.name}) applied.")
+        applied.append(migration.version)
+    return applied
+
+
+def ensure_migrated(db=None) -> bool:
+    """Bring the database to LATEST_VERSION once per process and set the
+    verified flag. Returns False (flag unset) when the DB is unreachable or a
+    migration fails; callers keep their own DDL in that case."""
+    global _verified
+    if _verified:
+        return True
+    with _lock:
+        if _verified:
+            return True
+        try:
+            conn = (db or _db()).get_connection()
+        except Exception as e:
+            logging.warning(f"Schema migration skipped, database unavailable: {e}")
+            return False
+        if not conn:
+            return False
+        try:
+            migrate(conn)
+            _verified = True
+        except Exception as e:
+            logging.error(f"Schema migration failed; per-call DDL stays on: {e}")
+        finally:
+            conn.close()
+    return _verified
+
+
+def start_background() -> None:
+    """Run ensure_migrated on a daemon thread so it never delays a cold start."""
+    threading.Thread(target=ensure_migrated, name="schema-migrate", daemon=True).start()
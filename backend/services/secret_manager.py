@@ -6,20 +6,38 @@ Usage: SecretManager().get_secret("MY_SECRET_NAME")
 
 Production:  Managed Identity on the Function App → Key Vault access policy
 Development: Falls back to environment variable with the same name
+
+Resolved values are cached in-process, shared by every SecretManager instance
+(TessieClient, BankingService etc. construct one per request):
+
+  * Each secret lives for SECRET_CACHE_TTL_SEC, or its SECRET_TTL_OVERRIDES
+    entry, before Key Vault is asked again.
+  * Concurrent misses for the same name make one Key Vault call; the other
+    callers wait for it, or take the expired value if there is one.
+  * When a refresh fails (Key Vault throttled or unreachable) the expired
+    value keeps being served for up to SECRET_MAX_STALE_SEC, retried every
+    SECRET_ERROR_RETRY_SEC.
+  * set_secret() invalidates the name and caches the value it wrote;
+    invalidate_secret() drops one name, or all of them.
+
+Without a Key Vault client the environment is read directly, uncached.
 """
 
 import os
 import logging
-from functools import lru_cache
-from typing import Optional
+import threading
+import time
+from typing import Dict, Optional
 
 # Only import Azure SDK classes if available (avoids dev-env import errors)
 try:
     from azure.identity import ManagedIdentityCredential, DefaultAzureCredential
     from azure.keyvault.secrets import SecretClient
+    from azure.core.exceptions import ResourceNotFoundError
     AZURE_SDK_AVAILABLE = True
 except ImportError:
     AZURE_SDK_AVAILABLE = False
+    ResourceNotFoundError = LookupError
     logging.warning("azure-identity / azure-keyvault-secrets not installed. Key Vault disabled.")
 
 
@@ -27,6 +45,41 @@ KEYVAULT_URL = os.environ.get("KEYVAULT_URL")  # e.g. https://summitos-kv.vault.
 
 _kv_client: Optional["SecretClient"] = None
 
+SECRET_CACHE_TTL_SEC = int(os.environ.get("SECRET_CACHE_TTL_SEC", "900"))
+SECRET_MAX_STALE_SEC = int(os.environ.get("SECRET_MAX_STALE_SEC", "86400"))
+SECRET_ERROR_RETRY_SEC = int(os.environ.get("SECRET_ERROR_RETRY_SEC", "30"))
+SECRET_WAIT_SEC = 10.0
+# Secrets that rotate more often than the default TTL.
+SECRET_TTL_OVERRIDES: Dict[str, int] = {
+    "TELLER_TOKEN": 300,
+}
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, "_CachedSecret"] = {}
+_inflight: Dict[str, threading.Event] = {}
+
+
+class _CachedSecret:
+    __slots__ = ("value", "fetched_at", "expires_at")
+
+    def __init__(self, value: str, ttl: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.expires_at = self.fetched_at + ttl
+
+
+def _ttl(name: str) -> int:
+    return SECRET_TTL_OVERRIDES.get(name, SECRET_CACHE_TTL_SEC)
+
+
+def invalidate_secret(name: Optional[str] = None) -> None:
+    """Drop one cached secret (or every one) so the next read goes to Key Vault."""
+    with _cache_lock:
+        if name is None:
+            _cache.clear()
+        else:
+            _cache.pop(name, None)
+
 
 def _get_kv_client() -> Optional["SecretClient"]:
     """Lazily create and cache the Key Vault client."""
@@ -63,17 +116,68 @@ class SecretManager:
         while environment variables use underscores (SQL_CONNECTION_STRING).
         This method normalises automatically.
         """
-        kv_name = name.replace("_", "-")
         client = _get_kv_client()
-        if client:
-            try:
-                secret = client.get_secret(kv_name)
-                if secret.value:
-                    logging.debug(f"Secret '{name}' retrieved from Key Vault.")
-                    return secret.value
-            except Exception as e:
-                logging.warning(f"Key Vault miss for '{kv_name}': {e}. Falling back to env.")
+        if not client:
+            return self._from_env(name)
+
+        while True:
+            now = time.monotonic()
+            with _cache_lock:
+                entry = _cache.get(name)
+                if entry and now < entry.expires_at:
+                    return entry.value
+                waiter = _inflight.get(name)
+                if waiter is None:
+                    _inflight[name] = threading.Event()
+                    break
+            if entry:
+                # Someone else is refreshing; the expired value is good enough.
+                return entry.value
+            if not waiter.wait(SECRET_WAIT_SEC):
+                logging.warning(f"Timed out waiting for Key Vault fetch of '{name}'.")
+                return self._from_env(name)
+            with _cache_lock:
+                if name in _cache:
+                    continue
+            # The fetch we waited on found nothing cacheable.
+            return self._from_env(name)
+
+        try:
+            return self._refresh(client, name, entry)
+        finally:
+            with _cache_lock:
+                _inflight.pop(name).set()
+
+    def _refresh(self, client, name: str, stale: Optional[_CachedSecret]) -> Optional[str]:
+        """Fetch from Key Vault into the cache; the caller holds the in-flight slot."""
+        kv_name = name.replace("_", "-")
+        ttl = _ttl(name)
+        try:
+            secret = client.get_secret(kv_name)
+            value = secret.value
+        except ResourceNotFoundError:
+            # Not a Key Vault secret (App Setting only): cache the env value.
+            value = None
+        except Exception as e:
+            if stale and time.monotonic() - stale.fetched_at < SECRET_MAX_STALE_SEC:
+                logging.warning(f"Key Vault refresh of '{kv_name}' failed: {e}. Serving cached value.")
+                with _cache_lock:
+                    if _cache.get(name) is stale:
+                        stale.expires_at = time.monotonic() + SECRET_ERROR_RETRY_SEC
+                return stale.value
+            logging.warning(f"Key Vault miss for '{kv_name}': {e}. Falling back to env.")
+            value, ttl = None, SECRET_ERROR_RETRY_SEC
+
+        if value:
+            logging.debug(f"Secret '{name}' retrieved from Key Vault.")
+        else:
+            value = self._from_env(name)
+        if value:
+            with _cache_lock:
+                _cache[name] = _CachedSecret(value, ttl)
+        return value
 
+    def _from_env(self, name: str) -> Optional[str]:
         # Fallback: environment variable
         value = os.environ.get(name)
         if value:
@@ -92,10 +196,13 @@ class SecretManager:
         try:
             client.set_secret(kv_name, value)
             logging.info(f"Secret '{kv_name}' updated in Key Vault.")
-            return True
         except Exception as e:
             logging.error(f"Failed to write secret '{kv_name}' to Key Vault: {e}")
             return False
+        invalidate_secret(name)
+        with _cache_lock:
+            _cache[name] = _CachedSecret(value, _ttl(name))
+        return True
 
 
 # ── Convenience singleton ────────────────────────────────────────────────────
@@ -1,9 +1,15 @@
 import logging
 import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from .vector_store import VectorStore
 from .artifact_registry import ArtifactRegistry
 
+# One worker: batches queue behind each other instead of racing for OpenAI
+# rate limit and the System_Vectors MERGE.
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-ingest")
+
+
 class SemanticIngestionService:
     def __init__(self):
         self.vector_store = VectorStore()
@@ -15,59 +21,98 @@ class SemanticIngestionService:
         Drive data can be raw from API or processed from SQL.
         """
         try:
-            # Normalize timestamp
-            ts = drive_data.get('started_at') or drive_data.get('Timestamp_Start')
-            if isinstance(ts, int):
-                dt = datetime.fromtimestamp(ts)
-            elif isinstance(ts, str):
-                try:
-                    dt = datetime.fromisoformat(ts)
-                except ValueError:
-                    dt = datetime.utcnow() # Fallback
+            return self.vector_store.add_vector(self._tessie_drive_vector(drive_data, telemetry_summary))
+        except Exception as e:
+            logging.error(f"Semantic Ingestion Failure (Tessie): {e}")
+            return False
+
+    def ingest_tessie_drives(self, drives) -> int:
+        """
+        Batch form of ingest_tessie_drive for a day's sync or a backfill:
+        `drives` is a list of (drive_data, telemetry_summary). Embeddings are
+        fetched in batches (skipping any already cached) and all vectors are
+        written in one MERGE. Returns the number persisted.
+        """
+        vectors = []
+        for drive_data, telemetry_summary in drives:
+            try:
+                vectors.append(self._tessie_drive_vector(drive_data, telemetry_summary))
+            except Exception as e:
+                logging.error(f"Semantic Ingestion Failure (Tessie {drive_data.get('id')}): {e}")
+        try:
+            return self.vector_store.add_vectors_batch(vectors)
+        except Exception as e:
+            logging.error(f"Semantic Ingestion Failure (Tessie batch): {e}")
+            return 0
+
+    def ingest_tessie_drives_background(self, drives) -> Future:
+        """
+        Queue ingest_tessie_drives on the background worker and return at
+        once. Ingestion is idempotent (embedding cache + MERGE by vector id),
+        so a batch lost to a host recycle is redone by the next sync of that day.
+        """
+        drives = list(drives)
+
+        def report(future):
+            if future.exception():
+                logging.error(f"Background semantic ingestion failed: {future.exception()}")
             else:
-                dt = datetime.utcnow()
+                logging.info(f"Background semantic ingestion persisted {future.result()} of {len(drives)} drive vector(s).")
 
-            # Extract key details
-            ride_id = drive_data.get('RideID') or f"TES-{drive_data.get('id')}"
-            start_loc = drive_data.get('starting_location') or drive_data.get('Pickup_Location', 'Unknown')
-            end_loc = drive_data.get('ending_location') or drive_data.get('Dropoff_Location', 'Unknown')
-            tag = drive_data.get('tag') or drive_data.get('Classification', 'None')
-            dist = float(drive_data.get('distance_miles') or drive_data.get('Distance_mi', 0))
-            
-            # Create the "Metaword" Summary
-            summary = (
-                f"Tesla Drive Activity [{ride_id}]: Traveled {dist:.1f} miles from {start_loc} to {end_loc} "
-                f"on {dt.strftime('%Y-%m-%d %I:%M %p')}. Mission Tag: {tag}. "
-                f"{telemetry_summary} "
-                f"This mobility event represents operational usage of the Tesla fleet."
-            )
-            
-            raw_hash = hashlib.sha256(summary.encode()).hexdigest()
+        future = _background.submit(self.ingest_tessie_drives, drives)
+        future.add_done_callback(report)
+        return future
 
-            source_path = drive_data.get('source_path') or drive_data.get('filename')
-            guid = self.registry.register(
-                artifact_type='Drive',
-                entity_id=str(ride_id),
-                entity_table='Rides.Rides',
-                source_path=source_path,
-                content_hash=raw_hash,
-                ingestion_path='Tessie',
-            )
+    def _tessie_drive_vector(self, drive_data, telemetry_summary="") -> dict:
+        """Summary text, artifact registration and vector payload for one drive."""
+        # Normalize timestamp
+        ts = drive_data.get('started_at') or drive_data.get('Timestamp_Start')
+        if isinstance(ts, int):
+            dt = datetime.fromtimestamp(ts)
+        elif isinstance(ts, str):
+            try:
+                dt = datetime.fromisoformat(ts)
+            except ValueError:
+                dt = datetime.utcnow() # Fallback
+        else:
+            dt = datetime.utcnow()
 
-            vector_data = {
-                "vector_id":        f"V-{ride_id}",
-                "source_type":      "Trip",
-                "timestamp_utc":    dt,
-                "raw_text_hash":    raw_hash,
-                "source_pointer":   self.registry.pointer(guid),
-                "derivation_reason": summary,
-                "artifact_guid":    guid,
-            }
+        # Extract key details
+        ride_id = drive_data.get('RideID') or f"TES-{drive_data.get('id')}"
+        start_loc = drive_data.get('starting_location') or drive_data.get('Pickup_Location', 'Unknown')
+        end_loc = drive_data.get('ending_location') or drive_data.get('Dropoff_Location', 'Unknown')
+        tag = drive_data.get('tag') or drive_data.get('Classification', 'None')
+        dist = float(drive_data.get('distance_miles') or drive_data.get('Distance_mi', 0))
+        
+        # Create the "Metaword" Summary
+        summary = (
+            f"Tesla Drive Activity [{ride_id}]: Traveled {dist:.1f} miles from {start_loc} to {end_loc} "
+            f"on {dt.strftime('%Y-%m-%d %I:%M %p')}. Mission Tag: {tag}. "
+            f"{telemetry_summary} "
+            f"This mobility event represents operational usage of the Tesla fleet."
+        )
+        
+        raw_hash = hashlib.sha256(summary.encode()).hexdigest()
 
-            return self.vector_store.add_vector(vector_data)
-        except Exception as e:
-            logging.error(f"Semantic Ingestion Failure (Tessie): {e}")
-            return False
+        source_path = drive_data.get('source_path') or drive_data.get('filename')
+        guid = self.registry.register(
+            artifact_type='Drive',
+            entity_id=str(ride_id),
+            entity_table='Rides.Rides',
+            source_path=source_path,
+            content_hash=raw_hash,
+            ingestion_path='Tessie',
+        )
+
+        return {
+            "vector_id":        f"V-{ride_id}",
+            "source_type":      "Trip",
+            "timestamp_utc":    dt,
+            "raw_text_hash":    raw_hash,
+            "source_pointer":   self.registry.pointer(guid),
+            "derivation_reason": summary,
+            "artifact_guid":    guid,
+        }
 
     def ingest_private_payment(self, payment: dict) -> bool:
         """
@@ -1,8 +1,8 @@
 import os
-import requests
 import logging
 import json
 from datetime import datetime
+from services import http_pool
 
 class SharePointClient:
     """
@@ -41,7 +41,7 @@ class SharePointClient:
         }
         
         try:
-            res = requests.post(url, data=data)
+            res = http_pool.post(url, data=data)
             res.raise_for_status()
             token_data = res.json()
             self.token = token_data.get("access_token")
@@ -74,7 +74,7 @@ class SharePointClient:
             direct_url = f"https://graph.microsoft.com/v1.0/sites/{hostname}:{path}"
             
             headers = self._get_headers()
-            res = requests.get(direct_url, headers=headers)
+            res = http_pool.get(direct_url, headers=headers)
             if res.ok:
                 self.site_id = res.json().get('id')
                 logging.info(f"✅ Found Site ID via Direct Path: {self.site_id}")
@@ -82,7 +82,7 @@ class SharePointClient:
                 # Fallback to Search
                 logging.warning(f"Direct resolution failed for {path}. Falling back to search...")
                 search_url = f"https://graph.microsoft.com/v1.0/sites?search={self.site_name}"
-                res = requests.get(search_url, headers=headers)
+                res = http_pool.get(search_url, headers=headers)
                 if res.ok:
                     sites = res.json().get('value', [])
                     for s in sites:
@@ -100,7 +100,7 @@ class SharePointClient:
         if not self.drive_id:
             logging.info(f"Resolving Drive ID for Library '{self.lib_name}'...")
             url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/drives"
-            res = requests.get(url, headers=headers)
+            res = http_pool.get(url, headers=headers)
             if res.ok:
                 drives = res.json().get('value', [])
                 drive_names = [d.get('name') for d in drives]
@@ -150,7 +150,7 @@ class SharePointClient:
         url = f"https://graph.microsoft.com/v1.0/drives/{self.drive_id}/root:/{destination_path}:/content"
         
         try:
-            res = requests.put(url, headers=upload_headers, data=file_data)
+            res = http_pool.put(url, headers=upload_headers, data=file_data)
             res.raise_for_status()
             item = res.json()
             logging.info(f"✅ Upload Complete. Item ID: {item.get('id')}")
@@ -177,7 +177,7 @@ class SharePointClient:
         headers = self._get_headers()
         
         try:
-            res = requests.get(url, headers=headers)
+            res = http_pool.get(url, headers=headers)
             res.raise_for_status()
             data = res.json()
             list_item = data.get('listItem')
@@ -196,7 +196,7 @@ class SharePointClient:
             
             payload = metadata # e.g. {"TripID": "123", "Amount": 24.50}
             
-            patch_res = requests.patch(patch_url, headers=headers, json=payload)
+            patch_res = http_pool.patch(patch_url, headers=headers, json=payload)
             patch_res.raise_for_status()
             logging.info(f"✅ Metadata updated for {item_id}")
             
@@ -1,5 +1,7 @@
 import logging
 
+from services import telemetry_profile
+
 class TelemetryAnalysisService:
     def __init__(self):
         pass
@@ -13,6 +15,59 @@ class TelemetryAnalysisService:
         if not telemetry_data or not isinstance(telemetry_data, dict):
             return ""
 
+        if telemetry_profile.available():
+            try:
+                profile = telemetry_profile.profile_drive(telemetry_data)
+                if profile is not None:
+                    return self.summarize_profile(profile)
+            except Exception as e:
+                logging.error(f"Error profiling telemetry, using basic analysis: {e}")
+        return self._analyze_lists(telemetry_data)
+
+    def profile_drives(self, payloads):
+        """Combined profile for a day's or month's drives (None without numpy)."""
+        return telemetry_profile.profile_drives(payloads)
+
+    @staticmethod
+    def summarize_profile(profile):
+        """Vector Context sentence for a telemetry_profile.profile_drive result."""
+        summary_parts = []
+
+        speed = profile.get("speed_mph")
+        if speed and speed.get("max") is not None:
+            summary_parts.append(
+                f"Top speed was {speed['max']:.1f} mph (avg {speed['mean_moving']:.1f} mph moving, "
+                f"90th percentile {speed['p90']:.1f} mph).")
+
+        idle_min = profile.get("idle_s", 0) / 60
+        if idle_min >= 1:
+            summary_parts.append(f"Idled {idle_min:.0f} min.")
+
+        if profile.get("elevation_max_ft") is not None:
+            if profile["elevation_max_ft"] - profile["elevation_min_ft"] > 50:
+                summary_parts.append(
+                    f"Elevation varied between {profile['elevation_min_ft']:.0f} ft and "
+                    f"{profile['elevation_max_ft']:.0f} ft ({profile['climb_ft']:.0f} ft climbed).")
+
+        if profile.get("inside_temp_f") is not None and profile.get("outside_temp_f") is not None:
+            summary_parts.append(
+                f"Cabin climate averaged {profile['inside_temp_f']:.0f}°F while outside temps "
+                f"averaged {profile['outside_temp_f']:.0f}°F.")
+
+        if (profile.get("peak_power_kw") or 0) > 10:
+            summary_parts.append(f"Peak motor exertion hit {profile['peak_power_kw']:.0f} kW.")
+        if profile.get("wh_per_mi") is not None:
+            summary_parts.append(f"Used {profile['wh_per_mi']:.0f} Wh/mi.")
+        hard = (profile.get("hard_accel_events") or 0, profile.get("hard_brake_events") or 0)
+        if any(hard):
+            summary_parts.append(f"{hard[0]} hard acceleration and {hard[1]} hard braking event(s).")
+
+        if summary_parts:
+            return " Telemetry Profile: " + " ".join(summary_parts)
+        return ""
+
+    def _analyze_lists(self, telemetry_data):
+        """List-based summary used when numpy is unavailable."""
         try:
             # Extract arrays
             speeds = telemetry_data.get('speeds', [])
@@ -0,0 +1,219 @@
+"""
+Compact columnar encoding for raw Tessie drive telemetry.
+
+Drive_Telemetry used to hold each drive's /states response as one json.dumps
+blob — a few MB of JSON number lists per busy drive that every reader had to
+re-parse into Python lists. A blob is now:
+
+    b"TLM1" + zlib( <u32 header length> <header JSON> <channel bytes...> )
+
+Each list-valued channel (speeds, elevations, powers, temps, latitudes, ...)
+becomes one typed little-endian array:
+
+  * "q": numbers that are exact decimals with at most MAX_DECIMALS places are
+         scaled to integers (x * 10**k) and stored as the first value (in the
+         header) plus deltas from the previous sample, in the narrowest of
+         int8/16/32/64 that holds them.
+         Consecutive samples differ little, so the deltas are small and
+         compress well, and the round trip is exact.
+  * "d": any other numeric channel, as raw float64.
+  * Anything else (strings, nested lists, scalars) stays JSON in the header.
+
+None samples are recorded as a list of indices and decode to NaN. Decoding
+returns numpy arrays when numpy is importable and `array.array` otherwise —
+both expose the buffer protocol, so readers can take a memoryview without
+building Python lists. `as_lists()` restores the original JSON shape for
+callers that still want it.
+"""
+import json
+import math
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Any, Dict
+
+try:
+    import numpy as np
+except ImportError:  # optional: decode falls back to array.array
+    np = None
+
+MAGIC = b"TLM1"
+MAX_DECIMALS = 7
+COMPRESS_LEVEL = 6
+_LITTLE = sys.byteorder == "little"
+# array typecode -> (numpy dtype, largest magnitude it holds)
+_INT_TYPES = (("b", "<i1", 2 ** 7 - 1), ("h", "<i2", 2 ** 15 - 1),
+              ("i", "<i4", 2 ** 31 - 1), ("q", "<i8", 2 ** 63 - 1))
+_NP_DTYPE = {code: dtype for code, dtype, _ in _INT_TYPES}
+
+
+def is_encoded(blob) -> bool:
+    return isinstance(blob, (bytes, bytearray, memoryview)) and bytes(blob[:4]) == MAGIC
+
+
+def _decimal_scale(values) -> int:
+    """Smallest k such that every value is exactly n / 10**k, or -1."""
+    for k in range(MAX_DECIMALS + 1):
+        scale = 10 ** k
+        try:
+            if all(abs(v) < 2 ** 53 / scale and round(v * scale) / scale == v for v in values):
+                return k
+        except (OverflowError, ValueError):
+            return -1
+    return -1
+
+
+def _le_bytes(arr: array) -> bytes:
+    if not _LITTLE:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(typecode: str, raw: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(raw)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr
+
+
+def encode_telemetry(telemetry: Dict[str, Any]) -> bytes:
+    header = {"channels": [], "extra": {}}
+    chunks = []
+    offset = 0
+
+    def add(raw: bytes) -> list:
+        nonlocal offset
+        chunks.append(raw)
+        span = [offset, len(raw)]
+        offset += len(raw)
+        return span
+
+    for name, values in telemetry.items():
+        numeric = isinstance(values, list) and all(
+            v is None or (isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v))
+            for v in values)
+        present = [v for v in values if v is not None] if numeric else []
+        k = _decimal_scale(present) if present else -1
+        ints = all(isinstance(v, int) for v in present)
+        if not present or (ints and k < 0):
+            # Non-numeric, all-None, or integers too large for exact float64.
+            header["extra"][name] = values
+            continue
+        nulls = [i for i, v in enumerate(values) if v is None]
+        # Fill nulls with the previous value so they cost a zero delta.
+        filled, last = [], (present[0] if present else 0)
+        for v in values:
+            last = last if v is None else v
+            filled.append(last)
+
+        channel = {"name": name, "n": len(values), "ints": ints}
+        if k >= 0:
+            scale = 10 ** k
+            scaled = [round(v * scale) for v in filled]
+            deltas = [0] + [b - a for a, b in zip(scaled, scaled[1:])]
+            widest = max(abs(d) for d in deltas)
+            code = next(c for c, _, limit in _INT_TYPES if widest <= limit)
+            channel.update(kind="q", k=k, base=scaled[0], t=code, data=add(_le_bytes(array(code, deltas))))
+        else:
+            channel.update(kind="d", data=add(_le_bytes(array("d", filled))))
+        if nulls:
+            channel["nulls"] = add(_le_bytes(array("I", nulls)))
+        header["channels"].append(channel)
+
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    body = struct.pack("<I", len(head)) + head + b"".join(chunks)
+    return MAGIC + zlib.compress(body, COMPRESS_LEVEL)
+
+
+def _read(blob):
+    body = zlib.decompress(bytes(blob[4:]))
+    (head_len,) = struct.unpack_from("<I", body)
+    header = json.loads(body[4:4 + head_len])
+    data = memoryview(body)[4 + head_len:]
+    return header, data
+
+
+def _decode(header, data, use_numpy: bool) -> Dict[str, Any]:
+    out: Dict[str, Any] = dict(header["extra"])
+    for ch in header["channels"]:
+        off, size = ch["data"]
+        raw = data[off:off + size]
+        if use_numpy:
+            if ch["kind"] == "q":
+                values = np.frombuffer(raw, dtype=_NP_DTYPE[ch["t"]]).cumsum(dtype=np.int64)
+                values = (values + ch["base"]).astype(np.float64)
+                if ch["k"]:
+                    values /= 10 ** ch["k"]
+            else:
+                values = np.frombuffer(raw, dtype="<f8").astype(np.float64)
+            if "nulls" in ch:
+                n_off, n_size = ch["nulls"]
+                values[np.frombuffer(data[n_off:n_off + n_size], dtype="<u4")] = np.nan
+        else:
+            if ch["kind"] == "q":
+                scale = 10 ** ch["k"]
+                deltas = _from_le(ch["t"], raw)
+                values = array("d", (q / scale for q in accumulate(deltas, initial=ch["base"])))
+                values.pop(0)
+            else:
+                values = _from_le("d", raw)
+            if "nulls" in ch:
+                n_off, n_size = ch["nulls"]
+                for i in _from_le("I", data[n_off:n_off + n_size]):
+                    values[i] = math.nan
+        out[ch["name"]] = values
+    return out
+
+
+def decode_telemetry(blob, use_numpy: bool = None) -> Dict[str, Any]:
+    """Channel name -> float64 array (NaN where the sample was None), plus
+    the JSON-kept values as-is. numpy arrays when available (or
+    use_numpy=True), array.array otherwise."""
+    if use_numpy is None:
+        use_numpy = np is not None
+    header, data = _read(blob)
+    return _decode(header, data, use_numpy)
+
+
+def as_lists(blob, use_numpy: bool = None) -> Dict[str, Any]:
+    """Decode to the original JSON shape: lists of int/float with None.
+
+    Lists come from ndarray.tolist() (or straight off the integer deltas
+    without numpy) and only the recorded null indices are patched, rather
+    than NaN-testing and casting every sample in Python.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    header, data = _read(blob)
+    out: Dict[str, Any] = dict(header["extra"])
+    for ch in header["channels"]:
+        off, size = ch["data"]
+        raw = data[off:off + size]
+        if ch["kind"] == "q":
+            if use_numpy:
+                scaled = np.frombuffer(raw, dtype=_NP_DTYPE[ch["t"]]).cumsum(dtype=np.int64) + ch["base"]
+                values = (scaled if ch["ints"] else scaled / 10 ** ch["k"]).tolist()
+            else:
+                scaled = accumulate(_from_le(ch["t"], raw), initial=ch["base"])
+                next(scaled)
+                scale = 10 ** ch["k"]
+                values = list(scaled) if ch["ints"] else [q / scale for q in scaled]
+        else:
+            values = (np.frombuffer(raw, dtype="<f8") if use_numpy else _from_le("d", raw)).tolist()
+        if "nulls" in ch:
+            n_off, n_size = ch["nulls"]
+            for i in _from_le("I", data[n_off:n_off + n_size]):
+                values[i] = None
+        out[ch["name"]] = values
+    return out
+
+
+def load_payload(blob=None, raw_json: str = None) -> Dict[str, Any]:
+    """Telemetry as lists from whichever column a Drive_Telemetry row has."""
+    if blob is not None and is_encoded(blob):
+        return as_lists(blob)
+    return json.loads(raw_json or "{}")
@@ -0,0 +1,221 @@
+"""
+Vectorised per-drive telemetry profiles.
+
+TelemetryAnalysisService.analyze_drive used to walk each /states channel in
+Python list comprehensions for four numbers (max/avg speed, elevation range,
+temps, peak power). profile_drive computes a fuller profile in one pass of
+NumPy array operations over the channels — which is what
+telemetry_codec.decode_telemetry returns, so stored drives are profiled
+without building Python lists — and profile_drives rolls a day or a month of
+drives up into one.
+
+Units follow the /states payload as analyze_drive reads it: speeds in mph,
+elevations in ft, powers in kW (positive = drawing, negative = regen),
+timestamps in unix seconds, odometers in miles, temperatures in °C.
+
+Profile fields:
+
+  * duration / moving / idle seconds (idle = speed below IDLE_MPH)
+  * speed max, mean while moving, and p50/p90/p95
+  * seconds in each SPEED_BANDS_MPH band
+  * hard acceleration / braking events: rising edges where power jumps by
+    at least HARD_ACCEL_KW_PER_S or falls by HARD_BRAKE_KW_PER_S
+  * cumulative climb / descent, elevation min/max
+  * energy drawn and regenerated (power integrated over time), Wh/mi overall
+    and per SEGMENT_MILES segment of odometer distance
+  * average cabin / outside temperature (°F) and peak power
+
+Sample intervals are capped at MAX_GAP_S so a telemetry gap (car asleep,
+no signal) is not counted as time at the last known speed. Missing samples
+(None / NaN) are ignored channel by channel.
+
+numpy is required; `available()` says whether it is importable so callers can
+keep a simpler fallback.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # callers check available()
+    np = None
+
+IDLE_MPH = 1.0
+SPEED_BANDS_MPH = (0, 5, 25, 45, 65)
+HARD_ACCEL_KW_PER_S = 40.0
+HARD_BRAKE_KW_PER_S = 30.0
+SEGMENT_MILES = 5.0
+MAX_GAP_S = 30.0
+_PERCENTILES = (50, 90, 95)
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _channel(telemetry: Dict[str, Any], name: str, n: int):
+    values = telemetry.get(name)
+    if values is None or len(values) == 0:
+        return None
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim != 1:
+        return None
+    if len(arr) < n:
+        arr = np.concatenate([arr, np.full(n - len(arr), np.nan)])
+    return arr[:n]
+
+
+def _band_labels() -> List[str]:
+    edges = list(SPEED_BANDS_MPH)
+    labels = [f"{lo}-{hi}" for lo, hi in zip(edges, edges[1:])]
+    return labels + [f"{edges[-1]}+"]
+
+
+def _edges(mask) -> int:
+    """Number of runs of True in a boolean array."""
+    if mask.size == 0:
+        return 0
+    return int(mask[0]) + int(np.count_nonzero(mask[1:] & ~mask[:-1]))
+
+
+def _round(x, digits=1):
+    return None if x is None or not np.isfinite(x) else round(float(x), digits)
+
+
+def profile_drive(telemetry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Profile of one drive's /states channels, or None when there is no
+    timestamped speed trace to profile."""
+    if np is None or not telemetry:
+        return None
+    ts = telemetry.get("timestamps")
+    if ts is None or len(ts) < 2:
+        return None
+    ts = np.asarray(ts, dtype=np.float64)
+    n = len(ts)
+    speed = _channel(telemetry, "speeds", n)
+    if speed is None:
+        return None
+
+    # Each sample holds until the next one: dt[i] is how long sample i lasted.
+    dt = np.clip(np.nan_to_num(np.diff(ts, append=ts[-1]), nan=0.0), 0.0, MAX_GAP_S)
+    has_speed = ~np.isnan(speed)
+    moving = has_speed & (speed >= IDLE_MPH)
+    idle = has_speed & ~moving
+
+    profile: Dict[str, Any] = {
+        "samples": n,
+        "duration_s": round(float(ts[-1] - ts[0]), 1),
+        "moving_s": round(float(dt[moving].sum()), 1),
+        "idle_s": round(float(dt[idle].sum()), 1),
+    }
+
+    valid_speed = speed[has_speed]
+    if valid_speed.size:
+        pct = np.percentile(valid_speed, _PERCENTILES)
+        profile["speed_mph"] = {
+            "max": _round(valid_speed.max()),
+            "mean_moving": _round(speed[moving].mean()) if moving.any() else 0.0,
+            **{f"p{p}": _round(v) for p, v in zip(_PERCENTILES, pct)},
+        }
+        band = np.digitize(speed[has_speed], SPEED_BANDS_MPH[1:])
+        band_s = np.bincount(band, weights=dt[has_speed], minlength=len(SPEED_BANDS_MPH))
+        profile["speed_band_s"] = {label: round(float(s), 1) for label, s in zip(_band_labels(), band_s)}
+
+    # Distance: odometer when present, otherwise speed integrated over time.
+    odo = _channel(telemetry, "odometers", n)
+    if odo is not None and np.count_nonzero(~np.isnan(odo)) >= 2:
+        odo_filled = np.fmax.accumulate(np.where(np.isnan(odo), -np.inf, odo))
+        odo_filled[np.isneginf(odo_filled)] = np.nanmin(odo)
+        miles = odo_filled - odo_filled[0]
+    else:
+        miles = np.concatenate([[0.0], np.cumsum(np.nan_to_num(speed) * dt / 3600.0)[:-1]])
+    distance = float(miles[-1])
+    profile["distance_mi"] = round(distance, 2)
+
+    power = _channel(telemetry, "powers", n)
+    if power is not None and np.count_nonzero(~np.isnan(power)):
+        p = np.nan_to_num(power)
+        kwh = p * dt / 3600.0
+        drawn, regen = float(kwh[kwh > 0].sum()), float(-kwh[kwh < 0].sum())
+        profile["peak_power_kw"] = _round(np.nanmax(power))
+        profile["energy_drawn_kwh"] = round(drawn, 3)
+        profile["energy_regen_kwh"] = round(regen, 3)
+        profile["wh_per_mi"] = _round((drawn - regen) * 1000 / distance) if distance > 0.1 else None
+
+        rate = np.diff(power) / np.where(np.diff(ts) > 0, np.diff(ts), np.nan)
+        rate = np.nan_to_num(rate, nan=0.0)
+        profile["hard_accel_events"] = _edges(rate >= HARD_ACCEL_KW_PER_S)
+        profile["hard_brake_events"] = _edges(rate <= -HARD_BRAKE_KW_PER_S)
+
+        if distance >= SEGMENT_MILES:
+            seg = np.minimum((miles // SEGMENT_MILES).astype(np.int64), int(distance // SEGMENT_MILES))
+            seg_kwh = np.bincount(seg, weights=kwh)
+            seg_mi = np.bincount(seg, weights=np.diff(miles, append=miles[-1]))
+            profile["segments"] = [
+                {"from_mi": round(i * SEGMENT_MILES, 1), "miles": round(float(m), 2),
+                 "wh_per_mi": _round(k * 1000 / m) if m > 0.1 else None}
+                for i, (k, m) in enumerate(zip(seg_kwh, seg_mi))
+            ]
+
+    elev = _channel(telemetry, "elevations", n)
+    if elev is not None and np.count_nonzero(~np.isnan(elev)) >= 2:
+        e = elev[~np.isnan(elev)]
+        step = np.diff(e)
+        profile["climb_ft"] = round(float(step[step > 0].sum()), 1)
+        profile["descent_ft"] = round(float(-step[step < 0].sum()), 1)
+        profile["elevation_min_ft"] = _round(e.min(), 0)
+        profile["elevation_max_ft"] = _round(e.max(), 0)
+
+    for name, key in (("inside_temps", "inside_temp_f"), ("outside_temps", "outside_temp_f")):
+        temps = _channel(telemetry, name, n)
+        if temps is not None and np.count_nonzero(~np.isnan(temps)):
+            profile[key] = _round(np.nanmean(temps) * 9 / 5 + 32, 0)
+
+    return profile
+
+
+def profile_drives(payloads: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Roll several drives (a day, a month) into one profile. Percentiles are
+    over every sample of every drive, not averages of per-drive values."""
+    if np is None:
+        return None
+    profiles, speeds = [], []
+    for telemetry in payloads:
+        prof = profile_drive(telemetry)
+        if prof is None:
+            continue
+        profiles.append(prof)
+        s = np.asarray(telemetry.get("speeds"), dtype=np.float64)
+        speeds.append(s[~np.isnan(s)])
+    if not profiles:
+        return None
+
+    def total(key):
+        return sum(p.get(key) or 0 for p in profiles)
+
+    distance = total("distance_mi")
+    drawn, regen = total("energy_drawn_kwh"), total("energy_regen_kwh")
+    all_speed = np.concatenate(speeds) if speeds else np.empty(0)
+    out: Dict[str, Any] = {
+        "drives": len(profiles),
+        "duration_s": round(total("duration_s"), 1),
+        "moving_s": round(total("moving_s"), 1),
+        "idle_s": round(total("idle_s"), 1),
+        "distance_mi": round(distance, 2),
+        "energy_drawn_kwh": round(drawn, 3),
+        "energy_regen_kwh": round(regen, 3),
+        "wh_per_mi": _round((drawn - regen) * 1000 / distance) if distance > 0.1 and drawn else None,
+        "hard_accel_events": int(total("hard_accel_events")),
+        "hard_brake_events": int(total("hard_brake_events")),
+        "climb_ft": round(total("climb_ft"), 1),
+        "descent_ft": round(total("descent_ft"), 1),
+        "speed_band_s": {label: round(sum(p.get("speed_band_s", {}).get(label, 0) for p in profiles), 1)
+                         for label in _band_labels()},
+    }
+    if all_speed.size:
+        pct = np.percentile(all_speed, _PERCENTILES)
+        out["speed_mph"] = {"max": _round(all_speed.max()),
+                            **{f"p{p}": _round(v) for p, v in zip(_PERCENTILES, pct)}}
+    peaks = [p["peak_power_kw"] for p in profiles if p.get("peak_power_kw") is not None]
+    if peaks:
+        out["peak_power_kw"] = max(peaks)
+    return out
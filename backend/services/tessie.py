@@ -3,6 +3,8 @@ import os
 import requests
 from datetime import datetime
 from math import radians, cos, sin, asin, sqrt
+from services import http_pool
+from services.geocode_cache import get_geocode_cache
 from services.secret_manager import SecretManager
 
 
@@ -42,6 +44,9 @@ def _home_geofence():
 
 
 class TessieClient:
+    # Guard rail on get_tagged_drives paging.
+    TAGGED_DRIVES_LIMIT = 3000
+
     def __init__(self):
         self.secrets = SecretManager()
         self.api_key = self.secrets.get_secret("TESSIE_API_KEY")
@@ -54,22 +59,12 @@ class TessieClient:
     def _resolve_address(self, lat, lon):
         """
         Uses OpenStreetMap (Nominatim) to reverse geocode lat/lon if Tessie doesn't provide address.
+        Results are cached per ~30 m cell and misses throttled to Nominatim's 1 req/s
+        (see services/geocode_cache.py).
         """
-        if not lat or not lon:
-            return None
-            
         try:
-            # Simple User-Agent required by OSM
-            headers = {'User-Agent': 'SummitOS/1.0'}
-            url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}"
-            resp = requests.get(url, headers=headers, timeout=5)
-            if resp.status_code == 200:
-                data = resp.json()
-                # Try to get street address
-                addr = data.get('address', {})
-                return f"{addr.get('road', 'Unknown Road')}, {addr.get('city', 'Unknown City')}"
-            return None
-        except:
+            return get_geocode_cache().resolve(lat, lon)
+        except Exception:
             return None
 
     def get_vehicle_state(self, vin):
@@ -88,7 +83,7 @@ class TessieClient:
             url = f"{self.base_url}/{vin}/state?use_cache=true"
             headers = {"Authorization": f"Bearer {self.api_key}"}
             
-            response = requests.get(url, headers=headers, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, timeout=self.timeout)
             
             # Parse JSON regardless of status code
             try:
@@ -108,7 +103,7 @@ class TessieClient:
                 # Try to get the last known state from Tessie's status endpoint
                 try:
                     status_url = f"{self.base_url}/{vin}/status"
-                    status_resp = requests.get(status_url, headers=headers, timeout=self.timeout)
+                    status_resp = http_pool.get(status_url, headers=headers, timeout=self.timeout)
                     if status_resp.status_code == 200:
                         status_data = status_resp.json()
                         vehicle_status = status_data.get("status", "asleep")
@@ -151,7 +146,7 @@ class TessieClient:
             # Limit to 1 to get the latest
             params = {"limit": 1} 
             
-            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -180,7 +175,7 @@ class TessieClient:
                 "limit": 250 # Capture all stops in a day
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -218,7 +213,7 @@ class TessieClient:
                 "limit": 10 # Should be enough for a 8 hour window
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -264,15 +259,20 @@ class TessieClient:
             logging.error(f"Error matching Tessie drive: {str(e)}")
             return None
 
-    def get_tagged_drives(self, vin, from_ts, to_ts, limit=3000):
+    def get_tagged_drives(self, vin, from_ts, to_ts, limit=None, raise_errors=False):
         """
         Fetches all drives in a time range from the Tessie API.
         Automatically pages through results to capture all drives.
         Returns raw drive objects including the 'tag' field.
         Filtering by tag keyword is done in the caller for flexibility.
+        With raise_errors=True a failed page raises instead of returning the
+        pages fetched so far (callers that cache must not store a partial day).
         """
         if not self.api_key:
+            if raise_errors:
+                raise RuntimeError("Tessie API key not configured")
             return []
+        limit = limit or self.TAGGED_DRIVES_LIMIT
 
         logging.info(f"Fetching tagged drives for VIN: {vin}, from={from_ts}, to={to_ts}")
         all_results = []
@@ -291,7 +291,7 @@ class TessieClient:
                 }
 
                 logging.info(f"Requesting page {page} of tagged drives (current count: {len(all_results)})...")
-                response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+                response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
                 response.raise_for_status()
 
                 data = response.json()
@@ -317,6 +317,8 @@ class TessieClient:
             
         except Exception as e:
             logging.error(f"Error fetching tagged drives: {str(e)}")
+            if raise_errors:
+                raise
             return all_results
 
     def get_drive_telemetry(self, vin, from_ts, to_ts):
@@ -336,7 +338,7 @@ class TessieClient:
                 "to": to_ts
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -373,7 +375,7 @@ class TessieClient:
                 "limit": limit
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -609,7 +611,7 @@ class TessieClient:
             headers = {"Authorization": f"Bearer {self.api_key}"}
             params = {"seat": seat, "level": level}
 
-            response = requests.post(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -630,7 +632,7 @@ class TessieClient:
             url = f"{self.base_url}/{vin}/command/{action}"
             headers = {"Authorization": f"Bearer {self.api_key}"}
 
-            response = requests.post(url, headers=headers, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -644,7 +646,7 @@ class TessieClient:
         try:
             url = f"{self.base_url}/{vin}/command/start_climate"
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            response = requests.post(url, headers=headers, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -658,7 +660,7 @@ class TessieClient:
         try:
             url = f"{self.base_url}/{vin}/command/stop_climate"
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            response = requests.post(url, headers=headers, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -683,7 +685,7 @@ class TessieClient:
             url = f"{self.base_url}/{vin}/command/set_temperatures"
             headers = {"Authorization": f"Bearer {self.api_key}"}
             params = {"temperature": temp_c}
-            response = requests.post(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -697,7 +699,7 @@ class TessieClient:
         try:
             url = f"{self.base_url}/{vin}/command/activate_rear_trunk"
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            response = requests.post(url, headers=headers, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -711,7 +713,7 @@ class TessieClient:
         try:
             url = f"{self.base_url}/{vin}/command/activate_front_trunk"
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            response = requests.post(url, headers=headers, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -745,7 +747,7 @@ class TessieClient:
                 "drives": str(drive_id),
                 "tag": tag
             }
-            response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+            response = http_pool.post(url, headers=headers, json=payload, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -769,7 +771,7 @@ class TessieClient:
                 "simplify": "true" if simplify else "false",
                 "details": "true" if details else "false"
             }
-            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = http_pool.get(url, headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -0,0 +1,302 @@
+"""
+Per-operational-day cache of Tessie drives for the Copilot drive queries.
+
+copilot_tessie_drives and the get_drives MCP tool used to page
+TessieClient.get_tagged_drives live over the whole window on every request —
+up to 365 days, 250 drives per page. A past operational day (04:00 -> 04:00
+local, see services/datetime_utils.get_operational_window) does not change
+once it has closed, except through a tag edit, so drives are cached per
+(VIN, operational date):
+
+  * A day is *closed* CLOSE_GRACE_SEC after its window ends (Tessie finalises
+    drives shortly after they end). Closed days are served from
+    Rides.TessieDriveDays, all requested days in one SELECT.
+  * A closed day is also kept in an in-process LRU once it is *settled*:
+    WATCH_HORIZON_SEC past its window end, beyond the reach of the label
+    watcher. Until then only SQL serves it, since an invalidation deletes the
+    SQL row for every instance but can only clear the LRU of the one
+    instance that ran the watcher.
+  * Closed days missing from both are fetched live, each contiguous run in one
+    paged call, bucketed by started_at and stored.
+  * Open days (today, and yesterday until the grace has passed) are always
+    fetched live and never stored.
+  * TessieSyncService.watch_tessie_labels invalidates the days whose drives it
+    saw tagged, re-tagged or ingested, so the next query re-reads them.
+
+A live fetch that fails, or that hits get_tagged_drives' row limit, is
+returned but not stored. Callers get fresh copies and may mutate them.
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.datetime_utils import get_operational_window, get_timezone
+
+CLOSE_GRACE_SEC = int(os.environ.get("TESSIE_DRIVE_CACHE_CLOSE_GRACE_SEC", "7200"))
+# watch_tessie_labels looks back 48 hours and runs every 30 minutes; an hour
+# of slack covers a run in progress.
+WATCH_HORIZON_SEC = int(os.environ.get("TESSIE_DRIVE_CACHE_WATCH_HORIZON_SEC", str(49 * 3600)))
+LRU_DAYS = 800
+# Operational days start at 04:00 local.
+_DAY_START = datetime.timedelta(hours=4)
+
+
+def operational_date(ts: int, tz=None) -> datetime.date:
+    """Operational date a unix timestamp falls in."""
+    local = datetime.datetime.fromtimestamp(ts, tz=tz or get_timezone())
+    return (local - _DAY_START).date()
+
+
+def _window_ts(day: datetime.date, tz) -> Tuple[int, int]:
+    start, end = get_operational_window(day.isoformat(), tz=tz)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+class TessieDriveCache:
+    def __init__(self, db=None, lru_days: int = LRU_DAYS):
+        self._db = db
+        self._lru: "OrderedDict[Tuple[str, datetime.date], str]" = OrderedDict()
+        self._lru_days = lru_days
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    @property
+    def db(self):
+        if self._db is None:
+            from services.database import DatabaseClient
+            self._db = DatabaseClient()
+        return self._db
+
+    # ── LRU ───────────────────────────────────────────────────────────────────
+
+    def _lru_get(self, vin: str, day: datetime.date) -> Optional[str]:
+        with self._lock:
+            hit = self._lru.get((vin, day))
+            if hit is not None:
+                self._lru.move_to_end((vin, day))
+            return hit
+
+    def _lru_put(self, vin: str, day: datetime.date, payload: str) -> None:
+        with self._lock:
+            self._lru[(vin, day)] = payload
+            self._lru.move_to_end((vin, day))
+            while len(self._lru) > self._lru_days:
+                self._lru.popitem(last=False)
+
+    # ── SQL ───────────────────────────────────────────────────────────────────
+
+    def _ensure_table(self, cursor) -> None:
+        if self._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.TessieDriveDays', 'U') IS NULL
+            CREATE TABLE Rides.TessieDriveDays (
+                Vin             NVARCHAR(32)  NOT NULL,
+                OperationalDate DATE          NOT NULL,
+                DriveCount      INT           NOT NULL,
+                DrivesJson      NVARCHAR(MAX) NOT NULL,
+                FetchedAt       DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME(),
+                CONSTRAINT PK_TessieDriveDays PRIMARY KEY (Vin, OperationalDate)
+            )
+        """)
+        self._table_ready = True
+
+    def _sql_get(self, vin: str, days: List[datetime.date]) -> Dict[datetime.date, str]:
+        try:
+            conn = self.db.get_connection()
+        except Exception as e:
+            logging.warning(f"Tessie drive cache unavailable: {e}")
+            return {}
+        if not conn:
+            return {}
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            conn.commit()
+            cursor.execute(
+                "SELECT OperationalDate, DrivesJson FROM Rides.TessieDriveDays "
+                "WHERE Vin = ? AND OperationalDate BETWEEN ? AND ?",
+                (vin, min(days), max(days)))
+            wanted = set(days)
+            found = {}
+            for op_date, payload in cursor.fetchall():
+                if isinstance(op_date, datetime.datetime):
+                    op_date = op_date.date()
+                if op_date in wanted:
+                    found[op_date] = payload
+            return found
+        except Exception as e:
+            logging.warning(f"Tessie drive cache lookup failed: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def _sql_put(self, vin: str, payloads: Dict[datetime.date, Tuple[int, str]]) -> None:
+        try:
+            conn = self.db.get_connection()
+        except Exception as e:
+            logging.warning(f"Tessie drive cache unavailable: {e}")
+            return
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                CREATE TABLE #DriveDayStage (
+                    OperationalDate DATE          NOT NULL,
+                    DriveCount      INT           NOT NULL,
+                    DrivesJson      NVARCHAR(MAX) NOT NULL
+                )
+            """)
+            cursor.fast_executemany = True
+            cursor.executemany(
+                "INSERT INTO #DriveDayStage (OperationalDate, DriveCount, DrivesJson) VALUES (?, ?, ?)",
+                [(day, count, payload) for day, (count, payload) in payloads.items()])
+            cursor.execute("""
+                MERGE INTO Rides.TessieDriveDays WITH (HOLDLOCK) AS target
+                USING #DriveDayStage AS source
+                ON (target.Vin = ? AND target.OperationalDate = source.OperationalDate)
+                WHEN MATCHED THEN
+                    UPDATE SET DriveCount = source.DriveCount, DrivesJson = source.DrivesJson,
+                               FetchedAt = SYSUTCDATETIME()
+                WHEN NOT MATCHED THEN
+                    INSERT (Vin, OperationalDate, DriveCount, DrivesJson)
+                    VALUES (?, source.OperationalDate, source.DriveCount, source.DrivesJson);
+            """, (vin, vin))
+            cursor.execute("DROP TABLE #DriveDayStage")
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Tessie drive cache write failed: {e}")
+        finally:
+            conn.close()
+
+    def invalidate(self, vin: str, days: Iterable[datetime.date]) -> None:
+        """Forget cached drives for `days` (e.g. after a tag edit)."""
+        days = sorted(set(days))
+        if not days:
+            return
+        with self._lock:
+            for day in days:
+                self._lru.pop((vin, day), None)
+        try:
+            conn = self.db.get_connection()
+        except Exception as e:
+            logging.warning(f"Tessie drive cache unavailable: {e}")
+            return
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            placeholders = ", ".join("?" for _ in days)
+            cursor.execute(
+                f"DELETE FROM Rides.TessieDriveDays WHERE Vin = ? AND OperationalDate IN ({placeholders})",
+                (vin, *days))
+            conn.commit()
+            logging.info(f"Tessie drive cache invalidated {len(days)} day(s): {[d.isoformat() for d in days]}")
+        except Exception as e:
+            logging.warning(f"Tessie drive cache invalidation failed: {e}")
+        finally:
+            conn.close()
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    def get_drives(self, tessie, vin: str, from_ts: int, to_ts: int, now: Optional[float] = None) -> Tuple[list, dict]:
+        """Drives that started in [from_ts, to_ts], oldest first, plus a
+        provenance dict saying where each operational day came from."""
+        tz = get_timezone()
+        now = time.time() if now is None else now
+        first, last = operational_date(from_ts, tz), operational_date(max(from_ts, to_ts - 1), tz)
+        days = [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+        closed = [d for d in days if _window_ts(d, tz)[1] + CLOSE_GRACE_SEC <= now]
+        open_days = [d for d in days if d not in set(closed)]
+        settled = {d for d in closed if _window_ts(d, tz)[1] + WATCH_HORIZON_SEC <= now}
+
+        payloads: Dict[datetime.date, str] = {}
+        provenance = {"memory_days": 0, "sql_days": 0, "live_days": 0, "open_days": len(open_days), "tessie_calls": 0}
+        for day in closed:
+            hit = self._lru_get(vin, day) if day in settled else None
+            if hit is not None:
+                payloads[day] = hit
+                provenance["memory_days"] += 1
+        missing = [d for d in closed if d not in payloads]
+        if missing:
+            for day, payload in self._sql_get(vin, missing).items():
+                payloads[day] = payload
+                if day in settled:
+                    self._lru_put(vin, day, payload)
+                provenance["sql_days"] += 1
+
+        drives: list = []
+        for payload in payloads.values():
+            drives.extend(json.loads(payload))
+
+        # Everything not cached — closed misses and open days — is fetched
+        # live, one paged Tessie call per contiguous run of days.
+        live = sorted(d for d in days if d not in payloads)
+        to_store: Dict[datetime.date, Tuple[int, str]] = {}
+        for run in _runs(live):
+            run_from, _ = _window_ts(run[0], tz)
+            _, run_to = _window_ts(run[-1], tz)
+            fetched, complete = _fetch_live(tessie, vin, run_from, run_to)
+            provenance["tessie_calls"] += 1
+            drives.extend(fetched)
+            if not complete:
+                continue
+            by_day: Dict[datetime.date, list] = {d: [] for d in run}
+            for drive in fetched:
+                started = drive.get("started_at")
+                if started:
+                    by_day.setdefault(operational_date(started, tz), []).append(drive)
+            for day in run:
+                if day in closed:
+                    payload = json.dumps(by_day[day])
+                    to_store[day] = (len(by_day[day]), payload)
+                    if day in settled:
+                        self._lru_put(vin, day, payload)
+        provenance["live_days"] = len(live) - len(open_days)
+        if to_store:
+            self._sql_put(vin, to_store)
+
+        drives = [d for d in drives if from_ts <= (d.get("started_at") or from_ts) <= to_ts]
+        drives.sort(key=lambda d: d.get("started_at", 0))
+        provenance["cached_days"] = provenance["memory_days"] + provenance["sql_days"]
+        return drives, provenance
+
+
+def _runs(days: List[datetime.date]) -> List[List[datetime.date]]:
+    runs: List[List[datetime.date]] = []
+    for day in days:
+        if runs and (day - runs[-1][-1]).days == 1:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+def _fetch_live(tessie, vin: str, from_ts: int, to_ts: int) -> Tuple[list, bool]:
+    """(drives, complete). Incomplete results are served but not cached."""
+    try:
+        drives = tessie.get_tagged_drives(vin, from_ts, to_ts, raise_errors=True) or []
+    except Exception as e:
+        logging.warning(f"Tessie drive fetch failed; not caching this range: {e}")
+        return [], False
+    return drives, len(drives) < tessie.TAGGED_DRIVES_LIMIT
+
+
+_shared: Optional[TessieDriveCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_tessie_drive_cache() -> TessieDriveCache:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TessieDriveCache()
+        return _shared
@@ -2,6 +2,8 @@ import logging
 import json
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
 
@@ -11,9 +13,20 @@ from services.semantic_ingestion import SemanticIngestionService
 from services.telemetry_analysis import TelemetryAnalysisService
 
 from services.datetime_utils import get_timezone, get_operational_window
+from services.tessie_drive_cache import get_tessie_drive_cache, operational_date
+from services.client_roster import ClientMatcher, get_client_matcher
 
 log = logging.getLogger(__name__)
 
+# Concurrent /states fetches per sync; kept small to stay under Tessie's
+# rate limit.
+TELEMETRY_WORKERS = int(os.environ.get("TESSIE_TELEMETRY_WORKERS", "4"))
+
+
+def _ms(since: float) -> int:
+    return int((time.perf_counter() - since) * 1000)
+
+
 class TessieSyncService:
     def __init__(self):
         self.tessie = TessieClient()
@@ -25,12 +38,16 @@ class TessieSyncService:
     def sync_day(self, target_date: str = None) -> Dict[str, Any]:
         """
         Synchronizes all drives and charging sessions for a specific date (YYYY-MM-DD).
-        Defaults to 'today'.
+        Defaults to 'today'. Telemetry is fetched concurrently, written in one
+        batch, and semantic ingestion is queued in the background; per-stage
+        durations are returned under "timings_ms".
         """
         if not target_date:
             target_date = datetime.now(self.mdt).strftime('%Y-%m-%d')
         
         log.info(f"Starting Tessie Sync for {target_date}...")
+        started = t0 = time.perf_counter()
+        timings: Dict[str, int] = {}
         
         # 1. Fetch from Tessie
         # Note: Tessie API uses 'since' and 'until' as Unix timestamps.
@@ -51,6 +68,7 @@ class TessieSyncService:
         drives = self.tessie.get_drives(vin, from_ts=start_ts, to_ts=end_ts)
         # Fetch Charges
         charges = self.tessie.get_charges(vin, from_ts=start_ts, to_ts=end_ts)
+        timings["tessie_list"] = _ms(t0)
 
         # 2. Process & Save
         results = {
@@ -59,9 +77,16 @@ class TessieSyncService:
             "charges_found": len(charges),
             "drives_saved": 0,
             "charges_saved": 0,
-            "errors": []
+            "telemetry_saved": 0,
+            "semantic_queued": 0,
+            "errors": [],
+            "timings_ms": timings,
         }
+        t0 = time.perf_counter()
 
+        # Map every drive first so the whole day is written in one set-based
+        # upsert (save_trips_bulk) rather than a guardrail SELECT + MERGE per drive.
+        mapped = []
         for drive in drives:
             try:
                 # Map Tessie fields to our SQL schema
@@ -91,12 +116,25 @@ class TessieSyncService:
                     "Sidecar_Artifact_JSON": json.dumps(drive)
                 }
 
-                # Save all drives to DB (filtered out on dashboard if not business, but useful for matching/mileage)
-                # This ensures "Untagged" drives are available for the Uber Matcher to claim them.
-                self.db.save_trip(drive_data)
-                results["drives_saved"] += 1
-                
-                # Upsert Location Intelligence if tagged
+                mapped.append((drive, drive_data))
+            except Exception as e:
+                log.error(f"Error mapping drive {drive.get('id')}: {e}")
+                results["errors"].append(f"Drive {drive.get('id')}: {str(e)}")
+
+        timings["map"] = _ms(t0)
+
+        # Save all drives to DB (filtered out on dashboard if not business, but useful for matching/mileage)
+        # This ensures "Untagged" drives are available for the Uber Matcher to claim them.
+        t0 = time.perf_counter()
+        if mapped:
+            results["drives_saved"] = self.db.save_trips_bulk([d for _, d in mapped])
+        timings["save_trips"] = _ms(t0)
+
+        t0 = time.perf_counter()
+        for drive, _ in mapped:
+            try:
+                # Upsert Location Intelligence if tagged. Sequential: each
+                # upsert re-weights every row sharing the label.
                 tag = drive.get('tag')
                 if tag:
                     lat = drive.get('ending_latitude')
@@ -113,27 +151,39 @@ class TessieSyncService:
                         dtype = 'POI'
                     
                     if lat is not None and lon is not None:
-                        self.db.upsert_location_intelligence(tag, lat, lon, addr, dtype, self._format_ts(ended_at))
-                
-                # Fetch & Analyze Telemetry
-                drive_id = drive.get('id')
-                d_start = drive.get('started_at')
-                d_end = drive.get('ended_at')
-                
-                telemetry_summary = ""
-                if d_start and d_end:
-                    tlm = self.tessie.get_drive_telemetry(vin, d_start, d_end)
-                    if tlm:
-                        self.db.save_drive_telemetry(f"TESSIE-{drive_id}", tlm)
-                        telemetry_summary = self.telemetry.analyze_drive(tlm)
-                
-                # Semantic Ingestion
-                self.semantic.ingest_tessie_drive(drive, telemetry_summary=telemetry_summary)
-                
+                        self.db.upsert_location_intelligence(tag, lat, lon, addr, dtype, self._format_ts(drive.get('ended_at')))
             except Exception as e:
                 log.error(f"Error saving drive {drive.get('id')}: {e}")
                 results["errors"].append(f"Drive {drive.get('id')}: {str(e)}")
+        timings["location_intelligence"] = _ms(t0)
 
+        # Fetch & Analyze Telemetry: concurrently, bounded so a busy day does
+        # not burst past Tessie's rate limit (http_pool also backs off on 429).
+        t0 = time.perf_counter()
+        telemetry = self._fetch_telemetry(vin, [drive for drive, _ in mapped], results["errors"])
+        timings["telemetry_fetch"] = _ms(t0)
+
+        t0 = time.perf_counter()
+        archived, to_vectorize = [], []
+        for drive, _ in mapped:
+            tlm, telemetry_summary = telemetry.get(drive.get('id'), (None, ""))
+            if tlm:
+                archived.append((f"TESSIE-{drive.get('id')}", tlm))
+            to_vectorize.append((drive, telemetry_summary))
+        if archived:
+            results["telemetry_saved"] = self.db.save_drive_telemetry_bulk(archived)
+        timings["telemetry_save"] = _ms(t0)
+
+        # Semantic Ingestion (one embeddings round trip for the day's uncached
+        # summaries, one MERGE for all vectors) runs on a background worker so
+        # the OpenAI call does not hold the sync open.
+        t0 = time.perf_counter()
+        if to_vectorize:
+            self.semantic.ingest_tessie_drives_background(to_vectorize)
+            results["semantic_queued"] = len(to_vectorize)
+        timings["semantic_enqueue"] = _ms(t0)
+
+        t0 = time.perf_counter()
         # Save Charges
         for charge in charges:
             try:
@@ -154,9 +204,39 @@ class TessieSyncService:
                 log.error(f"Error saving charge {charge.get('id')}: {e}")
                 results["errors"].append(f"Charge {charge.get('id')}: {str(e)}")
 
-        log.info(f"Sync Complete: {results['drives_saved']} drives, {results['charges_saved']} charges.")
+        timings["charges"] = _ms(t0)
+        timings["total"] = _ms(started)
+
+        log.info(f"Sync Complete: {results['drives_saved']} drives, {results['charges_saved']} charges in {timings['total']} ms.")
         return results
 
+    def _fetch_telemetry(self, vin: str, drives: List[Dict[str, Any]], errors: List[str]) -> Dict[Any, tuple]:
+        """drive id -> (telemetry, summary) for every drive Tessie has a
+        /states trace for, fetched on TELEMETRY_WORKERS threads."""
+        def fetch(drive):
+            d_start, d_end = drive.get('started_at'), drive.get('ended_at')
+            if not (d_start and d_end):
+                return None, ""
+            tlm = self.tessie.get_drive_telemetry(vin, d_start, d_end)
+            if not tlm:
+                return None, ""
+            return tlm, self.telemetry.analyze_drive(tlm)
+
+        out = {}
+        if not drives:
+            return out
+        with ThreadPoolExecutor(max_workers=min(TELEMETRY_WORKERS, len(drives)),
+                                thread_name_prefix="tessie-telemetry") as pool:
+            futures = {pool.submit(fetch, drive): drive for drive in drives}
+            for future in as_completed(futures):
+                drive = futures[future]
+                try:
+                    out[drive.get('id')] = future.result()
+                except Exception as e:
+                    log.error(f"Error fetching telemetry for drive {drive.get('id')}: {e}")
+                    errors.append(f"Drive {drive.get('id')}: {str(e)}")
+        return out
+
     def _format_ts(self, ts: int) -> Optional[str]:
         if not ts: return None
         return datetime.fromtimestamp(ts, self.mdt).strftime('%Y-%m-%d %H:%M:%S')
@@ -213,23 +293,9 @@ class TessieSyncService:
             return 'Uber_Dropoff'
             
         # 6. Matches a known client name exactly
-        try:
-            known_clients = self.db.get_known_client_names()
-        except Exception:
-            known_clients = ["jackie", "jacquelyn", "esmeralda", "daniel", "ryan", "lauren", "terrance", "lorynne", "nancy", "adrienne", "david", "emerson"]
+        if t in get_client_matcher(self.db).names:
+            return ClientMatcher.classification(t)
 
-        search_str = t
-        if "jacquelyn" in search_str:
-            search_str += " jackie"
-            
-        for client in known_clients:
-            if client == t:
-                if client in ["jackie", "jacquelyn", "jacquelyn heslep"]:
-                    return "Jacquelyn Heslep"
-                elif client in ["david", "david berezov"]:
-                    return "David Berezov"
-                return client.capitalize()
-                
         # 6. Any other text -> POI
         return 'POI'
 
@@ -264,6 +330,8 @@ class TessieSyncService:
         if not conn:
             raise RuntimeError("Database connection failed")
         cursor = conn.cursor()
+        # Operational days whose cached drive snapshot this run made stale.
+        touched_days = set()
 
         try:
             for drive in drives:
@@ -271,6 +339,7 @@ class TessieSyncService:
                 tag = drive.get('tag')
                 if not tag:
                     continue
+                started_day = operational_date(drive['started_at'], self.mdt) if drive.get('started_at') else None
 
                 # Query database for existing label and classification
                 cursor.execute("""
@@ -307,6 +376,7 @@ class TessieSyncService:
                         }
                         self.db.save_trip(drive_data)
                         results["labels_set"] += 1
+                        touched_days.add(started_day)
                         
                         # Upsert Location Intelligence
                         lat = drive.get('ending_latitude')
@@ -342,8 +412,10 @@ class TessieSyncService:
                             LastUpdated = GETUTCDATE()
                         WHERE RideID = ?
                     """, (tag, new_class, drive_id))
+                    self.db.mark_rides_dirty(cursor, "RideID = ?", (drive_id,))
                     conn.commit()
                     results["labels_set"] += 1
+                    touched_days.add(started_day)
 
                     # Upsert Location Intelligence
                     lat = drive.get('ending_latitude')
@@ -366,6 +438,7 @@ class TessieSyncService:
                     if tag.strip().lower() != existing_label.strip().lower():
                         log.info(f"WATCHER: Label change detected for {drive_id} in Tessie: '{existing_label}' -> '{tag}'. Preserving original SQL label.")
                         results["labels_ignored"] += 1
+                        touched_days.add(started_day)
         except Exception as watch_err:
             log.error(f"Error in Tessie Label Watcher: {watch_err}")
             results["errors"].append(str(watch_err))
@@ -373,5 +446,9 @@ class TessieSyncService:
             cursor.close()
             conn.close()
 
+        touched_days.discard(None)
+        if touched_days:
+            get_tessie_drive_cache().invalidate(vin, touched_days)
+
         log.info(f"Watcher Complete: {results['labels_set']} labels set/updated, {results['labels_ignored']} changes logged and ignored.")
         return results
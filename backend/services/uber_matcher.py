@@ -7,6 +7,8 @@ from typing import Dict, Any, Optional, List
 
 from .database import DatabaseClient
 from .ocr import OCRClient
+from .ocr_cache import content_hash
+from .processed_artifacts import ProcessedArtifacts
 from .semantic_ingestion import SemanticIngestionService
 
 log = logging.getLogger(__name__)
@@ -16,12 +18,25 @@ class UberMatcherService:
         self.db = DatabaseClient()
         self.ocr = OCRClient()
         self.semantic = SemanticIngestionService()
+        self.artifacts = ProcessedArtifacts(self.db)
         self.mdt = timezone(timedelta(hours=-6))
 
-    def process_image_bytes(self, image_bytes: bytes, filename: str) -> Dict[str, Any]:
-        """Runs OCR on image bytes and matches to the closest Tessie Uber drive."""
+    def process_image_bytes(self, image_bytes: bytes, filename: str, item_id: str = None,
+                            source: str = "upload") -> Dict[str, Any]:
+        """Runs OCR on image bytes and matches to the closest Tessie Uber drive.
+
+        `item_id` is the OneDrive item id when the screenshot came from Graph;
+        `source` is recorded in Rides.ProcessedArtifacts.
+        """
         log.info(f"Processing Uber card: {filename}")
-        
+
+        # 0. Idempotency by content / item id — skips OCR for a known screenshot
+        sha256 = content_hash(image_bytes)
+        seen = self.artifacts.find(sha256=sha256, item_id=item_id)
+        if seen:
+            log.info(f"Screenshot {filename} was already processed (by {seen['matched_on']}).")
+            return self._already_processed(seen)
+
         # 1. OCR (Using the service's existing method if possible, or direct)
         # Assuming OCRClient has a method to process bytes. If not, we'll use a wrapper.
         text = self.ocr.analyze_image_bytes(image_bytes)
@@ -43,17 +58,16 @@ class UberMatcherService:
             log.info(f"Skipping screenshot {filename} because parsed driver earnings are $0.00 (likely not an Uber receipt).")
             return {"status": "SKIP", "reason": "No driver earnings parsed (not a valid Uber receipt)"}
 
-        # 2.5 Check if already processed (Idempotency)
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT RideID FROM Rides.Rides WHERE Sidecar_Artifact_JSON LIKE ?", (f'%"{filename}"%',))
-        existing_row = cursor.fetchone()
-        if existing_row:
+        # 2.5 Check if already processed by filename (Idempotency)
+        seen = self.artifacts.find(filename=filename)
+        if seen:
             log.info(f"Screenshot {filename} was already processed.")
+            # Remember the bytes so the next copy is rejected before OCR
+            self.artifacts.record(seen["ride_id"], source, filename=filename, sha256=sha256, item_id=item_id)
             # Still return matched data so the caller knows what happened
             return {
                 "status": "MATCHED",
-                "ride_id": existing_row[0],
+                "ride_id": seen["ride_id"],
                 "driver_earnings": card["driver_earnings"],
                 "rider_payment": card["rider_payment"]
             }
@@ -116,6 +130,7 @@ class UberMatcherService:
         else:
             ride_id = match["RideID"]
             self._update_ride(ride_id, card, uber_cut, sidecar)
+        self.artifacts.record(ride_id, source, filename=filename, sha256=sha256, item_id=item_id)
 
         # 6. Vectorize the matched ride for Copilot semantic memory
         try:
@@ -144,6 +159,15 @@ class UberMatcherService:
             "uber_cut": uber_cut
         }
 
+    def _already_processed(self, seen: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "status": "MATCHED",
+            "ride_id": seen["ride_id"],
+            "driver_earnings": seen["driver_earnings"],
+            "rider_payment": seen["rider_payment"],
+            "duplicate": True,
+        }
+
     def _parse_uber_card(self, text: str) -> Dict[str, Any]:
         """Parses Uber card text using the robust OCRClient logic."""
         parsed = self.ocr.parse_ubertrip(text)
@@ -249,6 +273,7 @@ class UberMatcherService:
             card["rider_payment"], card.get("tip", 0.0), card["driver_earnings"], uber_cut,
             json.dumps(sidecar), ride_id
         ))
+        self.db.mark_rides_dirty(cursor, "RideID = ?", (ride_id,))
         conn.commit()
         cursor.close()
 
@@ -263,6 +288,7 @@ class UberMatcherService:
         """, (
             ride_id, card_dt, card["rider_payment"], card["driver_earnings"], card.get("tip", 0.0), uber_cut, json.dumps(sidecar)
         ))
+        self.db.mark_rides_dirty(cursor, "RideID = ?", (ride_id,))
         conn.commit()
         cursor.close()
         return ride_id
@@ -0,0 +1,225 @@
+"""
+Optional in-process retrieval engine for VectorStore Evidence Mode.
+
+query_evidence_mode asks Azure SQL to compute VECTOR_DISTANCE twice per row
+over every row of System_Vectors (there is no vector index), and Insight /
+Narrative mode pay that full scan on every Copilot question. This module
+keeps a float32 NumPy matrix of all embeddings in the worker instead: rows
+are L2-normalised once at load, so a query is one matrix-vector product and
+an argpartition, and cosine confidence (1 - cosine distance) is the dot
+product itself.
+
+Enabled with VECTOR_LOCAL_INDEX=1 and only when numpy is importable; in every
+other case (disabled, numpy missing, more than MAX_VECTORS rows, load failed)
+`LocalVectorIndex.get()` returns None and VectorStore keeps using SQL. At
+1536 float32 dimensions a row costs 6 KB, so the default cap of 50k rows is
+~300 MB.
+
+Staying in sync:
+
+  * Loaded lazily on the first query, in one SELECT.
+  * Writes made by this process (add_vector / add_vectors_batch) are applied
+    to the index directly by vector_id.
+  * Every REFRESH_SEC, rows with timestamp_utc at or past the watermark
+    (minus a small overlap) are re-read, which picks up other instances'
+    new vectors.
+  * System_Vectors has no modified-at column, so another instance
+    re-embedding an *old* row is only seen by the full reload every
+    FULL_RELOAD_SEC.
+
+Results have exactly the row shape of the SQL path.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency; the SQL path needs none of this
+    np = None
+
+ENABLED = os.environ.get("VECTOR_LOCAL_INDEX", "0") == "1"
+MAX_VECTORS = int(os.environ.get("VECTOR_LOCAL_INDEX_MAX", "50000"))
+REFRESH_SEC = float(os.environ.get("VECTOR_LOCAL_INDEX_REFRESH_SEC", "60"))
+FULL_RELOAD_SEC = float(os.environ.get("VECTOR_LOCAL_INDEX_FULL_RELOAD_SEC", "3600"))
+DIM = 1536
+# Re-read this far behind the watermark so rows committed out of order by a
+# concurrent writer are not skipped.
+_WATERMARK_OVERLAP = timedelta(hours=1)
+
+_COLUMNS = ("vector_id", "source_type", "timestamp_utc", "vehicle_id", "driver_id",
+            "original_confidence", "raw_text_hash", "source_pointer", "derivation_reason")
+
+_SELECT = """
+    SELECT vector_id, source_type, timestamp_utc, vehicle_id, driver_id,
+           confidence_score, raw_text_hash, source_pointer, derivation_reason,
+           CAST(embedding AS NVARCHAR(MAX))
+    FROM System_Vectors
+"""
+
+
+def available() -> bool:
+    return ENABLED and np is not None
+
+
+class LocalVectorIndex:
+    _instance: Optional["LocalVectorIndex"] = None
+    _instance_lock = threading.Lock()
+    # After a load that did not produce an index, don't retry until then.
+    _retry_at = 0.0
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, DIM), dtype=np.float32)
+        self._meta: List[Dict[str, Any]] = []
+        self._pos: Dict[str, int] = {}
+        self._watermark = None
+        self._refreshed_at = 0.0
+        self._loaded_at = 0.0
+
+    @classmethod
+    def get(cls, db) -> Optional["LocalVectorIndex"]:
+        """The process-wide index, loaded on first use; None when the local
+        engine is unavailable and callers should query SQL."""
+        if not available():
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                if time.monotonic() < cls._retry_at:
+                    return None
+                index = cls(db)
+                try:
+                    loaded = index.load()
+                except Exception as e:
+                    logging.warning(f"Local vector index load failed; using SQL: {e}")
+                    loaded = False
+                if not loaded:
+                    cls._retry_at = time.monotonic() + REFRESH_SEC
+                    return None
+                cls._instance = index
+            index = cls._instance
+        try:
+            index.maybe_refresh()
+        except Exception as e:
+            logging.warning(f"Local vector index refresh failed; serving last snapshot: {e}")
+        return index
+
+    @classmethod
+    def loaded(cls) -> Optional["LocalVectorIndex"]:
+        """The index if this process has one, without loading it."""
+        return cls._instance
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    def _fetch(self, since=None) -> list:
+        with self.db.connection() as conn:
+            if not conn:
+                raise RuntimeError("Database unavailable")
+            cursor = conn.cursor()
+            if since is None:
+                cursor.execute("SELECT COUNT(*) FROM System_Vectors")
+                count = cursor.fetchone()[0]
+                if count > MAX_VECTORS:
+                    logging.info(f"System_Vectors has {count} rows (> {MAX_VECTORS}); local index disabled.")
+                    return None
+                cursor.execute(_SELECT)
+            else:
+                cursor.execute(_SELECT + " WHERE timestamp_utc >= ?", (since,))
+            return cursor.fetchall()
+
+    def load(self) -> bool:
+        rows = self._fetch()
+        if rows is None:
+            return False
+        with self._lock:
+            self._matrix = np.zeros((0, DIM), dtype=np.float32)
+            self._meta, self._pos, self._watermark = [], {}, None
+            self._apply_rows(rows)
+            self._loaded_at = self._refreshed_at = time.monotonic()
+        logging.info(f"Local vector index loaded {len(self._meta)} vector(s).")
+        return True
+
+    def maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._loaded_at >= FULL_RELOAD_SEC:
+            self.load()
+        elif now - self._refreshed_at >= REFRESH_SEC:
+            since = self._watermark - _WATERMARK_OVERLAP if self._watermark else None
+            rows = self._fetch(since) if since else self._fetch()
+            with self._lock:
+                if rows:
+                    self._apply_rows(rows)
+                self._refreshed_at = now
+
+    def _apply_rows(self, rows) -> None:
+        for r in rows:
+            try:
+                embedding = json.loads(r[9]) if isinstance(r[9], str) else r[9]
+            except (TypeError, ValueError):
+                continue
+            meta = dict(zip(_COLUMNS, r[:9]))
+            self._upsert(meta, embedding)
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def _upsert(self, meta: Dict[str, Any], embedding) -> None:
+        vec = np.asarray(embedding, dtype=np.float32)
+        if vec.shape != (DIM,):
+            return
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return
+        vec /= norm
+        pos = self._pos.get(meta["vector_id"])
+        if pos is None:
+            pos = len(self._meta)
+            if pos == self._matrix.shape[0]:
+                grown = np.zeros((max(64, pos * 2), DIM), dtype=np.float32)
+                grown[:pos] = self._matrix[:pos]
+                self._matrix = grown
+            self._meta.append(meta)
+            self._pos[meta["vector_id"]] = pos
+        else:
+            self._meta[pos] = meta
+        self._matrix[pos] = vec
+        ts = meta.get("timestamp_utc")
+        if ts is not None and (self._watermark is None or ts > self._watermark):
+            self._watermark = ts
+
+    def upsert(self, meta: Dict[str, Any], embedding) -> None:
+        """Apply a row this process just wrote. `meta` uses the result keys."""
+        with self._lock:
+            self._upsert(dict(meta), embedding)
+
+    # ── Query ─────────────────────────────────────────────────────────────────
+
+    def search(self, embedding, n_results: int, confidence_threshold: float) -> List[Dict[str, Any]]:
+        """Top `n_results` rows with cosine confidence >= threshold, best first."""
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0 or n_results <= 0:
+            return []
+        q /= norm
+        with self._lock:
+            n = len(self._meta)
+            if n == 0:
+                return []
+            scores = self._matrix[:n] @ q
+            k = min(n_results, n)
+            top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            out = []
+            for i in top:
+                score = float(scores[i])
+                if score < confidence_threshold:
+                    break
+                out.append(dict(self._meta[i], search_confidence=score))
+            return out
@@ -9,26 +9,139 @@ from openai import OpenAI
 from pydantic import ValidationError
 from services.database import DatabaseClient
 from services.vector_contract import CanonicalVector
+from services.vector_index import LocalVectorIndex
 
 class VectorStore:
     """
     Manages embedding generation, token budgeting, and vector interactions with Azure SQL.
     Strictly enforces Canonical Vector Contracts and specific retrieval modes.
     """
+    # Inputs per embeddings request (OpenAI accepts up to 2048).
+    EMBED_BATCH_SIZE = 256
+    # SQL Server caps a statement at 2100 parameters.
+    LOOKUP_CHUNK = 1000
+    _embedding_cache_ready = False
+
     def __init__(self):
         self.openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
         self.model = "text-embedding-3-small" # The 1536-dimensional model
         self.db = DatabaseClient()
         
-    def get_embedding(self, text: str) -> List[float]:
+    # ── Embeddings ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _embed_text(text: str) -> str:
+        return (text or "").replace("\n", " ")
+
+    @staticmethod
+    def _text_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _ensure_embedding_cache(self, cursor):
+        if VectorStore._embedding_cache_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('Rides.EmbeddingCache', 'U') IS NULL
+            CREATE TABLE Rides.EmbeddingCache (
+                Model      NVARCHAR(100) NOT NULL,
+                TextSha256 CHAR(64)      NOT NULL,
+                Embedding  NVARCHAR(MAX) NOT NULL,
+                CreatedAt  DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME(),
+                CONSTRAINT PK_EmbeddingCache PRIMARY KEY (Model, TextSha256)
+            )
+        """)
+        VectorStore._embedding_cache_ready = True
+
+    def _cached_embeddings(self, keys: List[str]) -> Dict[str, List[float]]:
+        """(model, sha256(text)) cache lookup. A cache failure is a miss."""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        try:
+            with self.db.connection() as conn:
+                if not conn:
+                    return found
+                cursor = conn.cursor()
+                self._ensure_embedding_cache(cursor)
+                conn.commit()
+                for i in range(0, len(keys), self.LOOKUP_CHUNK):
+                    chunk = keys[i:i + self.LOOKUP_CHUNK]
+                    cursor.execute(
+                        "SELECT TextSha256, Embedding FROM Rides.EmbeddingCache WHERE Model = ? "
+                        f"AND TextSha256 IN ({','.join('?' * len(chunk))})",
+                        [self.model] + chunk,
+                    )
+                    for key, emb in cursor.fetchall():
+                        found[key] = json.loads(emb)
+        except Exception as e:
+            logging.warning(f"Embedding cache lookup failed: {e}")
+        return found
+
+    def _store_embeddings(self, fresh: Dict[str, List[float]]) -> None:
+        if not fresh:
+            return
+        try:
+            with self.db.connection() as conn:
+                if not conn:
+                    return
+                cursor = conn.cursor()
+                self._ensure_embedding_cache(cursor)
+                cursor.execute("CREATE TABLE #EmbeddingStage (TextSha256 CHAR(64) PRIMARY KEY, Embedding NVARCHAR(MAX))")
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    "INSERT INTO #EmbeddingStage (TextSha256, Embedding) VALUES (?, ?)",
+                    [(k, json.dumps(v)) for k, v in fresh.items()],
+                )
+                cursor.execute("""
+                    MERGE INTO Rides.EmbeddingCache WITH (HOLDLOCK) AS target
+                    USING #EmbeddingStage AS source
+                    ON (target.Model = ? AND target.TextSha256 = source.TextSha256)
+                    WHEN NOT MATCHED THEN
+                        INSERT (Model, TextSha256, Embedding) VALUES (?, source.TextSha256, source.Embedding);
+                """, (self.model, self.model))
+                cursor.execute("DROP TABLE #EmbeddingStage")
+                conn.commit()
+        except Exception as e:
+            logging.warning(f"Embedding cache write failed: {e}")
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddings for `texts`, in order. Identical texts are embedded once,
+        texts already in Rides.EmbeddingCache are not sent at all, and the
+        rest go to OpenAI EMBED_BATCH_SIZE inputs per request.
+        """
+        prepared = [self._embed_text(t) for t in texts]
+        keys = [self._text_key(t) for t in prepared]
+        by_key = self._cached_embeddings(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, prepared):
+            if key not in by_key:
+                missing.setdefault(key, text)
+        pending = list(missing.items())
+        fresh: Dict[str, List[float]] = {}
         try:
-            # Efficiency constraint check: In a full app, check token budgets here.
-            text = text.replace("\n", " ")
-            response = self.openai_client.embeddings.create(input=[text], model=self.model)
-            return response.data[0].embedding
+            for i in range(0, len(pending), self.EMBED_BATCH_SIZE):
+                batch = pending[i:i + self.EMBED_BATCH_SIZE]
+                # Efficiency constraint check: In a full app, check token budgets here.
+                response = self.openai_client.embeddings.create(input=[t for _, t in batch], model=self.model)
+                for item in response.data:
+                    fresh[batch[item.index][0]] = item.embedding
         except Exception as e:
             logging.error(f"OpenAI Embedding Error (Token budget exceeded or connection failed): {e}")
             raise e
+        finally:
+            # Whatever was paid for is kept, even if a later batch failed.
+            self._store_embeddings(fresh)
+
+        by_key.update(fresh)
+        if pending:
+            logging.info(f"Embeddings: {len(keys) - len(pending)} cached, {len(pending)} requested "
+                         f"in {-(-len(pending) // self.EMBED_BATCH_SIZE)} call(s).")
+        return [by_key[k] for k in keys]
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embeddings([text])[0]
 
     def add_document(self, filename: str, content: str, metadata: dict) -> bool:
         """
@@ -59,6 +172,47 @@ class VectorStore:
         
         return self.add_vector(vector_data)
 
+    # PRIVACY GHOSTS: Safe placeholders for DB NOT NULL constraints
+    _SAFE_VIN_HASH    = "sha256-summitos-privacy-standard"
+    _SAFE_DRIVER_HASH = "sha256-system-autonomous-segment"
+
+    # DB Compatibility Mapping for source_type (CHECK constraint alignment)
+    _DB_SOURCE_TYPE_MAP = {
+        "Artifact": "Operations",
+        "Trip":     "Passenger",
+        "Charge":   "Operations",
+        "Ops":      "Operations",
+    }
+
+    def _row(self, canonical: CanonicalVector) -> tuple:
+        """(vector_id, source_type, timestamp_utc, vehicle_id, driver_id,
+        confidence_score, embedding_model_version, raw_text_hash,
+        source_pointer, derivation_reason, artifact_guid, embedding JSON)"""
+        return (
+            canonical.vector_id,
+            self._DB_SOURCE_TYPE_MAP.get(canonical.source_type, "Operations"),
+            canonical.timestamp_utc, self._SAFE_VIN_HASH, self._SAFE_DRIVER_HASH,
+            1.0, self.model, canonical.raw_text_hash,
+            canonical.source_pointer, canonical.derivation_reason,
+            canonical.artifact_guid,  # None for legacy vectors
+            json.dumps(canonical.embedding),
+        )
+
+    @staticmethod
+    def _index_written(written) -> None:
+        """Mirror rows this process just persisted into the local index, if
+        one is loaded. `written` is [(row, embedding)]."""
+        index = LocalVectorIndex.loaded()
+        if index is None:
+            return
+        for row, embedding in written:
+            meta = dict(zip(
+                ("vector_id", "source_type", "timestamp_utc", "vehicle_id", "driver_id",
+                 "original_confidence", "raw_text_hash", "source_pointer", "derivation_reason"),
+                row[:6] + row[7:10],
+            ))
+            index.upsert(meta, embedding)
+
     def add_vector(self, vector_data: dict) -> bool:
         """
         Validates and adds a canonical vector to the System_Vectors table.
@@ -76,10 +230,6 @@ class VectorStore:
             return False
 
         # 2. Database Merge/Insert
-        conn = self.db.get_connection()
-        if not conn: return False
-        cursor = conn.cursor()
-        
         # SQL must include all NOT NULL columns for legacy DB maintenance
         sql = """
         MERGE INTO System_Vectors AS target
@@ -99,53 +249,101 @@ class VectorStore:
                     CAST(CAST(? AS NVARCHAR(MAX)) AS VECTOR(1536)));
         """
 
-        emb_json = json.dumps(canonical.embedding)
-
-        # PRIVACY GHOSTS: Safe placeholders for DB NOT NULL constraints
-        safe_vin_hash    = "sha256-summitos-privacy-standard"
-        safe_driver_hash = "sha256-system-autonomous-segment"
-
-        # DB Compatibility Mapping for source_type (CHECK constraint alignment)
-        db_source_type_map = {
-            "Artifact": "Operations",
-            "Trip":     "Passenger",
-            "Charge":   "Operations",
-            "Ops":      "Operations",
-        }
-        db_source_type = db_source_type_map.get(canonical.source_type, "Operations")
-        artifact_guid  = canonical.artifact_guid  # None for legacy vectors
-
-        params = (
-            canonical.vector_id,
-            # UPDATE branch
-            db_source_type, canonical.timestamp_utc, safe_vin_hash, safe_driver_hash,
-            1.0, self.model, canonical.raw_text_hash,
-            canonical.source_pointer, canonical.derivation_reason, artifact_guid, emb_json,
-            # INSERT branch
-            canonical.vector_id, db_source_type, canonical.timestamp_utc,
-            safe_vin_hash, safe_driver_hash,
-            1.0, self.model, canonical.raw_text_hash,
-            canonical.source_pointer, canonical.derivation_reason, artifact_guid, emb_json,
-        )
+        row = self._row(canonical)
+        params = row + row  # source key + UPDATE branch, then INSERT branch
         
-        try:
-            cursor.execute(sql, params)
-            conn.commit()
-            logging.info(f"Modernized Canonical Vector {canonical.vector_id} securely persisted.")
-            return True
-        except Exception as e:
-            logging.error(f"System_Vectors SQL Insert Error for vector {canonical.vector_id}: {e}")
-            return False
-        finally:
-            conn.close()
+        with self.db.connection() as conn:
+            if not conn: return False
+            try:
+                conn.cursor().execute(sql, params)
+                conn.commit()
+                logging.info(f"Modernized Canonical Vector {canonical.vector_id} securely persisted.")
+                self._index_written([(row, canonical.embedding)])
+                return True
+            except Exception as e:
+                logging.error(f"System_Vectors SQL Insert Error for vector {canonical.vector_id}: {e}")
+                return False
 
-    def query_evidence_mode(self, query_text: str, n_results=5, confidence_threshold=0.40) -> List[Dict[str, Any]]:
+    def add_vectors_batch(self, vectors: List[dict]) -> int:
         """
-        Retrieve verifiable records under 'Evidence Mode'.
-        This mode strictly returns semantic matches above standard confidence without applying LLM inference smoothing.
-        Returns the raw pointers to the source data based on vector similarity.
+        Set-based add_vector for backfills and daily syncs. Missing embeddings
+        are fetched together through get_embeddings (cache first, then
+        EMBED_BATCH_SIZE texts per OpenAI call); every valid vector is then
+        written in one MERGE from a staged temp table. Vectors failing the
+        contract are skipped and logged. Returns the number persisted.
         """
-        emb = self.get_embedding(query_text)
+        if not vectors:
+            return 0
+        need = [v for v in vectors if "embedding" not in v]
+        if need:
+            embeddings = self.get_embeddings([v.get("derivation_reason", "") for v in need])
+            for v, emb in zip(need, embeddings):
+                v["embedding"] = emb
+
+        rows = {}
+        for v in vectors:
+            try:
+                canonical = CanonicalVector(**v)
+            except ValidationError as e:
+                logging.error(f"Vector Validation Failed for {v.get('vector_id')}: {e}")
+                continue
+            # last write per id wins
+            rows[canonical.vector_id] = (self._row(canonical), canonical.embedding)
+        if not rows:
+            return 0
+
+        with self.db.connection() as conn:
+            if not conn: return 0
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    CREATE TABLE #VectorStage (
+                        vector_id NVARCHAR(200) PRIMARY KEY, source_type NVARCHAR(50),
+                        timestamp_utc DATETIME2, vehicle_id NVARCHAR(100), driver_id NVARCHAR(100),
+                        confidence_score FLOAT, embedding_model_version NVARCHAR(100),
+                        raw_text_hash NVARCHAR(64), source_pointer NVARCHAR(MAX),
+                        derivation_reason NVARCHAR(MAX), artifact_guid NVARCHAR(100),
+                        embedding NVARCHAR(MAX)
+                    )
+                """)
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    "INSERT INTO #VectorStage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row, _ in rows.values()],
+                )
+                cursor.execute("""
+                    MERGE INTO System_Vectors AS target
+                    USING #VectorStage AS source
+                    ON (target.vector_id = source.vector_id)
+                    WHEN MATCHED THEN
+                        UPDATE SET
+                            source_type=source.source_type, timestamp_utc=source.timestamp_utc,
+                            vehicle_id=source.vehicle_id, driver_id=source.driver_id,
+                            confidence_score=source.confidence_score,
+                            embedding_model_version=source.embedding_model_version,
+                            raw_text_hash=source.raw_text_hash, source_pointer=source.source_pointer,
+                            derivation_reason=source.derivation_reason, artifact_guid=source.artifact_guid,
+                            embedding=CAST(source.embedding AS VECTOR(1536))
+                    WHEN NOT MATCHED THEN
+                        INSERT (vector_id, source_type, timestamp_utc, vehicle_id, driver_id,
+                                confidence_score, embedding_model_version, raw_text_hash,
+                                source_pointer, derivation_reason, artifact_guid, embedding)
+                        VALUES (source.vector_id, source.source_type, source.timestamp_utc,
+                                source.vehicle_id, source.driver_id, source.confidence_score,
+                                source.embedding_model_version, source.raw_text_hash,
+                                source.source_pointer, source.derivation_reason,
+                                source.artifact_guid, CAST(source.embedding AS VECTOR(1536)));
+                """)
+                cursor.execute("DROP TABLE #VectorStage")
+                conn.commit()
+                logging.info(f"Persisted {len(rows)} canonical vector(s) in one batch.")
+                self._index_written(rows.values())
+                return len(rows)
+            except Exception as e:
+                logging.error(f"System_Vectors batch MERGE failed ({len(rows)} vectors): {e}")
+                return 0
+
+    def _query_evidence_sql(self, emb: List[float], n_results: int, confidence_threshold: float) -> List[Dict[str, Any]]:
         emb_json = json.dumps(emb)
         
         # We calculate confidence as (1.0 - Distance). Distance 0 means identical.
@@ -163,7 +361,24 @@ class VectorStore:
         """
         
         results = self.db.execute_query_params(sql, (n_results, emb_json, emb_json, max_dist))
-        
+        return results
+
+    def query_evidence_mode(self, query_text: str, n_results=5, confidence_threshold=0.40) -> List[Dict[str, Any]]:
+        """
+        Retrieve verifiable records under 'Evidence Mode'.
+        This mode strictly returns semantic matches above standard confidence without applying LLM inference smoothing.
+        Returns the raw pointers to the source data based on vector similarity.
+        """
+        emb = self.get_embedding(query_text)
+
+        # In-process index (services/vector_index.py) when enabled and loaded;
+        # same rows, same confidence, no full scan of System_Vectors.
+        index = LocalVectorIndex.get(self.db)
+        if index is not None:
+            results = index.search(emb, n_results, confidence_threshold)
+        else:
+            results = self._query_evidence_sql(emb, n_results, confidence_threshold)
+
         if results:
             logging.info(f"Evidence Mode Retrieved {len(results)} exact matches exceeding {confidence_threshold} confidence.")
         else:
@@ -291,7 +291,7 @@ class TestGraphPayload:
         for var in ("OAUTH_TENANT_ID", "OAUTH_CLIENT_ID", "OAUTH_CLIENT_SECRET"):
             monkeypatch.setenv(var, "test-not-real")
         monkeypatch.setattr(GraphClient, "_get_token", lambda self: "t")
-        monkeypatch.setattr("services.graph.requests.post",
+        monkeypatch.setattr("services.graph.http_pool.post",
                             lambda url, headers=None, json=None, timeout=None:
                             (captured.update(json), _Resp())[1])
 
@@ -322,7 +322,7 @@ class TestGraphPayload:
         for var in ("OAUTH_TENANT_ID", "OAUTH_CLIENT_ID", "OAUTH_CLIENT_SECRET"):
             monkeypatch.setenv(var, "test-not-real")
         monkeypatch.setattr(GraphClient, "_get_token", lambda self: "t")
-        monkeypatch.setattr("services.graph.requests.post",
+        monkeypatch.setattr("services.graph.http_pool.post",
                             lambda url, headers=None, json=None, timeout=None:
                             (captured.update(json), _Resp())[1])
 
@@ -0,0 +1,105 @@
+"""
+Cached client roster (services/client_roster.py): one compiled matcher per
+process, reloaded after an INV- ride is saved or the TTL lapses, matching
+every roster name in a string in a single pass.
+"""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import client_roster  # noqa: E402
+from services.client_roster import DEFAULT_CLIENT_NAMES, ClientMatcher, get_client_matcher  # noqa: E402
+
+
+class _DB:
+    def __init__(self, names):
+        self.names = list(names)
+        self.calls = 0
+
+    def get_known_client_names(self, raise_errors=False):
+        self.calls += 1
+        return self.names
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache(monkeypatch):
+    monkeypatch.setattr(client_roster, "_cached", None)
+
+
+def test_find_takes_the_leftmost_then_longest_name():
+    m = ClientMatcher(["david", "david berezov", "ryan", "nancy"])
+    assert m.find("airport run for david berezov") == "david berezov"
+    assert m.find("nancy then ryan") == "nancy"
+    assert m.find("bryant") == "ryan"  # substring semantics, as before
+    assert m.find("nobody") is None and m.find("") is None
+    assert ClientMatcher([]).find("david") is None
+
+
+def test_names_in_reports_overlapping_names():
+    m = ClientMatcher(["jacquelyn", "jacquelyn heslep", "heslep", "lauren"])
+    assert m.names_in("jacquelyn heslep to denver") == {"jacquelyn", "jacquelyn heslep", "heslep"}
+    assert m.names_in("lauren + jacquelyn") == {"lauren", "jacquelyn"}
+    assert m.names_in("untagged") == frozenset()
+
+
+def test_classification_maps_aliases():
+    assert ClientMatcher.classification("jackie") == "Jacquelyn Heslep"
+    assert ClientMatcher.classification("David Berezov") == "David Berezov"
+    assert ClientMatcher.classification("lauren") == "Lauren"
+
+
+def test_roster_is_loaded_once_until_invalidated():
+    db = _DB(["lauren", "emerson"])
+    assert get_client_matcher(db).find("emerson home") == "emerson"
+    get_client_matcher(db)
+    assert db.calls == 1
+
+    db.names.append("priya")
+    client_roster.invalidate_client_roster()
+    assert get_client_matcher(db).find("priya") == "priya"
+    assert db.calls == 2
+
+
+def test_expired_roster_is_reloaded(monkeypatch):
+    db = _DB(["lauren"])
+    get_client_matcher(db)
+    monkeypatch.setattr(client_roster, "_cached_at", client_roster._cached_at - client_roster.CLIENT_ROSTER_TTL_SEC)
+    get_client_matcher(db)
+    assert db.calls == 2
+
+
+def test_unreadable_roster_falls_back_to_defaults_uncached():
+    class _Broken:
+        def get_known_client_names(self, raise_errors=False):
+            raise RuntimeError("pyodbc unavailable")
+
+    assert get_client_matcher(_Broken()).names == frozenset(DEFAULT_CLIENT_NAMES)
+    assert client_roster._cached is None
+
+
+def test_database_outage_is_retried_not_cached_as_the_roster():
+    from services.database import DatabaseClient
+
+    class _Cursor:
+        def execute(self, sql):
+            pass
+
+        def fetchall(self):
+            return [("INV-Priya-0602",)]
+
+    conn = types.SimpleNamespace(cursor=_Cursor, close=lambda: None)
+    db = DatabaseClient()
+    db.get_connection = lambda: None
+    assert get_client_matcher(db).find("priya") is None
+    assert client_roster._cached is None
+
+    db.get_connection = lambda: conn
+    assert get_client_matcher(db).find("airport for priya") == "priya"
+    assert client_roster._cached is not None
@@ -0,0 +1,102 @@
+"""
+Cold start of function_app.py (api/lazy_routes.py).
+
+With LAZY_BLUEPRINTS=1 plain HTTP blueprints are registered from
+api/route_manifest.json and imported on first request. The manifest must
+match the decorators, a deferred route must import its module on first call,
+and a fresh interpreter must import function_app within COLD_START_BUDGET_MS
+without loading the heavy SDKs.
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import types
+
+import azure.functions as func
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND)
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from api import lazy_routes  # noqa: E402
+
+COLD_START_BUDGET_MS = float(os.environ.get("COLD_START_BUDGET_MS", "1000"))
+HEAVY_MODULES = ("openai", "stripe", "googlemaps", "azure.ai.vision", "pywebpush")
+
+
+def test_manifest_matches_blueprint_decorators():
+    import function_app
+
+    assert lazy_routes.build_manifest(function_app.blueprints) == lazy_routes.load_manifest(), \
+        "api/route_manifest.json is stale: run python scripts/build_route_manifest.py"
+
+
+def _request(route):
+    return func.HttpRequest(method="GET", url=f"/api/{route}", body=b"")
+
+
+def test_deferred_route_imports_its_module_on_first_request(tmp_path, monkeypatch):
+    (tmp_path / "lazy_demo_bp.py").write_text(textwrap.dedent("""
+        import azure.functions as func
+        bp = func.Blueprint()
+
+        @bp.route(route="demo/hello", methods=["GET"])
+        def demo_hello(req: func.HttpRequest) -> func.HttpResponse:
+            return func.HttpResponse("hello")
+    """))
+    (tmp_path / "lazy_broken_bp.py").write_text("raise ImportError('no SDK')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    manifest = {
+        "lazy_demo_bp": {"lazy": True, "routes": [
+            {"name": "demo_hello", "route": "demo/hello", "methods": ["GET"], "auth_level": None}]},
+        "lazy_broken_bp": {"lazy": True, "routes": [
+            {"name": "broken", "route": "demo/broken", "methods": ["GET"], "auth_level": "FUNCTION"}]},
+        "lazy_timer_bp": {"lazy": False, "reason": "tick: timerTrigger"},
+    }
+
+    app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+    deferred = lazy_routes.register_deferred(app, ["lazy_demo_bp", "lazy_broken_bp", "lazy_timer_bp"], manifest)
+    assert deferred == ["lazy_demo_bp", "lazy_broken_bp"]
+    assert "lazy_demo_bp" not in sys.modules
+
+    functions = {f.get_function_name(): f for f in app.get_functions()}
+    trigger = json.loads(functions["broken"].get_function_json())["bindings"][0]
+    assert (trigger["route"], trigger["authLevel"]) == ("demo/broken", "FUNCTION")
+
+    resp = functions["demo_hello"].get_user_function()(_request("demo/hello"))
+    assert resp.get_body() == b"hello" and "lazy_demo_bp" in sys.modules
+    assert "lazy_demo_bp" in lazy_routes.import_timings()
+
+    resp = functions["broken"].get_user_function()(_request("demo/broken"))
+    assert resp.status_code == 500 and "no SDK" in resp.get_body().decode()
+
+
+def test_lazy_cold_start_stays_within_budget():
+    probe = textwrap.dedent(f"""
+        import json, sys, time, types
+        sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+        t0 = time.perf_counter()
+        import function_app
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(json.dumps({{
+            "ms": elapsed,
+            "functions": sorted(f.get_function_name() for f in function_app.app.get_functions()),
+            "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+            "logs": [l for l in function_app.registration_logs if l.startswith("ERROR")],
+        }}))
+    """)
+    env = dict(os.environ, LAZY_BLUEPRINTS="1")
+    out = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, timeout=120)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["logs"] == []
+    assert result["heavy"] == []
+    routes = [r["name"] for entry in lazy_routes.load_manifest().values() if entry["lazy"] for r in entry["routes"]]
+    assert set(routes) <= set(result["functions"])
+    assert result["ms"] < COLD_START_BUDGET_MS, \
+        f"cold-start import took {result['ms']:.0f} ms (budget {COLD_START_BUDGET_MS:.0f} ms)"
@@ -0,0 +1,260 @@
+"""
+Incrementally maintained daily rollup (Rides.DailyRollup).
+
+The rollup is only worth having if it is never wrong: every writer has to mark
+both the day a row left and the day it landed on, a refresh has to touch only
+dirty days, and a write that commits mid-refresh must leave its day dirty
+rather than be silently absorbed into a stale total.
+"""
+import datetime
+import os
+import sys
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.database import DatabaseClient  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, dirty=None, fail_on=None):
+        self.executed = []
+        self.many = []
+        self.fast_executemany = False
+        self._dirty = dirty or []
+        self._pending = []
+        self._fail_on = fail_on
+        self.description = None
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        flat = " ".join(sql.split())
+        self.executed.append((flat, params))
+        if self._fail_on and self._fail_on in flat:
+            raise RuntimeError("simulated failure")
+        if flat.startswith("SELECT RollupDate, DirtyVersion"):
+            self._pending = list(self._dirty)
+
+    def executemany(self, sql, rows):
+        self.many.append((" ".join(sql.split()), list(rows)))
+
+    def fetchall(self):
+        rows, self._pending = self._pending, []
+        return rows
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.committed += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _db(cursor):
+    DatabaseClient._rollup_table_ready = True
+    db = DatabaseClient()
+    conn = _Conn(cursor)
+    db.get_connection = lambda: conn
+    return db, conn
+
+
+def _kinds(cursor):
+    out = []
+    for sql, _ in cursor.executed:
+        if sql.startswith("MERGE INTO Rides.DailyRollup"):
+            out.append("mark" if "HOLDLOCK" in sql else "refresh")
+        elif sql.startswith("MERGE INTO Rides.Rides"):
+            out.append("ride")
+    return out
+
+
+def test_save_trip_marks_the_old_and_new_day_around_the_write():
+    cur = _Cursor()
+    db, conn = _db(cur)
+    db.save_trip({"RideID": "TRIP-1", "Timestamp_Start": "2026-06-02 08:00:00"})
+    assert _kinds(cur) == ["mark", "ride", "mark"]
+    assert conn.committed == 1
+
+
+def test_bulk_save_marks_staged_days_in_the_same_transaction():
+    cur = _Cursor()
+    db, conn = _db(cur)
+    db.save_trips_bulk([{"RideID": f"TRIP-{i}", "Timestamp_Start": "2026-06-02 08:00:00"}
+                        for i in range(3)])
+    assert _kinds(cur) == ["mark", "ride", "mark"]
+    marks = [s for s, _ in cur.executed if s.startswith("MERGE INTO Rides.DailyRollup")]
+    assert all("JOIN #TripStage" in m for m in marks)
+    assert conn.committed == 1
+
+
+def test_expense_charge_and_payment_writers_mark_their_days():
+    for call, table in (
+        (lambda db: db.save_manual_expense({"id": "E1", "category": "Food", "amount": 9}), "ManualExpenses"),
+        (lambda db: db.save_charge({"session_id": "C1", "cost": 4}), "ChargingSessions"),
+        (lambda db: db.upsert_private_payments([{"id": "P1", "date": "2026-06-02"}]), "PrivatePayments"),
+        (lambda db: db.soft_delete_private_payment("P1"), "PrivatePayments"),
+    ):
+        cur = _Cursor()
+        db, _ = _db(cur)
+        call(db)
+        marks = [s for s, _ in cur.executed if s.startswith("MERGE INTO Rides.DailyRollup")]
+        assert marks and all(f"FROM Rides.{table}" in m for m in marks), table
+
+
+def test_a_failed_mark_never_fails_the_write():
+    cur = _Cursor(fail_on="MERGE INTO Rides.DailyRollup")
+    db, conn = _db(cur)
+    db.save_trip({"RideID": "TRIP-1", "Timestamp_Start": "2026-06-02 08:00:00"})
+    assert "ride" in _kinds(cur)
+    assert conn.committed == 1
+
+
+def test_refresh_with_nothing_dirty_does_no_work():
+    cur = _Cursor()
+    db, _ = _db(cur)
+    assert db.refresh_daily_rollup("2026-06-01", "2026-06-30") == 0
+    assert "refresh" not in _kinds(cur)
+    assert cur.many == []
+
+
+def test_refresh_recomputes_only_dirty_days_and_guards_on_version():
+    dirty = [(datetime.date(2026, 6, 2), 3), (datetime.date(2026, 6, 9), 1)]
+    cur = _Cursor(dirty=dirty)
+    db, conn = _db(cur)
+
+    assert db.refresh_daily_rollup("2026-06-01", "2026-06-30") == 2
+
+    (sql, rows), = cur.many
+    assert sql.startswith("INSERT INTO #RollupDays")
+    assert rows == dirty
+    refresh, = [(s, p) for s, p in cur.executed if s.startswith("WITH Ops AS")]
+    assert "MERGE INTO Rides.DailyRollup" in refresh[0]
+    assert "CASE WHEN target.DirtyVersion = source.SeenVersion THEN 0 ELSE 1 END" in refresh[0]
+    # The source scans are bounded by the dirty span, not the requested range.
+    assert refresh[1] == (dirty[0][0], dirty[1][0]) * 3
+    assert conn.committed >= 1
+
+
+def test_daily_metrics_read_the_rollup_after_refreshing_the_range():
+    cur = _Cursor()
+    db, _ = _db(cur)
+    seen = []
+    db.execute_query_params = lambda q, p: seen.append((" ".join(q.split()), p)) or []
+
+    db.get_daily_metrics("2026-06-01", "2026-06-07")
+
+    dirty_scan = next(p for s, p in cur.executed if s.startswith("SELECT RollupDate, DirtyVersion"))
+    assert dirty_scan == ["2026-06-01", "2026-06-07"]
+    (query, params), = seen
+    assert "FROM Rides.DailyRollup" in query and "Rides.Rides" not in query
+    assert params == ("2026-06-01", "2026-06-07")
+
+
+class _CachedOcr:
+    """OCR cache holding one already-parsed Uber receipt, so the scan below
+    goes straight to the TRIP-* writes without Graph, OCR or the vision model."""
+
+    def get_many(self, item_ids):
+        return {i: {"version": "c1", "sha256": "ab", "text": "Your earnings $18.50",
+                    "card": {"is_uber_receipt": True, "you_earned": 18.5, "rider_payment": 25.0}}
+                for i in item_ids}
+
+    def get_by_hash(self, sha256):
+        return None
+
+    def put(self, *args):
+        pass
+
+
+def test_scan_and_number_trips_marks_the_trip_day_around_its_writes():
+    from services.cloud_watcher import CloudWatcherService
+
+    cur = _Cursor()
+    db, conn = _db(cur)
+    svc = CloudWatcherService.__new__(CloudWatcherService)
+    svc.db = db
+    svc.ocr_cache = _CachedOcr()
+    svc._delta = None
+    svc.graph = types.SimpleNamespace(
+        list_folder_files=lambda path: [{"id": "A", "name": "Screenshot_1.jpg", "cTag": "c1"}])
+    svc.uber = types.SimpleNamespace(_parse_timestamp_from_text=lambda text: None)
+
+    result = svc.scan_and_number_trips("2026-06-02", explicit_path="Uber Driver/x")
+    assert result["trip_count"] == 1 and conn.committed == 1
+
+    trip_marks = [i for i, (s, p) in enumerate(cur.executed)
+                  if s.startswith("MERGE INTO Rides.DailyRollup") and p == ("TRIP-20260602-%",)]
+    soft_delete = next(i for i, (s, _) in enumerate(cur.executed) if s.startswith("UPDATE Rides.Rides SET DeletedAt"))
+    merge = next(i for i, (s, _) in enumerate(cur.executed) if s.startswith("MERGE Rides.Rides"))
+    assert trip_marks[0] < soft_delete and trip_marks[-1] > merge
+
+
+class _ExpenseCursor(_Cursor):
+    """Cursor whose EXP-* lookup finds last scan's rows, so a rescan deletes them."""
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if self.executed[-1][0].startswith("SELECT ExpenseID FROM Rides.ManualExpenses"):
+            self._pending = [("EXP-20260602-01",), ("EXP-20260602-02",)]
+
+
+def test_expense_rescan_marks_the_deleted_rows_own_days(monkeypatch):
+    import json
+    import openai
+    from services import artifact_registry, vector_store
+    from services.cloud_watcher import CloudWatcherService
+
+    receipt = json.dumps({"is_expense_receipt": True, "merchant": "Shell", "amount": 40.0,
+                          "category": "Fuel_Receipt", "date_time": "2026-06-02 09:15:00", "items": []})
+    reply = types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=receipt))])
+
+    class _OpenAI:
+        def __init__(self, **kwargs):
+            self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=lambda **kw: reply))
+
+    class _Registry:
+        def register(self, **kwargs):
+            return "0" * 32
+
+        def pointer(self, guid):
+            return f"artifact://{guid}"
+
+    monkeypatch.setattr(openai, "OpenAI", _OpenAI)
+    monkeypatch.setattr(artifact_registry, "ArtifactRegistry", _Registry)
+    monkeypatch.setattr(vector_store, "VectorStore", lambda: types.SimpleNamespace(add_vector=lambda data: True))
+
+    cur = _ExpenseCursor()
+    db, _ = _db(cur)
+    svc = CloudWatcherService.__new__(CloudWatcherService)
+    svc.db = db
+    svc._list_folder = lambda path, logs: [{"id": "R1", "name": "receipt.jpg"}]
+    svc.graph = types.SimpleNamespace(get_file_content=lambda item_id: b"jpeg")
+
+    result = svc.scan_and_log_expenses("2026-06-02", explicit_path="Uber Driver/x")
+    assert result["success"] and len(result["expenses"]) == 1
+
+    delete = next(i for i, (s, _) in enumerate(cur.executed) if s.startswith("DELETE FROM Rides.ManualExpenses"))
+    old_days = [i for i, (s, p) in enumerate(cur.executed)
+                if s.startswith("MERGE INTO Rides.DailyRollup") and "FROM Rides.ManualExpenses WHERE ExpenseID LIKE ?" in s]
+    assert old_days and old_days[0] < delete
+    assert cur.executed[old_days[0]][1] == ("EXP-20260602-%",)
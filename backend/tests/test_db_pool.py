@@ -0,0 +1,231 @@
+"""
+Shared SQL connection pool.
+
+A pooled connection has to be indistinguishable from a fresh one, or reuse
+turns into cross-request bugs: one borrower's uncommitted write landing in the
+next borrower's commit, a dead socket handed to a booking write, or a slot that
+never comes back after a caller forgot to close. These tests pin those
+guarantees with a fake driver — no ODBC install needed.
+"""
+import gc
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from services.db_pool import ConnectionPool, get_pool, pool_metrics, reset_pools
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        if self.conn.dead:
+            raise RuntimeError("Communication link failure")
+        self.conn.executed.append(sql)
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.closed = True
+
+
+class _Raw:
+    def __init__(self, n):
+        self.n = n
+        self.dead = False
+        self.closed = False
+        self.autocommit = False
+        self.rollbacks = 0
+        self.commits = 0
+        self.executed = []
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        if self.dead:
+            raise RuntimeError("Communication link failure")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class _Factory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        raw = _Raw(len(self.made))
+        self.made.append(raw)
+        return raw
+
+
+def _pool(**kw):
+    factory = _Factory()
+    opts = dict(min_size=0, max_size=2, borrow_timeout=0.2,
+                idle_timeout=300, validate_after=300, max_lifetime=3600)
+    opts.update(kw)
+    return ConnectionPool(factory, **opts), factory
+
+
+def test_close_returns_the_connection_for_reuse():
+    pool, factory = _pool()
+    conn = pool.borrow()
+    conn.close()
+    again = pool.borrow()
+    assert len(factory.made) == 1
+    assert again._entry.raw is factory.made[0]
+    assert pool.metrics()["opened"] == 1
+
+
+def test_release_rolls_back_uncommitted_work_and_closes_cursors():
+    pool, factory = _pool()
+    conn = pool.borrow()
+    cur = conn.cursor()
+    cur.execute("UPDATE Rides.Rides SET Fare = 0")
+    conn.autocommit = True
+    conn.close()
+    raw = factory.made[0]
+    assert raw.rollbacks == 1
+    assert cur.closed
+    assert raw.autocommit is False
+
+
+def test_attribute_writes_reach_the_driver():
+    pool, factory = _pool()
+    conn = pool.borrow()
+    conn.autocommit = True
+    assert factory.made[0].autocommit is True
+    conn.close()
+
+
+def test_using_a_returned_connection_fails_loudly():
+    pool, _ = _pool()
+    conn = pool.borrow()
+    conn.close()
+    conn.close()  # idempotent
+    with pytest.raises(RuntimeError):
+        conn.cursor()
+
+
+def test_borrow_times_out_to_none_when_exhausted():
+    pool, _ = _pool(max_size=1, borrow_timeout=0.05)
+    held = pool.borrow()
+    assert pool.borrow() is None
+    assert pool.metrics()["timeouts"] == 1
+    held.close()
+    assert pool.borrow() is not None
+
+
+def test_waiting_borrower_gets_the_released_connection():
+    pool, factory = _pool(max_size=1, borrow_timeout=2)
+    held = pool.borrow()
+    got = {}
+
+    def waiter():
+        got["conn"] = pool.borrow()
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.05)
+    held.close()
+    t.join(2)
+    assert got["conn"] is not None
+    assert len(factory.made) == 1
+    assert pool.metrics()["borrow_wait_ms_max"] > 0
+
+
+def test_stale_connection_failing_the_health_check_is_replaced():
+    pool, factory = _pool(validate_after=0)
+    conn = pool.borrow()
+    conn.close()
+    factory.made[0].dead = True
+    conn = pool.borrow()
+    assert conn._entry.raw is factory.made[1]
+    assert factory.made[0].closed
+    assert pool.metrics()["reconnects"] == 1
+
+
+def test_connections_are_recycled_after_max_lifetime():
+    # Managed-identity tokens are fetched at connect time; recycling is what
+    # picks up a fresh one.
+    pool, factory = _pool(max_lifetime=0)
+    pool.borrow().close()
+    pool.borrow().close()
+    assert len(factory.made) == 2
+    assert factory.made[0].closed
+    assert pool.metrics()["reconnects"] == 1
+
+
+def test_idle_connections_above_min_size_are_evicted():
+    pool, factory = _pool(idle_timeout=0, min_size=0)
+    pool.borrow().close()
+    pool.borrow().close()
+    assert factory.made[0].closed
+    assert pool.metrics()["evicted_idle"] >= 1
+
+
+def test_min_size_floor_survives_idle_eviction():
+    pool, factory = _pool(idle_timeout=0, min_size=1)
+    pool.borrow().close()
+    pool.borrow().close()
+    assert len(factory.made) == 1
+    assert not factory.made[0].closed
+
+
+def test_connection_broken_on_release_is_discarded():
+    pool, factory = _pool()
+    conn = pool.borrow()
+    factory.made[0].dead = True
+    conn.close()
+    assert factory.made[0].closed
+    m = pool.metrics()
+    assert m["live"] == 0 and m["discarded"] == 1
+
+
+def test_unclosed_connection_releases_its_slot_when_collected():
+    pool, factory = _pool(max_size=1, borrow_timeout=0.05)
+    conn = pool.borrow()
+    del conn
+    gc.collect()
+    assert pool.borrow() is not None
+    assert factory.made[0].closed  # discarded, not reused: state unknown
+
+
+def test_connect_failure_frees_the_reserved_slot():
+    pool = ConnectionPool(lambda: None, min_size=0, max_size=1, borrow_timeout=0.05)
+    assert pool.borrow() is None
+    m = pool.metrics()
+    assert m["live"] == 0 and m["connect_failures"] == 1 and m["timeouts"] == 0
+
+
+def test_context_manager_always_releases():
+    pool, _ = _pool(max_size=1, borrow_timeout=0.05)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            assert conn is not None
+            raise ValueError("boom")
+    assert pool.metrics()["in_use"] == 0
+
+
+def test_get_pool_is_process_wide_and_reported_in_metrics():
+    reset_pools()
+    try:
+        a = get_pool("k", _Factory(), name="sql")
+        b = get_pool("k", _Factory(), name="other")
+        assert a is b
+        assert [m["name"] for m in pool_metrics()] == ["sql"]
+    finally:
+        reset_pools()
@@ -0,0 +1,155 @@
+"""
+Embedding cache and batched ingestion in VectorStore.
+
+Re-running a day's sync must not re-embed summaries already embedded,
+duplicates within a batch are embedded once, a backfill sends many texts per
+OpenAI request, and add_vectors_batch writes every vector in one MERGE.
+"""
+import json
+import os
+import sys
+import types
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.vector_store import VectorStore  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+        self.fast_executemany = False
+
+    def execute(self, sql, params=()):
+        self.db.statements.append(sql)
+        if "FROM Rides.EmbeddingCache" in sql:
+            model, keys = params[0], params[1:]
+            self._rows = [(k, self.db.cache[(model, k)]) for k in keys if (model, k) in self.db.cache]
+        elif "MERGE INTO Rides.EmbeddingCache" in sql:
+            for k, emb in self.db.staged:
+                self.db.cache.setdefault((params[0], k), emb)
+        elif "MERGE INTO System_Vectors" in sql and "#VectorStage" in sql:
+            self.db.merged.extend(self.db.staged)
+
+    def executemany(self, sql, rows):
+        self.db.staged = list(rows)
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return _Cursor(self.db)
+
+    def commit(self):
+        pass
+
+
+class _Db:
+    def __init__(self):
+        self.cache = {}
+        self.staged = []
+        self.merged = []
+        self.statements = []
+
+    @contextmanager
+    def connection(self):
+        yield _Conn(self)
+
+
+class _Embeddings:
+    def __init__(self):
+        self.requests = []
+
+    def create(self, input, model):
+        self.requests.append(list(input))
+        data = [types.SimpleNamespace(index=i, embedding=[float(len(t))] * 1536) for i, t in enumerate(input)]
+        # The API does not promise response order; callers must use .index.
+        return types.SimpleNamespace(data=list(reversed(data)))
+
+
+def _store(db=None):
+    vs = VectorStore.__new__(VectorStore)
+    vs.model = "text-embedding-3-small"
+    vs.db = db or _Db()
+    vs.openai_client = types.SimpleNamespace(embeddings=_Embeddings())
+    VectorStore._embedding_cache_ready = False
+    return vs
+
+
+def _vector(i, text):
+    return {
+        "vector_id": f"V-TESSIE-{i}",
+        "source_type": "Trip",
+        "timestamp_utc": datetime(2026, 6, 1, 12, 0),
+        "raw_text_hash": "a" * 64,
+        "source_pointer": f"artifact://{i}",
+        "derivation_reason": text,
+    }
+
+
+def test_embeddings_are_cached_by_model_and_text():
+    vs = _store()
+    first = vs.get_embeddings(["drive one", "drive\ntwo", "drive one"])
+    assert vs.openai_client.embeddings.requests == [["drive one", "drive two"]]
+    assert first[0] == first[2] and first[1] == [9.0] * 1536
+
+    again = vs.get_embedding("drive one")
+    assert again == first[0]
+    assert len(vs.openai_client.embeddings.requests) == 1
+
+    # A different model never reuses another model's vectors.
+    vs.model = "text-embedding-3-large"
+    vs.get_embedding("drive one")
+    assert len(vs.openai_client.embeddings.requests) == 2
+
+
+def test_backfill_batches_texts_per_request():
+    vs = _store()
+    vs.EMBED_BATCH_SIZE = 4
+    texts = [f"drive {i}" for i in range(10)]
+    out = vs.get_embeddings(texts)
+    assert [len(r) for r in vs.openai_client.embeddings.requests] == [4, 4, 2]
+    assert len(out) == 10
+
+
+def test_cache_failure_falls_back_to_openai():
+    vs = _store()
+
+    @contextmanager
+    def broken():
+        raise RuntimeError("db down")
+        yield  # pragma: no cover
+
+    vs.db.connection = broken
+    assert vs.get_embedding("drive one") == [9.0] * 1536
+
+
+def test_add_vectors_batch_writes_one_merge_and_skips_invalid():
+    db = _Db()
+    vs = _store(db)
+    vectors = [_vector(i, f"summary {i}") for i in range(3)]
+    bad = _vector(9, "summary bad")
+    bad["source_type"] = "Unknown"
+    assert vs.add_vectors_batch(vectors + [bad]) == 3
+
+    assert len(vs.openai_client.embeddings.requests) == 1
+    merges = [s for s in db.statements if "MERGE INTO System_Vectors" in s]
+    assert len(merges) == 1
+    assert [r[0] for r in db.merged] == ["V-TESSIE-0", "V-TESSIE-1", "V-TESSIE-2"]
+    assert db.merged[0][1] == "Passenger"
+    assert json.loads(db.merged[0][-1]) == [9.0] * 1536
+
+    # Re-running the same day costs no embedding calls.
+    vs.add_vectors_batch([_vector(i, f"summary {i}") for i in range(3)])
+    assert len(vs.openai_client.embeddings.requests) == 1
@@ -0,0 +1,146 @@
+"""
+Reverse-geocode cache (services/geocode_cache.py): drives ending at the same
+curb share one Nominatim lookup, misses respect the provider's rate limit,
+and dbo.Location_Intelligence addresses can seed the table.
+"""
+import os
+import sys
+import types
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import geocode_cache  # noqa: E402
+from services.geocode_cache import ReverseGeocodeCache, geohash  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = -1
+        self._rows = []
+        self.fast_executemany = False
+
+    def execute(self, sql, params=()):
+        if "SELECT Address FROM Rides.GeocodeCache" in sql:
+            hit = self.db.table.get(params[0])
+            self._rows = [(hit,)] if hit else []
+        elif "FROM dbo.Location_Intelligence" in sql:
+            self._rows = list(self.db.location_intelligence)
+        elif "USING (SELECT ? AS Geohash)" in sql:
+            self.db.table.setdefault(params[1], params[2])
+        elif "USING #GeocodeSeed" in sql:
+            new = {k: v for k, v in self.db.seed if k not in self.db.table}
+            self.db.table.update(new)
+            self.rowcount = len(new)
+
+    def executemany(self, sql, rows):
+        self.db.seed = rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return _Cursor(self.db)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Db:
+    def __init__(self):
+        self.table = {}
+        self.location_intelligence = []
+        self.seed = []
+
+    def get_connection(self):
+        return _Conn(self)
+
+
+class _Provider:
+    def __init__(self, answer="Peña Blvd, Denver"):
+        self.calls = []
+        self.answer = answer
+
+    def __call__(self, lat, lon):
+        self.calls.append((lat, lon))
+        return self.answer
+
+
+DIA = (39.849312, -104.673828)
+# ~5 m away from DIA: same ~30 m cell.
+DIA_NEARBY = (39.849340, -104.673850)
+
+
+def test_nearby_coordinates_share_a_cell():
+    assert geohash(*DIA) == geohash(*DIA_NEARBY)
+    assert geohash(*DIA) != geohash(39.7392, -104.9903)
+    assert len(geohash(*DIA)) == geocode_cache.GEOHASH_PRECISION
+    # Reference value for the encoder.
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_repeat_lookups_hit_the_lru_then_sql_without_the_provider():
+    db, provider = _Db(), _Provider()
+    cache = ReverseGeocodeCache(db=db, fetch=provider)
+    with patch.object(geocode_cache.time, "sleep"):
+        assert cache.resolve(*DIA) == "Peña Blvd, Denver"
+        assert cache.resolve(*DIA_NEARBY) == "Peña Blvd, Denver"
+    assert len(provider.calls) == 1 and cache.stats["lru"] == 1
+
+    # A fresh process (empty LRU) reads the persisted row.
+    other = ReverseGeocodeCache(db=db, fetch=provider)
+    assert other.resolve(*DIA_NEARBY) == "Peña Blvd, Denver"
+    assert len(provider.calls) == 1 and other.stats["sql"] == 1
+
+
+def test_misses_are_throttled_to_the_provider_rate():
+    db, provider = _Db(), _Provider()
+    cache = ReverseGeocodeCache(db=db, fetch=provider)
+    sleeps = []
+    clock = iter(range(100, 200))
+    with patch.object(geocode_cache.time, "sleep", sleeps.append), \
+         patch.object(geocode_cache.time, "monotonic", lambda: next(clock) * 0.1):
+        cache.resolve(*DIA)
+        cache.resolve(39.7392, -104.9903)
+    assert len(provider.calls) == 2
+    assert sleeps and all(0 < s <= geocode_cache.MIN_INTERVAL_SEC for s in sleeps)
+
+
+def test_failed_lookups_are_not_cached():
+    db, provider = _Db(), _Provider(answer=None)
+    cache = ReverseGeocodeCache(db=db, fetch=provider)
+    with patch.object(geocode_cache.time, "sleep"):
+        assert cache.resolve(*DIA) is None
+        provider.answer = "Peña Blvd, Denver"
+        assert cache.resolve(*DIA) == "Peña Blvd, Denver"
+    assert len(provider.calls) == 2 and db.table
+
+
+def test_prewarm_seeds_cells_from_location_intelligence():
+    db, provider = _Db(), _Provider()
+    db.location_intelligence = [
+        (DIA[0], DIA[1], "DEN Arrivals Level 5"),
+        (DIA_NEARBY[0], DIA_NEARBY[1], "DEN Arrivals (less frequent)"),
+        (39.7392, -104.9903, "Civic Center"),
+    ]
+    cache = ReverseGeocodeCache(db=db, fetch=provider)
+    assert cache.prewarm_from_location_intelligence() == 2
+    assert cache.resolve(*DIA_NEARBY) == "DEN Arrivals Level 5"
+    assert provider.calls == []
+    # Re-running adds nothing.
+    assert cache.prewarm_from_location_intelligence() == 0
@@ -0,0 +1,90 @@
+"""
+Shared Graph token cache (services/graph_token.py): one identity round trip
+per app registration until the token nears expiry, refreshed ahead of time.
+"""
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services import graph_token  # noqa: E402
+from services.graph_token import TokenCache  # noqa: E402
+
+
+class _Resp:
+    ok = True
+    status_code = 200
+    text = ""
+
+    def __init__(self, token, expires_in):
+        self._body = {"access_token": token, "expires_in": expires_in}
+
+    def json(self):
+        return self._body
+
+
+class _Identity:
+    def __init__(self, expires_in=3600, delay=0.0):
+        self.calls = 0
+        self.expires_in = expires_in
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(self.delay)
+        return _Resp(f"tok-{n}", self.expires_in)
+
+
+def test_token_is_reused_until_near_expiry():
+    idp = _Identity()
+    cache = TokenCache()
+    with patch.object(graph_token.requests, "post", idp.post):
+        assert [cache.get("t", "c", "s") for _ in range(40)] == ["tok-1"] * 40
+        # A different app registration gets its own token.
+        assert cache.get("t", "other", "s") == "tok-2"
+    assert idp.calls == 2
+
+
+def test_concurrent_cold_callers_share_one_fetch():
+    idp = _Identity(delay=0.05)
+    cache = TokenCache()
+    results = []
+    with patch.object(graph_token.requests, "post", idp.post):
+        threads = [threading.Thread(target=lambda: results.append(cache.get("t", "c", "s"))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert idp.calls == 1 and results == ["tok-1"] * 4
+
+
+def test_token_inside_refresh_window_is_served_while_refreshing():
+    idp = _Identity(expires_in=graph_token.REFRESH_AHEAD_S - 60)
+    cache = TokenCache()
+    with patch.object(graph_token.requests, "post", idp.post):
+        assert cache.get("t", "c", "s") == "tok-1"
+        # Still valid, so the caller is not blocked; a refresh runs behind it.
+        assert cache.get("t", "c", "s") == "tok-1"
+        deadline = time.time() + 2
+        while idp.calls < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert idp.calls == 2
+
+
+def test_nearly_expired_token_is_fetched_inline_and_invalidate_forces_refetch():
+    idp = _Identity(expires_in=graph_token.EXPIRY_SKEW_S - 1)
+    cache = TokenCache()
+    with patch.object(graph_token.requests, "post", idp.post):
+        assert cache.get("t", "c", "s") == "tok-1"
+        assert cache.get("t", "c", "s") == "tok-2"
+
+        idp.expires_in = 3600
+        assert cache.get("t", "c", "s") == "tok-3"
+        cache.invalidate("t", "c")
+        assert cache.get("t", "c", "s") == "tok-4"
@@ -0,0 +1,107 @@
+"""
+Shared outbound HTTP layer (services/http_pool.py): one keep-alive session
+per host, default timeouts, bounded retries that never replay a
+non-idempotent request after the server may have acted on it, and per-host
+metrics.
+"""
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services import http_pool  # noqa: E402
+
+
+class _Resp:
+    def __init__(self, status, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+
+
+class _Session:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, timeout))
+        out = self.outcomes.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return _Resp(*out) if isinstance(out, tuple) else _Resp(out)
+
+
+@pytest.fixture
+def fake_host():
+    sleeps = []
+    http_pool.reset_metrics()
+    with patch.object(http_pool.time, "sleep", sleeps.append):
+        def install(*outcomes):
+            session = _Session(outcomes)
+            http_pool._sessions["api.example.test"] = session
+            return session
+        yield install, sleeps
+    http_pool._sessions.pop("api.example.test", None)
+    http_pool.reset_metrics()
+
+
+URL = "https://api.example.test/v1/thing"
+
+
+def test_one_session_per_host():
+    a = http_pool.session_for("https://pool-a.example.test/x")
+    assert http_pool.session_for("https://POOL-A.example.test/y") is a
+    assert http_pool.session_for("https://pool-b.example.test/x") is not a
+
+
+def test_get_retries_throttling_and_honours_retry_after(fake_host):
+    install, sleeps = fake_host
+    session = install((429, {"Retry-After": "3"}), 503, 200)
+    resp = http_pool.get(URL)
+    assert resp.status_code == 200
+    assert len(session.calls) == 3
+    assert sleeps[0] == 3.0
+    assert 0 <= sleeps[1] <= http_pool.BACKOFF_CAP_SEC
+    # No timeout from the caller: the default is applied.
+    assert session.calls[0] == ("GET", http_pool.DEFAULT_TIMEOUT)
+
+    m = http_pool.http_metrics()["api.example.test"]
+    assert m["calls"] == 3 and m["retries"] == 2
+    assert m["status"] == {"429": 1, "503": 1, "200": 1}
+
+
+def test_post_is_not_replayed_after_a_server_error(fake_host):
+    install, _ = fake_host
+    session = install(500, 200)
+    assert http_pool.post(URL, json={}, timeout=7).status_code == 500
+    assert session.calls == [("POST", 7)]
+
+
+def test_post_is_retried_when_throttled(fake_host):
+    install, _ = fake_host
+    session = install(429, 201)
+    assert http_pool.post(URL, json={}).status_code == 201
+    assert len(session.calls) == 2
+
+
+def test_retries_are_bounded_and_last_response_returned(fake_host):
+    install, _ = fake_host
+    session = install(*([503] * (http_pool.MAX_RETRIES + 5)))
+    assert http_pool.get(URL).status_code == 503
+    assert len(session.calls) == http_pool.MAX_RETRIES + 1
+
+
+def test_connection_errors_retry_idempotent_only_and_reraise(fake_host):
+    install, _ = fake_host
+    session = install(requests.exceptions.ConnectionError("reset"), 200)
+    assert http_pool.get(URL).status_code == 200
+    assert len(session.calls) == 2
+
+    install(requests.exceptions.Timeout("slow"), 200)
+    with pytest.raises(requests.exceptions.Timeout):
+        http_pool.post(URL)
+    assert http_pool.http_metrics()["api.example.test"]["errors"] == 2
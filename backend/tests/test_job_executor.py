@@ -0,0 +1,183 @@
+"""
+Bounded background-job executor (services/job_executor.py) behind
+api/operations.run_async_job: worker cap, per-group limits, joining an
+identical active job, and the queue metrics /job-status reports.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from api import operations  # noqa: E402
+from services.job_executor import JobExecutor, dedupe_key  # noqa: E402
+
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    assert cond()
+
+
+def _ids():
+    counter = iter(range(1, 100))
+    return lambda: f"job_{next(counter)}"
+
+
+def test_operation_limit_queues_without_blocking_other_operations():
+    executor = JobExecutor(workers=2, limits={"OCR": 1})
+    release = threading.Event()
+    started = []
+
+    def run(job_id, wait_ms):
+        started.append(job_id)
+        release.wait(2)
+
+    new_id = _ids()
+    for key in ("scan 06-01", "scan 06-02"):
+        executor.submit("OCR Trip Ingestion", key, new_id, run)
+    executor.submit("OneDrive Folder Sync", "folders 06-02", new_id, run)
+    executor.submit("OneDrive Folder Sync", "folders 06-03", new_id, run)
+
+    _wait_for(lambda: len(started) == 2)
+    assert sorted(started) == ["job_1", "job_3"]
+    snap = executor.snapshot("job_2")
+    assert snap["queueDepth"] == 2 and snap["running"] == 2
+    assert snap["queuedByOperation"] == {"OCR Trip Ingestion": 1, "OneDrive Folder Sync": 1}
+    assert snap["job"]["state"] == "queued" and snap["job"]["position"] == 1
+    assert snap["job"]["operationLimit"] == 1 and snap["job"]["limitGroup"] == "OCR"
+
+    release.set()
+    _wait_for(lambda: executor.snapshot()["completed"] == 4)
+    assert sorted(started) == ["job_1", "job_2", "job_3", "job_4"]
+    assert executor.snapshot()["maxWaitMs"] > 0
+
+
+def test_identical_active_job_is_joined():
+    executor = JobExecutor(workers=1)
+    release = threading.Event()
+    runs = []
+
+    def run(job_id, wait_ms):
+        runs.append(job_id)
+        release.wait(2)
+
+    new_id = _ids()
+    key = dedupe_key("OCR Trip Ingestion", ("2026-06-02",), {"explicit_path": None})
+    first = executor.submit("OCR Trip Ingestion", key, new_id, run)
+    second = executor.submit("OCR Trip Ingestion", key, new_id, run)
+    assert second == {"jobId": first["jobId"], "deduplicated": True}
+
+    release.set()
+    _wait_for(lambda: executor.snapshot()["completed"] == 1)
+    third = executor.submit("OCR Trip Ingestion", key, new_id, run)
+    assert third["deduplicated"] is False and third["jobId"] != first["jobId"]
+    _wait_for(lambda: executor.snapshot()["completed"] == 2)
+    assert runs == [first["jobId"], third["jobId"]]
+
+
+def test_ocr_operations_share_one_slot():
+    executor = JobExecutor(workers=4)
+    release = threading.Event()
+    started = []
+
+    def run(job_id, wait_ms):
+        started.append(job_id)
+        release.wait(2)
+
+    new_id = _ids()
+    for operation in ("Unified Cloud Scan", "OCR Trip Ingestion", "Expense Receipt Ingestion"):
+        executor.submit(operation, operation, new_id, run)
+    executor.submit("OneDrive Folder Sync", "folders", new_id, run)
+
+    _wait_for(lambda: len(started) == 2)
+    time.sleep(0.05)
+    assert sorted(started) == ["job_1", "job_4"]
+    assert executor.snapshot()["queuedByOperation"] == {"OCR Trip Ingestion": 1, "Expense Receipt Ingestion": 1}
+
+    release.set()
+    _wait_for(lambda: executor.snapshot()["completed"] == 4)
+    assert started[2:] == ["job_2", "job_3"]
+
+
+def test_create_job_runs_outside_the_lock_and_duplicates_wait_for_its_id():
+    executor = JobExecutor(workers=2)
+    inserting = threading.Event()
+    finish_insert = threading.Event()
+    creates = []
+
+    def slow_create():
+        creates.append(1)
+        inserting.set()
+        finish_insert.wait(2)
+        return "job_slow"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(
+        executor.submit("OCR Trip Ingestion", "scan 06-02", slow_create, lambda job_id, wait_ms: None)))
+    first.start()
+    assert inserting.wait(2)
+
+    # The insert is in flight: snapshot and unrelated submits are not blocked by it.
+    assert executor.snapshot()["queueDepth"] == 0
+    other = executor.submit("OneDrive Folder Sync", "folders", lambda: "job_other", lambda job_id, wait_ms: None)
+    assert other == {"jobId": "job_other", "deduplicated": False}
+
+    second = threading.Thread(target=lambda: results.append(
+        executor.submit("OCR Trip Ingestion", "scan 06-02", slow_create, lambda job_id, wait_ms: None)))
+    second.start()
+    time.sleep(0.05)
+    assert second.is_alive()
+
+    finish_insert.set()
+    first.join(2)
+    second.join(2)
+    assert sorted(r["deduplicated"] for r in results) == [False, True]
+    assert {r["jobId"] for r in results} == {"job_slow"} and len(creates) == 1
+
+
+def test_failed_create_job_releases_the_key():
+    executor = JobExecutor(workers=1)
+
+    def broken():
+        raise RuntimeError("insert failed")
+
+    with pytest.raises(RuntimeError):
+        executor.submit("OCR Trip Ingestion", "scan 06-02", broken, lambda job_id, wait_ms: None)
+    result = executor.submit("OCR Trip Ingestion", "scan 06-02", lambda: "job_2", lambda job_id, wait_ms: None)
+    assert result == {"jobId": "job_2", "deduplicated": False}
+
+
+def test_run_async_job_joins_a_running_scan_and_reports_queue_wait(monkeypatch):
+    executor = JobExecutor(workers=2)
+    monkeypatch.setattr(operations, "get_job_executor", lambda: executor)
+    release = threading.Event()
+
+    def scan(date_str, explicit_path=None):
+        release.wait(2)
+        return {"logs": [f"scanned {date_str}"]}
+
+    first = operations.run_async_job("OCR Trip Ingestion", scan, "2026-06-02", explicit_path=None)
+    second = operations.run_async_job("OCR Trip Ingestion", scan, "2026-06-02", explicit_path=None)
+    other_day = operations.run_async_job("OCR Trip Ingestion", scan, "2026-06-03", explicit_path=None)
+    assert second["jobId"] == first["jobId"] and second["deduplicated"] is True
+    assert other_day["jobId"] != first["jobId"] and other_day["deduplicated"] is False
+
+    req = types.SimpleNamespace(method="GET", route_params={"job_id": other_day["jobId"]}, headers={})
+    queued = json.loads(operations.get_job_status(req).get_body())
+    assert queued["status"] == "queued" and queued["queue"]["job"]["position"] == 1
+
+    release.set()
+    _wait_for(lambda: executor.snapshot()["completed"] == 2)
+    done = json.loads(operations.get_job_status(req).get_body())
+    assert done["status"] == "completed" and done["queueWaitMs"] >= 0
+    assert any("in the job queue" in line for line in done["logs"])
@@ -0,0 +1,149 @@
+"""
+Set-based Luis running-balance recompute: walk_luis_chain
+(services/payment_categorizer.py) and PaymentTrackerService._recompute_luis_chain
+reading once, diffing against stored rows and writing only what changed,
+starting from the nearest balance checkpoint.
+"""
+import datetime
+import os
+import sys
+import types
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import payment_tracker  # noqa: E402
+from services.payment_categorizer import (  # noqa: E402
+    LUIS_START_DATE, check_consecutive_missed, classify_luis_payment, walk_luis_chain,
+)
+from services.payment_tracker import LUIS_CHECKPOINT_DAYS, PaymentTrackerService  # noqa: E402
+
+
+def _day(offset):
+    return LUIS_START_DATE + datetime.timedelta(days=offset)
+
+
+class TestWalkLuisChain(unittest.TestCase):
+    def test_matches_day_by_day_classification(self):
+        sent = {_day(1).isoformat(): 190.0, _day(2).isoformat(): 130.0,
+                _day(5).isoformat(): 250.0, _day(6).isoformat(): 150.0}
+        start, end = _day(-2), _day(8)
+
+        expected, balance, tiers = [], 40.0, []
+        day = start
+        while day <= end:
+            result = classify_luis_payment(sent.get(day.isoformat(), 0.0), balance, day)
+            if result["tier"] == "Missed":
+                escalation = check_consecutive_missed(tiers[:14])
+                if escalation:
+                    result["anomaly_reason"] = escalation
+            expected.append((result["tier"], result["new_balance"], result["anomaly_reason"]))
+            tiers.insert(0, result["tier"])
+            balance = result["new_balance"]
+            day += datetime.timedelta(days=1)
+
+        walked = [(r["tier"], r["new_balance"], r["anomaly_reason"])
+                  for r in walk_luis_chain(start, end, sent, 40.0)]
+        self.assertEqual(walked, expected)
+        self.assertIn("2 consecutive", walked[-1][2])
+
+    def test_prior_streak_escalates_the_first_missed_day(self):
+        first = next(walk_luis_chain(_day(3), _day(3), {}, 0.0, prior_missed_streak=2))
+        self.assertEqual(first["anomaly_reason"],
+                         "Escalated: 3 consecutive missed Luis Canales payments")
+        self.assertEqual(first["missed_streak"], 3)
+
+
+class _FakeDB:
+    def __init__(self, state):
+        self.state = state
+        self.loads = []
+        self.saved = None
+
+    def load_luis_chain(self, start_date, end_date, lookback=14):
+        self.loads.append((start_date, end_date))
+        return self.state
+
+    def save_luis_chain(self, *rows):
+        self.saved = rows
+        return True
+
+
+class TestRecomputeLuisChain(unittest.TestCase):
+    def setUp(self):
+        self._manual = payment_tracker.is_manual_only
+        payment_tracker.is_manual_only = lambda person: False
+        self.today = datetime.date.today()
+
+    def tearDown(self):
+        payment_tracker.is_manual_only = self._manual
+
+    def _run(self, state, start_date):
+        tracker = object.__new__(PaymentTrackerService)  # bypass __init__ (no DB)
+        tracker.db = _FakeDB(state)
+        tracker._recompute_luis_chain(start_date)
+        return tracker.db
+
+    def _empty_state(self, replay_from, **overrides):
+        state = {"replay_from": replay_from, "prior_balance": 0.0, "prior_missed_streak": 0,
+                 "sent": {}, "received": {}, "log": {}, "simple": {}, "flags": {}, "checkpoints": {}}
+        state.update(overrides)
+        return state
+
+    def test_unchanged_days_are_not_written(self):
+        start = max(LUIS_START_DATE, self.today - datetime.timedelta(days=20))
+        days = [(start + datetime.timedelta(days=i)).isoformat()
+                for i in range((self.today - start).days + 1)]
+        sent = {d: 190.0 for d in days}
+        state = self._empty_state(start.isoformat(), sent=sent)
+        first = self._run(state, start.isoformat()).saved
+        self.assertEqual(len(first[0]), len(days))
+        self.assertEqual(len(first[1]), len(days))
+
+        # Store exactly what was written; a second pass has nothing to do.
+        state["log"] = {r[0]: r[1:] for r in first[0]}
+        state["simple"] = {r[0]: r[1:] for r in first[1]}
+        state["checkpoints"] = {r[0]: r[1:] for r in first[4]}
+        self.assertEqual(self._run(state, start.isoformat()).saved, ([], [], [], [], []))
+
+        # Reassigning one day's payment only rewrites the days it changes.
+        changed = days[len(days) // 2]
+        state["sent"] = dict(sent, **{changed: 0.0})
+        log_rows, simple_rows, cleared, new_flags, _ = self._run(state, changed).saved
+        self.assertEqual([r[0] for r in log_rows], days[len(days) // 2:])
+        self.assertEqual([r[0] for r in simple_rows], [changed])
+        self.assertEqual(cleared, [])
+        self.assertEqual([(f["date"], f["subcategory"]) for f in new_flags], [(changed, "Missed")])
+
+    def test_replays_from_the_checkpoint_and_writes_new_ones(self):
+        replay_from = self.today - datetime.timedelta(days=2 * LUIS_CHECKPOINT_DAYS)
+        state = self._empty_state(replay_from.isoformat(), prior_balance=60.0, prior_missed_streak=1)
+        db = self._run(state, (self.today - datetime.timedelta(days=3)).isoformat())
+        log_rows, _, _, _, checkpoints = db.saved
+        self.assertEqual(db.loads[0][1], self.today.isoformat())
+        self.assertEqual(log_rows[0][0], replay_from.isoformat())
+        self.assertEqual(log_rows[0][4], 60.0 + (190.0 if replay_from >= LUIS_START_DATE else 0.0))
+        self.assertEqual(len(checkpoints), 2)
+        for date_str, balance, streak in checkpoints:
+            self.assertEqual(datetime.date.fromisoformat(date_str).toordinal() % LUIS_CHECKPOINT_DAYS, 0)
+
+    def test_stale_summary_flag_is_cleared(self):
+        start = max(LUIS_START_DATE, self.today - datetime.timedelta(days=1))
+        d0 = start.isoformat()
+        days = [(start + datetime.timedelta(days=i)).isoformat() for i in range((self.today - start).days + 1)]
+        sent = {d: 190.0 for d in days}
+        state = self._empty_state(d0, sent=sent, flags={d0: (0.0, "Missed", "No Luis Canales payment sent today")})
+        _, _, cleared, new_flags, _ = self._run(state, d0).saved
+        self.assertEqual(cleared, [d0])
+        self.assertEqual(new_flags, [])
+
+    def test_database_unavailable_writes_nothing(self):
+        db = self._run(None, self.today.isoformat())
+        self.assertIsNone(db.saved)
+
+
+if __name__ == "__main__":
+    unittest.main()
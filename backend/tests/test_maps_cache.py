@@ -0,0 +1,113 @@
+"""
+Maps result cache behind the public pricing quote (services/maps_cache.py).
+
+A repeat quote for the same run must cost no Google calls; spelling variants
+of an address share an entry; and the endpoint's route and county lookups
+still produce the same quote.
+"""
+import json
+import os
+import sys
+import types
+from unittest.mock import patch
+
+import azure.functions as func
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import maps_cache  # noqa: E402
+from services.maps_cache import MapsCache, normalize_address  # noqa: E402
+
+
+class _NoDb:
+    def get_connection(self):
+        return None
+
+
+class _Gmaps:
+    def __init__(self, county="El Paso County"):
+        self.directions_calls = []
+        self.geocode_calls = []
+        self.county = county
+
+    def directions(self, origin, destination, waypoints, mode, region):
+        self.directions_calls.append((origin, destination, tuple(waypoints)))
+        legs = [{"distance": {"value": 16093, "text": "10 mi"},
+                 "duration": {"value": 900, "text": "15 mins"},
+                 "start_address": f"{origin}, Colorado Springs, CO, USA",
+                 "end_address": f"{destination}, Colorado Springs, CO, USA",
+                 "steps": [{"html_instructions": "not cached"}]}]
+        return [{"legs": legs, "overview_polyline": {"points": "xyz"}}]
+
+    def geocode(self, address):
+        self.geocode_calls.append(address)
+        return [{"address_components": [
+            {"long_name": self.county, "types": ["administrative_area_level_2", "political"]}]}]
+
+
+def test_normalize_address_ignores_case_spacing_and_country():
+    assert normalize_address("  7770 Milton E Proby Pkwy ,Colorado Springs, CO 80916, USA ") == \
+        normalize_address("7770 milton e proby pkwy, colorado springs, co 80916")
+    # Only a trailing country is stripped.
+    assert normalize_address("Old Stage Bus") == "old stage bus"
+
+
+def test_routes_and_counties_are_fetched_once_and_trimmed():
+    cache, gmaps = MapsCache(db=_NoDb()), _Gmaps()
+    legs = cache.route_legs(gmaps, "Home", "COS Airport", ["Stop A"])
+    again = cache.route_legs(gmaps, "home ", "cos airport", ["stop a"])
+    assert legs == again and len(gmaps.directions_calls) == 1
+    assert set(legs[0]) == {"distance", "duration", "start_address", "end_address"}
+    # Waypoints are part of the key.
+    cache.route_legs(gmaps, "Home", "COS Airport", [])
+    assert len(gmaps.directions_calls) == 2
+
+    assert cache.county_of(gmaps, "Home") == "el paso county"
+    assert cache.county_of(gmaps, "HOME") == "el paso county"
+    assert gmaps.geocode_calls == ["Home"]
+
+
+def test_failed_geocode_is_not_cached():
+    cache, gmaps = MapsCache(db=_NoDb()), _Gmaps()
+    with patch.object(gmaps, "geocode", side_effect=RuntimeError("quota")):
+        assert cache.county_of(gmaps, "Home") == ""
+    assert cache.county_of(gmaps, "Home") == "el paso county"
+
+
+def test_expired_entries_are_refetched():
+    cache, gmaps = MapsCache(db=_NoDb()), _Gmaps()
+    clock = [1000.0]
+    with patch.object(maps_cache.time, "time", lambda: clock[0]):
+        cache.county_of(gmaps, "Home")
+        clock[0] += maps_cache.COUNTY_TTL_SEC + 1
+        cache.county_of(gmaps, "Home")
+    assert len(gmaps.geocode_calls) == 2
+
+
+def _quote(body):
+    from api.pricing import quote
+    req = func.HttpRequest(method="POST", url="/api/quote",
+                           headers={"Content-Type": "application/json"},
+                           body=json.dumps(body).encode("utf-8"))
+    return json.loads(quote(req).get_body())
+
+
+def test_repeat_round_trip_quote_makes_no_google_calls(monkeypatch):
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test-not-real")
+    gmaps = _Gmaps()
+    monkeypatch.setattr("api.pricing.googlemaps.Client", lambda key: gmaps)
+    shared = MapsCache(db=_NoDb())
+    monkeypatch.setattr("api.pricing.get_maps_cache", lambda: shared)
+
+    body = {"pickup": "Home", "dropoff": "COS Airport", "tripType": "round-trip"}
+    first = _quote(body)
+    assert first["success"] is True, first
+    assert len(gmaps.directions_calls) == 2 and len(gmaps.geocode_calls) == 2
+
+    second = _quote(body)
+    assert second["quote"] == first["quote"]
+    assert len(gmaps.directions_calls) == 2 and len(gmaps.geocode_calls) == 2
+    assert first["quote"]["distance"] == 20.0
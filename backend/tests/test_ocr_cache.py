@@ -0,0 +1,168 @@
+"""
+OCR result cache in CloudWatcherService.scan_and_number_trips.
+
+A rescan of an unchanged day folder must not download, OCR or send anything
+to the vision model again; a changed file must; and a byte-identical file
+under a new tag must be recognised by its content hash.
+"""
+import json
+import os
+import sys
+import types
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.cloud_watcher import CloudWatcherService  # noqa: E402
+from services.ocr_cache import content_hash  # noqa: E402
+
+
+class _Graph:
+    def __init__(self, files, blobs):
+        self.files = files
+        self.blobs = blobs
+        self.downloads = 0
+
+    def list_folder_files(self, path):
+        return [dict(f) for f in self.files]
+
+    def get_file_content(self, item_id):
+        self.downloads += 1
+        return self.blobs[item_id]
+
+
+class _Ocr:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_image_bytes(self, content):
+        self.calls += 1
+        return "Weekly summary\nOnline 6h 15m"
+
+
+class _MemoryCache:
+    def __init__(self):
+        self.rows = {}
+
+    def get_many(self, item_ids):
+        return {i: dict(self.rows[i]) for i in item_ids if i in self.rows}
+
+    def get_by_hash(self, sha256):
+        for r in self.rows.values():
+            if r["sha256"] == sha256:
+                return dict(r)
+        return None
+
+    def put(self, item_id, version, sha256, scan_date, file_name, text, card):
+        self.rows[item_id] = {"item_id": item_id, "version": version, "sha256": sha256,
+                              "text": text, "card": card}
+
+
+class _Db:
+    def get_connection(self):
+        return None
+
+
+class _Vision:
+    def __init__(self):
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def __call__(self, api_key=None):
+        return self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        msg = types.SimpleNamespace(content=json.dumps({"is_uber_summary": True, "online_time": "6h 15m"}))
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=msg)])
+
+
+def _service(files, blobs, cache):
+    svc = CloudWatcherService.__new__(CloudWatcherService)
+    svc.graph = _Graph(files, blobs)
+    svc.uber = types.SimpleNamespace(ocr=_Ocr())
+    svc.db = _Db()
+    svc.ocr_cache = cache
+    svc._delta = None
+    return svc
+
+
+def _scan(svc, vision):
+    with patch("openai.OpenAI", vision):
+        return svc.scan_and_number_trips("2026-06-02", explicit_path="Uber Driver/x")
+
+
+def _files(tag_b="c2"):
+    return [{"id": "A", "name": "Screenshot_1.jpg", "cTag": "c1"},
+            {"id": "B", "name": "Screenshot_2.jpg", "cTag": tag_b}]
+
+
+BLOBS = {"A": b"image-a", "B": b"image-b"}
+
+
+def test_first_scan_misses_and_fills_the_cache():
+    cache, vision = _MemoryCache(), _Vision()
+    svc = _service(_files(), BLOBS, cache)
+    result = _scan(svc, vision)
+    assert "INFO: OCR cache — 0 hit(s), 2 miss(es)." in result["logs"]
+    assert svc.graph.downloads == 2 and svc.uber.ocr.calls == 2 and vision.calls == 2
+    assert cache.rows["A"]["sha256"] == content_hash(b"image-a")
+    assert cache.rows["A"]["card"]["is_uber_summary"] is True
+
+
+def test_unchanged_rescan_downloads_and_ocrs_nothing():
+    cache, vision = _MemoryCache(), _Vision()
+    _scan(_service(_files(), BLOBS, cache), vision)
+
+    svc = _service(_files(), BLOBS, cache)
+    vision.calls = 0
+    result = _scan(svc, vision)
+    assert "INFO: OCR cache — 2 hit(s), 0 miss(es)." in result["logs"]
+    assert svc.graph.downloads == 0 and svc.uber.ocr.calls == 0 and vision.calls == 0
+    assert any(line.startswith("SUMMARY: 'Screenshot_1.jpg'") for line in result["logs"])
+
+
+def test_retagged_but_identical_bytes_hit_by_content_hash():
+    cache, vision = _MemoryCache(), _Vision()
+    _scan(_service(_files(), BLOBS, cache), vision)
+
+    svc = _service(_files(tag_b="c3"), BLOBS, cache)
+    vision.calls = 0
+    result = _scan(svc, vision)
+    assert "INFO: OCR cache — 2 hit(s), 0 miss(es)." in result["logs"]
+    assert svc.graph.downloads == 1 and svc.uber.ocr.calls == 0 and vision.calls == 0
+    assert cache.rows["B"]["version"] == "c3"
+
+
+def test_modified_file_is_ocrd_again():
+    cache, vision = _MemoryCache(), _Vision()
+    _scan(_service(_files(), BLOBS, cache), vision)
+
+    svc = _service(_files(tag_b="c3"), {"A": b"image-a", "B": b"image-b-edited"}, cache)
+    vision.calls = 0
+    result = _scan(svc, vision)
+    assert "INFO: OCR cache — 1 hit(s), 1 miss(es)." in result["logs"]
+    assert svc.uber.ocr.calls == 1 and vision.calls == 1
+    assert cache.rows["B"]["sha256"] == content_hash(b"image-b-edited")
+
+
+def test_table_check_runs_once_per_process(monkeypatch):
+    from services.ocr_cache import OcrCache
+
+    executed = []
+    cursor = types.SimpleNamespace(execute=lambda sql, params=None: executed.append(sql),
+                                   fetchall=lambda: [], rowcount=0)
+    conn = types.SimpleNamespace(cursor=lambda: cursor, commit=lambda: None, close=lambda: None)
+    db = types.SimpleNamespace(get_connection=lambda: conn)
+    monkeypatch.setattr(OcrCache, "_table_ready", False)
+
+    for _ in range(2):
+        cache = OcrCache(db)
+        cache.get_many(["A"])
+        cache.put("A", "c1", "ab", "2026-06-02", "a.jpg", "text", None)
+        cache.invalidate_day("2026-06-02")
+    assert sum("OBJECT_ID" in sql for sql in executed) == 1
+    assert len(executed) == 7
@@ -0,0 +1,199 @@
+"""
+Incremental OneDrive sync over Graph delta (services/onedrive_delta.py).
+
+Graph is replaced by a scripted sequence of pages and the SQL mirror by an
+in-memory store, so these pin the round/link bookkeeping: pagination to the
+deltaLink, 410 re-enumeration, deletions, path resolution and the per-folder
+cursor that keeps one consumer from swallowing another's changes.
+"""
+import os
+import sys
+import types
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services.onedrive_delta import DeltaStore, DriveDeltaSync  # noqa: E402
+
+
+class _Resp:
+    def __init__(self, status, body=None):
+        self.status_code = status
+        self.ok = 200 <= status < 300
+        self._body = body or {}
+        self.text = ""
+        self.headers = {}
+
+    def json(self):
+        return self._body
+
+
+class _Store:
+    def __init__(self):
+        self.link, self.round = None, 0
+        self.items = {}
+        self.cursors = {}
+        self.replaced = 0
+
+    def load_state(self, drive):
+        return self.link, self.round
+
+    def apply(self, drive, rows, deleted, delta_link, replace, sync_round):
+        if replace:
+            self.items.clear()
+            self.replaced += 1
+        for i in deleted:
+            self.items.pop(i, None)
+        for r in rows:
+            self.items[r[0]] = tuple(r) + (sync_round,)
+        self.link, self.round = delta_link, sync_round
+
+    def folders(self, drive):
+        return [(r[0], r[1], r[2], r[4]) for r in self.items.values() if r[3]]
+
+    def children(self, drive, parent_id, since_round=0):
+        return [r[:9] for r in self.items.values()
+                if r[1] == parent_id and not r[3] and r[9] > since_round]
+
+    def load_cursor(self, drive, path):
+        return self.cursors.get(path)
+
+    def save_cursor(self, drive, path, sync_round):
+        self.cursors[path] = sync_round
+
+
+def _folder(fid, parent, name):
+    return {"id": fid, "name": name, "folder": {}, "parentReference": {"id": parent}}
+
+
+def _file(fid, parent, name, ctag="c1"):
+    return {"id": fid, "name": name, "file": {}, "cTag": ctag, "parentReference": {"id": parent}}
+
+
+TREE = [
+    {"id": "root", "name": "root", "root": {}, "folder": {}},
+    _folder("pics", "root", "Pictures"),
+    _folder("roll", "pics", "Camera Roll"),
+    _folder("docs", "root", "Documents"),
+]
+
+
+def _sync(store, pages):
+    calls = []
+
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(url)
+        return pages.pop(0)
+
+    with patch("services.onedrive_delta.http_pool.get", fake_get):
+        delta = DriveDeltaSync(lambda: "tok", "users/me/drive", store)
+        return delta, delta.sync(), calls
+
+
+def test_first_round_follows_next_links_to_the_delta_link():
+    store = _Store()
+    pages = [
+        _Resp(200, {"value": TREE[:2], "@odata.nextLink": "page2"}),
+        _Resp(200, {"value": TREE[2:] + [_file("a", "roll", "IMG_1.jpg"), _file("d", "docs", "x.pdf")],
+                    "@odata.deltaLink": "link1"}),
+    ]
+    delta, changes, calls = _sync(store, pages)
+
+    assert calls[0].startswith("https://graph.microsoft.com/v1.0/users/me/drive/root/delta?")
+    assert calls[1] == "page2"
+    assert store.link == "link1" and store.round == 1
+    # Only watched folders are surfaced; the Documents file is mirrored but not reported.
+    assert [i["id"] for i in changes.upserted] == ["a"]
+    assert [i["id"] for i in changes.under("Pictures/Camera Roll")] == ["a"]
+    assert changes.resynced is True
+
+
+def test_next_round_starts_from_the_stored_link_and_applies_deletions():
+    store = _Store()
+    _sync(store, [_Resp(200, {"value": TREE + [_file("a", "roll", "IMG_1.jpg")], "@odata.deltaLink": "link1"})])
+
+    delta, changes, calls = _sync(store, [_Resp(200, {
+        "value": [{"id": "a", "deleted": {}}, _file("b", "roll", "IMG_2.jpg")],
+        "@odata.deltaLink": "link2"})])
+
+    assert calls == ["link1"]
+    assert changes.deleted == ["a"] and changes.resynced is False
+    assert [i["id"] for i in delta.list_folder("pictures/camera roll/")] == ["b"]
+    assert store.link == "link2" and store.round == 2
+
+
+def test_expired_link_re_enumerates_and_replaces_the_mirror():
+    store = _Store()
+    _sync(store, [_Resp(200, {"value": TREE + [_file("stale", "roll", "old.jpg")], "@odata.deltaLink": "link1"})])
+
+    delta, changes, calls = _sync(store, [
+        _Resp(410),
+        _Resp(200, {"value": TREE + [_file("b", "roll", "IMG_2.jpg")], "@odata.deltaLink": "link2"}),
+    ])
+
+    assert calls[0] == "link1" and "/root/delta" in calls[1]
+    assert changes.resynced is True and store.replaced == 2
+    assert "stale" not in store.items
+    assert [i["id"] for i in delta.list_folder("Pictures/Camera Roll")] == ["b"]
+
+
+def test_list_folder_resolves_renamed_parents_and_unknown_paths():
+    store = _Store()
+    _sync(store, [_Resp(200, {"value": TREE + [_file("a", "roll", "IMG_1.jpg")], "@odata.deltaLink": "link1"})])
+
+    # Renaming "Pictures" re-emits only that folder, not its descendants.
+    delta, _, _ = _sync(store, [_Resp(200, {"value": [_folder("pics", "root", "Photos")],
+                                            "@odata.deltaLink": "link2"})])
+
+    assert [i["id"] for i in delta.list_folder("Photos/Camera Roll")] == ["a"]
+    assert delta.list_folder("Pictures/Camera Roll") is None
+    assert delta.list_folder("Documents") == []
+    item = delta.list_folder("Photos/Camera Roll")[0]
+    assert item["name"] == "IMG_1.jpg" and item["cTag"] == "c1" and "file" in item
+
+
+def test_pending_returns_changes_since_the_folder_cursor_until_acked():
+    store = _Store()
+    pages = [
+        _Resp(200, {"value": TREE + [_file("a", "roll", "IMG_1.jpg")], "@odata.deltaLink": "link1"}),
+        _Resp(200, {"value": [], "@odata.deltaLink": "link2"}),
+        _Resp(200, {"value": [_file("b", "roll", "IMG_2.jpg")], "@odata.deltaLink": "link3"}),
+        # Another consumer advances the link; the roll cursor must not move.
+        _Resp(200, {"value": [_file("c", "roll", "IMG_3.jpg")], "@odata.deltaLink": "link4"}),
+        _Resp(200, {"value": [], "@odata.deltaLink": "link5"}),
+    ]
+
+    with patch("services.onedrive_delta.http_pool.get", lambda url, headers=None, timeout=None: pages.pop(0)):
+        delta = DriveDeltaSync(lambda: "tok", "users/me/drive", store)
+
+        files, rnd = delta.pending("Pictures/Camera Roll")
+        assert [f["id"] for f in files] == ["a"]    # no cursor yet: whole folder
+
+        # Not acked (e.g. a download failed): delivered again.
+        files, rnd = delta.pending("Pictures/Camera Roll")
+        assert [f["id"] for f in files] == ["a"]
+        delta.ack("Pictures/Camera Roll", rnd)
+
+        files, rnd = delta.pending("Pictures/Camera Roll")
+        assert [f["id"] for f in files] == ["b"]
+        delta.ack("Pictures/Camera Roll", rnd)
+
+        delta.sync()
+        files, rnd = delta.pending("Pictures/Camera Roll")
+        assert [f["id"] for f in files] == ["c"]
+
+
+def test_table_checks_run_once_per_process(monkeypatch):
+    executed = []
+    cursor = types.SimpleNamespace(execute=lambda sql, params=None: executed.append(sql),
+                                   executemany=lambda sql, rows: None, fetchone=lambda: None)
+    conn = types.SimpleNamespace(cursor=lambda: cursor, commit=lambda: None, close=lambda: None)
+    db = types.SimpleNamespace(get_connection=lambda: conn)
+    monkeypatch.setattr(DeltaStore, "_tables_ready", False)
+
+    for sync_round in (1, 2):
+        store = DeltaStore(db)
+        store.load_state("drive")
+        store.apply("drive", [("f1", "roll", "a.jpg", False, False, "c1", "e1", 10, None)],
+                    [], "link", False, sync_round)
+    assert sum("OBJECT_ID" in sql for sql in executed) == 3
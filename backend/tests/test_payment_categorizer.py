@@ -15,6 +15,7 @@ pure module with no I/O.
 import sys
 import os
 import datetime
+import random
 import unittest
 
 REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -30,9 +31,48 @@ from services.payment_categorizer import (
     categorize_payee,
     is_former_client,
     LUIS_START_DATE,
+    BUSINESS_ACCOUNT,
+    PERSONAL_ACCOUNT,
 )
 
 
+def _pairwise_transfer_pairs(transactions):
+    """The original O(n^2) find_transfer_pairs, kept as the reference the
+    bucketed implementation must agree with."""
+    transfer_ids = set()
+    n = len(transactions)
+    for i in range(n):
+        a = transactions[i]
+        if a["id"] in transfer_ids:
+            continue
+        for j in range(i + 1, n):
+            b = transactions[j]
+            if b["id"] in transfer_ids:
+                continue
+            if a["date"] != b["date"]:
+                continue
+            if round(abs(a["amount"]), 2) != round(abs(b["amount"]), 2):
+                continue
+            if (a["amount"] > 0) == (b["amount"] > 0):
+                continue
+            accounts = {a["account"], b["account"]}
+            is_cross_account_transfer = accounts == {BUSINESS_ACCOUNT, PERSONAL_ACCOUNT}
+            a_text = (a.get("counterparty") or "").lower()
+            b_text = (b.get("counterparty") or "").lower()
+            is_passthrough = (
+                a["account"] == PERSONAL_ACCOUNT and b["account"] == BUSINESS_ACCOUNT
+                and ("cash app" in a_text or "venmo" in a_text)
+            ) or (
+                b["account"] == PERSONAL_ACCOUNT and a["account"] == BUSINESS_ACCOUNT
+                and ("cash app" in b_text or "venmo" in b_text)
+            )
+            if is_cross_account_transfer or is_passthrough:
+                transfer_ids.add(a["id"])
+                transfer_ids.add(b["id"])
+                break
+    return transfer_ids
+
+
 class TestClassifyLuisPayment(unittest.TestCase):
     def setUp(self):
         self.on_date = LUIS_START_DATE + datetime.timedelta(days=10)
@@ -175,6 +215,42 @@ class TestTransferMatching(unittest.TestCase):
         self.assertEqual(find_transfer_pairs(txs), set())
 
 
+class TestTransferMatchingMatchesPairwiseReference(unittest.TestCase):
+    """Randomised property check: on dense, collision-heavy inputs the
+    bucketed find_transfer_pairs returns exactly what the pairwise scan did."""
+
+    ACCOUNTS = (BUSINESS_ACCOUNT, PERSONAL_ACCOUNT, "0001")
+    AMOUNTS = (0.0, 0.004, 0.005, 10.0, 10.001, 10.004, 45.0, 100.0, 100.005)
+    COUNTERPARTIES = ("", "Cash App Deposit", "Venmo", "Transfer", None)
+
+    def _random_txs(self, rng, n):
+        start = datetime.date(2026, 6, 1)
+        return [{
+            # Occasional repeated ids, as a re-fetched Teller page can produce.
+            "id": f"t{rng.randrange(n + 3) if rng.random() < 0.05 else i}",
+            "account": rng.choice(self.ACCOUNTS),
+            "amount": rng.choice(self.AMOUNTS) * rng.choice((1, -1)),
+            "date": start + datetime.timedelta(days=rng.randrange(3)),
+            "counterparty": rng.choice(self.COUNTERPARTIES),
+        } for i in range(n)]
+
+    def test_agrees_with_pairwise_scan(self):
+        for seed in range(400):
+            rng = random.Random(seed)
+            txs = self._random_txs(rng, rng.randrange(0, 40))
+            with self.subTest(seed=seed):
+                self.assertEqual(find_transfer_pairs(txs), _pairwise_transfer_pairs(txs))
+
+    def test_pairs_earliest_candidate_first(self):
+        d = datetime.date(2026, 6, 1)
+        txs = [
+            {"id": "out", "account": "9776", "amount": -20.0, "date": d},
+            {"id": "in1", "account": "2085", "amount": 20.0, "date": d},
+            {"id": "in2", "account": "2085", "amount": 20.0, "date": d},
+        ]
+        self.assertEqual(find_transfer_pairs(txs), {"out", "in1"})
+
+
 class TestCategorizePayee(unittest.TestCase):
     def test_former_client_flagged(self):
         self.assertTrue(is_former_client("zelle from esmeralda d'silva"))
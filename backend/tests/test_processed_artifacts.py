@@ -0,0 +1,131 @@
+"""
+Uber-card idempotency through Rides.ProcessedArtifacts
+(services/processed_artifacts.py): a screenshot already turned into a ride is
+recognised by content hash or OneDrive item id before OCR runs, and by
+filename after the card parses, as the old sidecar LIKE scan did.
+"""
+import datetime
+import os
+import sys
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.ocr_cache import content_hash  # noqa: E402
+from services.processed_artifacts import ProcessedArtifacts  # noqa: E402
+from services.uber_matcher import UberMatcherService  # noqa: E402
+
+
+class _Index:
+    """In-memory stand-in for Rides.ProcessedArtifacts."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def find(self, sha256=None, item_id=None, filename=None):
+        for field, value in (("sha256", sha256), ("item_id", item_id), ("filename", filename)):
+            for row in self.rows:
+                if value and row.get(field) == value:
+                    return {"ride_id": row["ride_id"], "matched_on": field,
+                            "driver_earnings": 18.5, "rider_payment": 25.0}
+        return None
+
+    def record(self, ride_id, source, filename=None, sha256=None, item_id=None):
+        self.rows.append({"ride_id": ride_id, "source": source, "filename": filename,
+                          "sha256": sha256, "item_id": item_id})
+
+
+class _Ocr:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_image_bytes(self, content):
+        self.calls += 1
+        return "Your earnings $18.50"
+
+    def parse_ubertrip(self, text):
+        return {"driver_total": 18.5, "rider_payment": 25.0, "tip": 0.0}
+
+
+def _matcher(index):
+    m = UberMatcherService.__new__(UberMatcherService)
+    m.ocr = _Ocr()
+    m.artifacts = index
+    m.semantic = types.SimpleNamespace(ingest_tessie_drive=lambda *a, **k: None)
+    m.mdt = datetime.timezone(datetime.timedelta(hours=-6))
+    m._find_match = lambda card_dt, tolerance_hours=4: {"RideID": "TESSIE-1"}
+    m.updated = []
+    m._update_ride = lambda ride_id, card, cut, sidecar: m.updated.append(ride_id)
+    return m
+
+
+def test_new_screenshot_is_recorded_under_every_identity():
+    index = _Index()
+    m = _matcher(index)
+    result = m.process_image_bytes(b"png-1", "Screenshot_20260601_053614.png", item_id="ITEM1", source="onedrive")
+    assert result["status"] == "MATCHED" and result["ride_id"] == "TESSIE-1"
+    assert index.rows == [{"ride_id": "TESSIE-1", "source": "onedrive", "filename": "Screenshot_20260601_053614.png",
+                           "sha256": content_hash(b"png-1"), "item_id": "ITEM1"}]
+
+
+def test_duplicate_bytes_or_item_are_rejected_before_ocr():
+    index = _Index([{"ride_id": "TESSIE-1", "sha256": content_hash(b"png-1"), "item_id": "ITEM1"}])
+    m = _matcher(index)
+
+    copy = m.process_image_bytes(b"png-1", "IMG_copy.png", source="blob")
+    moved = m.process_image_bytes(b"png-1-recompressed", "Screenshot.png", item_id="ITEM1")
+    assert copy["ride_id"] == moved["ride_id"] == "TESSIE-1" and copy["duplicate"] is True
+    assert copy["driver_earnings"] == 18.5
+    assert m.ocr.calls == 0 and m.updated == []
+
+
+def test_legacy_filename_match_learns_the_content_hash():
+    index = _Index([{"ride_id": "TESSIE-7", "filename": "Screenshot_20260501_070003.png"}])
+    m = _matcher(index)
+    result = m.process_image_bytes(b"png-7", "Screenshot_20260501_070003.png", source="blob")
+    assert result["ride_id"] == "TESSIE-7" and m.ocr.calls == 1 and m.updated == []
+    assert index.rows[-1]["sha256"] == content_hash(b"png-7")
+
+    m.process_image_bytes(b"png-7", "renamed.png")
+    assert m.ocr.calls == 1
+
+
+class _Cursor:
+    def __init__(self, row=None):
+        self.executed = []
+        self._row = row
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+
+    def fetchone(self):
+        return self._row
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_lookup_is_one_seek_per_identity():
+    cursor = _Cursor(row=("TESSIE-1", "sha256", 18.5, 25.0))
+    index = ProcessedArtifacts(db=types.SimpleNamespace(get_connection=lambda: _Conn(cursor)))
+    seen = index.find(sha256="ab" * 32, item_id="ITEM1")
+    assert seen == {"ride_id": "TESSIE-1", "matched_on": "sha256", "driver_earnings": 18.5, "rider_payment": 25.0}
+    sql, params = cursor.executed[-1]
+    assert "LIKE" not in sql and "Sidecar_Artifact_JSON" not in sql
+    assert params == ("ab" * 32, "ITEM1", None)
+
+    assert ProcessedArtifacts(db=types.SimpleNamespace(get_connection=lambda: None)).find(sha256="x") is None
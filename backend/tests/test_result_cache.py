@@ -0,0 +1,185 @@
+"""
+Two-tier result cache (services/result_cache.py) and the pre-shift check
+served through it: versioned keys, LRU memory tier in front of a shared
+tier, stale-while-revalidate, and the response's `cache` block.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+import azure.functions as func
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from api import pre_shift_check  # noqa: E402
+from services.result_cache import MemoryBackend, ResultCache, SqlBackend  # noqa: E402
+
+
+class _Shared:
+    """Stands in for the SQL tier."""
+    name = "sql"
+
+    def __init__(self):
+        self.rows = {}
+        self.fail = False
+
+    def get(self, key):
+        if self.fail:
+            raise RuntimeError("SQL down")
+        return self.rows.get(key)
+
+    def put(self, key, value, stored_at, keep_sec):
+        if self.fail:
+            raise RuntimeError("SQL down")
+        self.rows[key] = (value, stored_at)
+
+    def delete(self, key):
+        self.rows.pop(key, None)
+
+
+def test_memory_tier_is_a_bounded_lru():
+    mem = MemoryBackend(max_entries=2)
+    now = time.time()
+    mem.put("a", 1, now, 60)
+    mem.put("b", 2, now, 60)
+    mem.get("a")
+    mem.put("c", 3, now, 60)
+    assert mem.get("b") is None and mem.get("a") == (1, now)
+    mem.put("d", 4, now - 120, 60)
+    assert mem.get("d") is None
+
+
+def test_shared_hits_are_promoted_and_keys_are_versioned():
+    shared = _Shared()
+    mem = MemoryBackend()
+    v1 = ResultCache("pre_shift", "2.0.0", ttl_sec=60, backends=[mem, shared])
+    v2 = ResultCache("pre_shift", "2.1.0", ttl_sec=60, backends=[MemoryBackend(), shared])
+    assert v1.key("2026-06-01") == "pre_shift:2.0.0:2026-06-01"
+
+    shared.rows[v1.key("2026-06-01")] = ({"overall_status": "PASS"}, time.time() - 10)
+    value, meta = v1.get_or_compute(v1.key("2026-06-01"), lambda: {"overall_status": "FAIL"})
+    assert value == {"overall_status": "PASS"}
+    assert (meta["hit"], meta["tier"], meta["stale"]) == (True, "sql", False) and meta["age_seconds"] >= 10
+    assert mem.get(v1.key("2026-06-01"))[0] == {"overall_status": "PASS"}
+
+    _, meta = v1.get_or_compute(v1.key("2026-06-01"), lambda: None)
+    assert meta["tier"] == "memory"
+    assert meta["metrics"]["memory_hits"] == 1 and meta["metrics"]["sql_hits"] == 1
+
+    # A new pipeline version never reads the old entry.
+    value, meta = v2.get_or_compute(v2.key("2026-06-01"), lambda: {"overall_status": "WARN"})
+    assert value == {"overall_status": "WARN"} and meta["hit"] is False
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    mem = MemoryBackend()
+    cache = ResultCache("t", "1", ttl_sec=60, stale_sec=600, backends=[mem])
+    key = cache.key("day")
+    mem.put(key, "old", time.time() - 120, 660)
+
+    release, calls = threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return "new"
+
+    value, meta = cache.get_or_compute(key, compute)
+    assert (value, meta["stale"], meta["refreshing"]) == ("old", True, True)
+    value, _ = cache.get_or_compute(key, compute)
+    assert value == "old"
+    release.set()
+
+    deadline = time.time() + 2
+    while cache.stats()["refreshes"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 1
+    value, meta = cache.get_or_compute(key, compute)
+    assert (value, meta["stale"]) == ("new", False)
+    assert cache.stats()["stale_hits"] == 2
+
+    # Past the stale window it is an ordinary miss.
+    mem.put(key, "ancient", time.time() - 700, 660)
+    assert cache.get_or_compute(key, lambda: "fresh")[0] == "fresh"
+
+
+def test_a_failing_shared_tier_never_fails_the_request():
+    shared = _Shared()
+    shared.fail = True
+    cache = ResultCache("t", "1", ttl_sec=60, backends=[MemoryBackend(), shared])
+    value, meta = cache.get_or_compute(cache.key("x"), lambda: 42)
+    assert (value, meta["hit"]) == (42, False)
+    value, meta = cache.get_or_compute(cache.key("x"), lambda: 0)
+    assert (value, meta["tier"]) == (42, "memory")
+
+
+class _Cursor:
+    def __init__(self, row=None):
+        self.executed = []
+        self._row = row
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+
+    def fetchone(self):
+        return self._row
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_sql_tier_merges_and_reads_age_from_the_sql_clock():
+    cursor = _Cursor(row=(json.dumps({"overall_status": "PASS"}), 30))
+    backend = SqlBackend(db=types.SimpleNamespace(get_connection=lambda: _Conn(cursor)))
+    value, stored_at = backend.get("pre_shift:2.0.0:2026-06-01")
+    assert value == {"overall_status": "PASS"} and 29 <= time.time() - stored_at <= 31
+
+    backend.put("pre_shift:2.0.0:2026-06-01", {"overall_status": "WARN"}, time.time(), 3600)
+    merge_sql, params = cursor.executed[-1]
+    assert merge_sql.startswith("MERGE INTO Rides.ResultCache WITH (HOLDLOCK)")
+    assert params[0] == "pre_shift:2.0.0:2026-06-01" and params[3] == 3600
+
+    assert SqlBackend(db=types.SimpleNamespace(get_connection=lambda: None)).get("k") is None
+
+
+def _get(date):
+    req = func.HttpRequest(method="GET", url="/api/pre-shift-check", body=b"", params={"date": date})
+    return json.loads(pre_shift_check.pre_shift_check(req).get_body())
+
+
+def test_pre_shift_check_reports_cache_metrics(monkeypatch):
+    calls = []
+
+    def compute(date_str):
+        calls.append(date_str)
+        return {"date": date_str, "overall_status": "PASS", "overall_confidence": 100}
+
+    cache = ResultCache("pre_shift", pre_shift_check._PIPELINE_VERSION, ttl_sec=1800, backends=[MemoryBackend()])
+    monkeypatch.setattr(pre_shift_check, "_result_cache", cache)
+    monkeypatch.setattr(pre_shift_check, "_compute_payload", compute)
+    monkeypatch.setattr(pre_shift_check, "_warmup_started", True)
+
+    first, second = _get("2026-06-01"), _get("2026-06-01")
+    assert calls == ["2026-06-01"]
+    assert first["cache"]["hit"] is False and second["cache"]["hit"] is True
+    assert second["cache"]["tier"] == "memory"
+    assert second["cache"]["pipeline_version"] == pre_shift_check._PIPELINE_VERSION
+    assert second["cache"]["metrics"]["misses"] == 1 and second["cache"]["metrics"]["hits"] == 1
+    assert second["overall_status"] == "PASS"
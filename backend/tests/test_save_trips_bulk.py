@@ -0,0 +1,195 @@
+"""
+Set-based Tessie drive ingestion (DatabaseClient.save_trips_bulk).
+
+The bulk path exists for round trips, but it is only safe if it writes exactly
+what sequential save_trip calls would have: the ingestion guardrail must still
+stop a nightly sync from demoting a Private ride back to Uber, and a batch that
+trips over a bulk-only problem must not be lost.
+"""
+import json
+import os
+import sys
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.database import DatabaseClient  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, existing=None, fail_on=None):
+        self.executed = []
+        self.many = []
+        self.fast_executemany = False
+        self._existing = existing or []
+        self._pending = []
+        self._fail_on = fail_on
+
+    def execute(self, sql, params=None):
+        flat = " ".join(sql.split())
+        self.executed.append((flat, params))
+        if self._fail_on and self._fail_on in flat:
+            raise RuntimeError("simulated failure")
+        if flat.startswith("SELECT RideID, Classification"):
+            wanted = set(params)
+            self._pending = [r for r in self._existing if r[0] in wanted]
+
+    def executemany(self, sql, rows):
+        self.many.append((" ".join(sql.split()), list(rows)))
+
+    def fetchall(self):
+        rows, self._pending = self._pending, []
+        return rows
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = 0
+        self.rolled_back = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.committed += 1
+
+    def rollback(self):
+        self.rolled_back += 1
+
+    def close(self):
+        pass
+
+
+def _db(cursor):
+    db = DatabaseClient()
+    conn = _Conn(cursor)
+    db.get_connection = lambda: conn
+    return db, conn
+
+
+def _drive(n, tag="Uber Trip 1 DropOff", **extra):
+    d = {
+        "RideID": f"TESSIE-{n}",
+        "Timestamp_Start": "2026-06-02 08:00:00",
+        "Distance_mi": 3.2,
+        "Duration_min": 11,
+        "TripType": "Uber",
+        "Classification": "Uber_Dropoff",
+        "Tessie_Label": tag,
+        "Sidecar_Artifact_JSON": json.dumps({"id": n, "tag": tag}),
+    }
+    d.update(extra)
+    return d
+
+
+def _staged(cursor):
+    (sql, rows), = cursor.many
+    assert "INSERT INTO #TripStage" in sql
+    cols = sql[sql.index("(") + 1:sql.index(")")].split(", ")
+    return [dict(zip(cols, r)) for r in rows]
+
+
+def test_whole_batch_is_one_lookup_one_stage_and_one_merge():
+    cur = _Cursor()
+    db, conn = _db(cur)
+
+    saved = db.save_trips_bulk([_drive(i) for i in range(60)])
+
+    assert saved == 60
+    lookups = [s for s, _ in cur.executed if s.startswith("SELECT RideID, Classification")]
+    merges = [s for s, _ in cur.executed if s.startswith("MERGE INTO Rides.Rides")]
+    assert len(lookups) == 1 and len(merges) == 1
+    assert "USING #TripStage" in merges[0]
+    assert cur.fast_executemany is True
+    assert len(_staged(cur)) == 60
+    assert conn.committed == 1
+
+
+def test_merge_keeps_the_single_row_keep_existing_rules():
+    cur = _Cursor()
+    db, _ = _db(cur)
+    db.save_trips_bulk([_drive(1)])
+    merge = next(s for s, _ in cur.executed if s.startswith("MERGE INTO Rides.Rides"))
+    assert "Fare = CASE WHEN source.Fare > 0 THEN source.Fare ELSE target.Fare END" in merge
+    assert "Tessie_Label = COALESCE(target.Tessie_Label, source.Tessie_Label)" in merge
+    assert "PaymentStatus = COALESCE(source.PaymentStatus, target.PaymentStatus)" in merge
+
+
+def test_guardrail_preserves_an_existing_private_classification():
+    existing = [("TESSIE-7", "Private: Jackie", "Private",
+                 json.dumps({"tag": "Uber Trip 1 DropOff"}))]
+    cur = _Cursor(existing=existing)
+    db, _ = _db(cur)
+
+    db.save_trips_bulk([_drive(7), _drive(8)])
+
+    rows = {r["RideID"]: r for r in _staged(cur)}
+    assert rows["TESSIE-7"]["Classification"] == "Private: Jackie"
+    assert rows["TESSIE-7"]["TripType"] == "Private"
+    assert rows["TESSIE-8"]["Classification"] == "Uber_Dropoff"
+
+
+def test_changed_tessie_tag_bypasses_the_guardrail():
+    existing = [("TESSIE-7", "Private: Jackie", "Private",
+                 json.dumps({"tag": "Jackie Dropoff"}))]
+    cur = _Cursor(existing=existing)
+    db, _ = _db(cur)
+
+    db.save_trips_bulk([_drive(7)])
+
+    (row,) = _staged(cur)
+    assert row["Classification"] == "Uber_Dropoff"
+    assert row["TripType"] == "Uber"
+
+
+def test_duplicate_ride_ids_keep_the_last_version():
+    cur = _Cursor()
+    db, _ = _db(cur)
+    saved = db.save_trips_bulk([_drive(1, Distance_mi=1.0), _drive(1, Distance_mi=9.0)])
+    assert saved == 1
+    (row,) = _staged(cur)
+    assert row["Distance_mi"] == 9.0
+
+
+def test_rows_bind_with_uniform_types_for_fast_executemany():
+    cur = _Cursor()
+    db, _ = _db(cur)
+    db.save_trips_bulk([
+        # An epoch start resolves to a naive local datetime inside save_trip.
+        _drive(1, timestamp_epoch=1780408800, Start_SOC=80, Tessie_DriveID=123),
+        _drive(2, Start_SOC=79.5),
+    ])
+    rows = _staged(cur)
+    assert rows[0]["Timestamp_Start"] == "2026-06-02 08:00:00"  # 14:00Z in MDT
+    assert rows[0]["Tessie_DriveID"] == "123"
+    assert all(isinstance(r["Start_SOC"], float) for r in rows)
+
+
+def test_bulk_failure_falls_back_to_per_row_saves():
+    cur = _Cursor(fail_on="MERGE INTO Rides.Rides AS target USING #TripStage")
+    db, conn = _db(cur)
+    single = []
+    db.save_trip = lambda trip: single.append(trip["RideID"])
+
+    saved = db.save_trips_bulk([_drive(1), _drive(2)])
+
+    assert saved == 2
+    assert conn.rolled_back == 1
+    assert single == ["TESSIE-1", "TESSIE-2"]
+
+
+def test_empty_batch_touches_nothing():
+    cur = _Cursor()
+    db, _ = _db(cur)
+    assert db.save_trips_bulk([]) == 0
+    assert cur.executed == []
@@ -0,0 +1,141 @@
+"""
+Versioned schema migrations (services/schema_migrations.py): pending versions
+are applied once and recorded, a failure stops the run, and once the process
+has verified the schema the hot-path `_ensure_*` DDL is skipped.
+"""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import schema_migrations  # noqa: E402
+from services.database import DatabaseClient  # noqa: E402
+from services.schema_migrations import Migration, migrate  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, applied=()):
+        self.executed = []
+        self.applied = list(applied)
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.executed.append((sql, params))
+        if sql.startswith("IF NOT EXISTS (SELECT 1 FROM dbo.SchemaVersion"):
+            self.applied.append(params[0])
+
+    def fetchall(self):
+        return [(v,) for v in self.applied]
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _unverified(monkeypatch):
+    monkeypatch.setattr(schema_migrations, "_verified", False)
+
+
+def _recording(calls, name):
+    return lambda cursor: calls.append(name)
+
+
+def test_only_pending_versions_are_applied_and_recorded():
+    calls = []
+    migrations = [Migration(1, "one", _recording(calls, "one")),
+                  Migration(3, "three", _recording(calls, "three")),
+                  Migration(2, "two", _recording(calls, "two"))]
+    cursor = _Cursor(applied=[1])
+    conn = _Conn(cursor)
+
+    assert migrate(conn, migrations) == [2, 3]
+    assert calls == ["two", "three"]
+    assert sorted(cursor.applied) == [1, 2, 3]
+    assert conn.commits == 3  # SchemaVersion table, then one per migration
+
+    calls.clear()
+    assert migrate(conn, migrations) == [] and calls == []
+
+
+def test_a_failing_migration_is_rolled_back_and_stops_the_run():
+    calls = []
+
+    def broken(cursor):
+        raise RuntimeError("ALTER failed")
+
+    migrations = [Migration(1, "one", _recording(calls, "one")),
+                  Migration(2, "broken", broken),
+                  Migration(3, "three", _recording(calls, "three"))]
+    cursor = _Cursor()
+    conn = _Conn(cursor)
+    with pytest.raises(RuntimeError):
+        migrate(conn, migrations)
+    assert calls == ["one"] and cursor.applied == [1] and conn.rollbacks == 1
+
+
+def test_ensure_migrated_sets_the_flag_once(monkeypatch):
+    runs = []
+    monkeypatch.setattr(schema_migrations, "migrate", lambda conn: runs.append(conn))
+    conn = _Conn(_Cursor())
+    db = types.SimpleNamespace(get_connection=lambda: conn)
+
+    assert schema_migrations.ensure_migrated(db) is True
+    assert schema_migrations.ensure_migrated(db) is True
+    assert len(runs) == 1 and conn.closed
+    assert schema_migrations.schema_verified() is True
+
+
+def test_unreachable_database_leaves_per_call_ddl_on():
+    db = types.SimpleNamespace(get_connection=lambda: None)
+    assert schema_migrations.ensure_migrated(db) is False
+    assert schema_migrations.schema_verified() is False
+
+
+def test_verified_schema_skips_hot_path_ddl(monkeypatch):
+    db = DatabaseClient()
+    cursor = _Cursor()
+    db._ensure_finance_tables(cursor)
+    db._ensure_cabin_attempts_table(cursor)
+    assert len(cursor.executed) > 2
+
+    monkeypatch.setattr(schema_migrations, "_verified", True)
+    cursor = _Cursor()
+    db._ensure_finance_tables(cursor)
+    db._ensure_cabin_attempts_table(cursor)
+    db._ensure_payment_status_column(cursor)
+    db._ensure_telemetry_blob_column(cursor)
+    assert cursor.executed == []
+
+
+def test_every_migration_runs_against_a_fresh_database():
+    cursor = _Cursor()
+    conn = _Conn(cursor)
+    applied = migrate(conn)
+    assert applied == [m.version for m in schema_migrations.MIGRATIONS]
+    sql = " ".join(s for s, _ in cursor.executed)
+    for table in ("dbo.SchemaVersion", "Finance.Payments", "Rides.CabinAttempts",
+                  "Rides.DailyRollup", "Rides.BackgroundJobs", "TelemetryBlob",
+                  "Rides.ProcessedArtifacts"):
+        assert table in sql
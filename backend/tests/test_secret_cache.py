@@ -0,0 +1,124 @@
+"""
+In-process secret cache in services/secret_manager.py: per-secret TTL,
+single-flight Key Vault fetches, stale values on Key Vault errors, and
+set_secret() write-through.
+"""
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services import secret_manager  # noqa: E402
+from services.secret_manager import SecretManager, invalidate_secret  # noqa: E402
+
+
+class _Vault:
+    def __init__(self, values, delay=0.0):
+        self.values = dict(values)
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+
+    def get_secret(self, kv_name):
+        self.calls.append(kv_name)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("429 Too Many Requests")
+        if kv_name not in self.values:
+            raise secret_manager.ResourceNotFoundError(kv_name)
+        return types.SimpleNamespace(value=self.values[kv_name])
+
+    def set_secret(self, kv_name, value):
+        self.values[kv_name] = value
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def vault(monkeypatch):
+    v = _Vault({"TESSIE-API-KEY": "tk-1", "TELLER-TOKEN": "teller-1"})
+    monkeypatch.setattr(secret_manager, "_kv_client", v)
+    invalidate_secret()
+    yield v
+    invalidate_secret()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(secret_manager, "time", c)
+    return c
+
+
+def test_repeat_reads_share_one_key_vault_call_until_ttl(vault, clock, monkeypatch):
+    monkeypatch.setattr(secret_manager, "SECRET_CACHE_TTL_SEC", 900)
+    assert [SecretManager().get_secret("TESSIE_API_KEY") for _ in range(5)] == ["tk-1"] * 5
+    assert vault.calls == ["TESSIE-API-KEY"]
+
+    vault.values["TESSIE-API-KEY"] = "tk-2"
+    clock.now += 899
+    assert SecretManager().get_secret("TESSIE_API_KEY") == "tk-1"
+    clock.now += 2
+    assert SecretManager().get_secret("TESSIE_API_KEY") == "tk-2"
+
+    # TELLER_TOKEN rotates, so it has a shorter override.
+    SecretManager().get_secret("TELLER_TOKEN")
+    clock.now += secret_manager.SECRET_TTL_OVERRIDES["TELLER_TOKEN"] + 1
+    SecretManager().get_secret("TELLER_TOKEN")
+    assert vault.calls.count("TELLER-TOKEN") == 2
+
+
+def test_key_vault_errors_serve_the_stale_value_and_back_off(vault, clock):
+    assert SecretManager().get_secret("TESSIE_API_KEY") == "tk-1"
+    vault.fail = True
+    clock.now += secret_manager.SECRET_CACHE_TTL_SEC + 1
+    assert SecretManager().get_secret("TESSIE_API_KEY") == "tk-1"
+    assert SecretManager().get_secret("TESSIE_API_KEY") == "tk-1"
+    assert len(vault.calls) == 2  # retried only after SECRET_ERROR_RETRY_SEC
+
+    clock.now += secret_manager.SECRET_ERROR_RETRY_SEC + 1
+    vault.fail = False
+    vault.values["TESSIE-API-KEY"] = "tk-2"
+    assert SecretManager().get_secret("TESSIE_API_KEY") == "tk-2"
+
+
+def test_missing_from_key_vault_caches_the_app_setting(vault, monkeypatch):
+    monkeypatch.setenv("TESSIE_VIN", "5YJ3E1EA0KF000000")
+    assert SecretManager().get_secret("TESSIE_VIN") == "5YJ3E1EA0KF000000"
+    assert SecretManager().get_secret("TESSIE_VIN") == "5YJ3E1EA0KF000000"
+    assert vault.calls == ["TESSIE-VIN"]
+
+
+def test_concurrent_misses_make_one_key_vault_call(vault):
+    vault.delay = 0.1
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(SecretManager().get_secret("TESSIE_API_KEY")))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["tk-1"] * 8
+    assert vault.calls == ["TESSIE-API-KEY"]
+
+
+def test_set_secret_replaces_the_cached_value(vault):
+    assert SecretManager().get_secret("TELLER_TOKEN") == "teller-1"
+    assert SecretManager().set_secret("TELLER_TOKEN", "teller-2")
+    assert SecretManager().get_secret("TELLER_TOKEN") == "teller-2"
+    assert vault.calls == ["TELLER-TOKEN"]
+
+    invalidate_secret("TELLER_TOKEN")
+    SecretManager().get_secret("TELLER_TOKEN")
+    assert vault.calls == ["TELLER-TOKEN"] * 2
@@ -0,0 +1,87 @@
+"""
+Range summary metrics (DatabaseClient.get_summary_metrics_for_range).
+
+The dashboard tiles call this for today/week/month on every load, so it must
+stay a single round trip with index-friendly predicates, and the totals must
+keep the same meaning: Uber earnings already include tips, charging is OpEx,
+and net profit excludes CapEx.
+"""
+import os
+import sys
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.database import DatabaseClient  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, row=None, fail=False):
+        self.executed = []
+        self._row = row
+        self._fail = fail
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+        if self._fail:
+            raise RuntimeError("simulated failure")
+
+    def fetchone(self):
+        return self._row
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+
+def _run(row=None, fail=False):
+    cur = _Cursor(row, fail)
+    conn = _Conn(cur)
+    db = DatabaseClient()
+    db.get_connection = lambda: conn
+    return db.get_summary_metrics_for_range("2026-06-01", "2026-06-07"), cur, conn
+
+
+def test_one_round_trip_with_sargable_date_predicates():
+    _, cur, conn = _run(row=(0, 0, 0, 0, 0, 0, 0))
+    assert len(cur.executed) == 1
+    sql, params = cur.executed[0]
+    assert "CAST(Timestamp AS DATE)" not in sql
+    assert "CAST(Start_Time AS DATE)" not in sql
+    assert len(params) == 8
+    assert conn.closed
+
+
+def test_totals_keep_their_meaning():
+    # uber, uber tips, private bookings, private payments, opex, capex, charging
+    m, _, _ = _run(row=(200.0, 30.0, 90.0, 60.0, 25.0, 400.0, 15.0))
+    assert m["uber_earnings"] == 200.0
+    assert m["uber_tips"] == 30.0
+    assert m["private_income"] == 150.0
+    assert m["gross_earnings"] == 350.0       # tips are inside uber earnings
+    assert m["opex_expenses"] == 40.0         # charging counts as OpEx
+    assert m["capex_expenses"] == 400.0
+    assert m["expenses"] == 440.0
+    assert m["net_profit"] == 310.0           # CapEx is not deducted
+
+
+def test_empty_range_sums_to_zero():
+    m, _, _ = _run(row=(None,) * 7)
+    assert m["gross_earnings"] == 0.0 and m["net_profit"] == 0.0
+
+
+def test_query_failure_returns_zeroes():
+    m, _, conn = _run(fail=True)
+    assert m["gross_earnings"] == 0.0 and m["expenses"] == 0.0
+    assert conn.closed
@@ -0,0 +1,140 @@
+"""
+Compact columnar drive telemetry (services/telemetry_codec.py).
+
+The encoding must round-trip a Tessie /states payload exactly (ints stay
+ints, None stays None, non-numeric channels survive), be several times
+smaller than json.dumps, and DatabaseClient must read both new blob rows and
+legacy RawJSONPayload rows.
+"""
+import json
+import math
+import os
+import random
+import sys
+import types
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.database import DatabaseClient  # noqa: E402
+from services.telemetry_codec import as_lists, decode_telemetry, encode_telemetry, is_encoded  # noqa: E402
+
+
+def _drive(n=1800):
+    rng = random.Random(7)
+    return {
+        "timestamps": [1750000000 + i for i in range(n)],
+        "speeds": [None if i % 97 == 0 else rng.randint(0, 70) for i in range(n)],
+        "latitudes": [round(38.8339 + i * 1.3e-5, 6) for i in range(n)],
+        "longitudes": [round(-104.8214 - i * 1.1e-5, 6) for i in range(n)],
+        "elevations": [round(6035 + 40 * math.sin(i / 200), 1) for i in range(n)],
+        "powers": [round(rng.uniform(-40, 120), 1) for i in range(n)],
+        "inside_temps": [21.5] * n,
+        "outside_temps": [round(18 + i / 900, 2) for i in range(n)],
+        "shift_states": ["D"] * n,
+    }
+
+
+def test_round_trip_is_exact():
+    payload = _drive()
+    payload.update({
+        "ratios": [1 / 3, 2 / 7, None],          # not decimal: stored as float64
+        "odometer_ticks": [2 ** 60, 2 ** 60 + 1],  # beyond float64: kept as JSON
+        "all_none": [None, None],
+        "empty": [],
+        "vin": "5YJ3E1EA0KF000000",
+    })
+    blob = encode_telemetry(payload)
+    assert is_encoded(blob) and not is_encoded(json.dumps(payload).encode())
+    for use_numpy in (None, False):
+        restored = as_lists(blob, use_numpy=use_numpy)
+        assert restored == payload
+        assert type(restored["speeds"][1]) is int and type(restored["powers"][0]) is float
+
+
+def test_blob_is_much_smaller_than_json():
+    payload = _drive()
+    assert len(json.dumps(payload)) / len(encode_telemetry(payload)) >= 5
+
+
+def test_decode_returns_typed_arrays_with_nan_for_missing_samples():
+    payload = _drive(300)
+    decoded = decode_telemetry(encode_telemetry(payload), use_numpy=False)
+    speeds = decoded["speeds"]
+    assert speeds.typecode == "d" and len(speeds) == 300
+    assert math.isnan(speeds[0]) and speeds[1] == payload["speeds"][1]
+    assert memoryview(decoded["latitudes"]).nbytes == 300 * 8
+    assert decoded["shift_states"] == payload["shift_states"]
+
+
+def test_numpy_decode_matches_the_portable_decoder():
+    np = pytest.importorskip("numpy")
+    blob = encode_telemetry(_drive())
+    fast, portable = decode_telemetry(blob, use_numpy=True), decode_telemetry(blob, use_numpy=False)
+    for name, values in fast.items():
+        if isinstance(values, np.ndarray):
+            assert np.array_equal(values, np.asarray(portable[name]), equal_nan=True), name
+
+
+class _Cursor:
+    def __init__(self, rows=()):
+        self.executed = []
+        self.many = []
+        self.fast_executemany = False
+        self._rows = list(rows)
+
+    def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+
+    def executemany(self, sql, rows):
+        self.many.append(list(rows))
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_save_writes_the_blob_and_reader_handles_legacy_rows():
+    payload = _drive(120)
+    cursor = _Cursor()
+    db = DatabaseClient()
+    db.get_connection = lambda: _Conn(cursor)
+    db.save_drive_telemetry("TESSIE-1", payload)
+    merge_sql, params = cursor.executed[-1]
+    assert "UPDATE SET TelemetryBlob = ?, RawJSONPayload = NULL" in merge_sql
+    assert is_encoded(params[1]) and params[1] == params[3]
+
+    cursor = _Cursor(rows=[
+        ("TESSIE-1", params[1], None, "2026-06-01"),
+        ("TESSIE-2", None, json.dumps({"speeds": [1, 2]}), "2026-05-01"),
+    ])
+    rows = db.get_drive_telemetry_payloads(["2026-06-01"])
+    assert [r["Payload"] for r in rows] == [payload, {"speeds": [1, 2]}]
+    assert cursor.executed[-1][1] == ("2026-06-01",)
+
+
+def test_bulk_save_stages_every_drive_and_merges_once():
+    cursor = _Cursor()
+    db = DatabaseClient()
+    db.get_connection = lambda: _Conn(cursor)
+    assert db.save_drive_telemetry_bulk([("TESSIE-1", _drive(60)), ("TESSIE-2", _drive(90))]) == 2
+    (staged,) = cursor.many
+    assert [d for d, _ in staged] == ["TESSIE-1", "TESSIE-2"] and all(is_encoded(b) for _, b in staged)
+    assert sum("MERGE INTO Drive_Telemetry" in sql for sql, _ in cursor.executed) == 1
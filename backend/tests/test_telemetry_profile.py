@@ -0,0 +1,70 @@
+"""
+Vectorised drive telemetry profiles (services/telemetry_profile.py) and the
+TelemetryAnalysisService summary built from them.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from services import telemetry_profile  # noqa: E402
+from services.telemetry_analysis import TelemetryAnalysisService  # noqa: E402
+
+
+def _drive():
+    """10 minutes at 1 Hz: 2 min idle, 8 min at 30 mph climbing 1 ft/s,
+    one 50 kW jump into the cruise and one regen drop at the end."""
+    n = 600
+    ts = [1750000000 + i for i in range(n)]
+    speeds = [0] * 120 + [30] * 480
+    speeds[300] = None
+    powers = [1.0] * 120 + [51.0] * 470 + [-20.0] * 10
+    elevations = [6000.0] * 120 + [6000.0 + i for i in range(480)]
+    odometers = [1000.0] * 120 + [round(1000.0 + i * 30 / 3600, 4) for i in range(480)]
+    return {"timestamps": ts, "speeds": speeds, "powers": powers, "elevations": elevations,
+            "odometers": odometers, "inside_temps": [21.0] * n, "outside_temps": [10.0] * n}
+
+
+def test_profile_covers_speed_bands_idle_events_climb_and_efficiency():
+    pytest.importorskip("numpy")
+    p = telemetry_profile.profile_drive(_drive())
+    assert p["idle_s"] == 120 and p["moving_s"] == 478  # the last sample lasts 0 s
+    assert p["speed_mph"]["max"] == 30 and p["speed_mph"]["p50"] == 30
+    assert p["speed_band_s"]["0-5"] == 120 and p["speed_band_s"]["25-45"] == 478
+    assert p["hard_accel_events"] == 1 and p["hard_brake_events"] == 1
+    assert p["climb_ft"] == 479 and p["descent_ft"] == 0
+    assert p["distance_mi"] == pytest.approx(4.0, abs=0.01)
+    assert p["inside_temp_f"] == 70 and p["outside_temp_f"] == 50
+    assert p["wh_per_mi"] > 0 and p["energy_regen_kwh"] > 0
+    assert "segments" not in p  # under SEGMENT_MILES
+
+
+def test_day_rollup_and_semantic_summary():
+    pytest.importorskip("numpy")
+    day = telemetry_profile.profile_drives([_drive(), _drive(), {"speeds": [1, 2]}])
+    assert day["drives"] == 2 and day["idle_s"] == 240
+    assert day["hard_accel_events"] == 2 and day["speed_mph"]["p90"] == 30
+
+    summary = TelemetryAnalysisService().analyze_drive(_drive())
+    assert "Top speed was 30.0 mph" in summary and "Idled 2 min." in summary
+    assert "1 hard acceleration and 1 hard braking event(s)." in summary
+
+
+def test_long_drives_report_wh_per_mile_by_segment():
+    pytest.importorskip("numpy")
+    n = 1800  # 30 min at 36 mph = 18 mi
+    p = telemetry_profile.profile_drive({
+        "timestamps": list(range(n)), "speeds": [36] * n,
+        "powers": [20.0] * (n // 2) + [10.0] * (n // 2),
+    })
+    assert [s["from_mi"] for s in p["segments"]] == [0.0, 5.0, 10.0, 15.0]
+    assert p["segments"][0]["wh_per_mi"] > p["segments"][-1]["wh_per_mi"]
+
+
+def test_without_numpy_the_list_summary_is_used(monkeypatch):
+    monkeypatch.setattr(telemetry_profile, "np", None)
+    summary = TelemetryAnalysisService().analyze_drive({"speeds": [10, None, 40], "powers": [5, 60]})
+    assert summary == " Telemetry Profile: Top speed was 40.0 mph (avg 25.0 mph). Peak motor exertion hit 60 kW."
+    assert telemetry_profile.profile_drives([{"speeds": [1]}]) is None
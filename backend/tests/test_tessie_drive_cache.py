@@ -0,0 +1,180 @@
+"""
+Per-operational-day Tessie drive cache (services/tessie_drive_cache.py).
+
+A repeat 30-day query serves closed days from one SQL read and only asks
+Tessie for the open day; a failed fetch is never stored; invalidated days are
+re-read.
+"""
+import datetime
+import json
+import os
+import sys
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services.datetime_utils import get_operational_window, get_timezone  # noqa: E402
+from services.tessie_drive_cache import TessieDriveCache, operational_date  # noqa: E402
+
+TZ = get_timezone()
+
+
+def _ts(day, hour):
+    start, _ = get_operational_window(day, tz=TZ)
+    return int(start.timestamp()) + (hour - 4) * 3600
+
+
+# Midday on 2026-06-30: the 06-30 operational day is open, 06-29 closed.
+NOW = _ts("2026-06-30", 12)
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+        self.fast_executemany = False
+
+    def execute(self, sql, params=()):
+        self.db.statements.append(sql)
+        if "SELECT OperationalDate, DrivesJson" in sql:
+            vin, lo, hi = params
+            self._rows = [(d, p) for (v, d), p in self.db.table.items() if v == vin and lo <= d <= hi]
+        elif "MERGE INTO Rides.TessieDriveDays" in sql:
+            for day, _, payload in self.db.staged:
+                self.db.table[(params[0], day)] = payload
+        elif "DELETE FROM Rides.TessieDriveDays" in sql:
+            for day in params[1:]:
+                self.db.table.pop((params[0], day), None)
+
+    def executemany(self, sql, rows):
+        self.db.staged = list(rows)
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return _Cursor(self.db)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Db:
+    def __init__(self):
+        self.table = {}
+        self.staged = []
+        self.statements = []
+
+    def get_connection(self):
+        return _Conn(self)
+
+
+class _Tessie:
+    TAGGED_DRIVES_LIMIT = 3000
+
+    def __init__(self, drives):
+        self.drives = drives
+        self.calls = []
+        self.fail = False
+
+    def get_tagged_drives(self, vin, from_ts, to_ts, raise_errors=False):
+        self.calls.append((from_ts, to_ts))
+        if self.fail:
+            raise RuntimeError("Tessie 503")
+        return [dict(d) for d in self.drives if from_ts <= d["started_at"] <= to_ts]
+
+
+def _drives():
+    out = []
+    for i in range(1, 31):
+        day = (datetime.date(2026, 6, 1) + datetime.timedelta(days=i - 1)).isoformat()
+        out.append({"id": i, "tag": f"Uber Trip {i}", "started_at": _ts(day, 9)})
+    # Late-night drive at 01:00 on 06-16 belongs to the 06-15 operational day.
+    out.append({"id": 99, "tag": "Private", "started_at": _ts("2026-06-15", 25)})
+    return out
+
+
+def _window():
+    return _ts("2026-06-01", 4), NOW + 3600
+
+
+def test_operational_date_uses_the_4am_boundary():
+    assert operational_date(_ts("2026-06-15", 25), TZ) == datetime.date(2026, 6, 15)
+    assert operational_date(_ts("2026-06-16", 4), TZ) == datetime.date(2026, 6, 16)
+
+
+def test_repeat_query_reads_closed_days_from_cache_and_only_fetches_open_day():
+    db, tessie = _Db(), _Tessie(_drives())
+    cache = TessieDriveCache(db=db)
+    first, prov = cache.get_drives(tessie, "VIN", *_window(), now=NOW)
+    assert len(first) == 31 and prov["live_days"] == 29 and prov["open_days"] == 1
+    assert [d["started_at"] for d in first] == sorted(d["started_at"] for d in first)
+    assert len(tessie.calls) == 1  # one contiguous run of days
+
+    # A fresh process: closed days come from one SQL read, open day is live.
+    tessie.calls.clear()
+    other = TessieDriveCache(db=db)
+    again, prov = other.get_drives(tessie, "VIN", *_window(), now=NOW)
+    assert [d["id"] for d in again] == [d["id"] for d in first]
+    assert prov["sql_days"] == 29 and prov["tessie_calls"] == 1
+    open_from, _ = tessie.calls[0]
+    assert open_from == _ts("2026-06-30", 4)
+    assert sum("SELECT OperationalDate" in s for s in db.statements) == 2
+
+    # Callers may mutate drives without corrupting the cache.
+    again[0]["tag"] = "Jackie"
+    third, prov = other.get_drives(tessie, "VIN", *_window(), now=NOW)
+    # 06-28 and 06-29 are still within the label watcher's reach: SQL only.
+    assert third[0]["tag"] == "Uber Trip 1"
+    assert prov["memory_days"] == 27 and prov["sql_days"] == 2
+
+
+def test_failed_fetch_is_served_empty_and_not_cached():
+    db, tessie = _Db(), _Tessie(_drives())
+    cache = TessieDriveCache(db=db)
+    tessie.fail = True
+    drives, prov = cache.get_drives(tessie, "VIN", *_window(), now=NOW)
+    assert drives == [] and db.table == {}
+
+    tessie.fail = False
+    drives, _ = cache.get_drives(tessie, "VIN", *_window(), now=NOW)
+    assert len(drives) == 31 and len(db.table) == 29
+
+
+def test_invalidated_days_are_refetched():
+    db, tessie = _Db(), _Tessie(_drives())
+    cache = TessieDriveCache(db=db)
+    cache.get_drives(tessie, "VIN", *_window(), now=NOW)
+
+    tessie.drives[14]["tag"] = "Jackie"  # drive 15, operational day 06-15
+    cache.invalidate("VIN", [datetime.date(2026, 6, 15)])
+    tessie.calls.clear()
+    drives, prov = cache.get_drives(tessie, "VIN", *_window(), now=NOW)
+    assert next(d for d in drives if d["id"] == 15)["tag"] == "Jackie"
+    assert prov["live_days"] == 1 and len(tessie.calls) == 2
+    assert json.loads(db.table[("VIN", datetime.date(2026, 6, 15))])[0]["tag"] == "Jackie"
+
+
+def test_invalidation_by_another_instance_reaches_recent_days():
+    db, tessie = _Db(), _Tessie(_drives())
+    reader, watcher = TessieDriveCache(db=db), TessieDriveCache(db=db)
+    reader.get_drives(tessie, "VIN", *_window(), now=NOW)
+    reader.get_drives(tessie, "VIN", *_window(), now=NOW)
+
+    # The label watcher runs on another instance and only clears its own LRU.
+    tessie.drives[28]["tag"] = "Jackie"  # drive 29, operational day 06-29
+    watcher.invalidate("VIN", [datetime.date(2026, 6, 29)])
+    drives, prov = reader.get_drives(tessie, "VIN", *_window(), now=NOW)
+    assert next(d for d in drives if d["id"] == 29)["tag"] == "Jackie"
+    assert prov["live_days"] == 1
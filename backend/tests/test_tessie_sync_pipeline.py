@@ -0,0 +1,102 @@
+"""
+Pipelined TessieSyncService.sync_day: /states telemetry is fetched on a
+bounded pool, archived in one batch, semantic ingestion is queued rather than
+awaited, and the result reports per-stage timings.
+"""
+import os
+import sys
+import threading
+import time
+import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import tessie_sync  # noqa: E402
+from services.datetime_utils import get_timezone  # noqa: E402
+from services.tessie_sync import TessieSyncService  # noqa: E402
+
+
+class _Tessie:
+    def __init__(self, drives):
+        self.drives = drives
+        self.secrets = types.SimpleNamespace(get_secret=lambda name: "VIN")
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_drives(self, vin, from_ts, to_ts):
+        return self.drives
+
+    def get_charges(self, vin, from_ts, to_ts):
+        return []
+
+    def get_drive_telemetry(self, vin, start, end):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(0.05)
+            if start == 1750000300:
+                raise RuntimeError("Tessie 500")
+            return {"timestamps": [start, end], "speeds": [10, 20]}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class _Db:
+    def __init__(self):
+        self.telemetry_batches = []
+
+    def save_trips_bulk(self, trips):
+        return len(trips)
+
+    def upsert_location_intelligence(self, *args):
+        pass
+
+    def save_drive_telemetry_bulk(self, items):
+        self.telemetry_batches.append(items)
+        return len(items)
+
+
+class _Semantic:
+    def __init__(self):
+        self.queued = []
+
+    def ingest_tessie_drives_background(self, drives):
+        self.queued.append(list(drives))
+
+
+def _service(drives):
+    svc = TessieSyncService.__new__(TessieSyncService)
+    svc.tessie = _Tessie(drives)
+    svc.db = _Db()
+    svc.semantic = _Semantic()
+    svc.telemetry = types.SimpleNamespace(analyze_drive=lambda tlm: f"{len(tlm['speeds'])} samples")
+    svc.mdt = get_timezone()
+    return svc
+
+
+def test_sync_day_fetches_concurrently_and_batches_writes(monkeypatch):
+    monkeypatch.setattr(tessie_sync, "TELEMETRY_WORKERS", 3)
+    drives = [{"id": i, "tag": None, "started_at": 1750000000 + i * 100, "ended_at": 1750000050 + i * 100}
+              for i in range(8)]
+    svc = _service(drives)
+    results = svc.sync_day("2025-06-15")
+
+    assert 1 < svc.tessie.peak <= 3
+    assert results["drives_saved"] == 8
+    assert len(svc.db.telemetry_batches) == 1 and results["telemetry_saved"] == 7
+    assert [d for d, _ in svc.db.telemetry_batches[0]] == [f"TESSIE-{i}" for i in range(8) if i != 3]
+    assert results["errors"] == ["Drive 3: Tessie 500"]
+
+    # Every drive is still vectorised; the failed fetch just has no profile.
+    (queued,) = svc.semantic.queued
+    assert results["semantic_queued"] == 8
+    assert [summary for _, summary in queued] == ["2 samples"] * 3 + [""] + ["2 samples"] * 4
+
+    assert {"tessie_list", "save_trips", "telemetry_fetch", "telemetry_save",
+            "semantic_enqueue", "total"} <= set(results["timings_ms"])
@@ -0,0 +1,146 @@
+"""
+In-process Evidence Mode index (services/vector_index.py).
+
+Without numpy, or with VECTOR_LOCAL_INDEX unset, query_evidence_mode keeps the
+SQL path. With it, the index returns the same row shape ranked by cosine
+confidence, applies this process's writes immediately and picks up other
+instances' rows on refresh.
+"""
+import json
+import os
+import sys
+import types
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+from services import vector_index  # noqa: E402
+from services.vector_index import DIM, LocalVectorIndex  # noqa: E402
+from services.vector_store import VectorStore  # noqa: E402
+
+
+def _unit(i):
+    v = [0.0] * DIM
+    v[i] = 1.0
+    return v
+
+
+def _row(i, emb, ts=datetime(2026, 6, 1, 12, 0)):
+    return (f"V-{i}", "Passenger", ts, "vin", "drv", 1.0, "a" * 64,
+            f"artifact://{i}", f"summary {i}", json.dumps(emb))
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.db.statements.append(sql)
+        if "COUNT(*)" in sql:
+            self._rows = [(len(self.db.rows),)]
+        elif "WHERE timestamp_utc >= ?" in sql:
+            self._rows = [r for r in self.db.rows if r[2] >= params[0]]
+        else:
+            self._rows = list(self.db.rows)
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return self._rows
+
+
+class _Conn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return _Cursor(self.db)
+
+
+class _Db:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+        self.sql_queries = []
+
+    @contextmanager
+    def connection(self):
+        yield _Conn(self)
+
+    def execute_query_params(self, sql, params):
+        self.sql_queries.append(sql)
+        return [{"vector_id": "V-SQL"}]
+
+
+def _store(db):
+    vs = VectorStore.__new__(VectorStore)
+    vs.db = db
+    vs.get_embedding = lambda text: _unit(0)
+    return vs
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index(monkeypatch):
+    monkeypatch.setattr(LocalVectorIndex, "_instance", None)
+    monkeypatch.setattr(LocalVectorIndex, "_retry_at", 0.0)
+
+
+def test_disabled_index_falls_back_to_sql(monkeypatch):
+    monkeypatch.setattr(vector_index, "ENABLED", False)
+    db = _Db()
+    assert LocalVectorIndex.get(db) is None
+    assert _store(db).query_evidence_mode("airport run") == [{"vector_id": "V-SQL"}]
+    assert len(db.sql_queries) == 1 and db.statements == []
+
+
+def test_search_ranks_by_cosine_and_applies_threshold(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(vector_index, "ENABLED", True)
+    near = [1.0, 1.0] + [0.0] * (DIM - 2)  # cosine 0.707 to the query
+    db = _Db([_row(1, _unit(1)), _row(2, near), _row(3, [5.0] + [0.0] * (DIM - 1))])
+
+    results = _store(db).query_evidence_mode("airport run", n_results=5, confidence_threshold=0.5)
+    assert db.sql_queries == []
+    assert [r["vector_id"] for r in results] == ["V-3", "V-2"]
+    assert results[0]["search_confidence"] == pytest.approx(1.0)
+    assert results[1]["search_confidence"] == pytest.approx(0.7071, abs=1e-4)
+    assert set(results[0]) == {"vector_id", "source_type", "timestamp_utc", "vehicle_id", "driver_id",
+                               "original_confidence", "raw_text_hash", "source_pointer",
+                               "derivation_reason", "search_confidence"}
+
+
+def test_index_over_the_cap_is_not_built(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(vector_index, "ENABLED", True)
+    monkeypatch.setattr(vector_index, "MAX_VECTORS", 1)
+    db = _Db([_row(1, _unit(1)), _row(2, _unit(2))])
+    assert LocalVectorIndex.get(db) is None
+    _store(db).query_evidence_mode("airport run")
+    assert len(db.sql_queries) == 1
+
+
+def test_local_writes_and_refresh_update_the_index(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(vector_index, "ENABLED", True)
+    db = _Db([_row(1, _unit(1))])
+    index = LocalVectorIndex.get(db)
+    assert len(index) == 1
+
+    # This process re-embeds V-1: visible without a reload.
+    index.upsert(dict(zip(vector_index._COLUMNS, _row(1, None)[:9])), _unit(0))
+    assert [r["vector_id"] for r in index.search(_unit(0), 5, 0.9)] == ["V-1"]
+
+    # Another instance writes V-2; the periodic refresh reads past the watermark.
+    db.rows.append(_row(2, _unit(0), ts=datetime(2026, 6, 2, 9, 0)))
+    monkeypatch.setattr(vector_index, "REFRESH_SEC", 0)
+    LocalVectorIndex.get(db)
+    assert len(index) == 2
+    assert any("WHERE timestamp_utc >= ?" in s for s in db.statements)
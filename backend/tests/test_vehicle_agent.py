@@ -0,0 +1,103 @@
+"""
+VehicleAgent (services/agents/summit_intelligence.py) reads decoded telemetry
+arrays and scores every sample in NumPy. It must return exactly what the old
+per-sample Python loop over JSON lists returned, for blob and legacy rows.
+"""
+import datetime
+import json
+import os
+import random
+import sys
+import types
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# services.database pulls in pyodbc, which needs the native unixODBC driver.
+sys.modules.setdefault("pyodbc", types.ModuleType("pyodbc"))
+
+pytest.importorskip("numpy")
+
+from services.agents.summit_intelligence import VehicleAgent, VehicleModel  # noqa: E402
+from services.telemetry_codec import decode_telemetry, encode_telemetry  # noqa: E402
+
+
+def _reference(payloads, target_dates):
+    """The original per-sample loop over JSON lists."""
+    points = []
+    for payload in payloads:
+        timestamps = payload.get("timestamps", [])
+        battery_levels = payload.get("battery_levels", [])
+        odometers = payload.get("odometers", [])
+        if not timestamps or not battery_levels or not odometers:
+            continue
+        for idx, ts in enumerate(timestamps):
+            try:
+                dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+                mdt_naive = (dt - datetime.timedelta(hours=6)).replace(tzinfo=None)
+                if target_dates and mdt_naive.strftime("%Y-%m-%d") not in target_dates:
+                    continue
+                soc = float(battery_levels[idx] if idx < len(battery_levels) else 0.0)
+                odo = float(odometers[idx] if idx < len(odometers) else 0.0)
+                eff = 250.0
+                speeds = payload.get("speeds", [])
+                pack_current = payload.get("pack_current", [])
+                pack_voltage = payload.get("pack_voltage", [])
+                if idx < len(speeds) and idx < len(pack_current) and idx < len(pack_voltage):
+                    speed = float(speeds[idx] or 0.0)
+                    power_w = abs(float(pack_current[idx] or 0.0)) * float(pack_voltage[idx] or 0.0)
+                    if speed > 2.0:
+                        eff = max(100.0, min(800.0, power_w / speed))
+                points.append(VehicleModel(timestamp=mdt_naive.isoformat() + "-06:00", soc_pct=soc,
+                                           efficiency_wh_per_mi=round(eff, 1), odometer_mi=odo).model_dump())
+            except Exception:
+                continue
+    points.sort(key=lambda x: x["timestamp"])
+    return points[:100]
+
+
+def _drive(start, n, seed):
+    rng = random.Random(seed)
+    return {
+        "timestamps": [start + i * 7 for i in range(n)],
+        "battery_levels": [None if i % 41 == 0 else rng.randint(20, 90) for i in range(n)],
+        "odometers": [round(41000 + i * 0.02, 2) for i in range(n - 5)],  # short channel
+        "speeds": [None if i % 29 == 0 else rng.randint(0, 70) for i in range(n)],
+        "pack_current": [round(rng.uniform(-250, 80), 1) for i in range(n)],
+        "pack_voltage": [round(rng.uniform(340, 400), 1) for i in range(n - 3)],
+    }
+
+
+class _DB:
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.calls = []
+
+    def get_drive_telemetry_payloads(self, dates=None, decoded=False):
+        self.calls.append((dates, decoded))
+        return [{"DriveID": f"TESSIE-{i}", "LastUpdated": None, "Payload": p}
+                for i, p in enumerate(self.payloads)]
+
+
+# 2026-06-01 23:00 MDT and 2026-06-02 05:10 MDT: both drives straddle no
+# boundary, but together they cover two MDT dates.
+DRIVES = [_drive(1780376400, 600, 1), _drive(1780398600, 400, 2),
+          {"timestamps": [1780376400], "battery_levels": [], "odometers": [1.0]}]
+
+
+@pytest.mark.parametrize("kwargs,dates", [
+    ({"date_str": "2026-06-02"}, {"2026-06-02"}),
+    ({"start_date": "2026-06-01", "end_date": "2026-06-02"}, {"2026-06-01", "2026-06-02"}),
+    ({}, set()),
+])
+def test_matches_the_per_sample_loop(kwargs, dates):
+    expected = _reference(DRIVES, dates)
+    assert expected
+
+    blobs = _DB([decode_telemetry(encode_telemetry(p)) for p in DRIVES])
+    assert VehicleAgent(blobs).query(**kwargs) == expected
+    assert blobs.calls[0][1] is True
+
+    legacy = _DB([json.loads(json.dumps(p)) for p in DRIVES])
+    assert VehicleAgent(legacy).query(**kwargs) == expected
@@ -104,6 +104,25 @@ def process_blob_http(req: func.HttpRequest) -> func.HttpResponse:
         
         logging.info(f"Filename Suffix Detected: {suffix}")
 
+        # Idempotency: a blob already turned into a trip is not OCR'd again.
+        # OCR reads the blob by URL, so the filename is the identity we have.
+        from lib.processed_artifacts import ProcessedArtifacts
+        db = DatabaseClient()
+        processed = ProcessedArtifacts(db)
+        seen = processed.find(filename=filename)
+        if seen:
+            logging.info(f"Skipping {filename}: already processed into {seen['ride_id']}")
+            return func.HttpResponse(
+                json.dumps({
+                    "status": "skipped",
+                    "reason": "already_processed",
+                    "ride_id": seen["ride_id"],
+                    "matched_on": seen["matched_on"],
+                }),
+                status_code=200,
+                mimetype="application/json"
+            )
+
         # OCR & Classification
         ocr = OCRClient()
         raw_text = ocr.extract_text(blob_url)
@@ -182,8 +201,8 @@ def process_blob_http(req: func.HttpRequest) -> func.HttpResponse:
                 trip_data['end_location'] = drive.get('ending_address')
 
         # Save to Database
-        db = DatabaseClient()
-        db.save_trip(trip_data)
+        saved_id = db.save_trip(trip_data)
+        processed.record(saved_id, "summit_sync", filename=filename)
 
         # Handle Contextual Data (Weather, etc.)
         if classification == "Environmental_Context":
@@ -4,6 +4,7 @@ import datetime
 import logging
 import pytz
 from . import datetime_utils
+from .graph_token import get_graph_token
 
 class BookingsClient:
     """
@@ -21,17 +22,8 @@ class BookingsClient:
             logging.error("❌ BookingsClient: Missing Microsoft Graph credentials in environment")
 
     def _get_access_token(self):
-        """Get OAuth2 access token for Microsoft Graph"""
-        url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-        data = {
-            "client_id": self.client_id,
-            "scope": "https://graph.microsoft.com/.default",
-            "client_secret": self.client_secret,
-            "grant_type": "client_credentials"
-        }
-        res = requests.post(url, data=data)
-        res.raise_for_status()
-        return res.json().get("access_token")
+        """Get OAuth2 access token for Microsoft Graph (cached per process)"""
+        return get_graph_token(self.tenant_id, self.client_id, self.client_secret)
 
     def get_availability(self, date_str: str):
         """
@@ -215,6 +215,7 @@ class DatabaseClient:
             cursor.execute(query, params)
             conn.commit()
             logging.info(f"Successfully saved trip {trip_id} to database.")
+            return trip_id
         except Exception as e:
             logging.error(f"Error executing SQL for trip {trip_id}: {e}")
             raise
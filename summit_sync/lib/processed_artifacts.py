@@ -0,0 +1,114 @@
+"""
+Lookup and record of screenshots already processed, in Rides.ProcessedArtifacts.
+
+process-blob used to OCR every blob it was handed and save a trip, so a
+re-posted blob paid for OCR again. It now checks the index before OCR and
+records the blob after save_trip.
+
+The table is keyed by content hash, OneDrive item id and filename. This
+processor OCRs by URL and never holds the image bytes, so it passes the
+filename only. `find` and `record` accept a hash for callers that do have
+the bytes.
+
+Mirror of backend/services/processed_artifacts.py (find/record only) —
+summit_sync deploys as its own Function App and cannot import the backend
+package. Backend schema migration 9 owns the table; TABLE_DDL is repeated here
+so a fresh database still works, and runs once per process.
+"""
+import logging
+from typing import Optional
+
+TABLE_DDL = """
+    IF OBJECT_ID('Rides.ProcessedArtifacts', 'U') IS NULL
+    BEGIN
+        CREATE TABLE Rides.ProcessedArtifacts (
+            ArtifactID    BIGINT IDENTITY(1,1) PRIMARY KEY,
+            RideID        NVARCHAR(100) NOT NULL,
+            FileName      NVARCHAR(400) NULL,
+            ContentSha256 CHAR(64)      NULL,
+            ItemID        NVARCHAR(200) NULL,
+            Source        NVARCHAR(40)  NOT NULL,
+            RecordedAt    DATETIME2     NOT NULL DEFAULT SYSUTCDATETIME()
+        );
+        CREATE INDEX IX_ProcessedArtifacts_Sha256 ON Rides.ProcessedArtifacts (ContentSha256);
+        CREATE INDEX IX_ProcessedArtifacts_ItemID ON Rides.ProcessedArtifacts (ItemID);
+        CREATE INDEX IX_ProcessedArtifacts_FileName ON Rides.ProcessedArtifacts (FileName);
+    END
+"""
+
+# One seek per identity; a hash match wins over a filename match.
+_FIND_SQL = """
+    SELECT TOP 1 m.RideID, m.MatchedOn
+    FROM (
+        SELECT RideID, 'sha256' AS MatchedOn, 1 AS Rank FROM Rides.ProcessedArtifacts WHERE ContentSha256 = ?
+        UNION ALL
+        SELECT RideID, 'filename', 2 FROM Rides.ProcessedArtifacts WHERE FileName = ?
+    ) m
+    ORDER BY m.Rank
+"""
+
+_RECORD_SQL = """
+    MERGE INTO Rides.ProcessedArtifacts WITH (HOLDLOCK) AS target
+    USING (SELECT ? AS ContentSha256, ? AS FileName) AS source
+    ON (target.ContentSha256 = source.ContentSha256
+        OR (target.ContentSha256 IS NULL AND target.FileName = source.FileName))
+    WHEN MATCHED THEN
+        UPDATE SET RideID = ?, ContentSha256 = COALESCE(source.ContentSha256, target.ContentSha256),
+                   Source = ?, RecordedAt = SYSUTCDATETIME()
+    WHEN NOT MATCHED THEN
+        INSERT (RideID, FileName, ContentSha256, Source)
+        VALUES (?, source.FileName, source.ContentSha256, ?);
+"""
+
+
+class ProcessedArtifacts:
+    _table_ready = False
+
+    def __init__(self, db):
+        self.db = db
+
+    def _ensure_table(self, cursor):
+        if not ProcessedArtifacts._table_ready:
+            cursor.execute(TABLE_DDL)
+            ProcessedArtifacts._table_ready = True
+
+    def find(self, filename: Optional[str] = None, sha256: Optional[str] = None) -> Optional[dict]:
+        """The trip an artifact was already processed into, or None. Never
+        raises: with the DB unreachable the blob is processed as new."""
+        name = (filename or "")[:400] or None
+        if not (name or sha256):
+            return None
+        conn = self.db.get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute(_FIND_SQL, (sha256, name))
+            row = cursor.fetchone()
+            return {"ride_id": row[0], "matched_on": row[1]} if row else None
+        except Exception as e:
+            logging.warning(f"Processed-artifact lookup failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def record(self, ride_id: str, source: str, filename: Optional[str] = None,
+               sha256: Optional[str] = None) -> None:
+        """Record that this artifact produced `ride_id`. Never raises: a
+        missed record costs one repeat OCR, not the trip."""
+        name = (filename or "")[:400] or None
+        if not ride_id or not (name or sha256):
+            return
+        conn = self.db.get_connection()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute(_RECORD_SQL, (sha256, name, ride_id, source, ride_id, source))
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Processed-artifact record failed for {ride_id}: {e}")
+        finally:
+            conn.close()